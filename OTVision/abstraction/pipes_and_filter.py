@@ -26,3 +26,22 @@ class Filter[IN, OUT](ABC):
         """
 
         raise NotImplementedError
+
+
+class ChainedFilter[IN, INTERMEDIATE, OUT](Filter[IN, OUT]):
+    """Filter that passes elements through two filters one after the other.
+
+    Args:
+        first (Filter[IN, INTERMEDIATE]): the filter to process the input pipe.
+        second (Filter[INTERMEDIATE, OUT]): the filter to process the output of the
+            first filter.
+    """
+
+    def __init__(
+        self, first: Filter[IN, INTERMEDIATE], second: Filter[INTERMEDIATE, OUT]
+    ) -> None:
+        self._first = first
+        self._second = second
+
+    def filter(self, pipe: AsyncIterator[IN]) -> AsyncIterator[OUT]:
+        return self._second.filter(self._first.filter(pipe))
@@ -1,5 +1,6 @@
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
+from enum import StrEnum
 from pathlib import Path
 
 from OTVision.plugin.ffmpeg_video_writer import (
@@ -13,11 +14,13 @@ CALIBRATIONS = "CALIBRATIONS"
 COL_WIDTH = "COLWIDTH"
 CONF = "CONF"
 CONVERT = "CONVERT"
+CHUNK_SIZE = "CHUNK_SIZE"
 DEFAULT_FILETYPE = "DEFAULT_FILETYPE"
 DELETE_INPUT = "DELETE_INPUT"
 ROTATION = "ROTATION"
 DETECT = "DETECT"
 DETECTIONS = "DETECTIONS"
+DIRECT_FORWARD = "DIRECT_FORWARD"
 FILETYPES = "FILETYPES"
 FONT = "FONT"
 FONT_SIZE = "FONTSIZE"
@@ -47,6 +50,7 @@ SIGMA_IOU = "SIGMA_IOU"
 SIGMA_L = "SIGMA_L"
 T_MIN = "T_MIN"
 T_MISS_MAX = "T_MISS_MAX"
+MAX_EMISSION_DELAY_SECONDS = "MAX_EMISSION_DELAY_SECONDS"
 TRACK = "TRACK"
 TRACKS = "TRACKS"
 TRANSFORM = "TRANSFORM"
@@ -68,14 +72,68 @@ WRITE_VIDEO = "WRITE_VIDEO"
 VIDEO_CODEC = "VIDEO_CODEC"
 ENCODING_SPEED = "ENCODING_SPEED"
 CRF = "CRF"
+VIDEO_WRITER = "VIDEO_WRITER"
+RECORDING_SCALE = "RECORDING_SCALE"
+RECORDING_FRAME_STEP = "RECORDING_FRAME_STEP"
 DATETIME_FORMAT = "%Y-%m-%d_%H-%M-%S"
 DEFAULT_EXPECTED_DURATION: timedelta = timedelta(minutes=15)
 """Default length of a video is 15 minutes."""
 STREAM = "STREAM"
+STREAMS = "STREAMS"
 STREAM_SAVE_DIR = "SAVE_DIR"
 STREAM_NAME = "NAME"
 STREAM_SOURCE = "SOURCE"
 FLUSH_BUFFER_SIZE = "FLUSH_BUFFER_SIZE"
+FRAME_DELIVERY_POLICY = "FRAME_DELIVERY_POLICY"
+CAPTURE_BUFFER_SIZE = "CAPTURE_BUFFER_SIZE"
+DEFAULT_CAPTURE_BUFFER_SIZE = 30
+LOAD_SHEDDING = "LOAD_SHEDDING"
+RECORDING_MODE = "RECORDING_MODE"
+FRAME_TIMESTAMPS = "FRAME_TIMESTAMPS"
+EVENT_RECORDING = "EVENT_RECORDING"
+PRE_ROLL_SECONDS = "PRE_ROLL_SECONDS"
+QUIET_PERIOD_SECONDS = "QUIET_PERIOD_SECONDS"
+MAX_VIDEO_SECONDS = "MAX_VIDEO_SECONDS"
+ENABLED = "ENABLED"
+TARGET_UTILIZATION = "TARGET_UTILIZATION"
+MAX_DROP_RATE = "MAX_DROP_RATE"
+MIN_IMG_SIZE = "MIN_IMG_SIZE"
+IMG_SIZE_STEP = "IMG_SIZE_STEP"
+MEASUREMENT_WINDOW = "MEASUREMENT_WINDOW"
+METRICS = "METRICS"
+METRICS_HOST = "HOST"
+METRICS_PORT = "PORT"
+METRICS_TEXTFILE = "TEXTFILE"
+METRICS_INTERVAL_SECONDS = "INTERVAL_SECONDS"
+DEFAULT_METRICS_HOST = "127.0.0.1"
+PUBLISH = "PUBLISH"
+PUBLISH_SOCKET = "SOCKET"
+PUBLISH_BATCH_SIZE = "BATCH_SIZE"
+PUBLISH_MAX_BATCH_DELAY_SECONDS = "MAX_BATCH_DELAY_SECONDS"
+PUBLISH_SUBSCRIBER_QUEUE_SIZE = "SUBSCRIBER_QUEUE_SIZE"
+CHECKPOINT = "CHECKPOINT"
+FORWARD = "FORWARD"
+FORWARD_HOST = "HOST"
+FORWARD_PORT = "PORT"
+FORWARD_BATCH_SIZE = "BATCH_SIZE"
+FORWARD_SPOOL_FILE = "SPOOL_FILE"
+FORWARD_RETRY_SECONDS = "RETRY_SECONDS"
+FORWARD_QUEUE_SIZE = "QUEUE_SIZE"
+FORWARD_SEND_TIMEOUT_SECONDS = "SEND_TIMEOUT_SECONDS"
+INGEST = "INGEST"
+INGEST_HOST = "HOST"
+INGEST_PORT = "PORT"
+INGEST_SAVE_DIR = "SAVE_DIR"
+DEFAULT_INGEST_PORT = 7645
+CHECKPOINT_FILE = "FILE"
+CHECKPOINT_INTERVAL_SECONDS = "INTERVAL_SECONDS"
+LOOP_MONITOR = "LOOP_MONITOR"
+LOOP_MONITOR_INTERVAL_SECONDS = "INTERVAL_SECONDS"
+LOOP_MONITOR_STALL_THRESHOLD_SECONDS = "STALL_THRESHOLD_SECONDS"
+MODEL_CACHE = "MODEL_CACHE"
+MODEL_CACHE_MAX_MODELS = "MAX_MODELS"
+MODEL_CACHE_MAX_MEMORY_MB = "MAX_MEMORY_MB"
+MODEL_CACHE_PIN_DEFAULT = "PIN_DEFAULT"
 
 
 @dataclass(frozen=True)
@@ -223,8 +281,12 @@ class YoloConfig:
         conf (float): Confidence threshold.
         iou (float): Intersection over union threshold.
         img_size (int): Size of the input image.
-        chunk_size (int): Chunk size for processing.
+        chunk_size (int): Chunk size for processing. Number of frames that are
+            detected as one batch when using the direct forward inference.
         normalized (bool): Whether to normalize the bounding boxes.
+        direct_forward (bool): Whether to call the forward method of the model's
+            PyTorch module directly instead of using ultralytics' predict. Only
+            supported for PyTorch weights.
     """
 
     weights: str = _YoloWeights.yolov8s
@@ -234,6 +296,7 @@ class YoloConfig:
     img_size: int = 640
     chunk_size: int = 1
     normalized: bool = False
+    direct_forward: bool = False
 
     def to_dict(self) -> dict:
         return {
@@ -242,10 +305,23 @@ class YoloConfig:
             CONF: self.conf,
             IOU: self.iou,
             IMG_SIZE: self.img_size,
+            CHUNK_SIZE: self.chunk_size,
             NORMALIZED: self.normalized,
+            DIRECT_FORWARD: self.direct_forward,
         }
 
 
+class VideoWriterBackend(StrEnum):
+    """Defines how decoded frames are encoded into videos.
+
+    FFMPEG: frames are piped into an ffmpeg process per video.
+    PYAV: frames are encoded in-process with libav.
+    """
+
+    FFMPEG = "ffmpeg"
+    PYAV = "pyav"
+
+
 @dataclass(frozen=True)
 class DetectConfig:
     """Represents the configuration for the `detect` command.
@@ -262,6 +338,10 @@ class DetectConfig:
             Value `None` marks the start of the video.
         detect_end (int | None): End frame for detection expressed in seconds.
             Value `None` marks the end of the video.
+        recording_scale (float): factor to scale the width and height of written
+            videos by. Detection always uses the frames at full size.
+        recording_frame_step (int): only every n-th frame is written into videos.
+            The videos' frame rate is reduced accordingly.
 
     """
 
@@ -303,6 +383,9 @@ class DetectConfig:
     video_codec: VideoCodec = VideoCodec.H264_SOFTWARE
     encoding_speed: EncodingSpeed = EncodingSpeed.FAST
     crf: ConstantRateFactor = ConstantRateFactor.DEFAULT
+    video_writer: VideoWriterBackend = VideoWriterBackend.FFMPEG
+    recording_scale: float = 1.0
+    recording_frame_step: int = 1
 
     def to_dict(self) -> dict:
         expected_duration = (
@@ -324,6 +407,9 @@ class DetectConfig:
             VIDEO_CODEC: self.video_codec.value,
             ENCODING_SPEED: self.encoding_speed.value,
             CRF: self.crf.name,
+            VIDEO_WRITER: self.video_writer.value,
+            RECORDING_SCALE: self.recording_scale,
+            RECORDING_FRAME_STEP: self.recording_frame_step,
         }
 
 
@@ -371,6 +457,12 @@ class TrackConfig:
     run_chained: bool = True
     iou: _TrackIouConfig = _TrackIouConfig()
     overwrite: bool = True
+    max_emission_delay_seconds: float | None = 60.0
+    """Seconds of a stream an ottrk file waits at most for its unfinished tracks.
+
+    Afterwards, the file is written with the tracks still open. They continue with
+    the same ids in the next file. If None, the file waits until all tracks ended.
+    """
 
     def to_dict(self) -> dict:
         return {
@@ -378,6 +470,7 @@ class TrackConfig:
             RUN_CHAINED: self.run_chained,
             IOU: self.iou.to_dict(),
             OVERWRITE: self.overwrite,
+            MAX_EMISSION_DELAY_SECONDS: self.max_emission_delay_seconds,
         }
 
 
@@ -432,12 +525,149 @@ class _GuiConfig:
         }
 
 
+class FrameDeliveryPolicy(StrEnum):
+    """Defines which captured frames of a stream are delivered to the detection.
+
+    EVERY_FRAME: every frame is delivered. Capturing pauses while the capture buffer
+        is full.
+    LATEST_FRAME: the oldest frames are dropped if the capture buffer is full, i.e.
+        the detection always continues with the newest frames.
+    """
+
+    EVERY_FRAME = "every_frame"
+    LATEST_FRAME = "latest_frame"
+
+
+class RecordingMode(StrEnum):
+    """Defines how videos of a stream are written if `WRITE_VIDEO` is enabled.
+
+    REENCODE: the decoded frames are encoded again with ffmpeg.
+    REMUX: the compressed packets of the stream are written without decoding or
+        encoding them. Video files start at the first key frame after the start of
+        their otdet file.
+    """
+
+    REENCODE = "reencode"
+    REMUX = "remux"
+
+
+class FrameTimestamps(StrEnum):
+    """Defines how the occurrence of the frames of a stream is determined.
+
+    WALL_CLOCK: the time a frame has been read from the stream. Network jitter and
+        decoder buffering carry over into the occurrences.
+    PTS: the presentation timestamp of a frame. The timestamps are anchored to the
+        wall clock once per connection, so that the spacing of the frames matches the
+        spacing at which the camera captured them.
+    """
+
+    WALL_CLOCK = "wall_clock"
+    PTS = "pts"
+
+
+@dataclass(frozen=True)
+class LoadSheddingConfig:
+    """Represents the configuration of load shedding in streaming mode.
+
+    If processing a frame takes longer than the stream's frame interval, frames are
+    dropped first. If dropping the maximum rate of frames does not suffice, the image
+    size of the detection is lowered step by step. Once the load drops, the image size
+    is raised again and fewer frames are dropped.
+
+    Attributes:
+        enabled (bool): whether load shedding is enabled.
+        target_utilization (float): share of the frame interval that processing a
+            frame may take on average.
+        max_drop_rate (float): maximum share of frames to drop.
+        min_img_size (int): lower bound of the image size of the detection.
+        img_size_step (int): step to lower or raise the image size by.
+        measurement_window (int): number of processed frames to average the
+            processing time over before deciding again.
+    """
+
+    enabled: bool = False
+    target_utilization: float = 0.9
+    max_drop_rate: float = 0.5
+    min_img_size: int = 320
+    img_size_step: int = 32
+    measurement_window: int = 25
+
+    def to_dict(self) -> dict:
+        return {
+            ENABLED: self.enabled,
+            TARGET_UTILIZATION: self.target_utilization,
+            MAX_DROP_RATE: self.max_drop_rate,
+            MIN_IMG_SIZE: self.min_img_size,
+            IMG_SIZE_STEP: self.img_size_step,
+            MEASUREMENT_WINDOW: self.measurement_window,
+        }
+
+
+@dataclass(frozen=True)
+class EventRecordingConfig:
+    """Represents the configuration of event-triggered recording in streaming mode.
+
+    Instead of recording the stream continuously, a video is only recorded while
+    objects are detected. The most recent frames are kept in memory, so that each
+    video starts with the frames shortly before the first detection.
+
+    Attributes:
+        enabled (bool): whether videos are only recorded while objects are detected.
+        pre_roll_seconds (float): seconds of frames before the first detection to
+            include in a video. Keep in mind that these frames are held in memory
+            uncompressed.
+        quiet_period_seconds (float): seconds without detections after which a
+            video ends.
+        max_video_seconds (float): maximum duration of a video. Events lasting
+            longer are continued in a new video.
+    """
+
+    enabled: bool = False
+    pre_roll_seconds: float = 2.0
+    quiet_period_seconds: float = 5.0
+    max_video_seconds: float = 300.0
+
+    def to_dict(self) -> dict:
+        return {
+            ENABLED: self.enabled,
+            PRE_ROLL_SECONDS: self.pre_roll_seconds,
+            QUIET_PERIOD_SECONDS: self.quiet_period_seconds,
+            MAX_VIDEO_SECONDS: self.max_video_seconds,
+        }
+
+
 @dataclass(frozen=True)
 class StreamConfig:
+    """Represents the configuration of a stream to detect objects in.
+
+    Attributes:
+        name (str): name of the stream used in output file names.
+        source (str): the RTSP URL of the stream.
+        save_dir (Path): directory to save the outputs to.
+        flush_buffer_size (int): number of frames after which outputs are written.
+        frame_delivery_policy (FrameDeliveryPolicy): which captured frames are
+            delivered if the detection falls behind capturing.
+        capture_buffer_size (int): number of captured frames that are buffered
+            until the detection consumes them.
+        load_shedding (LoadSheddingConfig): how to keep up with the stream if
+            processing is too slow.
+        recording_mode (RecordingMode): how videos of the stream are written.
+        event_recording (EventRecordingConfig): whether to record videos only while
+            objects are detected.
+        frame_timestamps (FrameTimestamps): how the occurrence of frames is
+            determined.
+    """
+
     name: str
     source: str
     save_dir: Path
     flush_buffer_size: int
+    frame_delivery_policy: FrameDeliveryPolicy = FrameDeliveryPolicy.EVERY_FRAME
+    capture_buffer_size: int = DEFAULT_CAPTURE_BUFFER_SIZE
+    load_shedding: LoadSheddingConfig = LoadSheddingConfig()
+    recording_mode: RecordingMode = RecordingMode.REENCODE
+    event_recording: EventRecordingConfig = EventRecordingConfig()
+    frame_timestamps: FrameTimestamps = FrameTimestamps.WALL_CLOCK
 
     def to_dict(self) -> dict:
         return {
@@ -445,6 +675,232 @@ class StreamConfig:
             STREAM_SOURCE: self.source,
             STREAM_SAVE_DIR: str(self.save_dir),
             FLUSH_BUFFER_SIZE: self.flush_buffer_size,
+            FRAME_DELIVERY_POLICY: self.frame_delivery_policy.value,
+            CAPTURE_BUFFER_SIZE: self.capture_buffer_size,
+            LOAD_SHEDDING: self.load_shedding.to_dict(),
+            RECORDING_MODE: self.recording_mode.value,
+            EVENT_RECORDING: self.event_recording.to_dict(),
+            FRAME_TIMESTAMPS: self.frame_timestamps.value,
+        }
+
+
+@dataclass(frozen=True)
+class MetricsConfig:
+    """Represents the configuration of the performance metrics.
+
+    Metrics are exported in the Prometheus text format via HTTP, into a text file or
+    both. If disabled, the instrumented components do not record anything.
+
+    Attributes:
+        enabled (bool): whether metrics are recorded and exported.
+        host (str): interface to serve the metrics on. Defaults to localhost only.
+        port (int | None): port to serve the metrics on via HTTP at `/metrics`. If
+            None, metrics are not served.
+        textfile (Path | None): file to periodically write the metrics to, e.g. for
+            the textfile collector of the Prometheus node exporter. If None, no file
+            is written.
+        interval_seconds (float): seconds between two writes of the text file.
+    """
+
+    enabled: bool = False
+    host: str = DEFAULT_METRICS_HOST
+    port: int | None = None
+    textfile: Path | None = None
+    interval_seconds: float = 15.0
+
+    def to_dict(self) -> dict:
+        return {
+            ENABLED: self.enabled,
+            METRICS_HOST: self.host,
+            METRICS_PORT: self.port,
+            METRICS_TEXTFILE: str(self.textfile) if self.textfile else None,
+            METRICS_INTERVAL_SECONDS: self.interval_seconds,
+        }
+
+
+@dataclass(frozen=True)
+class PublishConfig:
+    """Represents the configuration of publishing tracked frames in streaming mode.
+
+    Each tracked frame is published as a line of JSON to all subscribers connected
+    to a Unix domain socket, as soon as it has been tracked.
+
+    Attributes:
+        enabled (bool): whether tracked frames are published.
+        socket (Path): path of the Unix domain socket subscribers connect to.
+        batch_size (int): maximum number of frames sent together.
+        max_batch_delay_seconds (float): maximum seconds a frame waits for the batch
+            to fill up.
+        subscriber_queue_size (int): maximum number of batches queued for a single
+            subscriber. Further batches are dropped for that subscriber, so that slow
+            subscribers do not hold back the tracking.
+    """
+
+    enabled: bool = False
+    socket: Path = Path("otvision.sock")
+    batch_size: int = 1
+    max_batch_delay_seconds: float = 0.1
+    subscriber_queue_size: int = 100
+
+    def to_dict(self) -> dict:
+        return {
+            ENABLED: self.enabled,
+            PUBLISH_SOCKET: str(self.socket),
+            PUBLISH_BATCH_SIZE: self.batch_size,
+            PUBLISH_MAX_BATCH_DELAY_SECONDS: self.max_batch_delay_seconds,
+            PUBLISH_SUBSCRIBER_QUEUE_SIZE: self.subscriber_queue_size,
+        }
+
+
+@dataclass(frozen=True)
+class CheckpointConfig:
+    """Represents the configuration of tracking checkpoints in streaming mode.
+
+    The state of the tracking of all streams is saved periodically. On startup, tracks
+    of a stream are continued if the stream has been interrupted for at most
+    `T_MISS_MAX` frames. Otherwise, tracking starts anew. Frames not yet flushed to
+    otdet and ottrk files are lost on a restart, at most `FLUSH_BUFFER_SIZE` frames
+    per stream.
+
+    Attributes:
+        enabled (bool): whether checkpoints are saved and restored.
+        file (Path): the checkpoint file.
+        interval_seconds (float): seconds between two checkpoints.
+    """
+
+    enabled: bool = False
+    file: Path = Path("otvision.checkpoint")
+    interval_seconds: float = 1.0
+
+    def to_dict(self) -> dict:
+        return {
+            ENABLED: self.enabled,
+            CHECKPOINT_FILE: str(self.file),
+            CHECKPOINT_INTERVAL_SECONDS: self.interval_seconds,
+        }
+
+
+@dataclass(frozen=True)
+class ForwardConfig:
+    """Represents the configuration of forwarding detections to an ingestion server.
+
+    Edge nodes that can detect, but not track, send the detected frames of their
+    streams to a central ingestion server, which tracks them and writes the ottrk
+    files. While the server is unreachable, messages are spooled to a local file and
+    sent once the connection is back.
+
+    Attributes:
+        enabled (bool): whether detected frames are forwarded instead of tracked.
+        host (str): host of the ingestion server.
+        port (int): port of the ingestion server.
+        batch_size (int): number of detected frames sent together.
+        spool_file (Path): file to keep messages in while the server is unreachable.
+        retry_seconds (float): seconds to wait before connecting again.
+        queue_size (int): maximum number of messages waiting in memory. Further
+            messages are spooled until the queued messages are sent.
+        send_timeout_seconds (float): seconds the server may take to accept a
+            message before the connection is considered broken.
+    """
+
+    enabled: bool = False
+    host: str = "127.0.0.1"
+    port: int = DEFAULT_INGEST_PORT
+    batch_size: int = 20
+    spool_file: Path = Path("otvision_forward.spool")
+    retry_seconds: float = 5.0
+    queue_size: int = 10_000
+    send_timeout_seconds: float = 10.0
+
+    def to_dict(self) -> dict:
+        return {
+            ENABLED: self.enabled,
+            FORWARD_HOST: self.host,
+            FORWARD_PORT: self.port,
+            FORWARD_BATCH_SIZE: self.batch_size,
+            FORWARD_SPOOL_FILE: str(self.spool_file),
+            FORWARD_RETRY_SECONDS: self.retry_seconds,
+            FORWARD_QUEUE_SIZE: self.queue_size,
+            FORWARD_SEND_TIMEOUT_SECONDS: self.send_timeout_seconds,
+        }
+
+
+@dataclass(frozen=True)
+class IngestConfig:
+    """Represents the configuration of the ingestion server.
+
+    Attributes:
+        host (str): interface to accept edge nodes on. Defaults to localhost only.
+        port (int): port to accept edge nodes on.
+        save_dir (Path): directory to save the ottrk files of all streams to.
+    """
+
+    host: str = "127.0.0.1"
+    port: int = DEFAULT_INGEST_PORT
+    save_dir: Path = Path("ingest")
+
+    def to_dict(self) -> dict:
+        return {
+            INGEST_HOST: self.host,
+            INGEST_PORT: self.port,
+            INGEST_SAVE_DIR: str(self.save_dir),
+        }
+
+
+@dataclass(frozen=True)
+class LoopMonitorConfig:
+    """Represents the configuration of the event loop monitor.
+
+    The monitor finds code blocking the event loop. Stalls are logged with the stack
+    of the blocking code and summarized per stage at the end of a run.
+
+    Attributes:
+        enabled (bool): whether the event loop is monitored.
+        interval_seconds (float): seconds between two heartbeats of the monitor.
+        stall_threshold_seconds (float): minimum seconds a heartbeat has to be late
+            to report a stall.
+    """
+
+    enabled: bool = False
+    interval_seconds: float = 0.05
+    stall_threshold_seconds: float = 0.1
+
+    def to_dict(self) -> dict:
+        return {
+            ENABLED: self.enabled,
+            LOOP_MONITOR_INTERVAL_SECONDS: self.interval_seconds,
+            LOOP_MONITOR_STALL_THRESHOLD_SECONDS: self.stall_threshold_seconds,
+        }
+
+
+@dataclass(frozen=True)
+class ModelCacheConfig:
+    """Represents the configuration of the cache keeping detection models loaded.
+
+    If loading a model exceeds a limit, the least recently used models are evicted.
+
+    Attributes:
+        max_models (int | None): maximum number of cached models. `None` if
+            unlimited.
+        max_memory_mb (float | None): maximum estimated memory of the cached models
+            in MiB. `None` if unlimited.
+        pin_default (bool): whether the model configured at startup is never evicted.
+    """
+
+    max_models: int | None = 2
+    max_memory_mb: float | None = None
+    pin_default: bool = False
+
+    @property
+    def max_memory_bytes(self) -> int | None:
+        if self.max_memory_mb is None:
+            return None
+        return int(self.max_memory_mb * 2**20)
+
+    def to_dict(self) -> dict:
+        return {
+            MODEL_CACHE_MAX_MODELS: self.max_models,
+            MODEL_CACHE_MAX_MEMORY_MB: self.max_memory_mb,
+            MODEL_CACHE_PIN_DEFAULT: self.pin_default,
         }
 
 
@@ -468,6 +924,14 @@ class Config:
     transform: _TransformConfig = _TransformConfig()
     gui: _GuiConfig = _GuiConfig()
     stream: StreamConfig | None = None
+    streams: list[StreamConfig] = field(default_factory=list)
+    metrics: MetricsConfig = MetricsConfig()
+    publish: PublishConfig = PublishConfig()
+    checkpoint: CheckpointConfig = CheckpointConfig()
+    forward: ForwardConfig = ForwardConfig()
+    ingest: IngestConfig = IngestConfig()
+    loop_monitor: LoopMonitorConfig = LoopMonitorConfig()
+    model_cache: ModelCacheConfig = ModelCacheConfig()
 
     def to_dict(self) -> dict:
         """Returns the OTVision config as a dict.
@@ -487,7 +951,16 @@ class Config:
             UNDISTORT: self.undistort.to_dict(),
             TRANSFORM: self.transform.to_dict(),
             GUI: self.gui.to_dict(),
+            METRICS: self.metrics.to_dict(),
+            PUBLISH: self.publish.to_dict(),
+            CHECKPOINT: self.checkpoint.to_dict(),
+            FORWARD: self.forward.to_dict(),
+            INGEST: self.ingest.to_dict(),
+            LOOP_MONITOR: self.loop_monitor.to_dict(),
+            MODEL_CACHE: self.model_cache.to_dict(),
         }
         if self.stream is not None:
             data[STREAM] = self.stream.to_dict()
+        if self.streams:
+            data[STREAMS] = [stream.to_dict() for stream in self.streams]
         return data
@@ -2,6 +2,11 @@ from datetime import datetime, timedelta
 from pathlib import Path
 
 from OTVision.application.config import (
+    CAPTURE_BUFFER_SIZE,
+    CHECKPOINT,
+    CHECKPOINT_FILE,
+    CHECKPOINT_INTERVAL_SECONDS,
+    CHUNK_SIZE,
     COL_WIDTH,
     CONF,
     CONVERT,
@@ -12,29 +17,75 @@ from OTVision.application.config import (
     DETECT,
     DETECT_END,
     DETECT_START,
+    DIRECT_FORWARD,
+    ENABLED,
     ENCODING_SPEED,
+    EVENT_RECORDING,
     EXPECTED_DURATION,
     FLUSH_BUFFER_SIZE,
     FONT,
     FONT_SIZE,
+    FORWARD,
+    FORWARD_BATCH_SIZE,
+    FORWARD_HOST,
+    FORWARD_PORT,
+    FORWARD_QUEUE_SIZE,
+    FORWARD_RETRY_SECONDS,
+    FORWARD_SEND_TIMEOUT_SECONDS,
+    FORWARD_SPOOL_FILE,
     FPS_FROM_FILENAME,
+    FRAME_DELIVERY_POLICY,
+    FRAME_TIMESTAMPS,
     FRAME_WIDTH,
     GUI,
     HALF_PRECISION,
     IMG,
     IMG_SIZE,
+    IMG_SIZE_STEP,
+    INGEST,
+    INGEST_HOST,
+    INGEST_PORT,
+    INGEST_SAVE_DIR,
     INPUT_FPS,
     IOU,
+    LOAD_SHEDDING,
     LOCATION_X,
     LOCATION_Y,
     LOG,
     LOG_LEVEL_CONSOLE,
     LOG_LEVEL_FILE,
+    LOOP_MONITOR,
+    LOOP_MONITOR_INTERVAL_SECONDS,
+    LOOP_MONITOR_STALL_THRESHOLD_SECONDS,
+    MAX_DROP_RATE,
+    MAX_EMISSION_DELAY_SECONDS,
+    MAX_VIDEO_SECONDS,
+    MEASUREMENT_WINDOW,
+    METRICS,
+    METRICS_HOST,
+    METRICS_INTERVAL_SECONDS,
+    METRICS_PORT,
+    METRICS_TEXTFILE,
+    MIN_IMG_SIZE,
+    MODEL_CACHE,
+    MODEL_CACHE_MAX_MEMORY_MB,
+    MODEL_CACHE_MAX_MODELS,
+    MODEL_CACHE_PIN_DEFAULT,
     NORMALIZED,
     OUTPUT_FILETYPE,
     OUTPUT_FPS,
     OVERWRITE,
     PATHS,
+    PRE_ROLL_SECONDS,
+    PUBLISH,
+    PUBLISH_BATCH_SIZE,
+    PUBLISH_MAX_BATCH_DELAY_SECONDS,
+    PUBLISH_SOCKET,
+    PUBLISH_SUBSCRIBER_QUEUE_SIZE,
+    QUIET_PERIOD_SECONDS,
+    RECORDING_FRAME_STEP,
+    RECORDING_MODE,
+    RECORDING_SCALE,
     REFPTS,
     ROTATION,
     RUN_CHAINED,
@@ -47,22 +98,38 @@ from OTVision.application.config import (
     STREAM_NAME,
     STREAM_SAVE_DIR,
     STREAM_SOURCE,
+    STREAMS,
     T_MIN,
     T_MISS_MAX,
+    TARGET_UTILIZATION,
     TRACK,
     TRANSFORM,
     UNDISTORT,
     VID,
     VIDEO_CODEC,
+    VIDEO_WRITER,
     WEIGHTS,
     WINDOW,
     WRITE_VIDEO,
     YOLO,
+    CheckpointConfig,
     Config,
     ConvertConfig,
     DetectConfig,
+    EventRecordingConfig,
+    ForwardConfig,
+    FrameDeliveryPolicy,
+    FrameTimestamps,
+    IngestConfig,
+    LoadSheddingConfig,
+    LoopMonitorConfig,
+    MetricsConfig,
+    ModelCacheConfig,
+    PublishConfig,
+    RecordingMode,
     StreamConfig,
     TrackConfig,
+    VideoWriterBackend,
     YoloConfig,
     _DefaultFiletype,
     _GuiConfig,
@@ -106,6 +173,14 @@ class ConfigParser:
         transform_dict = d.get(TRANSFORM)
         gui_dict = d.get(GUI)
         stream_config_dict = d.get(STREAM)
+        stream_config_dicts = d.get(STREAMS, [])
+        metrics_dict = d.get(METRICS)
+        publish_dict = d.get(PUBLISH)
+        checkpoint_dict = d.get(CHECKPOINT)
+        forward_dict = d.get(FORWARD)
+        ingest_dict = d.get(INGEST)
+        loop_monitor_dict = d.get(LOOP_MONITOR)
+        model_cache_dict = d.get(MODEL_CACHE)
 
         log_config = self.parse_log_config(log_dict) if log_dict else Config.log
         default_filetype = (
@@ -136,6 +211,36 @@ class ConfigParser:
         stream_config = None
         if stream_config_dict is not None:
             stream_config = self.parse_stream_config(stream_config_dict)
+        stream_configs = [
+            self.parse_stream_config(stream_dict) for stream_dict in stream_config_dicts
+        ]
+        metrics_config = (
+            self.parse_metrics_config(metrics_dict) if metrics_dict else Config.metrics
+        )
+        publish_config = (
+            self.parse_publish_config(publish_dict) if publish_dict else Config.publish
+        )
+        checkpoint_config = (
+            self.parse_checkpoint_config(checkpoint_dict)
+            if checkpoint_dict
+            else Config.checkpoint
+        )
+        forward_config = (
+            self.parse_forward_config(forward_dict) if forward_dict else Config.forward
+        )
+        ingest_config = (
+            self.parse_ingest_config(ingest_dict) if ingest_dict else Config.ingest
+        )
+        loop_monitor_config = (
+            self.parse_loop_monitor_config(loop_monitor_dict)
+            if loop_monitor_dict
+            else Config.loop_monitor
+        )
+        model_cache_config = (
+            self.parse_model_cache_config(model_cache_dict)
+            if model_cache_dict
+            else Config.model_cache
+        )
 
         return Config(
             log=log_config,
@@ -148,6 +253,14 @@ class ConfigParser:
             transform=transform_config,
             gui=gui_config,
             stream=stream_config,
+            streams=stream_configs,
+            metrics=metrics_config,
+            publish=publish_config,
+            checkpoint=checkpoint_config,
+            forward=forward_config,
+            ingest=ingest_config,
+            loop_monitor=loop_monitor_config,
+            model_cache=model_cache_config,
         )
 
     def parse_log_config(self, data: dict) -> _LogConfig:
@@ -225,6 +338,15 @@ class ConfigParser:
             video_codec=video_codec,
             encoding_speed=encoding_speed,
             crf=crf,
+            video_writer=VideoWriterBackend(
+                data.get(VIDEO_WRITER, DetectConfig.video_writer)
+            ),
+            recording_scale=float(
+                data.get(RECORDING_SCALE, DetectConfig.recording_scale)
+            ),
+            recording_frame_step=int(
+                data.get(RECORDING_FRAME_STEP, DetectConfig.recording_frame_step)
+            ),
         )
 
     def parse_yolo_config(self, data: dict) -> YoloConfig:
@@ -233,7 +355,9 @@ class ConfigParser:
             conf=data.get(CONF, YoloConfig.conf),
             iou=data.get(IOU, YoloConfig.iou),
             img_size=data.get(IMG_SIZE, YoloConfig.img_size),
+            chunk_size=data.get(CHUNK_SIZE, YoloConfig.chunk_size),
             normalized=data.get(NORMALIZED, YoloConfig.normalized),
+            direct_forward=data.get(DIRECT_FORWARD, YoloConfig.direct_forward),
         )
 
     @staticmethod
@@ -250,12 +374,20 @@ class ConfigParser:
             else TrackConfig.iou
         )
         sources = self.parse_sources(data.get(PATHS, []))
+        max_emission_delay_seconds = data.get(
+            MAX_EMISSION_DELAY_SECONDS, TrackConfig.max_emission_delay_seconds
+        )
 
         return TrackConfig(
             sources,
             data.get(RUN_CHAINED, TrackConfig.run_chained),
             iou_config,
             data.get(OVERWRITE, TrackConfig.overwrite),
+            (
+                float(max_emission_delay_seconds)
+                if max_emission_delay_seconds is not None
+                else None
+            ),
         )
 
     def parse_track_iou_config(self, data: dict) -> _TrackIouConfig:
@@ -307,15 +439,176 @@ class ConfigParser:
         source = data[STREAM_SOURCE]
         save_dir = Path(data[STREAM_SAVE_DIR])
         flush_buffer_size = int(data[FLUSH_BUFFER_SIZE])
+        frame_delivery_policy = FrameDeliveryPolicy(
+            data.get(FRAME_DELIVERY_POLICY, StreamConfig.frame_delivery_policy)
+        )
+        capture_buffer_size = int(
+            data.get(CAPTURE_BUFFER_SIZE, StreamConfig.capture_buffer_size)
+        )
+        load_shedding_dict = data.get(LOAD_SHEDDING)
+        load_shedding = (
+            self.parse_load_shedding_config(load_shedding_dict)
+            if load_shedding_dict
+            else StreamConfig.load_shedding
+        )
+        recording_mode = RecordingMode(
+            data.get(RECORDING_MODE, StreamConfig.recording_mode)
+        )
+        event_recording_dict = data.get(EVENT_RECORDING)
+        event_recording = (
+            self.parse_event_recording_config(event_recording_dict)
+            if event_recording_dict
+            else StreamConfig.event_recording
+        )
+        frame_timestamps = FrameTimestamps(
+            data.get(FRAME_TIMESTAMPS, StreamConfig.frame_timestamps)
+        )
         return StreamConfig(
             name=name,
             source=source,
             save_dir=save_dir,
             flush_buffer_size=flush_buffer_size,
+            frame_delivery_policy=frame_delivery_policy,
+            capture_buffer_size=capture_buffer_size,
+            load_shedding=load_shedding,
+            recording_mode=recording_mode,
+            event_recording=event_recording,
+            frame_timestamps=frame_timestamps,
+        )
+
+    def parse_event_recording_config(self, data: dict) -> EventRecordingConfig:
+        return EventRecordingConfig(
+            enabled=bool(data.get(ENABLED, EventRecordingConfig.enabled)),
+            pre_roll_seconds=float(
+                data.get(PRE_ROLL_SECONDS, EventRecordingConfig.pre_roll_seconds)
+            ),
+            quiet_period_seconds=float(
+                data.get(
+                    QUIET_PERIOD_SECONDS, EventRecordingConfig.quiet_period_seconds
+                )
+            ),
+            max_video_seconds=float(
+                data.get(MAX_VIDEO_SECONDS, EventRecordingConfig.max_video_seconds)
+            ),
+        )
+
+    def parse_load_shedding_config(self, data: dict) -> LoadSheddingConfig:
+        return LoadSheddingConfig(
+            enabled=bool(data.get(ENABLED, LoadSheddingConfig.enabled)),
+            target_utilization=float(
+                data.get(TARGET_UTILIZATION, LoadSheddingConfig.target_utilization)
+            ),
+            max_drop_rate=float(
+                data.get(MAX_DROP_RATE, LoadSheddingConfig.max_drop_rate)
+            ),
+            min_img_size=int(data.get(MIN_IMG_SIZE, LoadSheddingConfig.min_img_size)),
+            img_size_step=int(
+                data.get(IMG_SIZE_STEP, LoadSheddingConfig.img_size_step)
+            ),
+            measurement_window=int(
+                data.get(MEASUREMENT_WINDOW, LoadSheddingConfig.measurement_window)
+            ),
+        )
+
+    def parse_metrics_config(self, data: dict) -> MetricsConfig:
+        port = data.get(METRICS_PORT, MetricsConfig.port)
+        textfile = data.get(METRICS_TEXTFILE, MetricsConfig.textfile)
+        return MetricsConfig(
+            enabled=bool(data.get(ENABLED, MetricsConfig.enabled)),
+            host=data.get(METRICS_HOST, MetricsConfig.host),
+            port=int(port) if port is not None else None,
+            textfile=Path(textfile) if textfile is not None else None,
+            interval_seconds=float(
+                data.get(METRICS_INTERVAL_SECONDS, MetricsConfig.interval_seconds)
+            ),
+        )
+
+    def parse_publish_config(self, data: dict) -> PublishConfig:
+        return PublishConfig(
+            enabled=bool(data.get(ENABLED, PublishConfig.enabled)),
+            socket=Path(data.get(PUBLISH_SOCKET, PublishConfig.socket)),
+            batch_size=int(data.get(PUBLISH_BATCH_SIZE, PublishConfig.batch_size)),
+            max_batch_delay_seconds=float(
+                data.get(
+                    PUBLISH_MAX_BATCH_DELAY_SECONDS,
+                    PublishConfig.max_batch_delay_seconds,
+                )
+            ),
+            subscriber_queue_size=int(
+                data.get(
+                    PUBLISH_SUBSCRIBER_QUEUE_SIZE, PublishConfig.subscriber_queue_size
+                )
+            ),
+        )
+
+    def parse_checkpoint_config(self, data: dict) -> CheckpointConfig:
+        return CheckpointConfig(
+            enabled=bool(data.get(ENABLED, CheckpointConfig.enabled)),
+            file=Path(data.get(CHECKPOINT_FILE, CheckpointConfig.file)),
+            interval_seconds=float(
+                data.get(CHECKPOINT_INTERVAL_SECONDS, CheckpointConfig.interval_seconds)
+            ),
+        )
+
+    def parse_forward_config(self, data: dict) -> ForwardConfig:
+        return ForwardConfig(
+            enabled=bool(data.get(ENABLED, ForwardConfig.enabled)),
+            host=str(data.get(FORWARD_HOST, ForwardConfig.host)),
+            port=int(data.get(FORWARD_PORT, ForwardConfig.port)),
+            batch_size=int(data.get(FORWARD_BATCH_SIZE, ForwardConfig.batch_size)),
+            spool_file=Path(data.get(FORWARD_SPOOL_FILE, ForwardConfig.spool_file)),
+            retry_seconds=float(
+                data.get(FORWARD_RETRY_SECONDS, ForwardConfig.retry_seconds)
+            ),
+            queue_size=int(data.get(FORWARD_QUEUE_SIZE, ForwardConfig.queue_size)),
+            send_timeout_seconds=float(
+                data.get(
+                    FORWARD_SEND_TIMEOUT_SECONDS, ForwardConfig.send_timeout_seconds
+                )
+            ),
+        )
+
+    def parse_ingest_config(self, data: dict) -> IngestConfig:
+        return IngestConfig(
+            host=str(data.get(INGEST_HOST, IngestConfig.host)),
+            port=int(data.get(INGEST_PORT, IngestConfig.port)),
+            save_dir=Path(data.get(INGEST_SAVE_DIR, IngestConfig.save_dir)),
+        )
+
+    def parse_loop_monitor_config(self, data: dict) -> LoopMonitorConfig:
+        return LoopMonitorConfig(
+            enabled=bool(data.get(ENABLED, LoopMonitorConfig.enabled)),
+            interval_seconds=float(
+                data.get(
+                    LOOP_MONITOR_INTERVAL_SECONDS, LoopMonitorConfig.interval_seconds
+                )
+            ),
+            stall_threshold_seconds=float(
+                data.get(
+                    LOOP_MONITOR_STALL_THRESHOLD_SECONDS,
+                    LoopMonitorConfig.stall_threshold_seconds,
+                )
+            ),
+        )
+
+    def parse_model_cache_config(self, data: dict) -> ModelCacheConfig:
+        max_models = data.get(MODEL_CACHE_MAX_MODELS, ModelCacheConfig.max_models)
+        max_memory_mb = data.get(
+            MODEL_CACHE_MAX_MEMORY_MB, ModelCacheConfig.max_memory_mb
+        )
+        return ModelCacheConfig(
+            max_models=int(max_models) if max_models is not None else None,
+            max_memory_mb=float(max_memory_mb) if max_memory_mb is not None else None,
+            pin_default=bool(
+                data.get(MODEL_CACHE_PIN_DEFAULT, ModelCacheConfig.pin_default)
+            ),
         )
 
     def validate_config(self, config: Config) -> None:
         self.validate_flush_buffer_support_track_lifecycle(config)
+        self.validate_streams_are_unique(config)
+        self.validate_streams_without_load_shedding(config)
+        self.validate_recording_profile(config)
 
     def validate_flush_buffer_support_track_lifecycle(self, config: Config) -> None:
         """Validate that the flush buffer size supports complete track lifecycle.
@@ -329,29 +622,100 @@ class ConfigParser:
             config (Config): The configuration to validate
 
         Raises:
-            InvalidOtvisionConfigError: If the flush buffer size is not greater
-                than both t_min and t_miss_max values
+            InvalidOtvisionConfigError: If the flush buffer size of any stream is not
+                greater than both t_min and t_miss_max values
 
         Note:
-            This validation only applies when stream configuration is present.
+            This validation only applies when stream configurations are present.
             The constraint ensures that:
             - Tracks have enough frames to reach minimum track length (t_min)
             - Tracks can handle maximum missing frames (t_miss_max) before completion
         """
+        stream_configs = list(config.streams)
+        if config.stream is not None:
+            stream_configs.append(config.stream)
 
-        if config.stream is None:
-            return
+        for stream_config in stream_configs:
+            self._validate_flush_buffer_size(
+                stream_config.flush_buffer_size, config.track
+            )
+
+    def validate_streams_are_unique(self, config: Config) -> None:
+        """Validate that the streams of a multi stream config can be told apart.
+
+        Output files are named after the stream name and detected frames are
+        assigned to their stream by the stream source. Thus, both must be unique.
+
+        Args:
+            config (Config): The configuration to validate
+
+        Raises:
+            InvalidOtvisionConfigError: If two streams share the same name or source.
+        """
+        names = [stream.name for stream in config.streams]
+        sources = [stream.source for stream in config.streams]
+        if len(set(names)) != len(names):
+            raise InvalidOtvisionConfigError(f"Stream names must be unique: {names}")
+        if len(set(sources)) != len(sources):
+            raise InvalidOtvisionConfigError(
+                f"Stream sources must be unique: {sources}"
+            )
 
-        flush_buffer_size = config.stream.flush_buffer_size
+    def validate_streams_without_load_shedding(self, config: Config) -> None:
+        """Validate that load shedding is only enabled for a single stream.
+
+        Load shedding is not supported when detecting multiple streams. Enabling it
+        for one of them would otherwise be silently ignored.
+
+        Args:
+            config (Config): The configuration to validate
+
+        Raises:
+            InvalidOtvisionConfigError: If load shedding is enabled for any stream of
+                a multi stream config.
+        """
+        names = [
+            stream.name for stream in config.streams if stream.load_shedding.enabled
+        ]
+        if names:
+            raise InvalidOtvisionConfigError(
+                "Load shedding is not supported for multiple streams, but is enabled "
+                f"for {names}. Disable it or detect the streams one by one."
+            )
+
+    def validate_recording_profile(self, config: Config) -> None:
+        """Validate that written videos have a size and a frame rate.
+
+        Args:
+            config (Config): The configuration to validate
+
+        Raises:
+            InvalidOtvisionConfigError: If the recording scale is not positive or the
+                recording frame step is less than 1.
+        """
+        if config.detect.recording_scale <= 0:
+            raise InvalidOtvisionConfigError(
+                "Recording scale must be positive, "
+                f"but is {config.detect.recording_scale}"
+            )
+        if config.detect.recording_frame_step < 1:
+            raise InvalidOtvisionConfigError(
+                "Recording frame step must be at least 1, "
+                f"but is {config.detect.recording_frame_step}"
+            )
+
+    def _validate_flush_buffer_size(
+        self, flush_buffer_size: int, track_config: TrackConfig
+    ) -> None:
         if (
-            config.track.t_min < flush_buffer_size
-            and config.track.t_miss_max < flush_buffer_size
+            track_config.t_min < flush_buffer_size
+            and track_config.t_miss_max < flush_buffer_size
         ):
             return
 
         raise InvalidOtvisionConfigError(
             f"The flush buffer size ({flush_buffer_size}) must be greater than the "
-            f"t_min ({config.track.t_min}) and t_miss_max "
-            f"({config.track.t_miss_max}) values to allow tracks to complete "
+            f"t_min ({track_config.t_min}) and t_miss_max "
+            f"({track_config.t_miss_max}) values to allow tracks to complete "
             "before flushing."
         )
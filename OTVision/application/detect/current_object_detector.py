@@ -1,27 +1,97 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from typing import AsyncIterator
 
+from OTVision.abstraction.observer import AsyncObservable, AsyncSubject
 from OTVision.abstraction.pipes_and_filter import Filter
+from OTVision.application.config import DetectConfig
+from OTVision.application.event.new_otvision_config import NewOtvisionConfigEvent
 from OTVision.application.get_current_config import GetCurrentConfig
+from OTVision.application.metrics import DISABLED_METRICS, MetricsRegistry
 from OTVision.domain.frame import DetectedFrame, Frame
-from OTVision.domain.object_detection import ObjectDetector, ObjectDetectorFactory
+from OTVision.domain.object_detection import (
+    ObjectDetector,
+    ObjectDetectorFactory,
+    ObjectDetectorMetadata,
+)
+from OTVision.helpers.log import LOGGER_NAME
 
+log = logging.getLogger(LOGGER_NAME)
 
-class CurrentObjectDetector(Filter[Frame, DetectedFrame]):
+
+@dataclass(frozen=True)
+class LoadedModelMetadata(ObjectDetectorMetadata):
+    """Metadata of a model as it has been loaded.
+
+    Unlike the metadata of the object detector itself, it does not follow later
+    changes of the current config.
+    """
+
+    loaded_config: DetectConfig
+    loaded_classifications: dict[int, str]
+
+    @property
+    def config(self) -> DetectConfig:
+        return self.loaded_config
+
+    @property
+    def classifications(self) -> dict[int, str]:
+        return self.loaded_classifications
+
+
+@dataclass(frozen=True)
+class _ActiveModel:
+    detector: ObjectDetector
+    metadata: ObjectDetectorMetadata
+
+
+class CurrentObjectDetector(
+    Filter[Frame, DetectedFrame], AsyncObservable[NewOtvisionConfigEvent]
+):
     """Use case to retrieve the currently used object detector.
 
     Filter implementation for detecting objects in frames using current
     configuration.
 
+    If the weights of the current config change while detecting, the new model is
+    loaded and preloaded on a background thread while the previous model keeps
+    detecting. Once loaded, the models are swapped between two frames. Before the
+    swap, observers are notified with a `NewOtvisionConfigEvent` to start a new
+    segment, so that each otdet file names the model that detected its frames.
+
     Args:
         get_current_config (GetCurrentConfig): Provider of current configuration.
         factory (ObjectDetectorFactory): Factory for creating object detector instances.
+        subject (AsyncSubject[NewOtvisionConfigEvent] | None): notifies observers
+            before a model is swapped in.
+        metrics (MetricsRegistry): registry to record model swaps in.
     """
 
     def __init__(
-        self, get_current_config: GetCurrentConfig, factory: ObjectDetectorFactory
+        self,
+        get_current_config: GetCurrentConfig,
+        factory: ObjectDetectorFactory,
+        subject: AsyncSubject[NewOtvisionConfigEvent] | None = None,
+        metrics: MetricsRegistry = DISABLED_METRICS,
     ) -> None:
+        AsyncObservable.__init__(
+            self, subject or AsyncSubject[NewOtvisionConfigEvent]()
+        )
         self._get_current_config = get_current_config
         self._factory = factory
+        self._loader = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="otvision-model-loader"
+        )
+        self._active: _ActiveModel | None = None
+        self._loading: asyncio.Future[ObjectDetector] | None = None
+        self._loading_config: DetectConfig | None = None
+        self._failed_weights: str | None = None
+        self._metadata_by_output: dict[str, ObjectDetectorMetadata] = {}
+        self._swaps_metric = metrics.counter(
+            "otvision_model_swaps_total", "Object detection models swapped in."
+        )
 
     def get(self) -> ObjectDetector:
         """Retrieve the currently used object detector.
@@ -30,9 +100,109 @@ class CurrentObjectDetector(Filter[Frame, DetectedFrame]):
             ObjectDetector: The object detector.
 
         """
-        detect_config = self._get_current_config.get().detect
-        return self._factory.create(detect_config)
+        return self._get_active().detector
+
+    def pop_metadata(self, output: str) -> ObjectDetectorMetadata:
+        """Retrieve the metadata of the model that detected the frames of an output.
+
+        Args:
+            output (str): the output the frames belong to.
+
+        Returns:
+            ObjectDetectorMetadata: the metadata of the model that detected the first
+                frame of the output. Metadata of the current model, if no frame of the
+                output has been detected.
+        """
+        if metadata := self._metadata_by_output.pop(output, None):
+            return metadata
+        return self._get_active().metadata
 
     async def filter(self, pipe: AsyncIterator[Frame]) -> AsyncIterator[DetectedFrame]:
-        async for detected_frame in self.get().detect(pipe):
-            yield detected_frame
+        frames = aiter(pipe)
+        exhausted = False
+
+        async def frames_until_swap() -> AsyncIterator[Frame]:
+            nonlocal exhausted
+            while not self._new_model_ready():
+                try:
+                    frame = await anext(frames)
+                except StopAsyncIteration:
+                    exhausted = True
+                    return
+                yield frame
+
+        while not exhausted:
+            active = self._get_active()
+            async for detected_frame in active.detector.detect(frames_until_swap()):
+                self._metadata_by_output.setdefault(
+                    detected_frame.output, active.metadata
+                )
+                yield detected_frame
+            if not exhausted:
+                await self._swap()
+
+    def _get_active(self) -> _ActiveModel:
+        if self._active is None:
+            detect_config = self._get_current_config.get().detect
+            self._activate(self._factory.create(detect_config), detect_config)
+        assert self._active is not None
+        return self._active
+
+    def _activate(self, detector: ObjectDetector, detect_config: DetectConfig) -> None:
+        self._active = _ActiveModel(
+            detector=detector,
+            metadata=LoadedModelMetadata(
+                loaded_config=detect_config,
+                loaded_classifications=detector.classifications,
+            ),
+        )
+
+    def _new_model_ready(self) -> bool:
+        """Start loading the model of the current config, if it is not active yet.
+
+        Returns:
+            bool: whether a new model has finished loading and can be swapped in.
+        """
+        if self._active is None:
+            return False
+        detect_config = self._get_current_config.get().detect
+        weights = detect_config.weights
+        if weights == self._active.metadata.config.weights:
+            # The config has been reverted while loading another model.
+            self._loading, self._loading_config = None, None
+        elif weights != self._failed_weights and (
+            self._loading_config is None or weights != self._loading_config.weights
+        ):
+            log.info(f"Loading model {weights} in the background")
+            self._loading_config = detect_config
+            self._loading = asyncio.get_running_loop().run_in_executor(
+                self._loader, self._load, detect_config
+            )
+        return self._loading is not None and self._loading.done()
+
+    def _load(self, detect_config: DetectConfig) -> ObjectDetector:
+        detector = self._factory.create(detect_config)
+        detector.preload()
+        return detector
+
+    async def _swap(self) -> None:
+        loading, detect_config = self._loading, self._loading_config
+        self._loading, self._loading_config = None, None
+        if loading is None or detect_config is None:
+            return
+        try:
+            detector = loading.result()
+        except Exception as cause:
+            log.exception(
+                f"Could not load model {detect_config.weights}. "
+                "Keep detecting with the previous model.",
+                exc_info=cause,
+            )
+            self._failed_weights = detect_config.weights
+            return
+        await self._subject.notify(NewOtvisionConfigEvent())
+        await self._subject.wait_for_all_observers()
+        self._activate(detector, detect_config)
+        self._failed_weights = None
+        self._swaps_metric.inc()
+        log.info(f"Swapped in model {detect_config.weights}")
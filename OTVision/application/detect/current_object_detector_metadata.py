@@ -25,3 +25,15 @@ class CurrentObjectDetectorMetadata:
         """
 
         return self.current_object_detector.get()
+
+    def pop(self, output: str) -> ObjectDetectorMetadata:
+        """Retrieve metadata about the object detector that detected an output.
+
+        Args:
+            output (str): the output the detected frames belong to.
+
+        Returns:
+            ObjectDetectorMetadata: Metadata information about the object detector
+                that detected the frames of the output.
+        """
+        return self.current_object_detector.pop_metadata(output)
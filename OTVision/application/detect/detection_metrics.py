@@ -0,0 +1,18 @@
+from OTVision.application.metrics import MetricsRegistry
+
+
+class DetectionMetrics:
+    """Metrics recorded by the object detectors.
+
+    Args:
+        metrics (MetricsRegistry): the registry to record the metrics in.
+    """
+
+    def __init__(self, metrics: MetricsRegistry) -> None:
+        self.inference_duration = metrics.histogram(
+            "otvision_inference_duration_seconds",
+            "Seconds of a single inference of the model on one frame or a batch.",
+        )
+        self.detected_frames = metrics.counter(
+            "otvision_detected_frames_total", "Frames passed through the detection."
+        )
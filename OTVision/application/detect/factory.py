@@ -1,25 +1,146 @@
+import logging
+from collections import OrderedDict
+from threading import Lock
+from time import perf_counter
+from typing import Callable
+
 from OTVision.application.config import DetectConfig
+from OTVision.application.metrics import DISABLED_METRICS, MetricsRegistry
 from OTVision.domain.object_detection import ObjectDetector, ObjectDetectorFactory
+from OTVision.helpers.log import LOGGER_NAME
+
+log = logging.getLogger(LOGGER_NAME)
+
+Clock = Callable[[], float]
 
 
 class ObjectDetectorCachedFactory(ObjectDetectorFactory):
+    """Creates object detectors and keeps the recently used ones loaded.
 
-    def __init__(self, other: ObjectDetectorFactory) -> None:
+    Detectors are cached by their weights. Once a newly created detector exceeds
+    `max_models` or the estimated memory of all cached detectors exceeds
+    `max_memory_bytes`, the least recently used detectors are evicted. The memory of
+    an evicted detector is released as soon as it is no longer in use. The detector
+    of `pinned_weights` and the newly created detector are never evicted.
+
+    Args:
+        other (ObjectDetectorFactory): creates the detectors that are not cached.
+        max_models (int | None): maximum number of cached detectors. `None` if
+            unlimited.
+        max_memory_bytes (int | None): maximum estimated memory of the cached
+            detectors. `None` if unlimited.
+        pinned_weights (str | None): weights of the detector to never evict.
+        metrics (MetricsRegistry): registry to record cache statistics in.
+        clock (Clock): provides the current time in seconds.
+    """
+
+    def __init__(
+        self,
+        other: ObjectDetectorFactory,
+        max_models: int | None = None,
+        max_memory_bytes: int | None = None,
+        pinned_weights: str | None = None,
+        metrics: MetricsRegistry = DISABLED_METRICS,
+        clock: Clock = perf_counter,
+    ) -> None:
         self._other = other
-        self.__cache: dict[str, ObjectDetector] = {}
+        self._max_models = max_models
+        self._max_memory_bytes = max_memory_bytes
+        self._pinned_weights = pinned_weights
+        self._clock = clock
+        self._lock = Lock()
+        self.__cache: OrderedDict[str, ObjectDetector] = OrderedDict()
+        self.__memory_bytes: dict[str, int] = {}
+        self._hits_metric = metrics.counter(
+            "otvision_model_cache_hits_total", "Detectors taken from the cache."
+        )
+        self._misses_metric = metrics.counter(
+            "otvision_model_cache_misses_total", "Detectors loaded into the cache."
+        )
+        self._evictions_metric = metrics.counter(
+            "otvision_model_cache_evictions_total", "Detectors evicted from the cache."
+        )
+        self._load_duration_metric = metrics.histogram(
+            "otvision_model_load_duration_seconds", "Seconds to load a detector."
+        )
+        self._models_metric = metrics.gauge(
+            "otvision_model_cache_models", "Detectors in the cache."
+        )
+        self._memory_metric = metrics.gauge(
+            "otvision_model_cache_memory_bytes",
+            "Estimated memory of the detectors in the cache.",
+        )
 
     def create(self, config: DetectConfig) -> ObjectDetector:
-        if cached_model := self.__cache.get(config.yolo_config.weights):
-            return cached_model
-        model = self._other.create(config)
-        self.__add_to_cache(model)
+        weights = config.yolo_config.weights
+        with self._lock:
+            if (cached_model := self.__cache.get(weights)) is not None:
+                self.__cache.move_to_end(weights)
+                self._hits_metric.inc()
+                return cached_model
+            # Loading holds the lock, so that a model is never loaded twice at once.
+            self._misses_metric.inc()
+            start = self._clock()
+            model = self._other.create(config)
+            self._load_duration_metric.observe(self._clock() - start)
+            self.__add_to_cache(weights, model)
+            evicted = self.__evict_least_recently_used()
+        if evicted:
+            self._other.release_unused_memory()
         return model
 
-    def __add_to_cache(self, model: ObjectDetector) -> None:
-        weights = model.config.yolo_config.weights
-        if not self.__cache.get(weights):
-            self.__cache[weights] = model
+    def release_unused_memory(self) -> None:
+        self._other.release_unused_memory()
+
+    def __add_to_cache(self, weights: str, model: ObjectDetector) -> None:
+        self.__cache[weights] = model
+        self.__memory_bytes[weights] = model.memory_bytes
+        self.__update_metrics()
+
+    def __evict_least_recently_used(self) -> bool:
+        """Evict detectors until the cache is within its limits.
+
+        Returns:
+            bool: whether any detector has been evicted.
+        """
+        evicted = False
+        while self.__exceeds_limits():
+            if (weights := self.__find_evictable()) is None:
+                log.warning(
+                    "Model cache exceeds its limits, but no other model than the "
+                    "pinned one is cached."
+                )
+                break
+            self.__remove_from_cache(weights)
+            evicted = True
+        return evicted
+
+    def __exceeds_limits(self) -> bool:
+        if self._max_models is not None and len(self.__cache) > self._max_models:
+            return True
+        return (
+            self._max_memory_bytes is not None
+            and sum(self.__memory_bytes.values()) > self._max_memory_bytes
+        )
+
+    def __find_evictable(self) -> str | None:
+        # The most recently used detector has just been added and must not be evicted.
+        candidates = list(self.__cache)[:-1]
+        for weights in candidates:
+            if weights != self._pinned_weights:
+                return weights
+        return None
 
     def __remove_from_cache(self, weights: str) -> None:
-        if self.__cache.get(weights):
-            del self.__cache[weights]
+        del self.__cache[weights]
+        memory_bytes = self.__memory_bytes.pop(weights)
+        self._evictions_metric.inc()
+        self.__update_metrics()
+        log.info(
+            f"Evicted model {weights} from the cache "
+            f"({memory_bytes / 2**20:.1f} MiB)"
+        )
+
+    def __update_metrics(self) -> None:
+        self._models_metric.set(len(self.__cache))
+        self._memory_metric.set(sum(self.__memory_bytes.values()))
@@ -50,6 +50,7 @@ class UpdateDetectConfigWithCliArgs:
             ),
             chunk_size=detect_config.yolo_config.chunk_size,
             normalized=detect_config.yolo_config.normalized,
+            direct_forward=detect_config.yolo_config.direct_forward,
         )
         return DetectConfig(
             paths=cli_args.paths if cli_args.paths is not None else detect_config.paths,
@@ -0,0 +1,91 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing import Callable
+
+from OTVision.application.metrics import DISABLED_METRICS, MetricsRegistry
+
+DEFAULT_IO_WORKERS = 1
+DEFAULT_MAX_PENDING_IO_JOBS = 4
+
+type IoJob[T] = Callable[[], T]
+
+
+class IoExecutor:
+    """Runs blocking file I/O on dedicated threads instead of the event loop.
+
+    Serializing and compressing output files takes long enough to stall capturing
+    and detecting frames, if it runs on the event loop. At most `max_pending_jobs`
+    jobs are queued or running at once. Submitting more waits until a job has
+    finished, so that slow storage slows down the producers of files instead of
+    piling up their contents in memory.
+
+    Args:
+        max_workers (int): number of threads running jobs in parallel.
+        max_pending_jobs (int): maximum number of jobs queued or running.
+        metrics (MetricsRegistry): registry to record I/O metrics in.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_IO_WORKERS,
+        max_pending_jobs: int = DEFAULT_MAX_PENDING_IO_JOBS,
+        metrics: MetricsRegistry = DISABLED_METRICS,
+    ) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="otvision-io"
+        )
+        self._slots = asyncio.Semaphore(max(max_pending_jobs, max_workers))
+        self._pending_jobs = 0
+        self._pending_jobs_metric = metrics.gauge(
+            "otvision_io_pending_jobs", "File I/O jobs queued or running."
+        )
+        self._job_duration_metric = metrics.histogram(
+            "otvision_io_job_duration_seconds", "Seconds to run a file I/O job."
+        )
+
+    async def submit[T](self, job: IoJob[T]) -> asyncio.Future[T]:
+        """Start running the job once fewer than `max_pending_jobs` are pending.
+
+        Args:
+            job (IoJob[T]): the blocking function to run.
+
+        Returns:
+            asyncio.Future[T]: completes with the result or the exception of the job.
+        """
+        await self._slots.acquire()
+        self._pending_jobs += 1
+        self._pending_jobs_metric.set(self._pending_jobs)
+        future = asyncio.get_running_loop().run_in_executor(
+            self._executor, self._measure, job
+        )
+        future.add_done_callback(self._release)
+        return future
+
+    async def run[T](self, job: IoJob[T]) -> T:
+        """Run the job and wait for its result.
+
+        Raises:
+            Exception: the exception raised by the job.
+        """
+        return await (await self.submit(job))
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the threads of the executor once they have run the submitted jobs.
+
+        Args:
+            wait (bool): whether to block until the submitted jobs have finished.
+        """
+        self._executor.shutdown(wait=wait)
+
+    def _measure[T](self, job: IoJob[T]) -> T:
+        start = perf_counter()
+        try:
+            return job()
+        finally:
+            self._job_duration_metric.observe(perf_counter() - start)
+
+    def _release(self, _: asyncio.Future) -> None:
+        self._pending_jobs -= 1
+        self._pending_jobs_metric.set(self._pending_jobs)
+        self._slots.release()
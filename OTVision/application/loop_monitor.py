@@ -0,0 +1,213 @@
+import asyncio
+import logging
+import sys
+import traceback
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Event, Lock, Thread, get_ident
+from time import monotonic
+from typing import Callable
+
+from OTVision.application.metrics import DISABLED_METRICS, MetricsRegistry
+from OTVision.helpers.log import LOGGER_NAME
+
+log = logging.getLogger(LOGGER_NAME)
+
+UNKNOWN_STAGE = "unknown"
+MAX_LOGGED_STACK_FRAMES = 25
+
+PACKAGE_DIR = Path(__file__).parents[1]
+
+Clock = Callable[[], float]
+
+
+@dataclass(frozen=True)
+class BlockingSummary:
+    """Stalls of the event loop during a run.
+
+    Attributes:
+        stalls (int): number of stalls.
+        max_lag_seconds (float): longest stall in seconds.
+        blocked_seconds_by_stage (dict[str, float]): seconds the loop was stalled
+            per stage, i.e. per innermost OTVision function running while stalled.
+    """
+
+    stalls: int
+    max_lag_seconds: float
+    blocked_seconds_by_stage: dict[str, float]
+
+    def to_text(self) -> str:
+        lines = [
+            f"Event loop stalls: {self.stalls}, "
+            f"longest {self.max_lag_seconds * 1000:.0f} ms"
+        ]
+        for stage, seconds in sorted(
+            self.blocked_seconds_by_stage.items(), key=lambda item: -item[1]
+        ):
+            lines.append(f"  {stage:<60}{seconds:>9.3f}s")
+        return "\n".join(lines)
+
+
+@dataclass(frozen=True)
+class _StackSample:
+    stage: str
+    stack: str
+
+
+class EventLoopMonitor:
+    """Detects stalls of the event loop and attributes them to the blocking code.
+
+    A heartbeat task wakes up every `interval_seconds`. The delay of its wake-ups is
+    the scheduling lag of the loop. A lag of at least `stall_threshold_seconds` is a
+    stall. While the loop is stalled, a watchdog thread samples the stack of the
+    loop's thread once. The stall is logged with the sampled stack and its duration
+    is attributed to the innermost OTVision function on the stack, its stage.
+
+    Code holding the GIL for the whole stall, e.g. a long computation in a C
+    extension that does not release it, cannot be sampled. Such stalls are attributed
+    to the stage `unknown`.
+
+    Args:
+        interval_seconds (float): seconds between two heartbeats.
+        stall_threshold_seconds (float): minimum lag in seconds to report as stall.
+        metrics (MetricsRegistry): registry to record the lag and stalls in.
+        clock (Clock): provides the current time in seconds.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: float,
+        stall_threshold_seconds: float,
+        metrics: MetricsRegistry = DISABLED_METRICS,
+        clock: Clock = monotonic,
+    ) -> None:
+        self._interval_seconds = interval_seconds
+        self._stall_threshold_seconds = stall_threshold_seconds
+        self._metrics = metrics
+        self._clock = clock
+        self._lock = Lock()
+        self._heartbeat: asyncio.Task | None = None
+        self._watchdog: Thread | None = None
+        self._stopped = Event()
+        self._loop_thread_id = 0
+        self._last_beat = 0.0
+        self._sampled_beat: float | None = None
+        self._sample: _StackSample | None = None
+        self._stalls = 0
+        self._max_lag_seconds = 0.0
+        self._blocked_seconds_by_stage: dict[str, float] = {}
+        self._lag_metric = metrics.histogram(
+            "otvision_event_loop_lag_seconds",
+            "Seconds the heartbeat of the event loop was late.",
+        )
+        self._stalls_metric = metrics.counter(
+            "otvision_event_loop_stalls_total", "Stalls of the event loop."
+        )
+
+    def start(self) -> None:
+        """Start monitoring the running event loop."""
+        if self._heartbeat is not None:
+            return
+        self._loop_thread_id = get_ident()
+        self._last_beat = self._clock()
+        self._stopped.clear()
+        self._heartbeat = asyncio.create_task(self._beat(), name="loop-monitor")
+        self._watchdog = Thread(
+            target=self._watch, name="loop-monitor-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    def stop(self) -> BlockingSummary:
+        """Stop monitoring and log the stalls of the run.
+
+        Returns:
+            BlockingSummary: the stalls since monitoring started.
+        """
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        self._stopped.set()
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+        summary = self.summary()
+        log.info(summary.to_text())
+        return summary
+
+    def summary(self) -> BlockingSummary:
+        with self._lock:
+            return BlockingSummary(
+                stalls=self._stalls,
+                max_lag_seconds=self._max_lag_seconds,
+                blocked_seconds_by_stage=dict(self._blocked_seconds_by_stage),
+            )
+
+    async def _beat(self) -> None:
+        while True:
+            expected = self._clock() + self._interval_seconds
+            await asyncio.sleep(self._interval_seconds)
+            now = self._clock()
+            lag = max(now - expected, 0.0)
+            self._lag_metric.observe(lag)
+            if lag >= self._stall_threshold_seconds:
+                self._record_stall(lag)
+            with self._lock:
+                self._last_beat = now
+
+    def _record_stall(self, lag: float) -> None:
+        with self._lock:
+            # A sample taken after an earlier stall ended belongs to no stall.
+            sample = self._sample if self._sampled_beat == self._last_beat else None
+            self._sample = None
+            stage = sample.stage if sample is not None else UNKNOWN_STAGE
+            self._stalls += 1
+            self._max_lag_seconds = max(self._max_lag_seconds, lag)
+            self._blocked_seconds_by_stage[stage] = (
+                self._blocked_seconds_by_stage.get(stage, 0.0) + lag
+            )
+        self._stalls_metric.inc()
+        self._metrics.labeled(stage=stage).counter(
+            "otvision_event_loop_blocked_seconds_total",
+            "Seconds the event loop was stalled by a stage.",
+        ).inc(lag)
+        stack = f"\n{sample.stack}" if sample is not None else ""
+        log.warning(f"Event loop stalled for {lag * 1000:.0f} ms in {stage}{stack}")
+
+    def _watch(self) -> None:
+        poll_seconds = max(self._stall_threshold_seconds / 4, 0.001)
+        while not self._stopped.wait(poll_seconds):
+            with self._lock:
+                last_beat = self._last_beat
+                already_sampled = self._sampled_beat == last_beat
+            overdue = self._clock() - last_beat - self._interval_seconds
+            if already_sampled or overdue < self._stall_threshold_seconds:
+                continue
+            sample = self._sample_loop_thread()
+            with self._lock:
+                self._sampled_beat = last_beat
+                self._sample = sample
+
+    def _sample_loop_thread(self) -> _StackSample | None:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return None
+        stack = traceback.extract_stack(frame)
+        return _StackSample(
+            stage=find_stage(stack),
+            stack="".join(traceback.format_list(stack[-MAX_LOGGED_STACK_FRAMES:])),
+        )
+
+
+def find_stage(stack: traceback.StackSummary) -> str:
+    """Return the innermost OTVision function of the stack.
+
+    Returns:
+        str: the function as `<module path>:<function name>` or `unknown`, if no
+            OTVision function is on the stack.
+    """
+    for frame in reversed(stack):
+        path = Path(frame.filename)
+        if path.is_relative_to(PACKAGE_DIR):
+            module = path.relative_to(PACKAGE_DIR.parent).with_suffix("")
+            return f"{'.'.join(module.parts)}:{frame.name}"
+    return UNKNOWN_STAGE
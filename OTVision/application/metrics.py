@@ -0,0 +1,285 @@
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from dataclasses import dataclass
+from enum import StrEnum
+from threading import Lock
+from typing import Callable
+
+DEFAULT_DURATION_BUCKETS: tuple[float, ...] = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class MetricType(StrEnum):
+    COUNTER = "counter"
+    GAUGE = "gauge"
+    HISTOGRAM = "histogram"
+
+
+class Metric(ABC):
+    """A named measurement with fixed labels.
+
+    Metrics are updated from the event loop as well as from worker threads. Hence,
+    all updates are synchronized.
+
+    Args:
+        name (str): name of the metric.
+        description (str): human readable description of the metric.
+        labels (Labels): label names and values distinguishing the metric from
+            others of the same name, e.g. the stream it is measured for.
+    """
+
+    @property
+    @abstractmethod
+    def type(self) -> MetricType:
+        raise NotImplementedError
+
+    def __init__(self, name: str, description: str, labels: Labels) -> None:
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self._lock = Lock()
+
+
+class Counter(Metric):
+    """A value that only increases, e.g. the number of processed frames."""
+
+    @property
+    def type(self) -> MetricType:
+        return MetricType.COUNTER
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def __init__(self, name: str, description: str, labels: Labels) -> None:
+        super().__init__(name, description, labels)
+        self._value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+
+class Gauge(Metric):
+    """A value that increases and decreases, e.g. the depth of a queue."""
+
+    @property
+    def type(self) -> MetricType:
+        return MetricType.GAUGE
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def __init__(self, name: str, description: str, labels: Labels) -> None:
+        super().__init__(name, description, labels)
+        self._value = 0.0
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+
+@dataclass(frozen=True)
+class HistogramSnapshot:
+    """Consistent state of a histogram.
+
+    Attributes:
+        buckets (list[tuple[float, int]]): upper bounds of the buckets and the
+            cumulative number of observations less than or equal to them.
+        sum (float): sum of all observations.
+        count (int): number of observations.
+    """
+
+    buckets: list[tuple[float, int]]
+    sum: float
+    count: int
+
+
+class Histogram(Metric):
+    """Counts observations, e.g. durations, in buckets of configurable size.
+
+    Args:
+        buckets (tuple[float, ...]): ascending upper bounds of the buckets.
+            Observations above the last bound are only counted in the total.
+    """
+
+    @property
+    def type(self) -> MetricType:
+        return MetricType.HISTOGRAM
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: Labels,
+        buckets: tuple[float, ...] = DEFAULT_DURATION_BUCKETS,
+    ) -> None:
+        super().__init__(name, description, labels)
+        self._bounds = tuple(sorted(buckets))
+        self._bucket_counts = [0] * len(self._bounds)
+        self._sum = 0.0
+        self._count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self._bounds, value)
+        with self._lock:
+            if index < len(self._bucket_counts):
+                self._bucket_counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> HistogramSnapshot:
+        with self._lock:
+            cumulative = 0
+            buckets = []
+            for bound, count in zip(self._bounds, self._bucket_counts):
+                cumulative += count
+                buckets.append((bound, cumulative))
+            return HistogramSnapshot(buckets=buckets, sum=self._sum, count=self._count)
+
+
+class _DisabledCounter(Counter):
+    def inc(self, amount: float = 1.0) -> None:
+        pass
+
+
+class _DisabledGauge(Gauge):
+    def set(self, value: float) -> None:
+        pass
+
+    def inc(self, amount: float = 1.0) -> None:
+        pass
+
+
+class _DisabledHistogram(Histogram):
+    def observe(self, value: float) -> None:
+        pass
+
+
+class _MetricsStore:
+    def __init__(self) -> None:
+        self.lock = Lock()
+        self.metrics: dict[tuple[str, Labels], Metric] = {}
+
+
+class MetricsRegistry:
+    """Creates metrics and collects them for export.
+
+    Requesting a metric of the same name and labels twice returns the same metric.
+    Registries created via `labeled` share their metrics with this registry, but add
+    labels to all metrics they create.
+
+    If disabled, the registry returns metrics ignoring all updates and collects
+    nothing. Instrumented components therefore do not need to check whether metrics
+    are enabled.
+
+    Args:
+        enabled (bool): whether metrics are recorded.
+    """
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def __init__(self, enabled: bool = True) -> None:
+        self._enabled = enabled
+        self._labels: Labels = ()
+        self._store = _MetricsStore()
+
+    def labeled(self, **labels: str) -> "MetricsRegistry":
+        """Create a registry adding the given labels to the metrics it creates.
+
+        Args:
+            **labels (str): label names and values to add.
+
+        Returns:
+            MetricsRegistry: registry sharing its metrics with this registry.
+        """
+        registry = MetricsRegistry(self._enabled)
+        registry._labels = tuple(sorted({**dict(self._labels), **labels}.items()))
+        registry._store = self._store
+        return registry
+
+    def counter(self, name: str, description: str) -> Counter:
+        if not self._enabled:
+            return _DisabledCounter(name, description, self._labels)
+        return self._get_or_create(
+            name, lambda: Counter(name, description, self._labels), Counter
+        )
+
+    def gauge(self, name: str, description: str) -> Gauge:
+        if not self._enabled:
+            return _DisabledGauge(name, description, self._labels)
+        return self._get_or_create(
+            name, lambda: Gauge(name, description, self._labels), Gauge
+        )
+
+    def histogram(
+        self,
+        name: str,
+        description: str,
+        buckets: tuple[float, ...] = DEFAULT_DURATION_BUCKETS,
+    ) -> Histogram:
+        if not self._enabled:
+            return _DisabledHistogram(name, description, self._labels, buckets)
+        return self._get_or_create(
+            name, lambda: Histogram(name, description, self._labels, buckets), Histogram
+        )
+
+    def collect(self) -> list[Metric]:
+        """Return all metrics sorted by name and labels."""
+        with self._store.lock:
+            return [
+                self._store.metrics[key] for key in sorted(self._store.metrics.keys())
+            ]
+
+    def _get_or_create[M: Metric](
+        self, name: str, create: Callable[[], M], metric_type: type[M]
+    ) -> M:
+        key = (name, self._labels)
+        with self._store.lock:
+            if (metric := self._store.metrics.get(key)) is None:
+                metric = create()
+                self._store.metrics[key] = metric
+        if not isinstance(metric, metric_type):
+            raise ValueError(
+                f"Metric '{name}' has already been registered as {metric.type}."
+            )
+        return metric
+
+
+DISABLED_METRICS = MetricsRegistry(enabled=False)
+
+
+class MetricsExporter(ABC):
+    """Makes the metrics of a registry available to a monitoring system."""
+
+    @abstractmethod
+    def start(self) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def stop(self) -> None:
+        raise NotImplementedError
@@ -1,7 +1,8 @@
 from collections import defaultdict
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Self
+from functools import partial
+from typing import Callable, Self
 
 from OTVision import dataformat, version
 from OTVision.detect.otdet import (
@@ -27,6 +28,14 @@ class OttrkBuilderConfig:
     frame_group: int
 
 
+@dataclass(frozen=True)
+class OttrkBuilderState:
+    """The data an ottrk builder has collected so far."""
+
+    config: OttrkBuilderConfig
+    tracked_detections: dict[TrackId, list[dict]]
+
+
 class OttrkBuilderError(Exception):
     pass
 
@@ -44,14 +53,21 @@ class OttrkBuilder:
         self._tracked_detections: dict[TrackId, list[dict]] = defaultdict(list)
 
     def build(self) -> dict:
-        result = {
-            dataformat.METADATA: self.build_metadata(),
-            dataformat.DATA: {
-                dataformat.DETECTIONS: self._build_data(),
-            },
-        }
+        return self.build_detached()()
+
+    def build_detached(self) -> Callable[[], dict]:
+        """Hand the collected data over to a function building the ottrk data.
+
+        The builder is reset and can collect the next ottrk file, while the returned
+        function sorts and assembles the detections, e.g. on another thread.
+
+        Returns:
+            Callable[[], dict]: builds the ottrk data of the collected detections.
+        """
+        metadata = self.build_metadata()
+        tracked_detections = self._tracked_detections
         self.reset()
-        return result
+        return partial(_build_ottrk, metadata, tracked_detections)
 
     def build_metadata(self) -> dict:
         otdet_metadata = self._otdet_metadata_builder.build(
@@ -81,24 +97,30 @@ class OttrkBuilder:
         tracking_metadata[dataformat.FRAME_GROUP] = self.config.frame_group
         return result
 
-    def _build_data(self) -> list[dict]:
-        return sorted(
-            (
-                detection
-                for detections in self._tracked_detections.values()
-                for detection in detections
-            ),
-            key=lambda detection: (
-                detection[dataformat.FRAME],
-                detection[dataformat.OCCURRENCE],
-            ),
-        )
-
     def set_config(self, config: OttrkBuilderConfig) -> Self:
         self._config = config
         self._otdet_metadata_builder.add_config(config.otdet_builder_config)
         return self
 
+    def snapshot(self) -> OttrkBuilderState | None:
+        """Return the collected data or None, if the builder has not been configured."""
+        if self._config is None:
+            return None
+        return OttrkBuilderState(
+            config=self._config,
+            tracked_detections={
+                track_id: [dict(detection) for detection in detections]
+                for track_id, detections in self._tracked_detections.items()
+            },
+        )
+
+    def restore(self, state: OttrkBuilderState) -> Self:
+        """Replace the collected data with the given one."""
+        self.reset()
+        self.set_config(state.config)
+        self._tracked_detections.update(state.tracked_detections)
+        return self
+
     def add_tracked_frames(self, tracked_frames: list[TrackedFrame]) -> Self:
         finished_tracks = set()
         discarded_tracks = set()
@@ -126,7 +148,7 @@ class OttrkBuilder:
         detection: TrackedDetection,
         occurrence: datetime,
     ) -> dict:
-        result = detection.to_otdet()
+        result = detection.to_otdet(self.config.otdet_builder_config.classifications)
         result[dataformat.INTERPOLATED_DETECTION] = False
         result[dataformat.FIRST] = detection.is_first
         result[dataformat.FINISHED] = False
@@ -169,6 +191,25 @@ class OttrkBuilder:
         return self
 
 
+def _build_ottrk(metadata: dict, tracked_detections: dict[TrackId, list[dict]]) -> dict:
+    return {
+        dataformat.METADATA: metadata,
+        dataformat.DATA: {
+            dataformat.DETECTIONS: sorted(
+                (
+                    detection
+                    for detections in tracked_detections.values()
+                    for detection in detections
+                ),
+                key=lambda detection: (
+                    detection[dataformat.FRAME],
+                    detection[dataformat.OCCURRENCE],
+                ),
+            ),
+        },
+    }
+
+
 def create_ottrk_metadata_entry(
     start_date: datetime,
     end_date: datetime,
@@ -39,6 +39,7 @@ class UpdateTrackConfigWithCliArgs:
             run_chained=track_config.run_chained,
             iou=iou_config,
             overwrite=value_or_default(cli_args.overwrite, track_config.overwrite),
+            max_emission_delay_seconds=track_config.max_emission_delay_seconds,
         )
 
     def _update_log_config(self, config: Config, cli_args: TrackCliArgs) -> _LogConfig:
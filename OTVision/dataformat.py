@@ -41,6 +41,14 @@ NORMALIZED_BBOX: str = "normalized_bbox"
 DETECT_START = "detect_start"
 DETECT_END = "detect_end"
 
+# Load shedding
+LOAD_SHEDDING: str = "load_shedding"
+PROCESSED_FRAMES: str = "processed_frames"
+DROPPED_FRAMES: str = "dropped_frames"
+DECISIONS: str = "decisions"
+LOAD: str = "load"
+DROP_RATE: str = "drop_rate"
+
 # Detektor model config
 NAME: str = "name"
 WEIGHTS: str = "weights"
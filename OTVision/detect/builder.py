@@ -3,7 +3,8 @@ from argparse import ArgumentParser
 from functools import cached_property
 
 from OTVision.abstraction.observer import AsyncSubject
-from OTVision.application.config import Config, DetectConfig
+from OTVision.abstraction.pipes_and_filter import Filter
+from OTVision.application.config import Config, DetectConfig, VideoWriterBackend
 from OTVision.application.config_parser import ConfigParser
 from OTVision.application.configure_logger import ConfigureLogger
 from OTVision.application.detect.current_object_detector import CurrentObjectDetector
@@ -16,9 +17,13 @@ from OTVision.application.detect.get_detect_cli_args import GetDetectCliArgs
 from OTVision.application.detect.update_detect_config_with_cli_args import (
     UpdateDetectConfigWithCliArgs,
 )
+from OTVision.application.event.new_otvision_config import NewOtvisionConfigEvent
 from OTVision.application.frame_count_provider import FrameCountProvider
 from OTVision.application.get_config import GetConfig
 from OTVision.application.get_current_config import GetCurrentConfig
+from OTVision.application.io_executor import IoExecutor
+from OTVision.application.loop_monitor import EventLoopMonitor
+from OTVision.application.metrics import MetricsExporter, MetricsRegistry
 from OTVision.application.otvision_save_path_provider import OtvisionSavePathProvider
 from OTVision.application.update_current_config import UpdateCurrentConfig
 from OTVision.detect.cli import ArgparseDetectCliParser
@@ -31,6 +36,8 @@ from OTVision.detect.detected_frame_producer import (
     DetectedFrameProducerFactory,
     SimpleDetectedFrameProducer,
 )
+from OTVision.detect.event_recording import EventTriggeredVideoWriter
+from OTVision.detect.load_shedding import LoadSheddingController
 from OTVision.detect.otdet import OtdetBuilder, OtdetMetadataBuilder
 from OTVision.detect.otdet_file_writer import OtdetFileWriter, OtdetFileWrittenEvent
 from OTVision.detect.plugin_av.rotate_frame import AvVideoFrameRotator
@@ -40,10 +47,19 @@ from OTVision.detect.yolo import YoloDetectionConverter, YoloFactory
 from OTVision.domain.cli import DetectCliParser
 from OTVision.domain.current_config import CurrentConfig
 from OTVision.domain.detect_producer_consumer import DetectedFrameProducer
+from OTVision.domain.frame import Frame
 from OTVision.domain.input_source_detect import InputSourceDetect
 from OTVision.domain.object_detection import ObjectDetectorFactory
 from OTVision.domain.serialization import Deserializer
 from OTVision.domain.video_writer import VideoWriter
+from OTVision.plugin.ffmpeg_video_writer import (
+    FfmpegVideoWriter,
+    PixelFormat,
+    VideoFormat,
+    VideoSaveLocationStrategy,
+)
+from OTVision.plugin.prometheus_metrics import create_metrics_exporters
+from OTVision.plugin.pyav_video_writer import PyAvVideoWriter
 from OTVision.plugin.yaml_serialization import YamlDeserializer
 
 
@@ -78,14 +94,36 @@ class DetectBuilder(ABC):
 
     @cached_property
     def object_detector_factory(self) -> ObjectDetectorFactory:
+        if self._object_detector_factory is not None:
+            return self._object_detector_factory
+        config = self.current_config.get()
+        model_cache_config = config.model_cache
         return ObjectDetectorCachedFactory(
             YoloFactory(
                 get_current_config=self.get_current_config,
                 detection_converter=self.detection_converter,
                 detected_frame_factory=self.frame_converter,
-            )
+                metrics=self.metrics,
+                flushes_in_band=self.flushes_in_band,
+            ),
+            max_models=model_cache_config.max_models,
+            max_memory_bytes=model_cache_config.max_memory_bytes,
+            pinned_weights=(
+                config.detect.weights if model_cache_config.pin_default else None
+            ),
+            metrics=self.metrics,
         )
 
+    @property
+    def flushes_in_band(self) -> bool:
+        """Whether flushes reach the detected frame buffers in order with the frames.
+
+        The input sources notify flushes as soon as they resume after their last
+        frame of a segment. Frames held back by the detection would miss their
+        segment.
+        """
+        return False
+
     @cached_property
     def detection_converter(self) -> YoloDetectionConverter:
         return YoloDetectionConverter()
@@ -108,6 +146,38 @@ class DetectBuilder(ABC):
     def update_current_config(self) -> UpdateCurrentConfig:
         return UpdateCurrentConfig(self.current_config)
 
+    @cached_property
+    def metrics(self) -> MetricsRegistry:
+        if self._metrics is not None:
+            return self._metrics
+        return MetricsRegistry(enabled=self.current_config.get().metrics.enabled)
+
+    @property
+    def pipeline_metrics(self) -> MetricsRegistry:
+        """The registry the components of the built pipeline record metrics in."""
+        return self.metrics
+
+    @cached_property
+    def io_executor(self) -> IoExecutor:
+        if self._io_executor is not None:
+            return self._io_executor
+        return IoExecutor(metrics=self.metrics)
+
+    @cached_property
+    def loop_monitor(self) -> EventLoopMonitor | None:
+        loop_monitor_config = self.current_config.get().loop_monitor
+        if not loop_monitor_config.enabled:
+            return None
+        return EventLoopMonitor(
+            interval_seconds=loop_monitor_config.interval_seconds,
+            stall_threshold_seconds=loop_monitor_config.stall_threshold_seconds,
+            metrics=self.metrics,
+        )
+
+    @cached_property
+    def metrics_exporters(self) -> list[MetricsExporter]:
+        return create_metrics_exporters(self.metrics, self.current_config.get().metrics)
+
     @cached_property
     def frame_rotator(self) -> AvVideoFrameRotator:
         return AvVideoFrameRotator()
@@ -132,6 +202,55 @@ class DetectBuilder(ABC):
             get_current_config=self.get_current_config,
             current_object_detector_metadata=self.current_object_detector_metadata,
             save_path_provider=self.detection_file_save_path_provider,
+            io_executor=self.io_executor,
+            load_shedding=self.load_shedding_controller,
+            metrics=self.pipeline_metrics,
+        )
+
+    @property
+    def load_shedding_controller(self) -> LoadSheddingController | None:
+        return None
+
+    @property
+    def event_recorder(self) -> EventTriggeredVideoWriter | None:
+        """Records videos only while objects are detected, if enabled."""
+        return None
+
+    @property
+    def video_writer_filter(self) -> Filter[Frame, Frame] | None:
+        """Writes the decoded frames into videos if `write_video` is enabled."""
+        return self.video_file_writer
+
+    def _create_video_writer(
+        self,
+        save_location_strategy: VideoSaveLocationStrategy,
+        drop_frames_if_full: bool,
+    ) -> VideoWriter:
+        if self.detect_config.video_writer == VideoWriterBackend.PYAV:
+            return PyAvVideoWriter(
+                save_location_strategy=save_location_strategy,
+                encoding_speed=self.detect_config.encoding_speed,
+                output_format=VideoFormat.MP4,
+                input_pixel_format=PixelFormat.RGB24,
+                output_pixel_format=PixelFormat.YUV420P,
+                output_video_codec=self.detect_config.video_codec,
+                constant_rate_factor=self.detect_config.crf,
+                drop_frames_if_full=drop_frames_if_full,
+                scale=self.detect_config.recording_scale,
+                frame_step=self.detect_config.recording_frame_step,
+            )
+        return FfmpegVideoWriter(
+            save_location_strategy=save_location_strategy,
+            encoding_speed=self.detect_config.encoding_speed,
+            input_format=VideoFormat.RAW,
+            output_format=VideoFormat.MP4,
+            input_pixel_format=PixelFormat.RGB24,
+            output_pixel_format=PixelFormat.YUV420P,
+            output_video_codec=self.detect_config.video_codec,
+            constant_rate_factor=self.detect_config.crf,
+            drop_frames_if_full=drop_frames_if_full,
+            scale=self.detect_config.recording_scale,
+            frame_step=self.detect_config.recording_frame_step,
         )
 
     @cached_property
@@ -140,14 +259,21 @@ class DetectBuilder(ABC):
 
     @cached_property
     def current_object_detector(self) -> CurrentObjectDetector:
+        if self._current_object_detector is not None:
+            return self._current_object_detector
         return CurrentObjectDetector(
             get_current_config=self.get_current_config,
             factory=self.object_detector_factory,
+            subject=AsyncSubject[NewOtvisionConfigEvent](),
+            metrics=self.metrics,
         )
 
     @cached_property
     def detected_frame_buffer(self) -> DetectedFrameBuffer:
-        return DetectedFrameBuffer(subject=AsyncSubject[DetectedFrameBufferEvent]())
+        return DetectedFrameBuffer(
+            subject=AsyncSubject[DetectedFrameBufferEvent](),
+            metrics=self.pipeline_metrics,
+        )
 
     @cached_property
     def detected_frame_producer(self) -> DetectedFrameProducer:
@@ -159,10 +285,12 @@ class DetectBuilder(ABC):
     def detected_frame_producer_factory(self) -> DetectedFrameProducerFactory:
         return DetectedFrameProducerFactory(
             input_source=self.input_source,
-            video_writer_filter=self.video_file_writer,
+            video_writer_filter=self.video_writer_filter,
             detection_filter=self.current_object_detector,
             detected_frame_buffer=self.detected_frame_buffer,
             get_current_config=self.get_current_config,
+            load_shedding_filter=self.load_shedding_controller,
+            event_recorder=self.event_recorder,
         )
 
     @cached_property
@@ -182,10 +310,18 @@ class DetectBuilder(ABC):
         argv: list[str] | None = None,
         current_config: CurrentConfig | None = None,
         configure_logger: ConfigureLogger | None = None,
+        object_detector_factory: ObjectDetectorFactory | None = None,
+        metrics: MetricsRegistry | None = None,
+        io_executor: IoExecutor | None = None,
+        current_object_detector: CurrentObjectDetector | None = None,
     ) -> None:
         self.argv = argv
         self.__current_config = current_config
         self._configure_logger = configure_logger
+        self._object_detector_factory = object_detector_factory
+        self._current_object_detector = current_object_detector
+        self._metrics = metrics
+        self._io_executor = io_executor
 
     @property
     @abstractmethod
@@ -204,7 +340,12 @@ class DetectBuilder(ABC):
     def build(self) -> OTVisionVideoDetect:
         self.register_observers()
         self._preload_object_detection_model()
-        return OTVisionVideoDetect(self.detected_frame_producer)
+        return OTVisionVideoDetect(
+            self.detected_frame_producer,
+            metrics_exporters=self.metrics_exporters,
+            loop_monitor=self.loop_monitor,
+            io_executor=self.io_executor,
+        )
 
     def _preload_object_detection_model(self) -> None:
         model = self.current_object_detector.get()
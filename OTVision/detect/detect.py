@@ -20,6 +20,11 @@ OTVision main module to detect objects in single or multiple images or videos.
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 
+import asyncio
+
+from OTVision.application.io_executor import IoExecutor
+from OTVision.application.loop_monitor import EventLoopMonitor
+from OTVision.application.metrics import MetricsExporter
 from OTVision.domain.detect_producer_consumer import (
     DetectedFrameConsumer,
     DetectedFrameProducer,
@@ -27,12 +32,34 @@ from OTVision.domain.detect_producer_consumer import (
 
 
 class OTVisionVideoDetect(DetectedFrameConsumer):
-    def __init__(self, producer: DetectedFrameProducer) -> None:
+    def __init__(
+        self,
+        producer: DetectedFrameProducer,
+        metrics_exporters: list[MetricsExporter] | None = None,
+        loop_monitor: EventLoopMonitor | None = None,
+        io_executor: IoExecutor | None = None,
+    ) -> None:
         self._producer = producer
+        self._metrics_exporters = metrics_exporters or []
+        self._loop_monitor = loop_monitor
+        self._io_executor = io_executor
 
     async def start(self) -> None:
         """Starts the detection of objects in multiple videos and/or images."""
-        await self.consume()
+        for exporter in self._metrics_exporters:
+            exporter.start()
+        if self._loop_monitor is not None:
+            self._loop_monitor.start()
+        try:
+            await self.consume()
+        finally:
+            if self._loop_monitor is not None:
+                self._loop_monitor.stop()
+            for exporter in self._metrics_exporters:
+                exporter.stop()
+            if self._io_executor is not None:
+                # Files still being written are completed before the threads stop.
+                await asyncio.to_thread(self._io_executor.shutdown)
 
     async def consume(self) -> None:
         async for _ in self._producer.produce():
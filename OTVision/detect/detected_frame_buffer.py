@@ -3,6 +3,7 @@ from datetime import datetime, timedelta
 
 from OTVision.abstraction.observer import AsyncObservable, AsyncSubject
 from OTVision.application.buffer import Buffer
+from OTVision.application.metrics import DISABLED_METRICS, MetricsRegistry
 from OTVision.domain.frame import DetectedFrame
 
 
@@ -53,14 +54,31 @@ class DetectedFrameBufferEvent:
 class DetectedFrameBuffer(
     Buffer[DetectedFrame, FlushEvent], AsyncObservable[DetectedFrameBufferEvent]
 ):
-    def __init__(self, subject: AsyncSubject[DetectedFrameBufferEvent]) -> None:
+    def __init__(
+        self,
+        subject: AsyncSubject[DetectedFrameBufferEvent],
+        metrics: MetricsRegistry = DISABLED_METRICS,
+    ) -> None:
         Buffer.__init__(self)
         AsyncObservable.__init__(self, subject)
+        self._buffered_frames_metric = metrics.gauge(
+            "otvision_detected_frame_buffer_frames",
+            "Detected frames buffered until the next flush.",
+        )
+        self._flushes_metric = metrics.counter(
+            "otvision_detected_frame_buffer_flushes_total",
+            "Flushes of the detected frames.",
+        )
 
     async def on_flush(self, event: FlushEvent) -> None:
         buffered_elements = self._get_buffered_elements()
-        await self._notify_observers(buffered_elements, event)
         self._reset_buffer()
+        self._buffered_frames_metric.set(0)
+        self._flushes_metric.inc()
+        await self._notify_observers(buffered_elements, event)
+        # Frames of the next segment must not reach the following filters, e.g. the
+        # ottrk file writer, before the flushed segment has been written.
+        await self._subject.wait_for_all_observers()
 
     async def _notify_observers(
         self, elements: list[DetectedFrame], event: FlushEvent
@@ -73,3 +91,4 @@ class DetectedFrameBuffer(
 
     async def buffer(self, to_buffer: DetectedFrame) -> None:
         self._buffer.append(to_buffer.without_image())
+        self._buffered_frames_metric.set(len(self._buffer))
@@ -10,30 +10,62 @@ class DetectedFrameProducerFactory:
     def __init__(
         self,
         input_source: InputSourceDetect,
-        video_writer_filter: Filter[Frame, Frame],
+        video_writer_filter: Filter[Frame, Frame] | None,
         detection_filter: Filter[Frame, DetectedFrame],
         detected_frame_buffer: Filter[DetectedFrame, DetectedFrame],
         get_current_config: GetCurrentConfig,
+        load_shedding_filter: Filter[Frame, Frame] | None = None,
+        event_recorder: Filter[DetectedFrame, DetectedFrame] | None = None,
     ) -> None:
         self._input_source = input_source
         self._video_writer_filter = video_writer_filter
         self._detection_filter = detection_filter
         self._detected_frame_buffer = detected_frame_buffer
         self._get_current_config = get_current_config
+        self._load_shedding_filter = load_shedding_filter
+        self._event_recorder = event_recorder
 
     def create(self) -> AsyncIterator[DetectedFrame]:
-        if self._get_current_config.get().detect.write_video:
-            return self.__create_with_video_writer()
+        write_video = self._get_current_config.get().detect.write_video
+        if write_video and (event_recorder := self._event_recorder) is not None:
+            return self.__create_with_event_recorder(event_recorder)
+        if (
+            write_video
+            and (video_writer_filter := self._video_writer_filter) is not None
+        ):
+            return self.__create_with_video_writer(video_writer_filter)
         return self.__create_without_video_writer()
 
     def __create_without_video_writer(self) -> AsyncIterator[DetectedFrame]:
         return self._detected_frame_buffer.filter(
-            self._detection_filter.filter(self._input_source.produce())
+            self._detection_filter.filter(
+                self.__shed_load(self._input_source.produce())
+            )
         )
 
-    def __create_with_video_writer(self) -> AsyncIterator[DetectedFrame]:
+    def __create_with_event_recorder(
+        self, event_recorder: Filter[DetectedFrame, DetectedFrame]
+    ) -> AsyncIterator[DetectedFrame]:
+        return self._detected_frame_buffer.filter(
+            event_recorder.filter(
+                self._detection_filter.filter(
+                    self.__shed_load(self._input_source.produce())
+                )
+            )
+        )
+
+    def __create_with_video_writer(
+        self, video_writer_filter: Filter[Frame, Frame]
+    ) -> AsyncIterator[DetectedFrame]:
         return self._detected_frame_buffer.filter(
             self._detection_filter.filter(
-                self._video_writer_filter.filter(self._input_source.produce())
+                self.__shed_load(
+                    video_writer_filter.filter(self._input_source.produce())
+                )
             )
         )
+
+    def __shed_load(self, frames: AsyncIterator[Frame]) -> AsyncIterator[Frame]:
+        if self._load_shedding_filter is None:
+            return frames
+        return self._load_shedding_filter.filter(frames)
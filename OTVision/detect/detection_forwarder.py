@@ -0,0 +1,64 @@
+from typing import AsyncIterator
+
+from OTVision.abstraction.pipes_and_filter import Filter
+from OTVision.application.metrics import DISABLED_METRICS, MetricsRegistry
+from OTVision.detect.otdet_file_writer import OtdetFileWrittenEvent
+from OTVision.domain.frame import DetectedFrame
+from OTVision.domain.message_sink import MessageSink
+from OTVision.ingest.protocol import encode_flush, encode_frames
+
+
+class DetectionForwarder(Filter[DetectedFrame, DetectedFrame]):
+    """Forwards the detected frames of a stream to an ingestion server.
+
+    Frames are sent in batches of `batch_size`. Once the otdet file of a segment has
+    been written, the remaining frames of the segment are sent, followed by the
+    segment's otdet metadata, so that the server can write the ottrk file of the
+    segment. Frames pass through unchanged.
+
+    Args:
+        stream (str): name of the stream the frames belong to.
+        sink (MessageSink): delivers the messages to the server.
+        batch_size (int): number of frames sent together.
+        metrics (MetricsRegistry): registry to record forwarding metrics in.
+    """
+
+    def __init__(
+        self,
+        stream: str,
+        sink: MessageSink,
+        batch_size: int,
+        metrics: MetricsRegistry = DISABLED_METRICS,
+    ) -> None:
+        self._stream = stream
+        self._sink = sink
+        self._batch_size = max(batch_size, 1)
+        self._batch: list[DetectedFrame] = []
+        self._forwarded_frames_metric = metrics.counter(
+            "otvision_forwarded_frames_total", "Detected frames handed to the sink."
+        )
+
+    async def filter(
+        self, pipe: AsyncIterator[DetectedFrame]
+    ) -> AsyncIterator[DetectedFrame]:
+        await self._sink.open()
+        try:
+            async for frame in pipe:
+                self._batch.append(frame.without_image())
+                if len(self._batch) >= self._batch_size:
+                    self._send_batch()
+                yield frame
+        finally:
+            self._send_batch()
+            await self._sink.close()
+
+    async def on_flush(self, event: OtdetFileWrittenEvent) -> None:
+        self._send_batch()
+        self._sink.publish(encode_flush(self._stream, event))
+
+    def _send_batch(self) -> None:
+        if not self._batch:
+            return
+        self._sink.publish(encode_frames(self._stream, self._batch))
+        self._forwarded_frames_metric.inc(len(self._batch))
+        self._batch = []
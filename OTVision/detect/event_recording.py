@@ -0,0 +1,143 @@
+from collections import deque
+from datetime import datetime, timedelta
+from math import ceil
+from typing import AsyncIterator
+
+from OTVision.abstraction.pipes_and_filter import Filter
+from OTVision.application.config import EventRecordingConfig
+from OTVision.application.configure_logger import logger
+from OTVision.application.get_current_config import GetCurrentConfig
+from OTVision.detect.rtsp_input_source import create_stream_output, find_stream_config
+from OTVision.domain.frame import DetectedFrame
+from OTVision.domain.video_writer import VideoWriter
+
+
+class EventTriggeredVideoWriter(Filter[DetectedFrame, DetectedFrame]):
+    """Records videos of a stream only while objects are detected.
+
+    The most recent frames are kept in a bounded pre-roll buffer. Once a frame
+    contains detections, a new video is opened starting with the buffered frames.
+    All following frames are written until no objects have been detected for the
+    configured quiet period. Events lasting longer than the maximum video duration
+    are continued in a new video. Each video is named after the occurrence of its
+    first frame.
+
+    Frames pass through unchanged. Frames without image are not recorded.
+
+    Args:
+        video_writer (VideoWriter): writes the frames into the video files.
+        get_current_config (GetCurrentConfig): provides the current config.
+        stream_name (str | None): name of the stream in the `STREAMS` section. If
+            None, the stream of the `STREAM` section is recorded.
+    """
+
+    @property
+    def is_recording(self) -> bool:
+        return self._last_event is not None
+
+    def __init__(
+        self,
+        video_writer: VideoWriter,
+        get_current_config: GetCurrentConfig,
+        stream_name: str | None = None,
+    ) -> None:
+        self._video_writer = video_writer
+        self._get_current_config = get_current_config
+        self._stream_name = stream_name
+        self._pre_roll: deque[DetectedFrame] = deque()
+        self._last_event: datetime | None = None
+        self._video_start: datetime | None = None
+
+    async def filter(
+        self, pipe: AsyncIterator[DetectedFrame]
+    ) -> AsyncIterator[DetectedFrame]:
+        try:
+            async for frame in pipe:
+                if frame.image is not None:
+                    self._record(frame)
+                yield frame
+        finally:
+            self._stop_recording()
+
+    def _record(self, frame: DetectedFrame) -> None:
+        config = self._get_event_recording_config()
+        if frame.detections:
+            if not self.is_recording:
+                self._start_recording(frame)
+            self._last_event = frame.occurrence
+        if not self.is_recording:
+            self._buffer(frame, config)
+            return
+        if self._is_too_long(frame.occurrence, config):
+            self._rotate(frame, config)
+        self._write(frame)
+        if self._is_quiet(frame.occurrence, config):
+            self._stop_recording()
+
+    def _start_recording(self, frame: DetectedFrame) -> None:
+        first_frame = self._pre_roll[0] if self._pre_roll else frame
+        output = self._open_video(first_frame.occurrence, frame)
+        logger().info(
+            f"Objects detected. Recording video with {len(self._pre_roll)} frames "
+            f"of pre-roll to '{output}'."
+        )
+        while self._pre_roll:
+            self._write(self._pre_roll.popleft())
+
+    def _rotate(self, frame: DetectedFrame, config: EventRecordingConfig) -> None:
+        self._video_writer.close()
+        output = self._open_video(frame.occurrence, frame)
+        logger().info(
+            f"Objects detected for more than {config.max_video_seconds}s. Continuing "
+            f"recording in '{output}'."
+        )
+
+    def _open_video(self, start: datetime, frame: DetectedFrame) -> str:
+        config = self._get_current_config.get()
+        stream_config = find_stream_config(config, self._stream_name)
+        fps = config.convert.output_fps
+        output = create_stream_output(stream_config, fps, start)
+        height, width = self._image_size(frame)
+        self._video_writer.open(output, width=width, height=height, fps=fps)
+        self._video_start = start
+        return output
+
+    def _stop_recording(self) -> None:
+        if self.is_recording:
+            self._video_writer.close()
+        self._last_event = None
+        self._video_start = None
+
+    def _write(self, frame: DetectedFrame) -> None:
+        if frame.image is not None:
+            self._video_writer.write(frame.image)
+
+    def _buffer(self, frame: DetectedFrame, config: EventRecordingConfig) -> None:
+        fps = self._get_current_config.get().convert.output_fps
+        max_frames = ceil(config.pre_roll_seconds * fps)
+        self._pre_roll.append(frame)
+        while len(self._pre_roll) > max_frames:
+            self._pre_roll.popleft()
+
+    def _is_quiet(self, occurrence: datetime, config: EventRecordingConfig) -> bool:
+        if self._last_event is None:
+            return True
+        quiet_period = timedelta(seconds=config.quiet_period_seconds)
+        return occurrence - self._last_event >= quiet_period
+
+    def _is_too_long(self, occurrence: datetime, config: EventRecordingConfig) -> bool:
+        if self._video_start is None:
+            return False
+        max_duration = timedelta(seconds=config.max_video_seconds)
+        return occurrence - self._video_start >= max_duration
+
+    def _get_event_recording_config(self) -> EventRecordingConfig:
+        config = self._get_current_config.get()
+        return find_stream_config(config, self._stream_name).event_recording
+
+    @staticmethod
+    def _image_size(frame: DetectedFrame) -> tuple[int, int]:
+        if frame.image is None:
+            raise ValueError("Frame has no image to record.")
+        height, width = frame.image.shape[:2]
+        return height, width
@@ -6,12 +6,7 @@ from OTVision.detect.builder import DetectBuilder
 from OTVision.detect.detected_frame_buffer import FlushEvent
 from OTVision.detect.video_input_source import VideoSource
 from OTVision.domain.video_writer import VideoWriter
-from OTVision.plugin.ffmpeg_video_writer import (
-    FfmpegVideoWriter,
-    PixelFormat,
-    VideoFormat,
-    append_save_suffix_to_save_location,
-)
+from OTVision.plugin.ffmpeg_video_writer import append_save_suffix_to_save_location
 
 
 class FileBasedDetectBuilder(DetectBuilder):
@@ -32,15 +27,9 @@ class FileBasedDetectBuilder(DetectBuilder):
         # Using save_location_strategy=keep_original_save_location is not supported for
         # file-based detection. Otherwise, we would be overwriting the input source that
         # we are reading from.
-        return FfmpegVideoWriter(
+        return self._create_video_writer(
             save_location_strategy=append_save_suffix_to_save_location,
-            encoding_speed=self.detect_config.encoding_speed,
-            input_format=VideoFormat.RAW,
-            output_format=VideoFormat.MP4,
-            input_pixel_format=PixelFormat.RGB24,
-            output_pixel_format=PixelFormat.YUV420P,
-            output_video_codec=self.detect_config.video_codec,
-            constant_rate_factor=self.detect_config.crf,
+            drop_frames_if_full=False,
         )
 
     def register_observers(self) -> None:
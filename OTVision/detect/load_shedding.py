@@ -0,0 +1,224 @@
+import math
+import time
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from typing import AsyncIterator, Callable
+
+from OTVision import dataformat
+from OTVision.abstraction.pipes_and_filter import Filter
+from OTVision.application.config import Config, LoadSheddingConfig
+from OTVision.application.configure_logger import logger
+from OTVision.application.get_current_config import GetCurrentConfig
+from OTVision.application.update_current_config import UpdateCurrentConfig
+from OTVision.domain.frame import Frame, FrameKeys, FrameNo
+
+DROP_RATE_RESOLUTION = 0.05
+"""Drop rates are rounded up to multiples of this value to avoid a new decision for
+every small change of the load."""
+
+
+@dataclass(frozen=True)
+class LoadSheddingDecision:
+    """State of load shedding from a frame on.
+
+    Attributes:
+        frame (FrameNo): number of the frame the decision applies from.
+        occurrence (datetime): occurrence of that frame.
+        load (float): average processing time of a frame divided by the frame
+            interval of the stream.
+        drop_rate (float): share of frames that are dropped.
+        img_size (int): image size of the detection.
+    """
+
+    frame: FrameNo
+    occurrence: datetime
+    load: float
+    drop_rate: float
+    img_size: int
+
+    def to_dict(self) -> dict:
+        return {
+            dataformat.FRAME: self.frame,
+            dataformat.OCCURRENCE: self.occurrence.timestamp(),
+            dataformat.LOAD: self.load,
+            dataformat.DROP_RATE: self.drop_rate,
+            dataformat.IMAGE_SIZE: self.img_size,
+        }
+
+
+@dataclass
+class LoadSheddingReport:
+    """Load shedding of the frames written to one output file.
+
+    Attributes:
+        processed_frames (int): number of frames passed on to the detection.
+        dropped_frames (int): number of dropped frames.
+        decisions (list[LoadSheddingDecision]): the state at the first frame and all
+            changes afterwards.
+    """
+
+    processed_frames: int = 0
+    dropped_frames: int = 0
+    decisions: list[LoadSheddingDecision] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            dataformat.PROCESSED_FRAMES: self.processed_frames,
+            dataformat.DROPPED_FRAMES: self.dropped_frames,
+            dataformat.DECISIONS: [decision.to_dict() for decision in self.decisions],
+        }
+
+
+class LoadSheddingController(Filter[Frame, Frame]):
+    """Keeps the detection of a stream in real time by shedding load.
+
+    The controller measures how long processing a frame takes, i.e. the time until
+    the next frame is requested, and relates it to the frame interval of the stream.
+    If the load exceeds the target utilization, frames are dropped at the rate needed
+    to catch up. If the maximum drop rate does not suffice, the image size of the
+    detection is lowered within the configured bounds. When the load drops, the image
+    size is raised back to the configured one as long as the predicted load stays
+    below the target and no frames need to be dropped.
+
+    Dropped frames are not passed on. Hence, the actual fps of the written otdet files
+    reflect the effective frame rate. The decisions are collected per output file and
+    can be added to its metadata.
+
+    Args:
+        get_current_config (GetCurrentConfig): provides the stream and detect config.
+        update_current_config (UpdateCurrentConfig): used to change the image size.
+        clock (Callable[[], float]): monotonic clock in seconds.
+    """
+
+    @property
+    def drop_rate(self) -> float:
+        return self._drop_rate
+
+    def __init__(
+        self,
+        get_current_config: GetCurrentConfig,
+        update_current_config: UpdateCurrentConfig,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        self._get_current_config = get_current_config
+        self._update_current_config = update_current_config
+        self._clock = clock
+        self._drop_rate = 0.0
+        self._drop_credit = 0.0
+        self._load = 0.0
+        self._configured_img_size: int | None = None
+        self._processing_times: list[float] = []
+        self._reports: dict[str, LoadSheddingReport] = {}
+
+    def pop_report(self, output: str) -> LoadSheddingReport | None:
+        """Remove and return the load shedding report of an output file.
+
+        Args:
+            output (str): the output the frames belong to.
+
+        Returns:
+            LoadSheddingReport | None: the report or None, if load shedding was not
+                active for the output.
+        """
+        return self._reports.pop(output, None)
+
+    async def filter(self, pipe: AsyncIterator[Frame]) -> AsyncIterator[Frame]:
+        async for frame in pipe:
+            config = self._get_load_shedding_config()
+            if not config.enabled:
+                yield frame
+                continue
+
+            report = self._get_report(frame)
+            if self._should_drop():
+                report.dropped_frames += 1
+                continue
+
+            start = self._clock()
+            yield frame
+            report.processed_frames += 1
+            self._measure(self._clock() - start, frame, config)
+
+    def _get_load_shedding_config(self) -> LoadSheddingConfig:
+        if stream_config := self._get_current_config.get().stream:
+            return stream_config.load_shedding
+        return LoadSheddingConfig()
+
+    def _get_report(self, frame: Frame) -> LoadSheddingReport:
+        output = frame[FrameKeys.output]
+        if (report := self._reports.get(output)) is None:
+            report = LoadSheddingReport(decisions=[self._create_decision(frame)])
+            self._reports[output] = report
+        return report
+
+    def _should_drop(self) -> bool:
+        self._drop_credit += self._drop_rate
+        if self._drop_credit >= 1:
+            self._drop_credit -= 1
+            return True
+        return False
+
+    def _measure(
+        self, processing_time: float, frame: Frame, config: LoadSheddingConfig
+    ) -> None:
+        self._processing_times.append(processing_time)
+        if len(self._processing_times) < config.measurement_window:
+            return
+        mean_processing_time = sum(self._processing_times) / len(self._processing_times)
+        self._processing_times = []
+        self._decide(mean_processing_time, frame, config)
+
+    def _decide(
+        self, mean_processing_time: float, frame: Frame, config: LoadSheddingConfig
+    ) -> None:
+        current_config = self._get_current_config.get()
+        frame_interval = 1 / current_config.convert.output_fps
+        self._load = mean_processing_time / frame_interval
+        img_size = current_config.detect.img_size
+        if self._configured_img_size is None:
+            self._configured_img_size = img_size
+
+        required_drop_rate = (
+            max(0.0, 1 - config.target_utilization / self._load) if self._load else 0.0
+        )
+        drop_rate = min(self._round_up(required_drop_rate), config.max_drop_rate)
+        new_img_size = img_size
+        if required_drop_rate > config.max_drop_rate:
+            new_img_size = max(config.min_img_size, img_size - config.img_size_step)
+        elif required_drop_rate == 0 and img_size < self._configured_img_size:
+            candidate = min(self._configured_img_size, img_size + config.img_size_step)
+            predicted_load = self._load * (candidate / img_size) ** 2
+            if predicted_load < config.target_utilization:
+                new_img_size = candidate
+
+        if drop_rate == self._drop_rate and new_img_size == img_size:
+            return
+        self._drop_rate = drop_rate
+        if new_img_size != img_size:
+            self._update_img_size(current_config, new_img_size)
+        decision = self._create_decision(frame)
+        self._get_report(frame).decisions.append(decision)
+        logger().info(
+            f"Load shedding: load {decision.load:.2f}, "
+            f"dropping {decision.drop_rate:.0%} of frames, "
+            f"image size {decision.img_size}"
+        )
+
+    @staticmethod
+    def _round_up(drop_rate: float) -> float:
+        steps = math.ceil(round(drop_rate / DROP_RATE_RESOLUTION, 6))
+        return round(steps * DROP_RATE_RESOLUTION, 2)
+
+    def _update_img_size(self, config: Config, img_size: int) -> None:
+        yolo_config = replace(config.detect.yolo_config, img_size=img_size)
+        detect_config = replace(config.detect, yolo_config=yolo_config)
+        self._update_current_config.update(replace(config, detect=detect_config))
+
+    def _create_decision(self, frame: Frame) -> LoadSheddingDecision:
+        return LoadSheddingDecision(
+            frame=frame[FrameKeys.frame],
+            occurrence=frame[FrameKeys.occurrence],
+            load=self._load,
+            drop_rate=self._drop_rate,
+            img_size=self._get_current_config.get().detect.img_size,
+        )
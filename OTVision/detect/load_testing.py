@@ -0,0 +1,367 @@
+import asyncio
+import math
+import sys
+from dataclasses import dataclass, replace
+from functools import cached_property
+from pathlib import Path
+from time import monotonic
+from typing import Callable
+
+from OTVision.application.config import Config, StreamConfig
+from OTVision.application.configure_logger import ConfigureLogger
+from OTVision.application.detect.current_object_detector import CurrentObjectDetector
+from OTVision.application.io_executor import IoExecutor
+from OTVision.application.loop_monitor import BlockingSummary
+from OTVision.application.metrics import MetricsRegistry
+from OTVision.detect.multi_stream_detect_builder import MultiStreamDetectBuilder
+from OTVision.detect.rtsp_based_detect_builder import (
+    FLUSH_BUFFER_SIZE,
+    RtspBasedDetectBuilder,
+)
+from OTVision.detect.rtsp_input_source import RtspCaptureFactory
+from OTVision.detect.simulated_camera import (
+    NO_FAULTS,
+    SimulatedCameraFaults,
+    SimulatedCaptureFactory,
+)
+from OTVision.domain.current_config import CurrentConfig
+from OTVision.domain.object_detection import ObjectDetectorFactory
+from OTVision.domain.time import CurrentDatetimeProvider, DatetimeProvider
+
+SIMULATED_SOURCE_PREFIX = "simulated://"
+
+
+def create_simulated_streams(
+    config: Config, number_of_streams: int, save_dir: Path
+) -> list[StreamConfig]:
+    """Create the configs of simulated cameras.
+
+    The first stream of the config serves as template. If there is none, the stream
+    defaults are used.
+
+    Args:
+        config (Config): the config to take the template from.
+        number_of_streams (int): number of simulated cameras.
+        save_dir (Path): directory to save the outputs of all cameras to.
+
+    Returns:
+        list[StreamConfig]: the configs of the simulated cameras.
+    """
+    template = (
+        config.streams[0]
+        if config.streams
+        else StreamConfig(
+            name="", source="", save_dir=save_dir, flush_buffer_size=FLUSH_BUFFER_SIZE
+        )
+    )
+    return [
+        replace(
+            template,
+            name=f"camera{index}",
+            source=f"{SIMULATED_SOURCE_PREFIX}camera{index}",
+            save_dir=save_dir,
+        )
+        for index in range(1, number_of_streams + 1)
+    ]
+
+
+class SimulatedStreamDetectBuilder(RtspBasedDetectBuilder):
+    """Builds the detection of a single simulated camera.
+
+    Args:
+        simulated_capture_factory (SimulatedCaptureFactory): creates the captures
+            replaying the camera's video.
+    """
+
+    def __init__(
+        self,
+        simulated_capture_factory: SimulatedCaptureFactory,
+        current_config: CurrentConfig,
+        configure_logger: ConfigureLogger,
+        object_detector_factory: ObjectDetectorFactory,
+        stream_name: str,
+        metrics: MetricsRegistry,
+        io_executor: IoExecutor,
+        current_object_detector: CurrentObjectDetector,
+    ) -> None:
+        super().__init__(
+            current_config=current_config,
+            configure_logger=configure_logger,
+            object_detector_factory=object_detector_factory,
+            stream_name=stream_name,
+            metrics=metrics,
+            io_executor=io_executor,
+            current_object_detector=current_object_detector,
+        )
+        self.simulated_capture_factory = simulated_capture_factory
+
+    @cached_property
+    def capture_factory(self) -> RtspCaptureFactory:
+        return self.simulated_capture_factory
+
+
+class SimulatedMultiStreamDetectBuilder(MultiStreamDetectBuilder):
+    """Builds the detection and tracking of the streams of simulated cameras.
+
+    All cameras replay the same video. Apart from capturing, the pipeline is the same
+    as for real cameras.
+
+    Args:
+        video_file (Path): the video the cameras replay.
+        speed (float): multiple of the video's frame rate to deliver frames at.
+        faults (SimulatedCameraFaults): faults to inject into each camera.
+        seed (int | None): seed of the random faults to make runs reproducible.
+    """
+
+    def __init__(
+        self,
+        video_file: Path,
+        speed: float = 1.0,
+        faults: SimulatedCameraFaults = NO_FAULTS,
+        seed: int | None = None,
+        current_config: CurrentConfig | None = None,
+        configure_logger: ConfigureLogger | None = None,
+        object_detector_factory: ObjectDetectorFactory | None = None,
+        metrics: MetricsRegistry | None = None,
+    ) -> None:
+        super().__init__(
+            current_config=current_config,
+            configure_logger=configure_logger,
+            object_detector_factory=object_detector_factory,
+            metrics=metrics,
+        )
+        self._video_file = video_file
+        self._speed = speed
+        self._faults = faults
+        self._seed = seed
+
+    def _create_stream_builder(self, stream_name: str) -> SimulatedStreamDetectBuilder:
+        return SimulatedStreamDetectBuilder(
+            simulated_capture_factory=SimulatedCaptureFactory(
+                datetime_provider=CurrentDatetimeProvider(),
+                video_file=self._video_file,
+                speed=self._speed,
+                faults=self._faults,
+                seed=self._stream_seed(stream_name),
+            ),
+            current_config=self.current_config,
+            configure_logger=self.configure_logger,
+            object_detector_factory=self.object_detector_factory,
+            stream_name=stream_name,
+            metrics=self.metrics,
+            io_executor=self.io_executor,
+            current_object_detector=self.current_object_detector,
+        )
+
+    def _stream_seed(self, stream_name: str) -> int | None:
+        if self._seed is None:
+            return None
+        names = [stream_config.name for stream_config in self.stream_configs]
+        return self._seed + names.index(stream_name)
+
+
+@dataclass(frozen=True)
+class StreamLoadReport:
+    """Measurements of a single stream of a load test.
+
+    Attributes:
+        name (str): name of the stream.
+        frames (int): number of frames that passed the whole pipeline.
+        fps (float): frames per second that passed the whole pipeline.
+        latency_p50 (float): median seconds from capturing a frame until it has
+            passed the pipeline.
+        latency_p95 (float): 95th percentile of the latency in seconds.
+        latency_p99 (float): 99th percentile of the latency in seconds.
+        latency_max (float): maximum latency in seconds.
+        capture_drops (int): frames dropped because the detection fell behind.
+        injected_drops (int): frames lost on purpose by the simulated camera.
+        stalls (int): injected stalls of the simulated camera.
+        disconnects (int): injected disconnects of the simulated camera.
+    """
+
+    name: str
+    frames: int
+    fps: float
+    latency_p50: float
+    latency_p95: float
+    latency_p99: float
+    latency_max: float
+    capture_drops: int
+    injected_drops: int
+    stalls: int
+    disconnects: int
+
+
+@dataclass(frozen=True)
+class LoadTestReport:
+    """Measurements of a load test.
+
+    Attributes:
+        duration_seconds (float): seconds the streams ran.
+        streams (list[StreamLoadReport]): measurements per stream.
+        baseline_memory_bytes (int | None): peak memory of the process before the
+            streams started, i.e. including the loaded model. None, if the platform
+            does not provide it.
+        peak_memory_bytes (int | None): peak memory of the process.
+        blocking (BlockingSummary | None): stalls of the event loop, if it has been
+            monitored.
+    """
+
+    duration_seconds: float
+    streams: list[StreamLoadReport]
+    baseline_memory_bytes: int | None
+    peak_memory_bytes: int | None
+    blocking: BlockingSummary | None = None
+
+    @property
+    def memory_per_stream_bytes(self) -> int | None:
+        """Additional peak memory of the streams divided by their number."""
+        if (
+            self.baseline_memory_bytes is None
+            or self.peak_memory_bytes is None
+            or not self.streams
+        ):
+            return None
+        return (self.peak_memory_bytes - self.baseline_memory_bytes) // len(
+            self.streams
+        )
+
+    def to_text(self) -> str:
+        lines = [
+            f"Load test of {len(self.streams)} streams "
+            f"for {self.duration_seconds:.1f}s",
+            f"{'stream':<12}{'frames':>8}{'fps':>8}{'p50 ms':>9}{'p95 ms':>9}"
+            f"{'p99 ms':>9}{'max ms':>9}{'dropped':>9}{'injected':>10}"
+            f"{'stalls':>8}{'disconn.':>10}",
+        ]
+        for stream in self.streams:
+            lines.append(
+                f"{stream.name:<12}{stream.frames:>8}{stream.fps:>8.1f}"
+                f"{stream.latency_p50 * 1000:>9.0f}{stream.latency_p95 * 1000:>9.0f}"
+                f"{stream.latency_p99 * 1000:>9.0f}{stream.latency_max * 1000:>9.0f}"
+                f"{stream.capture_drops:>9}{stream.injected_drops:>10}"
+                f"{stream.stalls:>8}{stream.disconnects:>10}"
+            )
+        if (peak := self.peak_memory_bytes) is not None:
+            lines.append(f"Peak memory: {peak / 2**20:.0f} MiB")
+        if (per_stream := self.memory_per_stream_bytes) is not None:
+            lines.append(f"Memory per stream: {per_stream / 2**20:.1f} MiB")
+        if self.blocking is not None:
+            lines.append(self.blocking.to_text())
+        return "\n".join(lines)
+
+
+def percentile(values: list[float], share: float) -> float:
+    """Return the nearest-rank percentile of the values or 0, if there are none."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(math.ceil(share * len(ordered)) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def peak_memory_bytes() -> int | None:
+    """Return the peak resident memory of the process, if the platform provides it."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kibibytes, macOS bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class StreamLoadTest:
+    """Runs the streams of simulated cameras through the pipeline and measures them.
+
+    Args:
+        builder (SimulatedMultiStreamDetectBuilder): builds the pipeline.
+        duration_seconds (float): seconds to run the streams for.
+        datetime_provider (DatetimeProvider): provides the time frames leave the
+            pipeline.
+        clock (Callable[[], float]): measures the duration of the run.
+        memory_probe (Callable[[], int | None]): measures the peak memory.
+    """
+
+    def __init__(
+        self,
+        builder: SimulatedMultiStreamDetectBuilder,
+        duration_seconds: float,
+        datetime_provider: DatetimeProvider = CurrentDatetimeProvider(),
+        clock: Callable[[], float] = monotonic,
+        memory_probe: Callable[[], int | None] = peak_memory_bytes,
+    ) -> None:
+        self._builder = builder
+        self._duration_seconds = duration_seconds
+        self._datetime_provider = datetime_provider
+        self._clock = clock
+        self._memory_probe = memory_probe
+
+    async def run(self) -> LoadTestReport:
+        self._builder.build()
+        baseline_memory = self._memory_probe()
+        streams_by_source = {
+            stream.builder.stream_config.source: stream.lane.name
+            for stream in self._builder.streams
+        }
+        latencies: dict[str, list[float]] = {
+            name: [] for name in streams_by_source.values()
+        }
+        loop_monitor = self._builder.loop_monitor
+        if loop_monitor is not None:
+            loop_monitor.start()
+        start = self._clock()
+        stop = asyncio.get_running_loop().call_later(self._duration_seconds, self.stop)
+        try:
+            async for frame in self._builder.detected_frame_producer.produce():
+                latency = self._datetime_provider.provide() - frame.occurrence
+                latencies[streams_by_source[frame.source]].append(
+                    latency.total_seconds()
+                )
+        finally:
+            stop.cancel()
+            await asyncio.to_thread(self._builder.io_executor.shutdown)
+        duration = self._clock() - start
+        blocking = loop_monitor.stop() if loop_monitor is not None else None
+        return LoadTestReport(
+            duration_seconds=duration,
+            streams=[
+                self._report(stream.builder, stream.lane.name, latencies, duration)
+                for stream in self._builder.streams
+            ],
+            baseline_memory_bytes=baseline_memory,
+            peak_memory_bytes=self._memory_probe(),
+            blocking=blocking,
+        )
+
+    def stop(self) -> None:
+        """Stop all streams. Frames already captured still pass the pipeline."""
+        for stream in self._builder.streams:
+            stream.builder.input_source.stop()
+
+    @staticmethod
+    def _report(
+        builder: RtspBasedDetectBuilder,
+        name: str,
+        latencies: dict[str, list[float]],
+        duration: float,
+    ) -> StreamLoadReport:
+        stream_latencies = latencies[name]
+        captures = (
+            builder.simulated_capture_factory.captures
+            if isinstance(builder, SimulatedStreamDetectBuilder)
+            else []
+        )
+        return StreamLoadReport(
+            name=name,
+            frames=len(stream_latencies),
+            fps=len(stream_latencies) / duration if duration > 0 else 0.0,
+            latency_p50=percentile(stream_latencies, 0.5),
+            latency_p95=percentile(stream_latencies, 0.95),
+            latency_p99=percentile(stream_latencies, 0.99),
+            latency_max=max(stream_latencies, default=0.0),
+            capture_drops=builder.input_source.dropped_frames,
+            injected_drops=sum(capture.injected_drops for capture in captures),
+            stalls=sum(capture.stalls for capture in captures),
+            disconnects=sum(capture.disconnects for capture in captures),
+        )
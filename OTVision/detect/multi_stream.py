@@ -0,0 +1,251 @@
+import asyncio
+from collections import deque
+from typing import AsyncIterator
+
+from OTVision.abstraction.observer import AsyncObservable, AsyncSubject
+from OTVision.abstraction.pipes_and_filter import Filter
+from OTVision.detect.detected_frame_buffer import FlushEvent
+from OTVision.domain.detect_producer_consumer import DetectedFrameProducer
+from OTVision.domain.frame import DetectedFrame, Frame, FrameKeys
+from OTVision.domain.input_source_detect import InputSourceDetect
+
+DEFAULT_LANE_QUEUE_SIZE = 2
+
+
+class EndOfStream:
+    """Marks that a stream of a multi stream detection has no more frames."""
+
+
+END_OF_STREAM = EndOfStream()
+
+type LaneInput = Frame | FlushEvent | EndOfStream
+type LaneOutput = DetectedFrame | FlushEvent | EndOfStream
+type DetectedFrameOrEnd = DetectedFrame | EndOfStream
+
+
+class StreamLane(AsyncObservable[FlushEvent]):
+    """Connects a single stream of a multi stream detection to the shared detection.
+
+    Frames of the stream are queued until the shared detection takes them. Detected
+    frames are routed back to the lane and passed through the stream's own filters,
+    e.g. buffering and tracking. Flush events of the stream are queued together with
+    the frames. They are notified to the lane's observers once all frames preceding
+    them have passed the stream's filters.
+
+    Args:
+        name (str): name of the stream.
+        input_source (InputSourceDetect): the source of the stream's frames.
+        subject (AsyncSubject[FlushEvent]): notifies the stream's flush observers.
+        detected_frame_filter (Filter[DetectedFrame, DetectedFrame]): filters the
+            detected frames of the stream.
+        frame_filter (Filter[Frame, Frame] | None): filters the frames of the stream
+            before they are detected, e.g. to write them to a video file.
+        queue_size (int): maximum number of queued frames in each direction.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        input_source: InputSourceDetect,
+        subject: AsyncSubject[FlushEvent],
+        detected_frame_filter: Filter[DetectedFrame, DetectedFrame],
+        frame_filter: Filter[Frame, Frame] | None = None,
+        queue_size: int = DEFAULT_LANE_QUEUE_SIZE,
+    ) -> None:
+        super().__init__(subject)
+        self.name = name
+        self._input_source = input_source
+        self._detected_frame_filter = detected_frame_filter
+        self._frame_filter = frame_filter
+        self._input: asyncio.Queue[Frame | FlushEvent] = asyncio.Queue(queue_size)
+        self._output: asyncio.Queue[LaneOutput] = asyncio.Queue(queue_size)
+        self._input_available = asyncio.Event()
+        self._exhausted = False
+        self._submitted_frames = 0
+        self._routed_frames = 0
+        self._pending_markers: deque[tuple[int, FlushEvent | EndOfStream]] = deque()
+
+    async def on_flush(self, event: FlushEvent) -> None:
+        """Queue a flush event of the stream behind the frames it belongs to."""
+        await self._put(event)
+
+    async def pump(self, input_available: asyncio.Event) -> None:
+        """Queue the frames of the stream until it ends.
+
+        Args:
+            input_available (asyncio.Event): set whenever the lane has queued input.
+        """
+        self._input_available = input_available
+        try:
+            async for frame in self._frames():
+                await self._put(frame)
+        finally:
+            self._exhausted = True
+            self._input_available.set()
+
+    def _frames(self) -> AsyncIterator[Frame]:
+        frames = self._input_source.produce()
+        if self._frame_filter is None:
+            return frames
+        return self._frame_filter.filter(frames)
+
+    async def _put(self, element: Frame | FlushEvent) -> None:
+        await self._input.put(element)
+        self._input_available.set()
+
+    def take(self) -> LaneInput | None:
+        """Take the next queued element without waiting.
+
+        Returns:
+            LaneInput | None: the next element or None, if nothing is queued. Once
+                the stream is exhausted and all its elements have been taken, the end
+                of the stream is returned.
+        """
+        try:
+            element = self._input.get_nowait()
+        except asyncio.QueueEmpty:
+            return END_OF_STREAM if self._exhausted else None
+        if not isinstance(element, FlushEvent):
+            self._submitted_frames += 1
+        return element
+
+    async def mark(self, marker: FlushEvent | EndOfStream) -> None:
+        """Pass a marker to the stream's filters after all submitted frames."""
+        if self._routed_frames == self._submitted_frames:
+            await self._output.put(marker)
+        else:
+            self._pending_markers.append((self._submitted_frames, marker))
+
+    async def route(self, detected_frame: DetectedFrame) -> None:
+        """Pass a detected frame of this stream to the stream's filters."""
+        await self._output.put(detected_frame)
+        self._routed_frames += 1
+        while (
+            self._pending_markers and self._pending_markers[0][0] <= self._routed_frames
+        ):
+            await self._output.put(self._pending_markers.popleft()[1])
+
+    async def forward(self, results: asyncio.Queue[DetectedFrameOrEnd]) -> None:
+        """Pass the detected frames through the stream's filters into results."""
+        async for detected_frame in self._detected_frame_filter.filter(
+            self._detected_frames()
+        ):
+            await results.put(detected_frame)
+
+    async def _detected_frames(self) -> AsyncIterator[DetectedFrame]:
+        while True:
+            element = await self._output.get()
+            if isinstance(element, EndOfStream):
+                return
+            if isinstance(element, FlushEvent):
+                await self._subject.notify(element)
+                await self._subject.wait_for_all_observers()
+                continue
+            yield element
+
+
+class MultiStreamInputSource(InputSourceDetect):
+    """Merges the frames of multiple streams for a shared detection.
+
+    Streams are served in turns. Each turn takes at most one frame of each stream, so
+    a stream delivering frames faster than others cannot hold them back. Frames of
+    different streams that follow each other can thereby be detected in one batch.
+
+    Args:
+        lanes (list[StreamLane]): the lanes of the streams to merge.
+    """
+
+    def __init__(self, lanes: list[StreamLane]) -> None:
+        self.lanes = lanes
+        self._lanes_by_source: dict[str, StreamLane] = {}
+
+    async def produce(self) -> AsyncIterator[Frame]:
+        input_available = asyncio.Event()
+        pumps = [
+            asyncio.create_task(lane.pump(input_available), name=f"pump-{lane.name}")
+            for lane in self.lanes
+        ]
+        active = list(self.lanes)
+        try:
+            while active:
+                input_available.clear()
+                took_any = False
+                for lane in list(active):
+                    if (element := lane.take()) is None:
+                        continue
+                    took_any = True
+                    if isinstance(element, EndOfStream):
+                        active.remove(lane)
+                        await lane.mark(element)
+                    elif isinstance(element, FlushEvent):
+                        await lane.mark(element)
+                    else:
+                        self._lanes_by_source[element[FrameKeys.source]] = lane
+                        yield element
+                if not took_any:
+                    await input_available.wait()
+            await asyncio.gather(*pumps)
+        finally:
+            for pump in pumps:
+                pump.cancel()
+            await asyncio.gather(*pumps, return_exceptions=True)
+
+    async def route(self, detected_frame: DetectedFrame) -> None:
+        """Pass a detected frame back to the lane of the stream it belongs to."""
+        await self._lanes_by_source[detected_frame.source].route(detected_frame)
+
+
+class MultiStreamDetectedFrameProducer(DetectedFrameProducer):
+    """Detects the frames of multiple streams with a single detection.
+
+    Detected frames are routed back to their streams and passed through the stream's
+    own filters. The detected frames of all streams are produced in the order they
+    leave the stream's filters.
+
+    Args:
+        input_source (MultiStreamInputSource): merges the frames of all streams.
+        detection_filter (Filter[Frame, DetectedFrame]): the shared detection.
+    """
+
+    def __init__(
+        self,
+        input_source: MultiStreamInputSource,
+        detection_filter: Filter[Frame, DetectedFrame],
+    ) -> None:
+        self._input_source = input_source
+        self._detection_filter = detection_filter
+
+    async def produce(self) -> AsyncIterator[DetectedFrame]:
+        results: asyncio.Queue[DetectedFrameOrEnd] = asyncio.Queue(
+            DEFAULT_LANE_QUEUE_SIZE
+        )
+        tasks = [asyncio.create_task(self._detect(), name="multi-stream-detect")]
+        tasks.extend(
+            asyncio.create_task(lane.forward(results), name=f"forward-{lane.name}")
+            for lane in self._input_source.lanes
+        )
+        finished = asyncio.create_task(self._finish(tasks, results))
+        try:
+            while not isinstance(result := await results.get(), EndOfStream):
+                yield result
+            await finished
+        finally:
+            for task in [*tasks, finished]:
+                task.cancel()
+            await asyncio.gather(*tasks, finished, return_exceptions=True)
+
+    async def _detect(self) -> None:
+        async for detected_frame in self._detection_filter.filter(
+            self._input_source.produce()
+        ):
+            await self._input_source.route(detected_frame)
+
+    async def _finish(
+        self,
+        tasks: list[asyncio.Task[None]],
+        results: asyncio.Queue[DetectedFrameOrEnd],
+    ) -> None:
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            await results.put(END_OF_STREAM)
@@ -0,0 +1,326 @@
+from dataclasses import dataclass
+from functools import cached_property
+
+from OTVision.abstraction.observer import AsyncSubject
+from OTVision.abstraction.pipes_and_filter import ChainedFilter, Filter
+from OTVision.application.config import StreamConfig
+from OTVision.application.track.ottrk import OttrkBuilder
+from OTVision.application.track.tracking_run_id import (
+    CurrentTrackingRunId,
+    GenerateNewTrackingRunId,
+    GetCurrentTrackingRunId,
+)
+from OTVision.detect.builder import DetectBuilder
+from OTVision.detect.detect import OTVisionVideoDetect
+from OTVision.detect.detected_frame_buffer import FlushEvent
+from OTVision.detect.detection_forwarder import DetectionForwarder
+from OTVision.detect.multi_stream import (
+    MultiStreamDetectedFrameProducer,
+    MultiStreamInputSource,
+    StreamLane,
+)
+from OTVision.detect.otdet import OtdetMetadataBuilder
+from OTVision.detect.rtsp_based_detect_builder import RtspBasedDetectBuilder
+from OTVision.domain.detect_producer_consumer import DetectedFrameProducer
+from OTVision.domain.frame import DetectedFrame, TrackedFrame
+from OTVision.domain.message_sink import MessageSink
+from OTVision.domain.time import CurrentDatetimeProvider
+from OTVision.domain.video_writer import VideoWriter
+from OTVision.plugin.spooling_tcp_sink import SpoolingTcpMessageSink
+from OTVision.plugin.unix_socket_sink import UnixSocketMessageSink
+from OTVision.track.checkpoint import CheckpointedStream, TrackingCheckpointer
+from OTVision.track.id_generator import track_id_generator, tracking_run_uuid_generator
+from OTVision.track.stream_ottrk_file_writer import (
+    OttrkFileWrittenEvent,
+    StreamOttrkFileWriter,
+)
+from OTVision.track.stream_tracker import StreamTracker
+from OTVision.track.tracked_frame_publisher import (
+    TrackedFramePublisher,
+    TrackedFrameSerializer,
+)
+from OTVision.track.tracker.tracker_plugin_iou import IouTracker
+
+
+@dataclass(frozen=True)
+class StreamComponents:
+    """Components that exist once per stream of a multi stream detection."""
+
+    builder: RtspBasedDetectBuilder
+    lane: StreamLane
+    ottrk_file_writer: StreamOttrkFileWriter | None = None
+    detection_forwarder: DetectionForwarder | None = None
+
+
+class MultiStreamDetectBuilder(DetectBuilder):
+    """Builds the detection and tracking of all streams of the `STREAMS` config section.
+
+    All streams share the config and a single object detection model. Frames of all
+    streams are detected together, while capturing, video writing, buffering, tracking
+    and writing otdet and ottrk files happen per stream. If publishing is enabled, the
+    tracked frames of all streams are published via a single message sink. If
+    checkpoints are enabled, the tracking state of all streams is saved periodically
+    and restored on startup.
+
+    If forwarding is enabled, the detected frames of all streams are sent to an
+    ingestion server instead of being tracked locally.
+    """
+
+    @property
+    def stream_configs(self) -> list[StreamConfig]:
+        if streams := self.get_current_config.get().streams:
+            return streams
+        raise ValueError(
+            "Streams are not provided. "
+            "Running OTVision in multi stream mode requires the streams config"
+        )
+
+    @cached_property
+    def streams(self) -> list[StreamComponents]:
+        return [
+            self._create_stream_components(stream_config.name)
+            for stream_config in self.stream_configs
+        ]
+
+    @property
+    def flushes_in_band(self) -> bool:
+        # Flush events are queued in the lanes behind the frames they belong to.
+        return True
+
+    @cached_property
+    def input_source(self) -> MultiStreamInputSource:
+        return MultiStreamInputSource([stream.lane for stream in self.streams])
+
+    @property
+    def video_file_writer(self) -> VideoWriter:
+        raise NotImplementedError(
+            "Videos are written per stream in multi stream mode. "
+            "See the video file writers of the stream builders."
+        )
+
+    @cached_property
+    def detected_frame_producer(self) -> DetectedFrameProducer:
+        return MultiStreamDetectedFrameProducer(
+            input_source=self.input_source,
+            detection_filter=self.current_object_detector,
+        )
+
+    @cached_property
+    def message_sink(self) -> MessageSink | None:
+        publish_config = self.get_current_config.get().publish
+        if not publish_config.enabled:
+            return None
+        return UnixSocketMessageSink(
+            path=publish_config.socket,
+            queue_size=publish_config.subscriber_queue_size,
+            metrics=self.metrics,
+        )
+
+    @cached_property
+    def detection_sink(self) -> MessageSink | None:
+        forward_config = self.get_current_config.get().forward
+        if not forward_config.enabled:
+            return None
+        return SpoolingTcpMessageSink(
+            host=forward_config.host,
+            port=forward_config.port,
+            spool_file=forward_config.spool_file,
+            retry_seconds=forward_config.retry_seconds,
+            io_executor=self.io_executor,
+            queue_size=forward_config.queue_size,
+            send_timeout_seconds=forward_config.send_timeout_seconds,
+            metrics=self.metrics,
+        )
+
+    @cached_property
+    def tracking_checkpointer(self) -> TrackingCheckpointer | None:
+        checkpoint_config = self.get_current_config.get().checkpoint
+        if not checkpoint_config.enabled:
+            return None
+        return TrackingCheckpointer(
+            file=checkpoint_config.file,
+            interval_seconds=checkpoint_config.interval_seconds,
+            get_current_config=self.get_current_config,
+            current_tracking_run_id=self.current_tracking_run_id,
+            datetime_provider=CurrentDatetimeProvider(),
+            io_executor=self.io_executor,
+        )
+
+    @cached_property
+    def current_tracking_run_id(self) -> CurrentTrackingRunId:
+        return CurrentTrackingRunId()
+
+    @cached_property
+    def generate_new_tracking_run_id(self) -> GenerateNewTrackingRunId:
+        return GenerateNewTrackingRunId(
+            tracking_run_uuid_generator, self.current_tracking_run_id
+        )
+
+    def _create_stream_builder(self, stream_name: str) -> RtspBasedDetectBuilder:
+        return RtspBasedDetectBuilder(
+            current_config=self.current_config,
+            configure_logger=self.configure_logger,
+            object_detector_factory=self.object_detector_factory,
+            stream_name=stream_name,
+            metrics=self.metrics,
+            io_executor=self.io_executor,
+            current_object_detector=self.current_object_detector,
+        )
+
+    def _create_stream_components(self, stream_name: str) -> StreamComponents:
+        builder = self._create_stream_builder(stream_name)
+        if (sink := self.detection_sink) is not None:
+            return self._create_forwarding_components(stream_name, builder, sink)
+        ottrk_file_writer = StreamOttrkFileWriter(
+            subject=AsyncSubject[OttrkFileWrittenEvent](),
+            builder=OttrkBuilder(OtdetMetadataBuilder()),
+            get_current_config=self.get_current_config,
+            get_current_tracking_run_id=GetCurrentTrackingRunId(
+                self.current_tracking_run_id
+            ),
+            save_path_provider=self.detection_file_save_path_provider,
+            io_executor=self.io_executor,
+            metrics=builder.pipeline_metrics,
+        )
+        iou_tracker = IouTracker(
+            get_current_config=self.get_current_config,
+            metrics=builder.pipeline_metrics,
+        )
+        tracker = StreamTracker(
+            tracker=iou_tracker, id_generator_factory=track_id_generator
+        )
+        lane = self._create_lane(
+            stream_name,
+            builder,
+            ChainedFilter(
+                self._publish(
+                    stream_name,
+                    builder,
+                    ChainedFilter(self._record_events(builder), tracker),
+                ),
+                self._checkpoint(
+                    stream_name,
+                    CheckpointedStream(
+                        tracker=iou_tracker,
+                        stream_tracker=tracker,
+                        ottrk_file_writer=ottrk_file_writer,
+                    ),
+                ),
+            ),
+        )
+        return StreamComponents(
+            builder=builder, lane=lane, ottrk_file_writer=ottrk_file_writer
+        )
+
+    def _create_forwarding_components(
+        self, stream_name: str, builder: RtspBasedDetectBuilder, sink: MessageSink
+    ) -> StreamComponents:
+        forwarder = DetectionForwarder(
+            stream=stream_name,
+            sink=sink,
+            batch_size=self.get_current_config.get().forward.batch_size,
+            metrics=builder.pipeline_metrics,
+        )
+        lane = self._create_lane(
+            stream_name,
+            builder,
+            ChainedFilter(self._record_events(builder), forwarder),
+        )
+        return StreamComponents(
+            builder=builder, lane=lane, detection_forwarder=forwarder
+        )
+
+    @staticmethod
+    def _create_lane(
+        stream_name: str,
+        builder: RtspBasedDetectBuilder,
+        detected_frame_filter: Filter[DetectedFrame, DetectedFrame],
+    ) -> StreamLane:
+        return StreamLane(
+            name=stream_name,
+            input_source=builder.input_source,
+            subject=AsyncSubject[FlushEvent](),
+            detected_frame_filter=detected_frame_filter,
+            frame_filter=(
+                builder.video_writer_filter if builder.records_continuously else None
+            ),
+        )
+
+    @staticmethod
+    def _record_events(
+        builder: RtspBasedDetectBuilder,
+    ) -> Filter[DetectedFrame, DetectedFrame]:
+        if (event_recorder := builder.event_recorder) is None:
+            return builder.detected_frame_buffer
+        return ChainedFilter(event_recorder, builder.detected_frame_buffer)
+
+    def _publish(
+        self,
+        stream_name: str,
+        builder: RtspBasedDetectBuilder,
+        tracking: Filter[DetectedFrame, TrackedFrame],
+    ) -> Filter[DetectedFrame, TrackedFrame]:
+        if (sink := self.message_sink) is None:
+            return tracking
+        publish_config = self.get_current_config.get().publish
+        metadata = builder.current_object_detector_metadata
+        publisher = TrackedFramePublisher(
+            stream=stream_name,
+            serializer=TrackedFrameSerializer(lambda: metadata.get().classifications),
+            sink=sink,
+            batch_size=publish_config.batch_size,
+            max_batch_delay_seconds=publish_config.max_batch_delay_seconds,
+            metrics=builder.pipeline_metrics,
+        )
+        return ChainedFilter(tracking, publisher)
+
+    def _checkpoint(
+        self, stream_name: str, stream: CheckpointedStream
+    ) -> Filter[TrackedFrame, TrackedFrame]:
+        if (checkpointer := self.tracking_checkpointer) is None:
+            return stream.ottrk_file_writer
+        checkpointer.add_stream(stream_name, stream)
+        return ChainedFilter(
+            stream.ottrk_file_writer, checkpointer.create_filter(stream_name)
+        )
+
+    def register_observers(self) -> None:
+        for stream in self.streams:
+            input_source = stream.builder.input_source
+            self.current_object_detector.register(input_source.notify_new_config)
+            if stream.builder.records_continuously:
+                video_file_writer = stream.builder.video_file_writer
+                input_source.subject_new_video_start.register(
+                    video_file_writer.notify_on_new_video_start
+                )
+                input_source.subject_flush.register(
+                    video_file_writer.notify_on_flush_event
+                )
+            # Flushes are passed through the lane to keep them in order with the
+            # frames that are still being detected.
+            input_source.subject_flush.register(stream.lane.on_flush)
+            stream.lane.register(stream.builder.detected_frame_buffer.on_flush)
+            stream.builder.detected_frame_buffer.register(
+                stream.builder.otdet_file_writer.write
+            )
+            if stream.ottrk_file_writer is not None:
+                stream.builder.otdet_file_writer.register_observer(
+                    stream.ottrk_file_writer.on_flush
+                )
+            if stream.detection_forwarder is not None:
+                stream.builder.otdet_file_writer.register_observer(
+                    stream.detection_forwarder.on_flush
+                )
+
+    def build(self) -> OTVisionVideoDetect:
+        if not self._restore_checkpoint():
+            self.generate_new_tracking_run_id.generate()
+        return super().build()
+
+    def _restore_checkpoint(self) -> bool:
+        if (checkpointer := self.tracking_checkpointer) is None:
+            return False
+        # Streams are added to the checkpointer when their components are created.
+        if not self.streams:
+            return False
+        return checkpointer.restore()
@@ -5,7 +5,7 @@ from pathlib import Path
 from typing import Self
 
 from OTVision import dataformat, version
-from OTVision.domain.detection import Detection
+from OTVision.domain.detection import ClassMapping, Detection
 from OTVision.domain.frame import DetectedFrame
 from OTVision.helpers.date import parse_datetime
 from OTVision.helpers.files import (
@@ -35,9 +35,78 @@ class OtdetBuilderConfig:
     detection_model: str | Path
     half_precision: bool
     chunksize: int
-    classifications: dict[int, str]
+    classifications: ClassMapping
     detect_start: int | None
     detect_end: int | None
+    load_shedding: dict | None = None
+
+    def to_dict(self) -> dict:
+        """Serialize the config to JSON compatible types."""
+        return {
+            "conf": self.conf,
+            "iou": self.iou,
+            "source": self.source,
+            "video_width": self.video_width,
+            "video_height": self.video_height,
+            "expected_duration": (
+                self.expected_duration.total_seconds()
+                if self.expected_duration is not None
+                else None
+            ),
+            "actual_duration": self.actual_duration.total_seconds(),
+            "recorded_fps": self.recorded_fps,
+            "recorded_start_date": self.recorded_start_date.isoformat(),
+            "actual_fps": self.actual_fps,
+            "actual_frames": self.actual_frames,
+            "detection_img_size": self.detection_img_size,
+            "normalized": self.normalized,
+            "detection_model": str(self.detection_model),
+            "half_precision": self.half_precision,
+            "chunksize": self.chunksize,
+            "classifications": {
+                str(class_id): label for class_id, label in self.classifications.items()
+            },
+            "detect_start": self.detect_start,
+            "detect_end": self.detect_end,
+            "load_shedding": self.load_shedding,
+        }
+
+    @staticmethod
+    def from_dict(data: dict) -> "OtdetBuilderConfig":
+        """Parse a config serialized by `to_dict`.
+
+        Raises:
+            KeyError: if a field is missing.
+        """
+        return OtdetBuilderConfig(
+            conf=float(data["conf"]),
+            iou=float(data["iou"]),
+            source=str(data["source"]),
+            video_width=int(data["video_width"]),
+            video_height=int(data["video_height"]),
+            expected_duration=(
+                timedelta(seconds=expected_duration)
+                if (expected_duration := data["expected_duration"]) is not None
+                else None
+            ),
+            actual_duration=timedelta(seconds=data["actual_duration"]),
+            recorded_fps=float(data["recorded_fps"]),
+            recorded_start_date=datetime.fromisoformat(data["recorded_start_date"]),
+            actual_fps=float(data["actual_fps"]),
+            actual_frames=int(data["actual_frames"]),
+            detection_img_size=int(data["detection_img_size"]),
+            normalized=bool(data["normalized"]),
+            detection_model=str(data["detection_model"]),
+            half_precision=bool(data["half_precision"]),
+            chunksize=int(data["chunksize"]),
+            classifications={
+                int(class_id): str(label)
+                for class_id, label in data["classifications"].items()
+            },
+            detect_start=data["detect_start"],
+            detect_end=data["detect_end"],
+            load_shedding=data["load_shedding"],
+        )
 
 
 class OtdetBuilderError(Exception):
@@ -83,7 +152,7 @@ class OtdetMetadataBuilder:
         return video_config
 
     def _build_detection_config(self) -> dict:
-        return {
+        detection_config = {
             dataformat.OTVISION_VERSION: version.otvision_version(),
             dataformat.MODEL: {
                 dataformat.NAME: "YOLOv8",
@@ -99,6 +168,9 @@ class OtdetMetadataBuilder:
             dataformat.DETECT_START: self.config.detect_start,
             dataformat.DETECT_END: self.config.detect_end,
         }
+        if self.config.load_shedding is not None:
+            detection_config[dataformat.LOAD_SHEDDING] = self.config.load_shedding
+        return detection_config
 
     def add_config(self, config: OtdetBuilderConfig) -> Self:
         self._config = config
@@ -155,7 +227,7 @@ class OtdetBuilder:
 
     def __convert_detection(self, detection: Detection) -> dict:
         return {
-            dataformat.CLASS: detection.label,
+            dataformat.CLASS: self.config.classifications[detection.class_id],
             dataformat.CONFIDENCE: detection.conf,
             dataformat.X: detection.x,
             dataformat.Y: detection.y,
@@ -238,6 +310,21 @@ def extract_otdet_video_length(metadata: dict) -> timedelta:
     return parse_video_length(video_length)
 
 
+def extract_classifications_from_otdet(metadata: dict) -> ClassMapping:
+    """Extract the mapping of class codes to labels of the detection model.
+
+    Args:
+        metadata (dict): otdet metadata.
+
+    Returns:
+        ClassMapping: mapping of class codes to labels. Empty, if the otdet file does
+            not contain the model's classes.
+    """
+    model = metadata.get(dataformat.DETECTION, {}).get(dataformat.MODEL, {})
+    classes = model.get(dataformat.CLASSES) or {}
+    return {int(class_id): label for class_id, label in classes.items()}
+
+
 def extract_hostname_from_otdet(metadata: dict) -> str:
     video_name = Path(metadata[dataformat.VIDEO][dataformat.FILENAME]).name
     match = re.search(
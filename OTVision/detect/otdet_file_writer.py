@@ -1,15 +1,21 @@
 import logging
 from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
+from time import perf_counter
 
 from OTVision.abstraction.observer import AsyncObserver, AsyncSubject
 from OTVision.application.detect.current_object_detector_metadata import (
     CurrentObjectDetectorMetadata,
 )
 from OTVision.application.get_current_config import GetCurrentConfig
+from OTVision.application.io_executor import IoExecutor
+from OTVision.application.metrics import DISABLED_METRICS, MetricsRegistry
 from OTVision.application.otvision_save_path_provider import OtvisionSavePathProvider
 from OTVision.detect.detected_frame_buffer import DetectedFrameBufferEvent
+from OTVision.detect.load_shedding import LoadSheddingController
 from OTVision.detect.otdet import OtdetBuilder, OtdetBuilderConfig
+from OTVision.domain.frame import DetectedFrame
 from OTVision.helpers.files import write_json
 from OTVision.helpers.log import LOGGER_NAME
 
@@ -40,6 +46,11 @@ class OtdetFileWriter:
             metadata about the current object detector.
         save_path_provider (OtvisionSavePathProvider): determines the save path for
             the otdet file to be written.
+        io_executor (IoExecutor): builds, serializes and compresses the otdet file
+            off the event loop.
+        load_shedding (LoadSheddingController | None): provides the load shedding
+            decisions to add to the metadata in streaming mode.
+        metrics (MetricsRegistry): registry to record write metrics in.
 
     """
 
@@ -50,12 +61,24 @@ class OtdetFileWriter:
         get_current_config: GetCurrentConfig,
         current_object_detector_metadata: CurrentObjectDetectorMetadata,
         save_path_provider: OtvisionSavePathProvider,
+        io_executor: IoExecutor,
+        load_shedding: LoadSheddingController | None = None,
+        metrics: MetricsRegistry = DISABLED_METRICS,
     ):
         self._subject = subject
         self._builder = builder
         self._get_current_config = get_current_config
         self._current_object_detector_metadata = current_object_detector_metadata
         self._save_path_provider = save_path_provider
+        self._load_shedding = load_shedding
+        self._io_executor = io_executor
+        self._write_duration_metric = metrics.histogram(
+            "otvision_otdet_write_duration_seconds",
+            "Seconds to build and write an otdet file.",
+        )
+        self._files_written_metric = metrics.counter(
+            "otvision_otdet_files_written_total", "Otdet files written."
+        )
 
     async def write(self, event: DetectedFrameBufferEvent) -> None:
         """Writes detection results to a file in OTDET format.
@@ -69,6 +92,7 @@ class OtdetFileWriter:
 
         """
 
+        start = perf_counter()
         source_metadata = event.source_metadata
         config = self._get_current_config.get()
         detect_config = config.detect
@@ -79,7 +103,9 @@ class OtdetFileWriter:
         else:
             actual_fps = actual_frames / source_metadata.duration.total_seconds()
 
-        class_mapping = self._current_object_detector_metadata.get().classifications
+        model_metadata = self._current_object_detector_metadata.pop(
+            source_metadata.output
+        )
         builder_config = OtdetBuilderConfig(
             conf=detect_config.confidence,
             iou=detect_config.iou,
@@ -94,26 +120,31 @@ class OtdetFileWriter:
             actual_frames=actual_frames,
             detection_img_size=detect_config.img_size,
             normalized=detect_config.normalized,
-            detection_model=detect_config.weights,
+            detection_model=model_metadata.config.weights,
             half_precision=detect_config.half_precision,
             chunksize=1,
-            classifications=class_mapping,
+            classifications=model_metadata.classifications,
             detect_start=detect_config.detect_start,
             detect_end=detect_config.detect_end,
+            load_shedding=self._get_load_shedding_report(source_metadata.output),
         )
-        otdet = self._builder.add_config(builder_config).build(event.frames)
-
         detections_file = self._save_path_provider.provide(
             source_metadata.output, config.filetypes.detect
         )
         detections_file.parent.mkdir(parents=True, exist_ok=True)
-        write_json(
-            otdet,
-            file=detections_file,
-            filetype=config.filetypes.detect,
-            overwrite=detect_config.overwrite,
+        await self._io_executor.run(
+            partial(
+                self._build_and_write,
+                builder_config,
+                event.frames,
+                file=detections_file,
+                filetype=config.filetypes.detect,
+                overwrite=detect_config.overwrite,
+            )
         )
 
+        self._write_duration_metric.observe(perf_counter() - start)
+        self._files_written_metric.inc()
         log.info(f"Successfully detected and wrote {detections_file}")
 
         finished_msg = "Finished detection"
@@ -123,6 +154,28 @@ class OtdetFileWriter:
             builder_config=builder_config,
             save_location=detections_file,
         )
+        # Observers take the frames they buffered for the written segment.
+        await self._subject.wait_for_all_observers()
+
+    def _build_and_write(
+        self,
+        builder_config: OtdetBuilderConfig,
+        frames: list[DetectedFrame],
+        file: Path,
+        filetype: str,
+        overwrite: bool,
+    ) -> None:
+        # Runs on the I/O executor. The builder is not used elsewhere, because each
+        # write waits for the previous one.
+        otdet = self._builder.add_config(builder_config).build(frames)
+        write_json(otdet, file=file, filetype=filetype, overwrite=overwrite)
+
+    def _get_load_shedding_report(self, output: str) -> dict | None:
+        if self._load_shedding is None:
+            return None
+        if report := self._load_shedding.pop_report(output):
+            return report.to_dict()
+        return None
 
     async def __notify(
         self, num_frames: int, builder_config: OtdetBuilderConfig, save_location: Path
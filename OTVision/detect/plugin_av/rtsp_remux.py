@@ -0,0 +1,352 @@
+from datetime import datetime, timedelta
+from time import perf_counter
+from typing import Iterator, Sequence
+
+import av
+from av.container import InputContainer, OutputContainer
+from av.packet import Packet
+from av.stream import Stream
+from av.video.frame import VideoFrame
+
+from OTVision.application.config import (
+    FrameDeliveryPolicy,
+    FrameTimestamps,
+    StreamConfig,
+)
+from OTVision.application.configure_logger import logger
+from OTVision.application.metrics import DISABLED_METRICS, MetricsRegistry
+from OTVision.detect.rtsp_input_source import (
+    DEFAULT_READ_FAIL_THRESHOLD,
+    RETRY_SECONDS,
+    CapturedFrame,
+    RtspCapture,
+    RtspCaptureFactory,
+)
+from OTVision.domain.time import DatetimeProvider
+from OTVision.domain.video_writer import StreamRecorder
+from OTVision.plugin.ffmpeg_video_writer import (
+    VideoSaveLocationStrategy,
+    keep_original_save_location,
+)
+
+# Packets read while probing the stream are delivered in a burst afterwards. Probing
+# only briefly keeps the backlog, and thereby the latency after connecting, small.
+RTSP_OPTIONS = {"rtsp_transport": "tcp", "analyzeduration": "500000"}
+TIMEOUT_SECONDS = 10.0
+MAX_CLOCK_DRIFT_SECONDS = 10.0
+
+
+class PresentationClock:
+    """Derives the occurrence of frames from their presentation timestamps.
+
+    The first timestamp of a connection is anchored to the current time. Subsequent
+    occurrences keep the spacing of the timestamps, independent of when the frames are
+    read. If the timestamps jump backwards or drift away from the wall clock by more
+    than `max_drift_seconds`, e.g. because the camera restarted its timestamps, they
+    are anchored again.
+
+    Args:
+        datetime_provider (DatetimeProvider): provides the time to anchor to.
+        max_drift_seconds (float): maximum deviation from the wall clock.
+    """
+
+    def __init__(
+        self,
+        datetime_provider: DatetimeProvider,
+        max_drift_seconds: float = MAX_CLOCK_DRIFT_SECONDS,
+    ) -> None:
+        self._datetime_provider = datetime_provider
+        self._max_drift = timedelta(seconds=max_drift_seconds)
+        self._anchor_time: datetime | None = None
+        self._anchor_pts = 0.0
+        self._last_pts = 0.0
+
+    def reset(self) -> None:
+        """Anchor the next timestamp again, e.g. after reconnecting."""
+        self._anchor_time = None
+
+    def occurrence(self, pts_seconds: float) -> datetime:
+        now = self._datetime_provider.provide()
+        if self._anchor_time is None or pts_seconds < self._last_pts:
+            return self._anchor(now, pts_seconds)
+        occurrence = self._anchor_time + timedelta(
+            seconds=pts_seconds - self._anchor_pts
+        )
+        if abs(occurrence - now) > self._max_drift:
+            logger().debug(
+                "Presentation timestamps drifted from the wall clock. Anchoring again."
+            )
+            return self._anchor(now, pts_seconds)
+        self._last_pts = pts_seconds
+        return occurrence
+
+    def _anchor(self, now: datetime, pts_seconds: float) -> datetime:
+        self._anchor_time = now
+        self._anchor_pts = pts_seconds
+        self._last_pts = pts_seconds
+        return now
+
+
+class PyAvRtspCapture(RtspCapture):
+    """Captures frames of an RTSP stream by demuxing and decoding it with PyAV.
+
+    If packets are recorded, each captured frame carries the compressed packets
+    demuxed since the previous frame. They can be written into video files without
+    encoding the frames again.
+
+    If frames are dropped because the detection falls behind, frames that no other
+    frame refers to are not decoded at all. These frames are not counted as dropped.
+
+    Args:
+        record_packets (bool): whether to attach the demuxed packets to the frames.
+        timeout (float): seconds to wait for the stream when opening or reading it.
+        pts_timestamps (bool): whether to derive the occurrence of frames from their
+            presentation timestamps instead of the time they are read.
+        metrics (MetricsRegistry): registry to record the decoder latency in.
+    """
+
+    def __init__(
+        self,
+        source: str,
+        datetime_provider: DatetimeProvider,
+        policy: FrameDeliveryPolicy,
+        buffer_size: int,
+        record_packets: bool,
+        read_fail_threshold: int = DEFAULT_READ_FAIL_THRESHOLD,
+        retry_seconds: float = RETRY_SECONDS,
+        timeout: float = TIMEOUT_SECONDS,
+        pts_timestamps: bool = False,
+        metrics: MetricsRegistry = DISABLED_METRICS,
+    ) -> None:
+        super().__init__(
+            source=source,
+            datetime_provider=datetime_provider,
+            policy=policy,
+            buffer_size=buffer_size,
+            read_fail_threshold=read_fail_threshold,
+            retry_seconds=retry_seconds,
+        )
+        self._record_packets = record_packets
+        self._timeout = timeout
+        self._container: InputContainer | None = None
+        self._packets: Iterator[Packet] | None = None
+        self._pending_packets: list[Packet] = []
+        self._clock = PresentationClock(datetime_provider) if pts_timestamps else None
+        self._demux_times: dict[int, float] = {}
+        self._skips_frames = False
+        self._decode_latency_metric = metrics.histogram(
+            "otvision_stream_decode_latency_seconds",
+            "Seconds from demuxing a packet until its frame has been decoded.",
+        )
+
+    def _open(self) -> bool:
+        try:
+            # PyAV's stubs expect numbers.Real, which mypy does not match to float
+            container = av.open(  # type: ignore[call-overload]
+                self.source, mode="r", options=RTSP_OPTIONS, timeout=self._timeout
+            )
+        except av.FFmpegError as cause:
+            logger().debug(f"Couldn't open the RTSP stream {self.source}: {cause}")
+            return False
+        if not container.streams.video:
+            logger().debug(f"RTSP stream {self.source} has no video stream")
+            container.close()
+            return False
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+        self._width = stream.codec_context.width
+        self._height = stream.codec_context.height
+        self._container = container
+        self._packets = container.demux(stream)
+        self._skips_frames = False
+        if self._clock is not None:
+            self._clock.reset()
+        return True
+
+    def _release(self) -> None:
+        if self._container is not None:
+            self._container.close()
+            self._container = None
+        self._packets = None
+        # Packets of an interrupted connection cannot be continued.
+        self._pending_packets = []
+        self._demux_times = {}
+
+    def _capture_frames(self) -> list[CapturedFrame]:
+        if self._packets is None:
+            return []
+        try:
+            packet = next(self._packets)
+            if packet.pts is not None:
+                self._demux_times[packet.pts] = perf_counter()
+            self._skip_frames_if_dropped(packet)
+            decoded_frames = packet.decode()
+        except StopIteration:
+            logger().debug(f"RTSP stream {self.source} ended")
+            self._reconnect()
+            return []
+        except av.FFmpegError as cause:
+            logger().debug(f"Failed to read RTSP stream {self.source}: {cause}")
+            self._handle_read_failure()
+            return []
+        self._consecutive_read_fails = 0
+        if packet.dts is None:
+            # Empty packet flushing the decoder
+            return []
+        if self._record_packets:
+            self._pending_packets.append(packet)
+
+        captured_frames: list[CapturedFrame] = []
+        for frame in decoded_frames:
+            if not isinstance(frame, VideoFrame):
+                continue
+            self._width = frame.width
+            self._height = frame.height
+            self._measure_decode_latency(frame)
+            captured_frames.append(
+                CapturedFrame(
+                    data=frame.to_ndarray(format="rgb24"),
+                    occurrence=self._occurrence_of(frame),
+                    packets=tuple(self._pending_packets),
+                )
+            )
+            self._pending_packets = []
+        return captured_frames
+
+    def _skip_frames_if_dropped(self, packet: Packet) -> None:
+        skips_frames = self._drops_frames
+        if skips_frames != self._skips_frames:
+            # Reference frames are still decoded, so that decoding can continue
+            # seamlessly once the detection has caught up.
+            packet.stream.codec_context.skip_frame = (
+                "NONREF" if skips_frames else "DEFAULT"
+            )
+            self._skips_frames = skips_frames
+
+    def _measure_decode_latency(self, frame: VideoFrame) -> None:
+        if frame.pts is None:
+            return
+        if (demuxed := self._demux_times.pop(frame.pts, None)) is not None:
+            self._decode_latency_metric.observe(perf_counter() - demuxed)
+        # Frames are returned in presentation order. Packets presented earlier have
+        # been decoded or skipped.
+        for pts in [pts for pts in self._demux_times if pts < frame.pts]:
+            del self._demux_times[pts]
+
+    def _occurrence_of(self, frame: VideoFrame) -> datetime:
+        if self._clock is None or frame.time is None:
+            return self._datetime_provider.provide()
+        return self._clock.occurrence(frame.time)
+
+
+class PyAvRtspCaptureFactory(RtspCaptureFactory):
+    """Creates `PyAvRtspCapture` instances for the current stream config.
+
+    Args:
+        record_packets (bool): whether the captures attach the demuxed packets to
+            the frames.
+        metrics (MetricsRegistry): registry to record the decoder latency in.
+    """
+
+    def __init__(
+        self,
+        datetime_provider: DatetimeProvider,
+        record_packets: bool,
+        read_fail_threshold: int = DEFAULT_READ_FAIL_THRESHOLD,
+        metrics: MetricsRegistry = DISABLED_METRICS,
+    ) -> None:
+        super().__init__(datetime_provider, read_fail_threshold)
+        self._record_packets = record_packets
+        self._metrics = metrics
+
+    def create(self, stream_config: StreamConfig) -> RtspCapture:
+        return PyAvRtspCapture(
+            source=stream_config.source,
+            datetime_provider=self._datetime_provider,
+            policy=stream_config.frame_delivery_policy,
+            buffer_size=stream_config.capture_buffer_size,
+            record_packets=self._record_packets,
+            read_fail_threshold=self._read_fail_threshold,
+            pts_timestamps=stream_config.frame_timestamps == FrameTimestamps.PTS,
+            metrics=self._metrics,
+        )
+
+
+class RemuxStreamRecorder(StreamRecorder):
+    """Writes the compressed packets of a stream into video files.
+
+    Packets are copied into the files as they are, i.e. without decoding and encoding
+    them again. A video file can only start with a key frame. Hence, a new segment
+    starts at the first key frame after it has been requested and the previous
+    segment ends with the packets before that key frame. Packets before the first
+    key frame of a recording are skipped.
+
+    If the stream has been reconnected, the current segment ends as the packets of
+    the new connection cannot be appended to it. Recording resumes with the next
+    segment.
+
+    Args:
+        save_location_strategy (VideoSaveLocationStrategy): derives the save location
+            of a video file from the output of the segment.
+    """
+
+    def __init__(
+        self,
+        save_location_strategy: VideoSaveLocationStrategy = keep_original_save_location,
+    ) -> None:
+        self._save_location_strategy = save_location_strategy
+        self._next_output: str | None = None
+        self._container: OutputContainer | None = None
+        self._input_stream: Stream | None = None
+        self._output_stream: Stream | None = None
+        self._offset: int | None = None
+
+    def start_segment(self, output: str) -> None:
+        self._next_output = output
+
+    def record(self, packets: Sequence[Packet]) -> None:
+        for packet in packets:
+            self._record(packet)
+
+    def _record(self, packet: Packet) -> None:
+        if self._next_output is not None and packet.is_keyframe:
+            self._open(self._next_output, packet.stream)
+            self._next_output = None
+        elif self._input_stream is not None and packet.stream is not self._input_stream:
+            logger().warning(
+                "Stream has been reconnected. Recording resumes with the next video."
+            )
+            self._close_segment()
+
+        if self._container is None or self._output_stream is None:
+            return
+        if self._offset is None:
+            self._offset = packet.dts
+        # Each video file starts at timestamp 0.
+        packet.dts -= self._offset
+        if packet.pts is not None:
+            packet.pts -= self._offset
+        packet.stream = self._output_stream
+        self._container.mux(packet)
+
+    def _open(self, output: str, input_stream: Stream) -> None:
+        self._close_segment()
+        save_file = self._save_location_strategy(output)
+        container = av.open(save_file, mode="w")
+        self._output_stream = container.add_stream(template=input_stream)
+        self._container = container
+        self._input_stream = input_stream
+        self._offset = None
+        logger().info(f"Recording new video file to '{save_file}'.")
+
+    def _close_segment(self) -> None:
+        if self._container is not None:
+            self._container.close()
+        self._container = None
+        self._input_stream = None
+        self._output_stream = None
+        self._offset = None
+
+    def close(self) -> None:
+        self._close_segment()
+        self._next_output = None
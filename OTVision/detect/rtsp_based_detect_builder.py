@@ -1,34 +1,94 @@
 from functools import cached_property
 
 from OTVision.abstraction.observer import AsyncSubject, Subject
-from OTVision.application.config import StreamConfig
+from OTVision.abstraction.pipes_and_filter import Filter
+from OTVision.application.config import FrameTimestamps, RecordingMode, StreamConfig
+from OTVision.application.configure_logger import ConfigureLogger
+from OTVision.application.detect.current_object_detector import CurrentObjectDetector
 from OTVision.application.event.new_video_start import NewVideoStartEvent
+from OTVision.application.io_executor import IoExecutor
+from OTVision.application.metrics import MetricsRegistry
 from OTVision.detect.builder import DetectBuilder
 from OTVision.detect.detected_frame_buffer import FlushEvent
-from OTVision.detect.rtsp_input_source import Counter, RtspInputSource
-from OTVision.domain.time import CurrentDatetimeProvider, DatetimeProvider
-from OTVision.domain.video_writer import VideoWriter
-from OTVision.plugin.ffmpeg_video_writer import (
-    FfmpegVideoWriter,
-    PixelFormat,
-    VideoFormat,
-    keep_original_save_location,
+from OTVision.detect.event_recording import EventTriggeredVideoWriter
+from OTVision.detect.load_shedding import LoadSheddingController
+from OTVision.detect.plugin_av.rtsp_remux import (
+    PyAvRtspCaptureFactory,
+    RemuxStreamRecorder,
+)
+from OTVision.detect.rtsp_input_source import (
+    Counter,
+    RtspCaptureFactory,
+    RtspInputSource,
+    find_stream_config,
 )
+from OTVision.domain.current_config import CurrentConfig
+from OTVision.domain.frame import Frame
+from OTVision.domain.object_detection import ObjectDetectorFactory
+from OTVision.domain.time import CurrentDatetimeProvider, DatetimeProvider
+from OTVision.domain.video_writer import StreamRecorder, VideoWriter
+from OTVision.plugin.ffmpeg_video_writer import keep_original_save_location
 
 FLUSH_BUFFER_SIZE = 18000
 FLUSH_BUFFER_SIZE = 1200
 
 
 class RtspBasedDetectBuilder(DetectBuilder):
+    """Builds the detection of a single RTSP stream.
+
+    Args:
+        stream_name (str | None): name of the stream in the `STREAMS` section of the
+            config to detect. If None, the stream of the `STREAM` section is detected.
+    """
+
     @property
     def stream_config(self) -> StreamConfig:
-        config = self.get_current_config.get()
-        if config.stream is None:
-            raise ValueError(
-                "Stream config is not provided. "
-                "Running OTVision in streaming mode requires stream config"
-            )
-        return config.stream
+        return find_stream_config(self.current_config.get(), self._stream_name)
+
+    @property
+    def remuxes_video(self) -> bool:
+        """Whether videos are written from the stream's packets without encoding."""
+        return (
+            self.detect_config.write_video
+            and self.stream_config.recording_mode == RecordingMode.REMUX
+        )
+
+    @property
+    def reencodes_video(self) -> bool:
+        """Whether videos are written by encoding the decoded frames again."""
+        return self.detect_config.write_video and not self.remuxes_video
+
+    @property
+    def records_events(self) -> bool:
+        """Whether videos are only recorded while objects are detected."""
+        return self.reencodes_video and self.stream_config.event_recording.enabled
+
+    @property
+    def records_continuously(self) -> bool:
+        """Whether the decoded frames are continuously written into videos."""
+        return self.reencodes_video and not self.records_events
+
+    def __init__(
+        self,
+        argv: list[str] | None = None,
+        current_config: CurrentConfig | None = None,
+        configure_logger: ConfigureLogger | None = None,
+        object_detector_factory: ObjectDetectorFactory | None = None,
+        stream_name: str | None = None,
+        metrics: MetricsRegistry | None = None,
+        io_executor: IoExecutor | None = None,
+        current_object_detector: CurrentObjectDetector | None = None,
+    ) -> None:
+        super().__init__(
+            argv=argv,
+            current_config=current_config,
+            configure_logger=configure_logger,
+            object_detector_factory=object_detector_factory,
+            metrics=metrics,
+            io_executor=io_executor,
+            current_object_detector=current_object_detector,
+        )
+        self._stream_name = stream_name
 
     @cached_property
     def input_source(self) -> RtspInputSource:
@@ -38,6 +98,56 @@ class RtspBasedDetectBuilder(DetectBuilder):
             datetime_provider=self.datetime_provider,
             frame_counter=Counter(),
             get_current_config=self.get_current_config,
+            capture_factory=self.capture_factory,
+            stream_name=self._stream_name,
+            recorder=self.stream_recorder,
+            metrics=self.pipeline_metrics,
+        )
+
+    @cached_property
+    def pipeline_metrics(self) -> MetricsRegistry:
+        return self.metrics.labeled(stream=self.stream_config.name)
+
+    @cached_property
+    def load_shedding_controller(self) -> LoadSheddingController:
+        return LoadSheddingController(
+            get_current_config=self.get_current_config,
+            update_current_config=self.update_current_config,
+        )
+
+    @cached_property
+    def capture_factory(self) -> RtspCaptureFactory:
+        if (
+            self.remuxes_video
+            or self.stream_config.frame_timestamps == FrameTimestamps.PTS
+        ):
+            return PyAvRtspCaptureFactory(
+                datetime_provider=self.datetime_provider,
+                record_packets=self.remuxes_video,
+                metrics=self.pipeline_metrics,
+            )
+        return RtspCaptureFactory(datetime_provider=self.datetime_provider)
+
+    @cached_property
+    def stream_recorder(self) -> StreamRecorder | None:
+        if self.remuxes_video:
+            return RemuxStreamRecorder()
+        return None
+
+    @property
+    def video_writer_filter(self) -> Filter[Frame, Frame] | None:
+        if not self.records_continuously:
+            return None
+        return self.video_file_writer
+
+    @cached_property
+    def event_recorder(self) -> EventTriggeredVideoWriter | None:
+        if not self.records_events:
+            return None
+        return EventTriggeredVideoWriter(
+            video_writer=self.video_file_writer,
+            get_current_config=self.get_current_config,
+            stream_name=self._stream_name,
         )
 
     @cached_property
@@ -46,19 +156,13 @@ class RtspBasedDetectBuilder(DetectBuilder):
 
     @cached_property
     def video_file_writer(self) -> VideoWriter:
-        return FfmpegVideoWriter(
+        return self._create_video_writer(
             save_location_strategy=keep_original_save_location,
-            encoding_speed=self.detect_config.encoding_speed,
-            input_format=VideoFormat.RAW,
-            output_format=VideoFormat.MP4,
-            input_pixel_format=PixelFormat.RGB24,
-            output_pixel_format=PixelFormat.YUV420P,
-            output_video_codec=self.detect_config.video_codec,
-            constant_rate_factor=self.detect_config.crf,
+            drop_frames_if_full=True,
         )
 
     def register_observers(self) -> None:
-        if self.detect_config.write_video:
+        if self.records_continuously:
             self.input_source.subject_new_video_start.register(
                 self.video_file_writer.notify_on_new_video_start
             )
@@ -66,4 +170,5 @@ class RtspBasedDetectBuilder(DetectBuilder):
                 self.video_file_writer.notify_on_flush_event
             )
         self.input_source.subject_flush.register(self.detected_frame_buffer.on_flush)
+        self.current_object_detector.register(self.input_source.notify_new_config)
         self.detected_frame_buffer.register(self.otdet_file_writer.write)
@@ -1,10 +1,14 @@
 import asyncio
 import socket
+import threading
+from collections import deque
+from dataclasses import dataclass, replace
 from datetime import datetime, timedelta
-from time import sleep
+from time import perf_counter
 from typing import AsyncIterator
 from urllib.parse import urlparse
 
+from av.packet import Packet
 from cv2 import (
     CAP_PROP_FRAME_HEIGHT,
     CAP_PROP_FRAME_WIDTH,
@@ -19,16 +23,19 @@ from OTVision.application.config import (
     DATETIME_FORMAT,
     Config,
     DetectConfig,
+    FrameDeliveryPolicy,
     StreamConfig,
 )
 from OTVision.application.configure_logger import logger
 from OTVision.application.event.new_otvision_config import NewOtvisionConfigEvent
 from OTVision.application.event.new_video_start import NewVideoStartEvent
 from OTVision.application.get_current_config import GetCurrentConfig
+from OTVision.application.metrics import DISABLED_METRICS, MetricsRegistry
 from OTVision.detect.detected_frame_buffer import FlushEvent
 from OTVision.domain.frame import Frame
 from OTVision.domain.input_source_detect import InputSourceDetect
 from OTVision.domain.time import DatetimeProvider
+from OTVision.domain.video_writer import StreamRecorder
 
 RTSP_URL = "rtsp://127.0.0.1:8554/test"
 RETRY_SECONDS = 5
@@ -54,6 +61,291 @@ class Counter:
         self.__counter = self._start_value
 
 
+@dataclass(frozen=True, slots=True)
+class CapturedFrame:
+    """A frame grabbed by the capture thread.
+
+    Attributes:
+        data (ndarray): the RGB image.
+        occurrence (datetime): the time the frame has been grabbed or, if derived
+            from presentation timestamps, the time it has been captured by the camera.
+        packets (tuple[Packet, ...]): compressed packets of the stream demuxed since
+            the previous frame. Only provided by captures recording the stream.
+    """
+
+    data: ndarray
+    occurrence: datetime
+    packets: tuple[Packet, ...] = ()
+
+
+class RtspCapture:
+    """Captures frames of an RTSP stream in a dedicated thread.
+
+    Grabbing frames and reconnecting to the stream block. Both are done in the capture
+    thread, so that the event loop, and thereby the observers writing files, are never
+    blocked by the stream. Captured frames are put into a ring buffer from which the
+    async side awaits them. If the buffer is full, the frame delivery policy decides
+    whether capturing pauses until a frame has been consumed (`EVERY_FRAME`) or the
+    oldest frame is dropped (`LATEST_FRAME`).
+
+    Args:
+        source (str): the RTSP URL of the stream.
+        datetime_provider (DatetimeProvider): provides the occurrence of frames.
+        policy (FrameDeliveryPolicy): policy to apply if the buffer is full.
+        buffer_size (int): maximum number of buffered frames.
+        read_fail_threshold (int): number of consecutive failed reads after which
+            the stream is reconnected.
+        retry_seconds (float): seconds to wait between connection attempts.
+    """
+
+    @property
+    def dropped_frames(self) -> int:
+        """Number of captured frames dropped because the buffer was full."""
+        return self._dropped_frames
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of captured frames waiting to be consumed."""
+        return len(self._buffer)
+
+    @property
+    def width(self) -> int:
+        return self._width
+
+    @property
+    def height(self) -> int:
+        return self._height
+
+    def __init__(
+        self,
+        source: str,
+        datetime_provider: DatetimeProvider,
+        policy: FrameDeliveryPolicy,
+        buffer_size: int,
+        read_fail_threshold: int = DEFAULT_READ_FAIL_THRESHOLD,
+        retry_seconds: float = RETRY_SECONDS,
+    ) -> None:
+        self.source = source
+        self._datetime_provider = datetime_provider
+        self._policy = policy
+        self._buffer: deque[CapturedFrame] = deque()
+        self._buffer_size = max(buffer_size, 1)
+        self._read_fail_threshold = read_fail_threshold
+        self._retry_seconds = retry_seconds
+        self._lock = threading.Lock()
+        self._space_available = threading.Condition(self._lock)
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._frame_available: asyncio.Event | None = None
+        self._video_capture: VideoCapture | None = None
+        self._consecutive_read_fails = 0
+        self._dropped_frames = 0
+        self._width = 0
+        self._height = 0
+        self._error: Exception | None = None
+
+    def start(self) -> None:
+        """Starts the capture thread. Must be called from within the event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._frame_available = asyncio.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f"rtsp-capture-{self.source}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops capturing. Already buffered frames can still be consumed."""
+        self._stop_event.set()
+        with self._space_available:
+            self._space_available.notify_all()
+        self._signal_frame_available()
+
+    def join(self, timeout: float | None = None) -> None:
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    @property
+    def is_stopped(self) -> bool:
+        return self._stop_event.is_set()
+
+    async def next_frame(self) -> CapturedFrame | None:
+        """Waits for the next captured frame without blocking the event loop.
+
+        Returns:
+            CapturedFrame | None: the next frame or None, if capturing has been stopped
+                and all buffered frames have been consumed.
+
+        Raises:
+            InvalidRtspUrlError: if the source is not a valid RTSP URL.
+        """
+        if self._frame_available is None:
+            raise RuntimeError("Capture has not been started")
+        while True:
+            with self._space_available:
+                if self._buffer:
+                    frame = self._buffer.popleft()
+                    self._space_available.notify()
+                    return frame
+                if self._error is not None:
+                    raise self._error
+                if self._stop_event.is_set():
+                    return None
+                self._frame_available.clear()
+            await self._frame_available.wait()
+
+    def _run(self) -> None:
+        try:
+            self._connect()
+            while not self._stop_event.is_set():
+                for frame in self._capture_frames():
+                    self._put(frame)
+        except Exception as cause:
+            self._error = cause
+            self._stop_event.set()
+        finally:
+            self._release()
+            self._signal_frame_available()
+
+    def _capture_frames(self) -> list[CapturedFrame]:
+        if (frame := self._read_next_frame()) is None:
+            return []
+        return [
+            CapturedFrame(
+                data=convert_frame_to_rgb(frame),  # YOLO expects RGB
+                occurrence=self._datetime_provider.provide(),
+            )
+        ]
+
+    def _put(self, frame: CapturedFrame) -> None:
+        with self._space_available:
+            if self._policy == FrameDeliveryPolicy.EVERY_FRAME:
+                while (
+                    len(self._buffer) >= self._buffer_size
+                    and not self._stop_event.is_set()
+                ):
+                    self._space_available.wait()
+            elif len(self._buffer) >= self._buffer_size:
+                frame = self._drop_oldest_frame(frame)
+            self._buffer.append(frame)
+        self._signal_frame_available()
+
+    @property
+    def _drops_frames(self) -> bool:
+        """Whether the next captured frame replaces the oldest buffered frame."""
+        return (
+            self._policy == FrameDeliveryPolicy.LATEST_FRAME
+            and len(self._buffer) >= self._buffer_size
+        )
+
+    def _drop_oldest_frame(self, frame: CapturedFrame) -> CapturedFrame:
+        dropped = self._buffer.popleft()
+        self._dropped_frames += 1
+        if not dropped.packets:
+            return frame
+        # Packets must not get lost, as the recording would be corrupted otherwise.
+        if self._buffer:
+            successor = self._buffer[0]
+            self._buffer[0] = replace(
+                successor, packets=dropped.packets + successor.packets
+            )
+            return frame
+        return replace(frame, packets=dropped.packets + frame.packets)
+
+    def _signal_frame_available(self) -> None:
+        if self._loop is None or self._frame_available is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._frame_available.set)
+        except RuntimeError:
+            # The event loop has already been closed.
+            pass
+
+    def _connect(self) -> None:
+        while not self._stop_event.is_set():
+            self._wait_for_connection()
+            if self._stop_event.is_set():
+                return
+            if self._open():
+                return
+
+    def _open(self) -> bool:
+        video_capture = VideoCapture(self.source)
+        if video_capture.isOpened():
+            self._width = int(video_capture.get(CAP_PROP_FRAME_WIDTH))
+            self._height = int(video_capture.get(CAP_PROP_FRAME_HEIGHT))
+            self._video_capture = video_capture
+            return True
+        video_capture.release()
+        return False
+
+    def _release(self) -> None:
+        if self._video_capture is not None:
+            self._video_capture.release()
+            self._video_capture = None
+
+    def _wait_for_connection(self) -> None:
+        while not self._stop_event.is_set() and not is_connection_available(
+            self.source
+        ):
+            logger().debug(
+                f"Couldn't open the RTSP stream: {self.source}. "
+                f"Trying again in {self._retry_seconds}s..."
+            )
+            self._stop_event.wait(self._retry_seconds)
+
+    def _read_next_frame(self) -> ndarray | None:
+        if self._video_capture is None:
+            return None
+        successful, frame = self._video_capture.read()
+        if successful:
+            self._consecutive_read_fails = 0
+            return frame
+        self._handle_read_failure()
+        return None
+
+    def _handle_read_failure(self) -> None:
+        self._consecutive_read_fails += 1
+
+        if self._consecutive_read_fails >= self._read_fail_threshold:
+            self._reconnect()
+
+        logger().debug("Failed to grab frame")
+
+    def _reconnect(self) -> None:
+        self._release()
+        self._consecutive_read_fails = 0
+        if not self._stop_event.is_set():
+            self._connect()
+
+
+class RtspCaptureFactory:
+    """Creates `RtspCapture` instances for the current stream config.
+
+    Args:
+        datetime_provider (DatetimeProvider): provides the occurrence of frames.
+        read_fail_threshold (int): number of consecutive failed reads after which
+            the stream is reconnected.
+    """
+
+    def __init__(
+        self,
+        datetime_provider: DatetimeProvider,
+        read_fail_threshold: int = DEFAULT_READ_FAIL_THRESHOLD,
+    ) -> None:
+        self._datetime_provider = datetime_provider
+        self._read_fail_threshold = read_fail_threshold
+
+    def create(self, stream_config: StreamConfig) -> RtspCapture:
+        return RtspCapture(
+            source=stream_config.source,
+            datetime_provider=self._datetime_provider,
+            policy=stream_config.frame_delivery_policy,
+            buffer_size=stream_config.capture_buffer_size,
+            read_fail_threshold=self._read_fail_threshold,
+        )
+
+
 class RtspInputSource(InputSourceDetect):
 
     @property
@@ -70,9 +362,7 @@ class RtspInputSource(InputSourceDetect):
 
     @property
     def stream_config(self) -> StreamConfig:
-        if stream_config := self.config.stream:
-            return stream_config
-        raise NoConfigurationFoundError("Stream config not found in config")
+        return find_stream_config(self.config, self._stream_name)
 
     @property
     def rtsp_url(self) -> str:
@@ -86,6 +376,14 @@ class RtspInputSource(InputSourceDetect):
     def fps(self) -> float:
         return self.config.convert.output_fps
 
+    @property
+    def dropped_frames(self) -> int:
+        """Number of frames dropped by the captures of this source so far."""
+        dropped = self._dropped_frames_of_closed_captures
+        if self._current_capture is not None:
+            dropped += self._current_capture.dropped_frames
+        return dropped
+
     def __init__(
         self,
         subject_flush: AsyncSubject[FlushEvent],
@@ -93,7 +391,10 @@ class RtspInputSource(InputSourceDetect):
         datetime_provider: DatetimeProvider,
         frame_counter: Counter,
         get_current_config: GetCurrentConfig,
-        read_fail_threshold: int = DEFAULT_READ_FAIL_THRESHOLD,
+        capture_factory: RtspCaptureFactory,
+        stream_name: str | None = None,
+        recorder: StreamRecorder | None = None,
+        metrics: MetricsRegistry = DISABLED_METRICS,
     ) -> None:
 
         self.subject_flush = subject_flush
@@ -102,107 +403,107 @@ class RtspInputSource(InputSourceDetect):
         self._stop_capture = False
         self._frame_counter = frame_counter
         self._get_current_config = get_current_config
-        self._current_stream: str | None = None
-        self._current_video_capture: VideoCapture | None = None
+        self._capture_factory = capture_factory
+        self._stream_name = stream_name
+        self._recorder = recorder
+        self._current_capture: RtspCapture | None = None
+        self._dropped_frames_of_closed_captures = 0
         self._stream_start_time: datetime = self._datetime_provider.provide()
         self._current_video_start_time = self._stream_start_time
         self._outdated = True
-        self._read_fail_threshold = read_fail_threshold
-        self._consecutive_read_fails = 0
+        self._new_segment_requested = False
+        self._frames_metric = metrics.counter(
+            "otvision_stream_frames_total", "Frames delivered by the stream."
+        )
+        self._dropped_frames_metric = metrics.counter(
+            "otvision_stream_dropped_frames_total",
+            "Captured frames dropped because the detection fell behind.",
+        )
+        self._capture_queue_depth_metric = metrics.gauge(
+            "otvision_stream_capture_queue_depth",
+            "Captured frames waiting for the detection.",
+        )
+        self._flush_duration_metric = metrics.histogram(
+            "otvision_stream_flush_duration_seconds",
+            "Seconds to notify and await all observers of a flush.",
+        )
+        self._reported_dropped_frames = 0
 
     @property
-    def _video_capture(self) -> VideoCapture:
+    def _capture(self) -> RtspCapture:
         # Property is moved below __init__ otherwise mypy is somehow unable to determine
-        # types of self._current_stream and self._current_video_capture
-        new_source = self.stream_config.source
-        if (
-            self._current_stream is not None
-            and self._current_stream == new_source
-            and self._current_video_capture
-        ):
+        # the type of self._current_capture
+        stream_config = self.stream_config
+        current = self._current_capture
+        if current is not None and current.source == stream_config.source:
             # current source has not changed
-            return self._current_video_capture
+            return current
 
         # Stream changed or has not been initialized
-        if self._current_video_capture is not None:
-            # If the stream changed and there's an existing capture, release it
-            self._current_video_capture.release()
-
-        self._current_stream = new_source
-        self._current_video_capture = self._init_video_capture(self._current_stream)
-        return self._current_video_capture
+        self._close_capture()
+        capture = self._capture_factory.create(stream_config)
+        capture.start()
+        self._current_capture = capture
+        return capture
+
+    def _close_capture(self) -> None:
+        if (capture := self._current_capture) is not None:
+            capture.stop()
+            self._dropped_frames_of_closed_captures += capture.dropped_frames
+            self._current_capture = None
 
     async def produce(self) -> AsyncIterator[Frame]:
         self._stream_start_time = self._datetime_provider.provide()
         self._current_video_start_time = self._stream_start_time
         try:
             while not self.should_stop():
-                if (frame := self._read_next_frame()) is not None:
+                if (captured := await self._capture.next_frame()) is not None:
                     self._frame_counter.increment()
-                    occurrence = self._datetime_provider.provide()
+                    self._update_metrics()
+                    occurrence = captured.occurrence
 
                     if self._outdated:
                         self._current_video_start_time = occurrence
                         self._outdated = False
                         self._notify_new_video_start_observers()
+                        self._start_recording_segment()
 
+                    self._record(captured.packets)
                     yield Frame(
-                        data=convert_frame_to_rgb(frame),  # YOLO expects RGB
+                        data=captured.data,
                         frame=self.current_frame_number,
                         source=self.rtsp_url,
                         output=self.create_output(),
                         occurrence=occurrence,
                     )
-                    if self.flush_condition_met():
+                    if self.flush_condition_met() or self._new_segment_requested:
                         await self._notify_flush_observers()
                         self._outdated = True
+                        self._new_segment_requested = False
                         self._frame_counter.reset()
             await self._notify_flush_observers()
         except InvalidRtspUrlError as cause:
             logger().error(cause)
-
-    def _init_video_capture(self, source: str) -> VideoCapture:
-        self._wait_for_connection(source)
-
-        cap = VideoCapture(source)
-        while not self.should_stop() and not cap.isOpened():
-            cap.release()
-            self._wait_for_connection(source)
-            cap = VideoCapture(source)
-        return cap
-
-    def _wait_for_connection(self, connection: str) -> None:
-        while not self.should_stop() and not is_connection_available(connection):
-            logger().debug(
-                f"Couldn't open the RTSP stream: {connection}. "
-                f"Trying again in {RETRY_SECONDS}s..."
-            )
-            sleep(RETRY_SECONDS)
-
-    def _read_next_frame(self) -> ndarray | None:
-        successful, frame = self._video_capture.read()
-        if successful:
-            self._consecutive_read_fails = 0
-            return frame
-        self._consecutive_read_fails += 1
-
-        if self._consecutive_read_fails >= self._read_fail_threshold:
-            self._try_reconnecting_stream()
-
-        logger().debug("Failed to grab frame")
-        return None
-
-    def _try_reconnecting_stream(self) -> None:
-        self._video_capture.release()
-        self._current_video_capture = None
-        if not self.should_stop() and self._current_stream is not None:
-            self._current_video_capture = self._init_video_capture(self._current_stream)
+        finally:
+            self._close_capture()
+            if self._recorder is not None:
+                self._recorder.close()
+
+    def _update_metrics(self) -> None:
+        self._frames_metric.inc()
+        dropped_frames = self.dropped_frames
+        self._dropped_frames_metric.inc(dropped_frames - self._reported_dropped_frames)
+        self._reported_dropped_frames = dropped_frames
+        if self._current_capture is not None:
+            self._capture_queue_depth_metric.set(self._current_capture.queue_depth)
 
     def should_stop(self) -> bool:
         return self._stop_capture
 
     def stop(self) -> None:
         self._stop_capture = True
+        if self._current_capture is not None:
+            self._current_capture.stop()
 
     def start(self) -> None:
         self._stop_capture = False
@@ -211,6 +512,7 @@ class RtspInputSource(InputSourceDetect):
         return self.current_frame_number % self.flush_buffer_size == 0
 
     async def _notify_flush_observers(self) -> None:
+        start = perf_counter()
         frame_width = self._get_width()
         frame_height = self._get_height()
         frames = (
@@ -231,12 +533,19 @@ class RtspInputSource(InputSourceDetect):
                 start_time=self._current_video_start_time,
             )
         )
+        # Frames following the flush must not reach observers before the flush.
+        await self.subject_flush.wait_for_all_observers()
+        self._flush_duration_metric.observe(perf_counter() - start)
 
     def _get_width(self) -> int:
-        return int(self._video_capture.get(CAP_PROP_FRAME_WIDTH))
+        if self._current_capture is None:
+            return 0
+        return self._current_capture.width
 
     def _get_height(self) -> int:
-        return int(self._video_capture.get(CAP_PROP_FRAME_HEIGHT))
+        if self._current_capture is None:
+            return 0
+        return self._current_capture.height
 
     def _notify_new_video_start_observers(self) -> None:
         event = NewVideoStartEvent(
@@ -247,21 +556,73 @@ class RtspInputSource(InputSourceDetect):
         )
         self.subject_new_video_start.notify(event)
 
+    def _start_recording_segment(self) -> None:
+        if self._recorder is not None:
+            self._recorder.start_segment(self.create_output())
+
+    def _record(self, packets: tuple[Packet, ...]) -> None:
+        if self._recorder is not None:
+            self._recorder.record(packets)
+
     def create_output(self) -> str:
-        output_filename = (
-            f"{self.stream_config.name}_FR{round(self.fps)}"
-            f"_{self._current_video_start_time.strftime(DATETIME_FORMAT)}.mp4"
+        return create_stream_output(
+            self.stream_config, self.fps, self._current_video_start_time
         )
-        return str(self.stream_config.save_dir / output_filename)
 
-    def notify_new_config(self, config: NewOtvisionConfigEvent) -> None:
-        try:
-            logger().debug("New OTVision config detected. Flushing buffers...")
+    async def notify_new_config(self, config: NewOtvisionConfigEvent) -> None:
+        """Start a new segment before the next frame is captured.
+
+        The segment is not flushed right away. Frames that have been produced but not
+        detected yet still belong to the current segment.
+        """
+        logger().debug("New OTVision config detected. Starting a new segment...")
+        self._new_segment_requested = True
 
-            # Create task to handle async flush notification
-            asyncio.create_task(self._notify_flush_observers())
-        except NoConfigurationFoundError:
-            logger().info("No configuration found for RTSP stream. Skipping flushing.")
+
+def create_stream_output(
+    stream_config: StreamConfig, fps: float, start_time: datetime
+) -> str:
+    """Create the output of a stream's video starting at the given time.
+
+    Args:
+        stream_config (StreamConfig): the config of the stream.
+        fps (float): the frame rate of the video.
+        start_time (datetime): the occurrence of the first frame of the video.
+
+    Returns:
+        str: the output path of the video.
+    """
+    output_filename = (
+        f"{stream_config.name}_FR{round(fps)}"
+        f"_{start_time.strftime(DATETIME_FORMAT)}.mp4"
+    )
+    return str(stream_config.save_dir / output_filename)
+
+
+def find_stream_config(config: Config, stream_name: str | None) -> StreamConfig:
+    """Find the config of a stream.
+
+    Args:
+        config (Config): the config to search.
+        stream_name (str | None): name of the stream in the `STREAMS` section. If
+            None, the config of the `STREAM` section is returned.
+
+    Returns:
+        StreamConfig: the config of the stream.
+
+    Raises:
+        NoConfigurationFoundError: if the stream is not configured.
+    """
+    if stream_name is None:
+        if stream_config := config.stream:
+            return stream_config
+        raise NoConfigurationFoundError("Stream config not found in config")
+    for stream_config in config.streams:
+        if stream_config.name == stream_name:
+            return stream_config
+    raise NoConfigurationFoundError(
+        f"Stream config '{stream_name}' not found in config"
+    )
 
 
 def convert_frame_to_rgb(frame: ndarray) -> ndarray:
@@ -0,0 +1,223 @@
+from dataclasses import dataclass
+from pathlib import Path
+from random import Random
+from time import monotonic
+
+from cv2 import (
+    CAP_PROP_FPS,
+    CAP_PROP_FRAME_HEIGHT,
+    CAP_PROP_FRAME_WIDTH,
+    CAP_PROP_POS_FRAMES,
+    VideoCapture,
+)
+from numpy import ndarray
+
+from OTVision.application.config import FrameDeliveryPolicy, StreamConfig
+from OTVision.application.configure_logger import logger
+from OTVision.detect.rtsp_input_source import (
+    DEFAULT_READ_FAIL_THRESHOLD,
+    RtspCapture,
+    RtspCaptureFactory,
+)
+from OTVision.domain.time import DatetimeProvider
+
+DEFAULT_FPS = 20.0
+
+
+@dataclass(frozen=True)
+class SimulatedCameraFaults:
+    """Faults injected into simulated cameras.
+
+    Probabilities apply to each frame independently.
+
+    Attributes:
+        drop_probability (float): probability that a frame gets lost.
+        stall_probability (float): probability that the camera stalls before a
+            frame. Frames are not lost during a stall, but delivered in a burst
+            afterwards.
+        stall_seconds (float): duration of a stall.
+        disconnect_probability (float): probability that the connection is lost
+            before a frame. Frames of the outage are lost.
+        disconnect_seconds (float): duration of an outage.
+    """
+
+    drop_probability: float = 0.0
+    stall_probability: float = 0.0
+    stall_seconds: float = 1.0
+    disconnect_probability: float = 0.0
+    disconnect_seconds: float = 5.0
+
+
+NO_FAULTS = SimulatedCameraFaults()
+
+
+class SimulatedCapture(RtspCapture):
+    """Replays a local video file as if it was a camera stream.
+
+    Frames are delivered at the frame rate of the video multiplied by `speed`. The
+    video is replayed from the start once it has ended. Apart from reading a file
+    instead of the stream, capturing behaves like `RtspCapture`, including buffering,
+    the frame delivery policy and reconnecting.
+
+    Args:
+        video_file (Path): the video to replay.
+        speed (float): multiple of the video's frame rate to deliver frames at.
+        faults (SimulatedCameraFaults): faults to inject.
+        random (Random): decides when faults are injected.
+    """
+
+    @property
+    def injected_drops(self) -> int:
+        """Number of frames lost on purpose."""
+        return self._injected_drops
+
+    @property
+    def stalls(self) -> int:
+        return self._stalls
+
+    @property
+    def disconnects(self) -> int:
+        return self._disconnects
+
+    def __init__(
+        self,
+        source: str,
+        video_file: Path,
+        datetime_provider: DatetimeProvider,
+        policy: FrameDeliveryPolicy,
+        buffer_size: int,
+        speed: float = 1.0,
+        faults: SimulatedCameraFaults = NO_FAULTS,
+        random: Random | None = None,
+        read_fail_threshold: int = DEFAULT_READ_FAIL_THRESHOLD,
+        retry_seconds: float = 0,
+    ) -> None:
+        super().__init__(
+            source=source,
+            datetime_provider=datetime_provider,
+            policy=policy,
+            buffer_size=buffer_size,
+            read_fail_threshold=read_fail_threshold,
+            retry_seconds=retry_seconds,
+        )
+        self._video_file = video_file
+        self._speed = speed
+        self._faults = faults
+        self._random = random or Random()
+        self._frame_interval = 1 / (DEFAULT_FPS * speed)
+        self._next_frame_due = 0.0
+        self._reconnect_at = 0.0
+        self._position = 0
+        self._injected_drops = 0
+        self._stalls = 0
+        self._disconnects = 0
+
+    def _wait_for_connection(self) -> None:
+        while not self._stop_event.is_set() and monotonic() < self._reconnect_at:
+            self._stop_event.wait(self._reconnect_at - monotonic())
+
+    def _open(self) -> bool:
+        video_capture = VideoCapture(str(self._video_file))
+        if not video_capture.isOpened():
+            video_capture.release()
+            logger().debug(f"Couldn't open the video {self._video_file}")
+            self._stop_event.wait(self._retry_seconds)
+            return False
+        fps = video_capture.get(CAP_PROP_FPS) or DEFAULT_FPS
+        self._frame_interval = 1 / (fps * self._speed)
+        self._width = int(video_capture.get(CAP_PROP_FRAME_WIDTH))
+        self._height = int(video_capture.get(CAP_PROP_FRAME_HEIGHT))
+        video_capture.set(CAP_PROP_POS_FRAMES, self._position)
+        self._video_capture = video_capture
+        self._next_frame_due = monotonic()
+        return True
+
+    def _read_next_frame(self) -> ndarray | None:
+        if self._video_capture is None:
+            return None
+        self._wait_until_next_frame_is_due()
+        if self._should_inject(self._faults.disconnect_probability):
+            self._disconnect()
+            return None
+        if self._should_inject(self._faults.stall_probability):
+            self._stalls += 1
+            self._stop_event.wait(self._faults.stall_seconds)
+        successful, frame = self._video_capture.read()
+        if not successful:
+            # Replay the video from the start
+            self._position = 0
+            self._video_capture.set(CAP_PROP_POS_FRAMES, 0)
+            successful, frame = self._video_capture.read()
+        if not successful:
+            self._handle_read_failure()
+            return None
+        self._consecutive_read_fails = 0
+        self._position += 1
+        if self._should_inject(self._faults.drop_probability):
+            self._injected_drops += 1
+            return None
+        return frame
+
+    def _wait_until_next_frame_is_due(self) -> None:
+        if (delay := self._next_frame_due - monotonic()) > 0:
+            self._stop_event.wait(delay)
+        self._next_frame_due += self._frame_interval
+
+    def _should_inject(self, probability: float) -> bool:
+        return probability > 0 and self._random.random() < probability
+
+    def _disconnect(self) -> None:
+        self._disconnects += 1
+        outage = self._faults.disconnect_seconds
+        logger().debug(f"Simulated camera {self.source} disconnects for {outage}s")
+        self._reconnect_at = monotonic() + outage
+        self._position += round(outage / self._frame_interval)
+        self._reconnect()
+
+
+class SimulatedCaptureFactory(RtspCaptureFactory):
+    """Creates `SimulatedCapture` instances replaying the same video for any stream.
+
+    The source of the stream config only identifies the simulated camera.
+
+    Args:
+        video_file (Path): the video to replay.
+        speed (float): multiple of the video's frame rate to deliver frames at.
+        faults (SimulatedCameraFaults): faults to inject.
+        seed (int | None): seed of the random faults to make runs reproducible.
+    """
+
+    @property
+    def captures(self) -> list[SimulatedCapture]:
+        """All captures created so far."""
+        return list(self._captures)
+
+    def __init__(
+        self,
+        datetime_provider: DatetimeProvider,
+        video_file: Path,
+        speed: float = 1.0,
+        faults: SimulatedCameraFaults = NO_FAULTS,
+        seed: int | None = None,
+    ) -> None:
+        super().__init__(datetime_provider)
+        self._video_file = video_file
+        self._speed = speed
+        self._faults = faults
+        self._random = Random(seed)
+        self._captures: list[SimulatedCapture] = []
+
+    def create(self, stream_config: StreamConfig) -> RtspCapture:
+        capture = SimulatedCapture(
+            source=stream_config.source,
+            video_file=self._video_file,
+            datetime_provider=self._datetime_provider,
+            policy=stream_config.frame_delivery_policy,
+            buffer_size=stream_config.capture_buffer_size,
+            speed=self._speed,
+            faults=self._faults,
+            random=Random(self._random.random()),
+            read_fail_threshold=self._read_fail_threshold,
+        )
+        self._captures.append(capture)
+        return capture
@@ -0,0 +1,388 @@
+import asyncio
+import gc
+import os
+import threading
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from time import monotonic
+from typing import Callable
+
+from OTVision.detect.load_testing import (
+    SimulatedMultiStreamDetectBuilder,
+    peak_memory_bytes,
+)
+
+MIB = 2**20
+TOP_TYPES = 10
+TOP_ALLOCATIONS = 10
+ALLOCATION_TRACEBACK_FRAMES = 5
+
+
+def current_memory_bytes() -> int | None:
+    """Return the current resident memory of the process.
+
+    Falls back to the peak resident memory, if the platform does not provide the
+    current one.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return peak_memory_bytes()
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def count_open_files() -> int | None:
+    """Return the number of open file descriptors, if the platform lists them."""
+    for fd_dir in (Path("/proc/self/fd"), Path("/dev/fd")):
+        if fd_dir.is_dir():
+            return len(os.listdir(fd_dir))
+    return None
+
+
+def count_objects_by_type() -> dict[str, int]:
+    """Count the objects tracked by the garbage collector per type."""
+    return dict(
+        Counter(
+            f"{type(obj).__module__}.{type(obj).__qualname__}"
+            for obj in gc.get_objects()
+        )
+    )
+
+
+@dataclass(frozen=True)
+class ResourceSample:
+    """Resources used by the process at a point in time of a soak test.
+
+    Attributes:
+        elapsed_seconds (float): seconds since the first sample.
+        frames (int): frames that passed the pipeline since the first sample.
+        rss_bytes (int | None): resident memory of the process. None, if the
+            platform does not provide it.
+        open_files (int | None): open file descriptors. None, if the platform does
+            not list them.
+        threads (int): threads alive.
+        objects (int): objects tracked by the garbage collector.
+        object_growth_by_type (dict[str, int]): types whose number of objects grew
+            most since the first sample, with their growth.
+        traced_memory_bytes (int | None): memory allocated by Python code. None, if
+            allocations are not traced.
+        allocation_growth (list[str]): allocation sites whose memory grew most since
+            the first sample. Empty, if allocations are not traced.
+    """
+
+    elapsed_seconds: float
+    frames: int
+    rss_bytes: int | None
+    open_files: int | None
+    threads: int
+    objects: int
+    object_growth_by_type: dict[str, int]
+    traced_memory_bytes: int | None = None
+    allocation_growth: list[str] = field(default_factory=list)
+
+
+class ResourceSampler:
+    """Samples the resources used by the process.
+
+    Growth is measured relative to the first sample.
+
+    Args:
+        trace_allocations (bool): whether to trace allocations with `tracemalloc`.
+            Tracing slows down Python code considerably.
+        rss_probe (Callable[[], int | None]): measures the resident memory.
+        open_files_probe (Callable[[], int | None]): counts open file descriptors.
+        thread_probe (Callable[[], int]): counts threads alive.
+        object_counter (Callable[[], dict[str, int]]): counts objects per type.
+    """
+
+    def __init__(
+        self,
+        trace_allocations: bool = False,
+        rss_probe: Callable[[], int | None] = current_memory_bytes,
+        open_files_probe: Callable[[], int | None] = count_open_files,
+        thread_probe: Callable[[], int] = threading.active_count,
+        object_counter: Callable[[], dict[str, int]] = count_objects_by_type,
+    ) -> None:
+        self._trace_allocations = trace_allocations
+        self._rss_probe = rss_probe
+        self._open_files_probe = open_files_probe
+        self._thread_probe = thread_probe
+        self._object_counter = object_counter
+        self._started_tracing = False
+        self._baseline_objects: dict[str, int] | None = None
+        self._baseline_snapshot: tracemalloc.Snapshot | None = None
+
+    def start(self) -> None:
+        if self._trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start(ALLOCATION_TRACEBACK_FRAMES)
+            self._started_tracing = True
+
+    def stop(self) -> None:
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        self._baseline_snapshot = None
+
+    def sample(self, elapsed_seconds: float, frames: int) -> ResourceSample:
+        objects = self._object_counter()
+        if self._baseline_objects is None:
+            self._baseline_objects = objects
+        growth = {
+            name: count - self._baseline_objects.get(name, 0)
+            for name, count in objects.items()
+        }
+        top_growth = sorted(growth.items(), key=lambda item: item[1], reverse=True)
+        traced_memory, allocation_growth = self._sample_allocations()
+        return ResourceSample(
+            elapsed_seconds=elapsed_seconds,
+            frames=frames,
+            rss_bytes=self._rss_probe(),
+            open_files=self._open_files_probe(),
+            threads=self._thread_probe(),
+            objects=sum(objects.values()),
+            object_growth_by_type={
+                name: count for name, count in top_growth[:TOP_TYPES] if count > 0
+            },
+            traced_memory_bytes=traced_memory,
+            allocation_growth=allocation_growth,
+        )
+
+    def _sample_allocations(self) -> tuple[int | None, list[str]]:
+        if not tracemalloc.is_tracing():
+            return None, []
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+        traced_memory, _ = tracemalloc.get_traced_memory()
+        if self._baseline_snapshot is None:
+            self._baseline_snapshot = snapshot
+            return traced_memory, []
+        differences = snapshot.compare_to(self._baseline_snapshot, "lineno")
+        return traced_memory, [
+            f"{difference.traceback}: {difference.size_diff / 1024:+.1f} KiB "
+            f"({difference.count_diff:+} blocks)"
+            for difference in differences[:TOP_ALLOCATIONS]
+            if difference.size_diff > 0
+        ]
+
+
+@dataclass(frozen=True)
+class SoakThresholds:
+    """Growth a soak test tolerates between its first and its last sample.
+
+    Attributes:
+        max_rss_growth_bytes (int): growth of the resident memory.
+        max_object_growth (int): growth of the number of objects of any type.
+        max_open_files_growth (int): growth of the open file descriptors.
+        max_thread_growth (int): growth of the threads alive.
+        max_throughput_drop (float): share the throughput of the last quarter of the
+            run may drop below the throughput of the first quarter.
+    """
+
+    max_rss_growth_bytes: int = 64 * MIB
+    max_object_growth: int = 10_000
+    max_open_files_growth: int = 16
+    max_thread_growth: int = 4
+    max_throughput_drop: float = 0.2
+
+
+@dataclass(frozen=True)
+class SoakTestReport:
+    """Resources sampled during a soak test.
+
+    Attributes:
+        samples (list[ResourceSample]): samples in the order they have been taken.
+        thresholds (SoakThresholds): growth the test tolerates.
+    """
+
+    samples: list[ResourceSample]
+    thresholds: SoakThresholds
+
+    @property
+    def throughput_drop(self) -> float | None:
+        """Share the throughput of the last quarter dropped below the first quarter.
+
+        None, if there are not enough samples to compare two quarters.
+        """
+        intervals = list(zip(self.samples, self.samples[1:]))
+        if len(intervals) < 2:
+            return None
+        quarter = max(len(intervals) // 4, 1)
+        first = _fps(intervals[:quarter])
+        if first <= 0:
+            return None
+        return 1 - _fps(intervals[-quarter:]) / first
+
+    @property
+    def violations(self) -> list[str]:
+        """Describe each threshold the growth between first and last sample exceeds."""
+        if len(self.samples) < 2:
+            return []
+        first, last = self.samples[0], self.samples[-1]
+        thresholds = self.thresholds
+        violations = []
+        if first.rss_bytes is not None and last.rss_bytes is not None:
+            rss_growth = last.rss_bytes - first.rss_bytes
+            if rss_growth > thresholds.max_rss_growth_bytes:
+                violations.append(
+                    f"Resident memory grew by {rss_growth / MIB:.1f} MiB "
+                    f"(max {thresholds.max_rss_growth_bytes / MIB:.1f} MiB)"
+                )
+        for name, growth in last.object_growth_by_type.items():
+            if growth > thresholds.max_object_growth:
+                violations.append(
+                    f"Objects of {name} grew by {growth} "
+                    f"(max {thresholds.max_object_growth})"
+                )
+        if first.open_files is not None and last.open_files is not None:
+            open_files_growth = last.open_files - first.open_files
+            if open_files_growth > thresholds.max_open_files_growth:
+                violations.append(
+                    f"Open files grew by {open_files_growth} "
+                    f"(max {thresholds.max_open_files_growth})"
+                )
+        thread_growth = last.threads - first.threads
+        if thread_growth > thresholds.max_thread_growth:
+            violations.append(
+                f"Threads grew by {thread_growth} "
+                f"(max {thresholds.max_thread_growth})"
+            )
+        drop = self.throughput_drop
+        if drop is not None and drop > thresholds.max_throughput_drop:
+            violations.append(
+                f"Throughput dropped by {drop:.0%} "
+                f"(max {thresholds.max_throughput_drop:.0%})"
+            )
+        return violations
+
+    @property
+    def passed(self) -> bool:
+        return not self.violations
+
+    def to_text(self) -> str:
+        lines = [
+            f"Soak test with {len(self.samples)} samples",
+            f"{'elapsed s':>10}{'frames':>10}{'fps':>8}{'rss MiB':>9}{'files':>7}"
+            f"{'threads':>9}{'objects':>10}",
+        ]
+        previous: ResourceSample | None = None
+        for sample in self.samples:
+            fps = _fps([(previous, sample)]) if previous is not None else 0.0
+            rss = (
+                f"{sample.rss_bytes / MIB:.0f}" if sample.rss_bytes is not None else "-"
+            )
+            open_files = sample.open_files if sample.open_files is not None else "-"
+            lines.append(
+                f"{sample.elapsed_seconds:>10.0f}{sample.frames:>10}{fps:>8.1f}"
+                f"{rss:>9}{open_files:>7}{sample.threads:>9}{sample.objects:>10}"
+            )
+            previous = sample
+        if self.samples:
+            last = self.samples[-1]
+            if last.object_growth_by_type:
+                lines.append("Object growth by type:")
+                lines.extend(
+                    f"  {name:<60}{growth:>+10}"
+                    for name, growth in last.object_growth_by_type.items()
+                )
+            if last.allocation_growth:
+                lines.append("Allocation growth:")
+                lines.extend(f"  {line}" for line in last.allocation_growth)
+        if self.passed:
+            lines.append("PASSED")
+        else:
+            lines.append("FAILED")
+            lines.extend(f"  {violation}" for violation in self.violations)
+        return "\n".join(lines)
+
+
+def _fps(intervals: list[tuple[ResourceSample, ResourceSample]]) -> float:
+    frames = sum(end.frames - start.frames for start, end in intervals)
+    seconds = sum(
+        end.elapsed_seconds - start.elapsed_seconds for start, end in intervals
+    )
+    return frames / seconds if seconds > 0 else 0.0
+
+
+class StreamSoakTest:
+    """Runs the streams of simulated cameras for a long time and samples resources.
+
+    Replaying the video faster than its frame rate accelerates the time the
+    pipeline experiences, e.g. rotating segments and files more often. The first
+    sample is taken after the warm-up, so that loading the model and filling buffers
+    and caches do not count as growth.
+
+    Args:
+        builder (SimulatedMultiStreamDetectBuilder): builds the pipeline.
+        duration_seconds (float): seconds to run the streams for after the warm-up.
+        sample_interval_seconds (float): seconds between two samples.
+        warmup_seconds (float): seconds to run the streams before the first sample.
+        sampler (ResourceSampler): samples the resources of the process.
+        thresholds (SoakThresholds): growth the test tolerates.
+        clock (Callable[[], float]): measures the elapsed time.
+    """
+
+    def __init__(
+        self,
+        builder: SimulatedMultiStreamDetectBuilder,
+        duration_seconds: float,
+        sample_interval_seconds: float,
+        warmup_seconds: float = 0.0,
+        sampler: ResourceSampler | None = None,
+        thresholds: SoakThresholds = SoakThresholds(),
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        self._builder = builder
+        self._duration_seconds = duration_seconds
+        self._sample_interval_seconds = sample_interval_seconds
+        self._warmup_seconds = warmup_seconds
+        self._sampler = sampler or ResourceSampler()
+        self._thresholds = thresholds
+        self._clock = clock
+        self._frames = 0
+        self._samples: list[ResourceSample] = []
+
+    async def run(self) -> SoakTestReport:
+        self._builder.build()
+        self._frames = 0
+        self._samples = []
+        self._sampler.start()
+        sampling = asyncio.create_task(self._sample_periodically())
+        try:
+            async for _ in self._builder.detected_frame_producer.produce():
+                self._frames += 1
+        finally:
+            sampling.cancel()
+            self._sampler.stop()
+            await asyncio.to_thread(self._builder.io_executor.shutdown)
+        return SoakTestReport(samples=self._samples, thresholds=self._thresholds)
+
+    def stop(self) -> None:
+        """Stop all streams. Frames already captured still pass the pipeline."""
+        for stream in self._builder.streams:
+            stream.builder.input_source.stop()
+
+    async def _sample_periodically(self) -> None:
+        try:
+            await asyncio.sleep(self._warmup_seconds)
+            start, start_frames = self._clock(), self._frames
+            elapsed = 0.0
+            while elapsed < self._duration_seconds:
+                self._samples.append(
+                    self._sampler.sample(elapsed, self._frames - start_frames)
+                )
+                await asyncio.sleep(
+                    min(
+                        self._sample_interval_seconds,
+                        self._duration_seconds - elapsed,
+                    )
+                )
+                elapsed = self._clock() - start
+            self._samples.append(
+                self._sampler.sample(elapsed, self._frames - start_frames)
+            )
+        finally:
+            self.stop()
@@ -42,6 +42,9 @@ class VideoTimestamper(Timestamper):
 
         self._number_of_frames = frame_count_provider.provide(self._video_file)
         self._time_per_frame = self._get_time_per_frame()
+        self._video_start_time = parse_start_time_from(
+            self._video_file, start_time=self._start_time
+        )
 
     def stamp(self, frame: dict) -> Frame:
         """This method adds timestamps when the frame occurred in real time to each
@@ -50,12 +53,9 @@ class VideoTimestamper(Timestamper):
         Returns:
             Frame: frame with occurrence.
         """
-        start_time = parse_start_time_from(
-            self._video_file, start_time=self._start_time
-        )
         frame_number = frame[FRAME]
         # Frame numbers start from 1
-        occurrence = start_time + (frame_number - 1) * self._time_per_frame
+        occurrence = self._video_start_time + (frame_number - 1) * self._time_per_frame
 
         return Frame(
             data=frame[FrameKeys.data],
@@ -19,21 +19,27 @@ OTVision module to detect objects using yolov5
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import gc
 import logging
+from dataclasses import dataclass
 from pathlib import Path
 from time import perf_counter
-from typing import AsyncIterator
+from typing import Any, AsyncIterator
 
 import torch
 from tqdm.asyncio import tqdm
 from ultralytics import YOLO
 from ultralytics.engine.results import Boxes
+from ultralytics.nn.tasks import DetectionModel
 
 from OTVision.abstraction.pipes_and_filter import Filter
 from OTVision.application.config import DetectConfig
 from OTVision.application.detect.detected_frame_factory import DetectedFrameFactory
+from OTVision.application.detect.detection_metrics import DetectionMetrics
 from OTVision.application.get_current_config import GetCurrentConfig
-from OTVision.domain.detection import Detection
+from OTVision.application.metrics import DISABLED_METRICS, MetricsRegistry
+from OTVision.detect.yolo_direct import YoloDirectDetector, module_memory_bytes
+from OTVision.domain.detection import ClassId, Detection
 from OTVision.domain.frame import DetectedFrame, Frame, FrameKeys
 from OTVision.domain.object_detection import ObjectDetector, ObjectDetectorFactory
 from OTVision.helpers.log import LOGGER_NAME
@@ -46,50 +52,45 @@ log = logging.getLogger(LOGGER_NAME)
 class YoloDetectionConverter:
     """Converts raw YOLO model detections into standardized detection objects."""
 
-    def convert(
-        self,
-        raw_detections: Boxes,
-        normalized: bool,
-        classification_mapping: dict[int, str],
-    ) -> list[Detection]:
+    def convert(self, raw_detections: Boxes, normalized: bool) -> list[Detection]:
         """Converts raw detection data into a list of Detection objects.
 
+        Classes are kept as the model's integer class indices. They are mapped to
+        their labels via the model's classifications on serialization.
+
         Args:
             raw_detections: The YOLO detection data.
             normalized: A boolean indicating whether the bounding box coordinates are
                 normalized or not.
-            classification_mapping: A dictionary mapping integer class indices to their
-                corresponding class names.
 
         Returns:
             list[Detection]: A list of Detection objects containing information for
                 each detection.
         """
         bboxes = raw_detections.xywhn if normalized else raw_detections.xywh
-        detections: list[Detection] = []
-        for bbox, class_idx, confidence in zip(
-            bboxes, raw_detections.cls, raw_detections.conf
-        ):
-            _class_idx = int(class_idx.item())
-            detections.append(
-                self._create_detection(
-                    bbox=bbox,
-                    classification=classification_mapping[_class_idx],
-                    confidence=confidence.item(),
-                )
+        return [
+            self._create_detection(
+                bbox=bbox,
+                class_id=int(class_idx),
+                confidence=confidence,
+            )
+            for bbox, class_idx, confidence in zip(
+                bboxes.tolist(),
+                raw_detections.cls.tolist(),
+                raw_detections.conf.tolist(),
             )
-        return detections
+        ]
 
     def _create_detection(
         self,
-        bbox: torch.Tensor,
-        classification: str,
+        bbox: list[float],
+        class_id: ClassId,
         confidence: float,
     ) -> Detection:
-        x, y, width, height = bbox.tolist()
+        x, y, width, height = bbox
 
         return Detection(
-            label=classification,
+            class_id=class_id,
             conf=confidence,
             x=x - width / 2,
             y=y - height / 2,
@@ -98,17 +99,40 @@ class YoloDetectionConverter:
         )
 
 
+@dataclass(frozen=True, slots=True)
+class YoloPredictionContext:
+    """Values required for every prediction that only change with the detect config.
+
+    Attributes:
+        detect_config (DetectConfig): the detect config the context was created from.
+        predict_arguments (dict[str, Any]): keyword arguments passed to
+            `YOLO.predict` for each frame.
+        normalized (bool): whether to normalize the bounding boxes.
+    """
+
+    detect_config: DetectConfig
+    predict_arguments: dict[str, Any]
+    normalized: bool
+
+
 class YoloDetector(ObjectDetector, Filter[Frame, DetectedFrame]):
     """Wrapper to YOLO object detection model.
 
     Args:
         get_current_config (GetCurrentConfig): use case to get current configuration.
+        metrics (MetricsRegistry): registry to record inference metrics in.
     """
 
     @property
     def config(self) -> DetectConfig:
         return self._get_current_config.get().detect
 
+    @property
+    def memory_bytes(self) -> int:
+        if isinstance(module := self._model.model, torch.nn.Module):
+            return module_memory_bytes(module)
+        return 0
+
     @property
     def classifications(self) -> dict[int, str]:
         """The model's classes that it is able to predict.
@@ -128,11 +152,15 @@ class YoloDetector(ObjectDetector, Filter[Frame, DetectedFrame]):
         get_current_config: GetCurrentConfig,
         detection_converter: YoloDetectionConverter,
         detected_frame_factory: DetectedFrameFactory,
+        metrics: MetricsRegistry = DISABLED_METRICS,
     ) -> None:
         self._model = model
         self._get_current_config = get_current_config
         self._detection_converter = detection_converter
         self._detected_frame_factory = detected_frame_factory
+        self._metrics = DetectionMetrics(metrics)
+        self._device: int | str = 0 if torch.cuda.is_available() else "cpu"
+        self._prediction_context: YoloPredictionContext | None = None
 
     async def filter(self, pipe: AsyncIterator[Frame]) -> AsyncIterator[DetectedFrame]:
         async for detected_frame in self.detect(pipe):
@@ -141,49 +169,76 @@ class YoloDetector(ObjectDetector, Filter[Frame, DetectedFrame]):
     async def detect(
         self, frames: AsyncIterator[Frame]
     ) -> AsyncIterator[DetectedFrame]:
-        async for frame in tqdm(
-            frames,
-            desc="Detected frames",
-            unit=" frames",
-            disable=self.disable_tqdm_logging(),
-        ):
+        if self.disable_tqdm_logging():
+            async for frame in frames:
+                yield self._predict(frame)
+            return
+
+        async for frame in tqdm(frames, desc="Detected frames", unit=" frames"):
             yield self._predict(frame)
 
     def disable_tqdm_logging(self) -> bool:
         return log.level > logging.INFO
 
     def _predict(self, frame: Frame) -> DetectedFrame:
+        self._metrics.detected_frames.inc()
         if frame[FrameKeys.data] is None:
             return self._create_empty_detection(frame)
 
         return self._process_frame(frame)
 
+    def _get_prediction_context(self) -> YoloPredictionContext:
+        """Return the prediction context for the current detect config.
+
+        The context is only rebuilt if the detect config has been replaced, e.g. by a
+        new config event in streaming mode.
+        """
+        detect_config = self.config
+        context = self._prediction_context
+        if context is None or context.detect_config is not detect_config:
+            context = self._create_prediction_context(detect_config)
+            self._prediction_context = context
+        return context
+
+    def _create_prediction_context(
+        self, detect_config: DetectConfig
+    ) -> YoloPredictionContext:
+        return YoloPredictionContext(
+            detect_config=detect_config,
+            predict_arguments={
+                "conf": detect_config.confidence,
+                "iou": detect_config.iou,
+                "half": detect_config.half_precision,
+                "imgsz": detect_config.img_size,
+                "device": self._device,
+                "stream": False,
+                "verbose": False,
+                "agnostic_nms": True,
+            },
+            normalized=detect_config.normalized,
+        )
+
     def _process_frame(self, frame: Frame) -> DetectedFrame:
         """Process a single frame and return detected objects."""
+        context = self._get_prediction_context()
+        start = perf_counter()
         model_predictions = self._model.predict(
-            source=frame[FrameKeys.data],
-            conf=self.config.confidence,
-            iou=self.config.iou,
-            half=self.config.half_precision,
-            imgsz=self.config.img_size,
-            device=0 if torch.cuda.is_available() else "cpu",
-            stream=False,
-            verbose=False,
-            agnostic_nms=True,
+            source=frame[FrameKeys.data], **context.predict_arguments
         )
+        self._metrics.inference_duration.observe(perf_counter() - start)
 
         for prediction in model_predictions:
-            return self._create_detection_from_boxes(frame, prediction.boxes)
+            return self._create_detection_from_boxes(frame, prediction.boxes, context)
 
         # Return empty detection if no predictions
         return self._create_empty_detection(frame)
 
-    def _create_detection_from_boxes(self, frame: Frame, boxes: Boxes) -> DetectedFrame:
+    def _create_detection_from_boxes(
+        self, frame: Frame, boxes: Boxes, context: YoloPredictionContext
+    ) -> DetectedFrame:
         """Convert raw detection boxes to a DetectedFrame with detected objects."""
         detections = self._detection_converter.convert(
-            boxes,
-            normalized=self.config.normalized,
-            classification_mapping=self.classifications,
+            boxes, normalized=context.normalized
         )
         return self._detected_frame_factory.create(frame, detections=detections)
 
@@ -195,15 +250,7 @@ class YoloDetector(ObjectDetector, Filter[Frame, DetectedFrame]):
         model_name = Path(self.config.weights).name
         log.info(f"Preloading YOLO model '{model_name}...'")
         self._model.predict(
-            source=None,
-            conf=self.config.confidence,
-            iou=self.config.iou,
-            half=self.config.half_precision,
-            imgsz=self.config.img_size,
-            device=0 if torch.cuda.is_available() else "cpu",
-            stream=False,
-            verbose=False,
-            agnostic_nms=True,
+            source=None, **self._get_prediction_context().predict_arguments
         )
         log.info(f"YOLO model '{model_name}' loaded and ready for inference.'")
 
@@ -222,6 +269,11 @@ class YoloFactory(ObjectDetectorFactory):
             to `Detection` objects.
         detected_frame_factory (DetectedFrameFactory): Factory to create`DetectedFrame`
             objects.
+        metrics (MetricsRegistry): registry the created detectors record inference
+            metrics in.
+        flushes_in_band (bool): whether flushes travel in order with the frames to
+            detect. Only then direct forward detectors hold frames back to fill a
+            batch.
     """
 
     def __init__(
@@ -229,10 +281,14 @@ class YoloFactory(ObjectDetectorFactory):
         get_current_config: GetCurrentConfig,
         detection_converter: YoloDetectionConverter,
         detected_frame_factory: DetectedFrameFactory,
+        metrics: MetricsRegistry = DISABLED_METRICS,
+        flushes_in_band: bool = False,
     ) -> None:
         self._get_current_config = get_current_config
         self._detection_converter = detection_converter
         self._detected_frame_factory = detected_frame_factory
+        self._metrics = metrics
+        self._flushes_in_band = flushes_in_band
 
     def create(self, config: DetectConfig) -> ObjectDetector:
         """
@@ -260,11 +316,8 @@ class YoloFactory(ObjectDetectorFactory):
         log.info(f"Try loading model {weights}")
         t1 = perf_counter()
         is_custom = Path(weights).is_file()
-        model = YoloDetector(
-            model=self._load_model(weights),
-            get_current_config=self._get_current_config,
-            detection_converter=self._detection_converter,
-            detected_frame_factory=self._detected_frame_factory,
+        model = self._create_detector(
+            self._load_model(weights), config.yolo_config.direct_forward
         )
         t2 = perf_counter()
 
@@ -278,6 +331,33 @@ class YoloFactory(ObjectDetectorFactory):
 
         return model
 
+    def _create_detector(self, model: YOLO, direct_forward: bool) -> ObjectDetector:
+        if direct_forward:
+            if isinstance(model.model, DetectionModel):
+                return YoloDirectDetector(
+                    module=model.model,
+                    get_current_config=self._get_current_config,
+                    detected_frame_factory=self._detected_frame_factory,
+                    metrics=self._metrics,
+                    flushes_in_band=self._flushes_in_band,
+                )
+            log.warning(
+                "Direct forward inference is only supported for PyTorch weights. "
+                "Falling back to YOLO predict."
+            )
+        return YoloDetector(
+            model=model,
+            get_current_config=self._get_current_config,
+            detection_converter=self._detection_converter,
+            detected_frame_factory=self._detected_frame_factory,
+            metrics=self._metrics,
+        )
+
+    def release_unused_memory(self) -> None:
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
     def _load_model(self, weights: str | Path) -> YOLO:
         """Load a custom trained or a pretrained YOLOv8 model.
 
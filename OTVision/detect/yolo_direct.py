@@ -0,0 +1,470 @@
+"""
+OTVision module to detect objects by calling the forward method of YOLO models
+"""
+
+# Copyright (C) 2022 OpenTrafficCam Contributors
+# <https://github.com/OpenTrafficCam
+# <team@opentrafficcam.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import logging
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from time import perf_counter
+from typing import AsyncIterator, Iterator
+
+import cv2
+import numpy as np
+import torch
+from torchvision.ops import batched_nms
+from tqdm.asyncio import tqdm
+from ultralytics.nn.tasks import DetectionModel
+
+from OTVision.abstraction.pipes_and_filter import Filter
+from OTVision.application.config import DetectConfig
+from OTVision.application.detect.detected_frame_factory import DetectedFrameFactory
+from OTVision.application.detect.detection_metrics import DetectionMetrics
+from OTVision.application.get_current_config import GetCurrentConfig
+from OTVision.application.metrics import DISABLED_METRICS, MetricsRegistry
+from OTVision.domain.detection import Detection
+from OTVision.domain.frame import DetectedFrame, Frame, FrameKeys
+from OTVision.domain.object_detection import ObjectDetector
+from OTVision.helpers.log import LOGGER_NAME
+
+LETTERBOX_PADDING_VALUE = 114
+MAX_BOXES_FOR_NMS = 30000
+MAX_DETECTIONS = 300
+
+log = logging.getLogger(LOGGER_NAME)
+
+
+def module_memory_bytes(module: torch.nn.Module) -> int:
+    """Return the memory occupied by the parameters and buffers of a module.
+
+    Args:
+        module (torch.nn.Module): the module to measure.
+
+    Returns:
+        int: the memory in bytes.
+    """
+    tensors = [*module.parameters(), *module.buffers()]
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+
+
+@dataclass(frozen=True, slots=True)
+class Letterbox:
+    """Describes how images of one shape are resized and padded to the network input.
+
+    Attributes:
+        image_height (int): height of the original images.
+        image_width (int): width of the original images.
+        resized_height (int): height of the resized images.
+        resized_width (int): width of the resized images.
+        top (int): padding above the resized images.
+        bottom (int): padding below the resized images.
+        left (int): padding left of the resized images.
+        right (int): padding right of the resized images.
+    """
+
+    image_height: int
+    image_width: int
+    resized_height: int
+    resized_width: int
+    top: int
+    bottom: int
+    left: int
+    right: int
+
+    @staticmethod
+    def create(
+        image_height: int, image_width: int, input_size: int, stride: int
+    ) -> "Letterbox":
+        """Creates the letterbox used by ultralytics' predictor for equally sized
+        images of a PyTorch model: the longer side is scaled to the input size and the
+        shorter side is padded to the next multiple of the stride.
+
+        Args:
+            image_height (int): height of the original images.
+            image_width (int): width of the original images.
+            input_size (int): the image size of the model, a multiple of the stride.
+            stride (int): the maximum stride of the model.
+
+        Returns:
+            Letterbox: the letterbox for images of the given shape.
+        """
+        gain = min(input_size / image_height, input_size / image_width)
+        resized_width = round(image_width * gain)
+        resized_height = round(image_height * gain)
+        pad_width = ((input_size - resized_width) % stride) / 2
+        pad_height = ((input_size - resized_height) % stride) / 2
+        return Letterbox(
+            image_height=image_height,
+            image_width=image_width,
+            resized_height=resized_height,
+            resized_width=resized_width,
+            top=round(pad_height - 0.1),
+            bottom=round(pad_height + 0.1),
+            left=round(pad_width - 0.1),
+            right=round(pad_width + 0.1),
+        )
+
+    def apply(self, image: np.ndarray) -> np.ndarray:
+        if image.shape[:2] != (self.resized_height, self.resized_width):
+            image = cv2.resize(
+                image,
+                (self.resized_width, self.resized_height),
+                interpolation=cv2.INTER_LINEAR,
+            )
+        return cv2.copyMakeBorder(
+            image,
+            self.top,
+            self.bottom,
+            self.left,
+            self.right,
+            cv2.BORDER_CONSTANT,
+            value=(LETTERBOX_PADDING_VALUE,) * 3,
+        )
+
+    def scale_boxes(self, boxes: torch.Tensor) -> torch.Tensor:
+        """Scales xyxy boxes from the network input back to the original images.
+
+        Args:
+            boxes (torch.Tensor): boxes of shape (n, 4) in network input pixels.
+
+        Returns:
+            torch.Tensor: boxes in pixels of the original images, clipped to them.
+        """
+        # Same arithmetic as ultralytics, which derives gain and padding from the
+        # shape of the network input.
+        input_height = self.resized_height + self.top + self.bottom
+        input_width = self.resized_width + self.left + self.right
+        gain = min(input_height / self.image_height, input_width / self.image_width)
+        boxes[:, [0, 2]] -= round((input_width - self.image_width * gain) / 2 - 0.1)
+        boxes[:, [1, 3]] -= round((input_height - self.image_height * gain) / 2 - 0.1)
+        boxes /= gain
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clamp(0, self.image_width)
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clamp(0, self.image_height)
+        return boxes
+
+
+@dataclass(frozen=True, slots=True)
+class DirectForwardContext:
+    """Values required for every batch that only change with the detect config.
+
+    Attributes:
+        detect_config (DetectConfig): the detect config the context was created from.
+        input_size (int): the image size rounded up to a multiple of the stride.
+        batch_size (int): maximum number of frames detected at once.
+        half (bool): whether to run the model in half precision.
+        normalized (bool): whether to normalize the bounding boxes.
+    """
+
+    detect_config: DetectConfig
+    input_size: int
+    batch_size: int
+    half: bool
+    normalized: bool
+
+
+class YoloDirectDetector(ObjectDetector, Filter[Frame, DetectedFrame]):
+    """Detects objects by calling the forward method of a YOLO PyTorch module.
+
+    Bypasses the orchestration of ultralytics' `YOLO.predict` (argument merging,
+    source checks, predictor setup and `Results` objects) that runs for every frame.
+    Frames are letterboxed and normalized in batches, passed to the module and reduced
+    with class agnostic non maximum suppression. Detections match those of
+    `YoloDetector` within floating point tolerance.
+
+    Args:
+        module (DetectionModel): the YOLO detection model, e.g. `YOLO(...).model`.
+        get_current_config (GetCurrentConfig): use case to get current configuration.
+        detected_frame_factory (DetectedFrameFactory): Factory to create
+            `DetectedFrame` objects.
+        metrics (MetricsRegistry): registry to record inference metrics in.
+        flushes_in_band (bool): whether flushes travel in order with the frames of
+            the upstream, e.g. through `StreamLane`. Only then frames are held back
+            until a batch is full. Otherwise pulling the next frame may flush the
+            segment of the held frames, so each frame is detected before the next
+            one is pulled.
+    """
+
+    @property
+    def config(self) -> DetectConfig:
+        return self._get_current_config.get().detect
+
+    @property
+    def memory_bytes(self) -> int:
+        return module_memory_bytes(self._module)
+
+    @property
+    def classifications(self) -> dict[int, str]:
+        """The model's classes that it is able to predict.
+
+        Returns:
+            dict[int, str]: the classes
+        """
+        return self._classifications
+
+    def __init__(
+        self,
+        module: DetectionModel,
+        get_current_config: GetCurrentConfig,
+        detected_frame_factory: DetectedFrameFactory,
+        metrics: MetricsRegistry = DISABLED_METRICS,
+        flushes_in_band: bool = False,
+    ) -> None:
+        self._get_current_config = get_current_config
+        self._detected_frame_factory = detected_frame_factory
+        self._metrics = DetectionMetrics(metrics)
+        self._flushes_in_band = flushes_in_band
+        self._device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
+        self._classifications: dict[int, str] = dict(module.names)
+        self._stride = max(int(module.stride.max()), 32)
+        self._module = self._prepare(module)
+        self._half = False
+        self._context: DirectForwardContext | None = None
+        self._letterboxes: dict[tuple[int, int, int], Letterbox] = {}
+
+    def _prepare(self, module: DetectionModel) -> torch.nn.Module:
+        with torch.inference_mode():
+            module = module.fuse(verbose=False)
+        return module.to(self._device).float().eval()
+
+    async def filter(self, pipe: AsyncIterator[Frame]) -> AsyncIterator[DetectedFrame]:
+        async for detected_frame in self.detect(pipe):
+            yield detected_frame
+
+    async def detect(
+        self, frames: AsyncIterator[Frame]
+    ) -> AsyncIterator[DetectedFrame]:
+        if not self.disable_tqdm_logging():
+            frames = tqdm(frames, desc="Detected frames", unit=" frames")
+
+        batch: list[Frame] = []
+        async for frame in frames:
+            if batch and not self._fits_into(batch, frame):
+                for detected_frame in self._detect_batch(batch):
+                    yield detected_frame
+                batch = []
+            batch.append(frame)
+            if not self._flushes_in_band or self._is_full(batch):
+                for detected_frame in self._detect_batch(batch):
+                    yield detected_frame
+                batch = []
+        if batch:
+            for detected_frame in self._detect_batch(batch):
+                yield detected_frame
+
+    def disable_tqdm_logging(self) -> bool:
+        return log.level > logging.INFO
+
+    def _is_full(self, batch: list[Frame]) -> bool:
+        return len(batch) >= self._get_context().batch_size
+
+    def _fits_into(self, batch: list[Frame], frame: Frame) -> bool:
+        """Frames are batched as long as all frames with image data share the same
+        shape and thereby the same letterbox.
+        """
+        image = frame[FrameKeys.data]
+        if image is None:
+            return True
+        for other in batch:
+            if (other_image := other[FrameKeys.data]) is not None:
+                return other_image.shape == image.shape
+        return True
+
+    def _get_context(self) -> DirectForwardContext:
+        """Return the context for the current detect config.
+
+        The context is only rebuilt if the detect config has been replaced, e.g. by a
+        new config event in streaming mode.
+        """
+        detect_config = self.config
+        context = self._context
+        if context is None or context.detect_config is not detect_config:
+            context = self._create_context(detect_config)
+            self._context = context
+        return context
+
+    def _create_context(self, detect_config: DetectConfig) -> DirectForwardContext:
+        half = detect_config.half_precision and self._device.type != "cpu"
+        if half != self._half:
+            self._module = self._module.half() if half else self._module.float()
+            self._half = half
+        return DirectForwardContext(
+            detect_config=detect_config,
+            input_size=math.ceil(detect_config.img_size / self._stride) * self._stride,
+            batch_size=max(detect_config.yolo_config.chunk_size, 1),
+            half=half,
+            normalized=detect_config.normalized,
+        )
+
+    def _get_letterbox(self, image: np.ndarray, input_size: int) -> Letterbox:
+        height, width = image.shape[:2]
+        key = (height, width, input_size)
+        if (letterbox := self._letterboxes.get(key)) is None:
+            letterbox = Letterbox.create(height, width, input_size, self._stride)
+            self._letterboxes[key] = letterbox
+        return letterbox
+
+    def _detect_batch(self, batch: list[Frame]) -> Iterator[DetectedFrame]:
+        images = [
+            image for frame in batch if (image := frame[FrameKeys.data]) is not None
+        ]
+        self._metrics.detected_frames.inc(len(batch))
+        results = iter(self._predict_and_measure(images) if images else [])
+        for frame in batch:
+            if frame[FrameKeys.data] is None:
+                yield self._detected_frame_factory.create(frame, detections=[])
+            else:
+                yield self._detected_frame_factory.create(
+                    frame, detections=next(results)
+                )
+
+    def _predict_and_measure(self, images: list[np.ndarray]) -> list[list[Detection]]:
+        start = perf_counter()
+        predictions = self._predict(images)
+        self._metrics.inference_duration.observe(perf_counter() - start)
+        return predictions
+
+    def _predict(self, images: list[np.ndarray]) -> list[list[Detection]]:
+        context = self._get_context()
+        letterbox = self._get_letterbox(images[0], context.input_size)
+        network_input = self._to_network_input(
+            np.stack([letterbox.apply(image) for image in images]), context
+        )
+        with torch.inference_mode():
+            prediction = self._module(network_input)
+        if isinstance(prediction, (list, tuple)):
+            prediction = prediction[0]
+
+        return [
+            self._to_detections(
+                letterbox.scale_boxes(boxes[:, :4].float()),
+                boxes[:, 4].float(),
+                boxes[:, 5],
+                letterbox,
+                context,
+            )
+            for boxes in self._non_max_suppression(prediction, context.detect_config)
+        ]
+
+    def _to_network_input(
+        self, batch: np.ndarray, context: DirectForwardContext
+    ) -> torch.Tensor:
+        # YOLO.predict treats numpy images as BGR and reverses the channels before
+        # passing them to the model. Our frames are RGB, thus the model is fed with BGR.
+        # The channels are reversed here as well to keep the detections identical.
+        tensor = torch.from_numpy(
+            np.ascontiguousarray(batch[..., ::-1].transpose(0, 3, 1, 2))
+        ).to(self._device, non_blocking=True)
+        tensor = tensor.half() if context.half else tensor.float()
+        return tensor / 255
+
+    def _non_max_suppression(
+        self, prediction: torch.Tensor, config: DetectConfig
+    ) -> list[torch.Tensor]:
+        """Reduces the raw predictions of a batch to the detections of each image.
+
+        Args:
+            prediction (torch.Tensor): raw predictions of shape
+                (batch, 4 + number of classes, number of anchors).
+            config (DetectConfig): the config containing the thresholds.
+
+        Returns:
+            list[torch.Tensor]: detections of each image with rows of x1, y1, x2, y2,
+                confidence and class.
+        """
+        prediction = prediction.transpose(-1, -2)
+        scores, classes = prediction[..., 4:].max(-1)
+        candidates = scores > config.confidence
+
+        results: list[torch.Tensor] = []
+        for image_prediction, image_scores, image_classes, image_candidates in zip(
+            prediction, scores, classes, candidates
+        ):
+            boxes = self._xywh_to_xyxy(image_prediction[image_candidates, :4])
+            image_scores = image_scores[image_candidates]
+            image_classes = image_classes[image_candidates]
+            if len(image_scores) > MAX_BOXES_FOR_NMS:
+                top = image_scores.argsort(descending=True)[:MAX_BOXES_FOR_NMS]
+                boxes = boxes[top]
+                image_scores = image_scores[top]
+                image_classes = image_classes[top]
+
+            # All boxes belong to the same group, which makes the NMS class agnostic
+            keep = batched_nms(
+                boxes, image_scores, torch.zeros_like(image_classes), config.iou
+            )[:MAX_DETECTIONS]
+            results.append(
+                torch.cat(
+                    (
+                        boxes[keep],
+                        image_scores[keep, None],
+                        image_classes[keep, None].to(boxes.dtype),
+                    ),
+                    dim=1,
+                )
+            )
+        return results
+
+    @staticmethod
+    def _xywh_to_xyxy(boxes: torch.Tensor) -> torch.Tensor:
+        result = torch.empty_like(boxes)
+        half_size = boxes[:, 2:] / 2
+        result[:, :2] = boxes[:, :2] - half_size
+        result[:, 2:] = boxes[:, :2] + half_size
+        return result
+
+    def _to_detections(
+        self,
+        boxes: torch.Tensor,
+        confidences: torch.Tensor,
+        classes: torch.Tensor,
+        letterbox: Letterbox,
+        context: DirectForwardContext,
+    ) -> list[Detection]:
+        width = boxes[:, 2] - boxes[:, 0]
+        height = boxes[:, 3] - boxes[:, 1]
+        # Same arithmetic as YoloDetectionConverter on the center based boxes
+        center_x = (boxes[:, 0] + boxes[:, 2]) / 2
+        center_y = (boxes[:, 1] + boxes[:, 3]) / 2
+        xywh = torch.stack((center_x, center_y, width, height), dim=1)
+        if context.normalized:
+            xywh /= torch.tensor(
+                [letterbox.image_width, letterbox.image_height] * 2,
+                device=xywh.device,
+            )
+        xywh[:, :2] -= xywh[:, 2:] / 2
+        return [
+            Detection(class_id=int(class_id), conf=conf, x=x, y=y, w=w, h=h)
+            for (x, y, w, h), conf, class_id in zip(
+                xywh.tolist(), confidences.tolist(), classes.tolist()
+            )
+        ]
+
+    def preload(self) -> None:
+        model_name = Path(self.config.weights).name
+        log.info(f"Preloading YOLO model '{model_name}...'")
+        context = self._get_context()
+        warmup_input = torch.zeros(
+            (1, 3, context.input_size, context.input_size),
+            device=self._device,
+            dtype=torch.float16 if context.half else torch.float32,
+        )
+        with torch.inference_mode():
+            self._module(warmup_input)
+        log.info(f"YOLO model '{model_name}' loaded and ready for inference.'")
@@ -81,3 +81,29 @@ class TrackCliParser(ABC):
             TrackCliArgs: the parsed track CLI arguments.
         """
         raise NotImplementedError
+
+
+@dataclass
+class ServeCliArgs(CliArgs):
+    socket: Path
+    workers: int
+    config_file: Path | None
+    logfile: Path
+    logfile_overwrite: bool
+    max_finished_jobs: int
+    finished_job_retention: timedelta | None
+    preload: bool = True
+
+    def get_config_file(self) -> Path | None:
+        return self.config_file
+
+
+class ServeCliParser(ABC):
+    @abstractmethod
+    def parse(self) -> ServeCliArgs:
+        """Parse serve CLI arguments.
+
+        Returns:
+            ServeCliArgs: the parsed serve CLI arguments.
+        """
+        raise NotImplementedError
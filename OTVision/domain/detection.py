@@ -14,14 +14,19 @@ from OTVision.dataformat import (
 )
 
 TrackId = int
+ClassId = int
+ClassMapping = dict[ClassId, str]
 
 
 @dataclass(frozen=True, repr=True)
 class Detection:
     """Detection data without track context data.
 
+    The class is stored as integer code. It is mapped to its label via the run's
+    `ClassMapping` only when the detection is serialized.
+
     Attributes:
-        label (str): Assigned label, e.g. vehicle class.
+        class_id (ClassId): Code of the assigned class, e.g. vehicle class.
         conf (float): Confidence of detected class.
         x (float): X-coordinate of detection center.
         y (float): Y-coordinate of detection center.
@@ -29,7 +34,7 @@ class Detection:
         h (float): Height of detection.
     """
 
-    label: str
+    class_id: ClassId
     conf: float
     x: float
     y: float
@@ -47,7 +52,7 @@ class Detection:
             TrackedDetection: This detection data with additional track information.
         """
         return TrackedDetection(
-            self.label,
+            self.class_id,
             self.conf,
             self.x,
             self.y,
@@ -57,9 +62,9 @@ class Detection:
             id,
         )
 
-    def to_otdet(self) -> dict:
+    def to_otdet(self, classifications: ClassMapping) -> dict:
         return {
-            CLASS: self.label,
+            CLASS: classifications[self.class_id],
             CONFIDENCE: self.conf,
             X: self.x,
             Y: self.y,
@@ -114,7 +119,7 @@ class FinishedDetection(TrackedDetection):
     ) -> "FinishedDetection":
         td = tracked_detection
         return cls(
-            label=td.label,
+            class_id=td.class_id,
             conf=td.conf,
             x=td.x,
             y=td.y,
@@ -126,9 +131,9 @@ class FinishedDetection(TrackedDetection):
             is_discarded=is_discarded,
         )
 
-    def to_dict(self) -> dict:
+    def to_dict(self, classifications: ClassMapping) -> dict:
         return {
-            CLASS: self.label,
+            CLASS: classifications[self.class_id],
             CONFIDENCE: self.conf,
             X: self.x,
             Y: self.y,
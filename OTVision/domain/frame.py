@@ -6,6 +6,7 @@ from numpy import ndarray
 
 from OTVision.dataformat import FRAME, OCCURRENCE, TRACK_ID
 from OTVision.domain.detection import (
+    ClassMapping,
     Detection,
     FinishedDetection,
     TrackedDetection,
@@ -189,12 +190,13 @@ class FinishedFrame(TrackedFrame):
 
     detections: Sequence[FinishedDetection]
 
-    def to_detection_dicts(self) -> list[dict]:
+    def to_detection_dicts(self, classifications: ClassMapping) -> list[dict]:
         frame_metadata = {FRAME: self.no, OCCURRENCE: self.occurrence.timestamp()}
 
         # add frame metadata to each detection dict
         detection_dict_list = [
-            {**detection.to_dict(), **frame_metadata} for detection in self.detections
+            {**detection.to_dict(classifications), **frame_metadata}
+            for detection in self.detections
         ]
 
         detection_dict_list.sort(key=lambda det: det[TRACK_ID])
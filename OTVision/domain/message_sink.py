@@ -0,0 +1,22 @@
+from abc import ABC, abstractmethod
+
+
+class MessageSink(ABC):
+    """Delivers serialized messages to live consumers.
+
+    A sink can be shared by multiple publishers. It is opened by each of them and
+    only closed once all of them have closed it.
+    """
+
+    @abstractmethod
+    async def open(self) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def publish(self, message: bytes) -> None:
+        """Hand a message over for delivery without waiting for the consumers."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def close(self) -> None:
+        raise NotImplementedError
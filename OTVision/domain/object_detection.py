@@ -42,8 +42,25 @@ class ObjectDetector(ObjectDetectorMetadata):
         """Preload the model if possible."""
         raise NotImplementedError
 
+    @property
+    def memory_bytes(self) -> int:
+        """Estimated memory occupied by the model's weights.
+
+        Returns:
+            int: the memory in bytes. 0 if unknown.
+        """
+        return 0
+
 
 class ObjectDetectorFactory(ABC):
     @abstractmethod
     def create(self, config: DetectConfig) -> ObjectDetector:
         raise NotImplementedError
+
+    def release_unused_memory(self) -> None:
+        """Return memory of detectors that are no longer referenced to the device.
+
+        Called after a detector has been dropped from a cache. Does nothing by
+        default.
+        """
+        pass
@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
+from typing import Sequence
 
+from av.packet import Packet
 from numpy import ndarray
 
 from OTVision.abstraction.pipes_and_filter import Filter
@@ -28,3 +30,20 @@ class VideoWriter(Filter[Frame, Frame], ABC):
     @abstractmethod
     def notify_on_new_video_start(self, event: NewVideoStartEvent) -> None:
         raise NotImplementedError
+
+
+class StreamRecorder(ABC):
+    """Records the compressed packets of a stream into video files."""
+
+    @abstractmethod
+    def start_segment(self, output: str) -> None:
+        """Start recording into a new video file for the given output."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def record(self, packets: Sequence[Packet]) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def close(self) -> None:
+        raise NotImplementedError
@@ -0,0 +1,124 @@
+from functools import cached_property
+
+from OTVision.abstraction.observer import AsyncSubject
+from OTVision.application.config import Config
+from OTVision.application.config_parser import ConfigParser
+from OTVision.application.configure_logger import ConfigureLogger
+from OTVision.application.get_current_config import GetCurrentConfig
+from OTVision.application.io_executor import IoExecutor
+from OTVision.application.metrics import MetricsExporter, MetricsRegistry
+from OTVision.application.otvision_save_path_provider import OtvisionSavePathProvider
+from OTVision.application.track.ottrk import OttrkBuilder
+from OTVision.application.track.tracking_run_id import (
+    CurrentTrackingRunId,
+    GenerateNewTrackingRunId,
+    GetCurrentTrackingRunId,
+)
+from OTVision.detect.otdet import OtdetMetadataBuilder
+from OTVision.domain.current_config import CurrentConfig
+from OTVision.domain.serialization import Deserializer
+from OTVision.ingest.server import DetectionIngestServer, IngestedStream
+from OTVision.plugin.prometheus_metrics import create_metrics_exporters
+from OTVision.plugin.yaml_serialization import YamlDeserializer
+from OTVision.track.id_generator import track_id_generator, tracking_run_uuid_generator
+from OTVision.track.stream_ottrk_file_writer import (
+    OttrkFileWrittenEvent,
+    StreamOttrkFileWriter,
+)
+from OTVision.track.stream_tracker import StreamTracker
+from OTVision.track.tracker.tracker_plugin_iou import IouTracker
+
+
+class IngestBuilder:
+    """Builds the ingestion server tracking the detections of edge nodes.
+
+    All streams share the config of the `TRACK` and `INGEST` sections and a single
+    tracking run.
+    """
+
+    @cached_property
+    def config_parser(self) -> ConfigParser:
+        return ConfigParser(self.yaml_deserializer)
+
+    @cached_property
+    def yaml_deserializer(self) -> Deserializer:
+        return YamlDeserializer()
+
+    @cached_property
+    def configure_logger(self) -> ConfigureLogger:
+        return ConfigureLogger()
+
+    @cached_property
+    def current_config(self) -> CurrentConfig:
+        if self._current_config is not None:
+            return self._current_config
+        return CurrentConfig(Config())
+
+    @cached_property
+    def get_current_config(self) -> GetCurrentConfig:
+        return GetCurrentConfig(self.current_config)
+
+    @cached_property
+    def metrics(self) -> MetricsRegistry:
+        return MetricsRegistry(enabled=self.current_config.get().metrics.enabled)
+
+    @cached_property
+    def metrics_exporters(self) -> list[MetricsExporter]:
+        return create_metrics_exporters(self.metrics, self.current_config.get().metrics)
+
+    @cached_property
+    def io_executor(self) -> IoExecutor:
+        return IoExecutor(metrics=self.metrics)
+
+    @cached_property
+    def save_path_provider(self) -> OtvisionSavePathProvider:
+        return OtvisionSavePathProvider(self.get_current_config)
+
+    @cached_property
+    def current_tracking_run_id(self) -> CurrentTrackingRunId:
+        return CurrentTrackingRunId()
+
+    @cached_property
+    def generate_new_tracking_run_id(self) -> GenerateNewTrackingRunId:
+        return GenerateNewTrackingRunId(
+            tracking_run_uuid_generator, self.current_tracking_run_id
+        )
+
+    def __init__(self, current_config: CurrentConfig | None = None) -> None:
+        self._current_config = current_config
+
+    def create_stream(self, name: str) -> IngestedStream:
+        metrics = self.metrics.labeled(stream=name)
+        return IngestedStream(
+            name=name,
+            tracker=StreamTracker(
+                tracker=IouTracker(
+                    get_current_config=self.get_current_config, metrics=metrics
+                ),
+                id_generator_factory=track_id_generator,
+            ),
+            ottrk_file_writer=StreamOttrkFileWriter(
+                subject=AsyncSubject[OttrkFileWrittenEvent](),
+                builder=OttrkBuilder(OtdetMetadataBuilder()),
+                get_current_config=self.get_current_config,
+                get_current_tracking_run_id=GetCurrentTrackingRunId(
+                    self.current_tracking_run_id
+                ),
+                save_path_provider=self.save_path_provider,
+                io_executor=self.io_executor,
+                metrics=metrics,
+            ),
+            save_dir=self.current_config.get().ingest.save_dir,
+        )
+
+    def build(self) -> DetectionIngestServer:
+        self.generate_new_tracking_run_id.generate()
+        ingest_config = self.current_config.get().ingest
+        return DetectionIngestServer(
+            create_stream=self.create_stream,
+            host=ingest_config.host,
+            port=ingest_config.port,
+            metrics=self.metrics,
+            metrics_exporters=self.metrics_exporters,
+            io_executor=self.io_executor,
+        )
@@ -0,0 +1,132 @@
+"""Messages sent from detecting edge nodes to the ingestion server.
+
+A connection carries a sequence of messages in one direction. Each message is a JSON
+object preceded by its length in bytes as 4 byte unsigned big-endian integer.
+
+A `frames` message contains detected frames of a stream. A `flush` message marks the
+end of a segment of a stream and contains the metadata of its otdet file.
+"""
+
+import asyncio
+import struct
+from datetime import datetime
+from pathlib import Path
+
+import ujson
+
+from OTVision.detect.otdet import OtdetBuilderConfig
+from OTVision.detect.otdet_file_writer import OtdetFileWrittenEvent
+from OTVision.domain.detection import Detection
+from OTVision.domain.frame import DetectedFrame
+
+LENGTH_PREFIX = struct.Struct("!I")
+MAX_MESSAGE_SIZE = 2**26
+
+TYPE = "type"
+FRAMES = "frames"
+FLUSH = "flush"
+STREAM = "stream"
+NUMBER_OF_FRAMES = "number_of_frames"
+SAVE_LOCATION = "save_location"
+OTDET_CONFIG = "otdet_config"
+
+
+class ProtocolError(Exception):
+    """Raised when a received message violates the protocol."""
+
+
+def encode(message: dict) -> bytes:
+    body = ujson.dumps(message).encode()
+    if len(body) > MAX_MESSAGE_SIZE:
+        raise ProtocolError(f"Message of {len(body)} bytes exceeds maximum size")
+    return LENGTH_PREFIX.pack(len(body)) + body
+
+
+async def read_message(reader: asyncio.StreamReader) -> dict | None:
+    """Read the next message.
+
+    Returns:
+        dict | None: the message or None, if the connection has been closed.
+    """
+    try:
+        prefix = await reader.readexactly(LENGTH_PREFIX.size)
+    except asyncio.IncompleteReadError as cause:
+        if cause.partial:
+            raise ProtocolError("Connection closed within a message") from cause
+        return None
+    (length,) = LENGTH_PREFIX.unpack(prefix)
+    if length > MAX_MESSAGE_SIZE:
+        raise ProtocolError(f"Message of {length} bytes exceeds maximum size")
+    try:
+        body = await reader.readexactly(length)
+    except asyncio.IncompleteReadError as cause:
+        raise ProtocolError("Connection closed within a message") from cause
+    message = ujson.loads(body.decode())
+    if not isinstance(message, dict):
+        raise ProtocolError(f"Expected JSON object but got '{message}'")
+    return message
+
+
+def encode_frames(stream: str, frames: list[DetectedFrame]) -> bytes:
+    return encode(
+        {
+            TYPE: FRAMES,
+            STREAM: stream,
+            FRAMES: [
+                [
+                    frame.no,
+                    frame.occurrence.isoformat(),
+                    frame.source,
+                    frame.output,
+                    [
+                        [d.class_id, d.conf, d.x, d.y, d.w, d.h]
+                        for d in frame.detections
+                    ],
+                ]
+                for frame in frames
+            ],
+        }
+    )
+
+
+def decode_frames(message: dict) -> list[DetectedFrame]:
+    return [
+        DetectedFrame(
+            no=int(no),
+            occurrence=datetime.fromisoformat(occurrence),
+            source=source,
+            output=output,
+            detections=[
+                Detection(
+                    class_id=int(class_id),
+                    conf=float(conf),
+                    x=float(x),
+                    y=float(y),
+                    w=float(w),
+                    h=float(h),
+                )
+                for class_id, conf, x, y, w, h in detections
+            ],
+        )
+        for no, occurrence, source, output, detections in message[FRAMES]
+    ]
+
+
+def encode_flush(stream: str, event: OtdetFileWrittenEvent) -> bytes:
+    return encode(
+        {
+            TYPE: FLUSH,
+            STREAM: stream,
+            NUMBER_OF_FRAMES: event.number_of_frames,
+            SAVE_LOCATION: str(event.save_location),
+            OTDET_CONFIG: event.otdet_builder_config.to_dict(),
+        }
+    )
+
+
+def decode_flush(message: dict) -> OtdetFileWrittenEvent:
+    return OtdetFileWrittenEvent(
+        otdet_builder_config=OtdetBuilderConfig.from_dict(message[OTDET_CONFIG]),
+        number_of_frames=message[NUMBER_OF_FRAMES],
+        save_location=Path(message[SAVE_LOCATION]),
+    )
@@ -0,0 +1,246 @@
+import asyncio
+import logging
+from dataclasses import replace
+from pathlib import Path
+from typing import AsyncIterator, Callable
+
+from OTVision.application.io_executor import IoExecutor
+from OTVision.application.metrics import (
+    DISABLED_METRICS,
+    Counter,
+    MetricsExporter,
+    MetricsRegistry,
+)
+from OTVision.detect.otdet_file_writer import OtdetFileWrittenEvent
+from OTVision.domain.frame import DetectedFrame
+from OTVision.helpers.log import LOGGER_NAME
+from OTVision.ingest.protocol import (
+    FLUSH,
+    FRAMES,
+    STREAM,
+    TYPE,
+    ProtocolError,
+    decode_flush,
+    decode_frames,
+    read_message,
+)
+from OTVision.track.stream_ottrk_file_writer import StreamOttrkFileWriter
+from OTVision.track.stream_tracker import StreamTracker
+
+log = logging.getLogger(LOGGER_NAME)
+
+DEFAULT_STREAM_QUEUE_SIZE = 1000
+
+IngestedElement = DetectedFrame | OtdetFileWrittenEvent
+
+
+class IngestedStream:
+    """Tracks the detected frames of a stream received from an edge node.
+
+    Frames and flushes are queued in the order they are received and passed through
+    the stream's tracker into its ottrk file writer. A flush is passed to the writer
+    once all frames preceding it have been tracked. The ottrk files are saved to
+    `save_dir` under the name of the edge node's otdet file.
+
+    Args:
+        name (str): name of the stream.
+        tracker (StreamTracker): tracks the frames of the stream.
+        ottrk_file_writer (StreamOttrkFileWriter): writes the ottrk files.
+        save_dir (Path): directory to save the ottrk files to.
+        queue_size (int): maximum number of queued frames. Receiving waits while the
+            queue is full, so that slow tracking slows down the edge node's
+            connection instead of growing the queue.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        tracker: StreamTracker,
+        ottrk_file_writer: StreamOttrkFileWriter,
+        save_dir: Path,
+        queue_size: int = DEFAULT_STREAM_QUEUE_SIZE,
+    ) -> None:
+        self.name = name
+        self._tracker = tracker
+        self._ottrk_file_writer = ottrk_file_writer
+        self._save_dir = save_dir
+        self._queue: asyncio.Queue[IngestedElement | None] = asyncio.Queue(queue_size)
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def put_frames(self, frames: list[DetectedFrame]) -> None:
+        for frame in frames:
+            await self._queue.put(frame)
+
+    async def put_flush(self, event: OtdetFileWrittenEvent) -> None:
+        source = self._save_dir / Path(event.otdet_builder_config.source).name
+        await self._queue.put(
+            replace(
+                event,
+                otdet_builder_config=replace(
+                    event.otdet_builder_config, source=str(source)
+                ),
+            )
+        )
+
+    async def stop(self) -> None:
+        """Track the queued frames and write the ottrk file still waiting for tracks."""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        async for _ in self._ottrk_file_writer.filter(
+            self._tracker.filter(self._frames())
+        ):
+            pass
+        if self._ottrk_file_writer.snapshot() is not None:
+            await self._ottrk_file_writer.force_flush(None)
+
+    async def _frames(self) -> AsyncIterator[DetectedFrame]:
+        while (element := await self._queue.get()) is not None:
+            if isinstance(element, OtdetFileWrittenEvent):
+                await self._ottrk_file_writer.on_flush(element)
+            else:
+                yield element
+
+
+class DetectionIngestServer:
+    """Accepts detected frames from edge nodes via TCP and tracks them per stream.
+
+    Edge nodes send their messages on long-lived connections as described in
+    `OTVision.ingest.protocol`. Each stream is tracked independently. A stream is
+    set up once its first message arrives. Connections that violate the protocol are
+    closed.
+
+    Args:
+        create_stream (Callable[[str], IngestedStream]): sets up the tracking of the
+            stream with the given name.
+        host (str): interface to listen on.
+        port (int): port to listen on. If 0, a free port is chosen.
+        metrics (MetricsRegistry): registry to record ingestion metrics in.
+        metrics_exporters (list[MetricsExporter] | None): export the metrics while
+            the server is running.
+        io_executor (IoExecutor | None): writes the ottrk files of the streams. It is
+            shut down once the server has stopped.
+    """
+
+    @property
+    def port(self) -> int:
+        """The port the server is listening on."""
+        if self._server is None:
+            raise ValueError("Server has not been started yet.")
+        return self._server.sockets[0].getsockname()[1]
+
+    def __init__(
+        self,
+        create_stream: Callable[[str], IngestedStream],
+        host: str,
+        port: int,
+        metrics: MetricsRegistry = DISABLED_METRICS,
+        metrics_exporters: list[MetricsExporter] | None = None,
+        io_executor: IoExecutor | None = None,
+    ) -> None:
+        self._create_stream = create_stream
+        self._host = host
+        self._port = port
+        self._metrics = metrics
+        self._metrics_exporters = metrics_exporters or []
+        self._io_executor = io_executor
+        self._server: asyncio.Server | None = None
+        self._streams: dict[str, IngestedStream] = {}
+        self._frames_metrics: dict[str, Counter] = {}
+        self._connections: set[asyncio.Task] = set()
+        self._shutdown_requested = asyncio.Event()
+        self._connections_metric = metrics.gauge(
+            "otvision_ingest_connections", "Edge nodes connected to the server."
+        )
+
+    async def serve(self) -> None:
+        """Serve edge nodes until a shutdown is requested."""
+        for exporter in self._metrics_exporters:
+            exporter.start()
+        try:
+            await self.start()
+            await self._shutdown_requested.wait()
+        finally:
+            await self.stop()
+            for exporter in self._metrics_exporters:
+                exporter.stop()
+            if self._io_executor is not None:
+                await asyncio.to_thread(self._io_executor.shutdown)
+
+    def request_shutdown(self) -> None:
+        self._shutdown_requested.set()
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(
+            self._handle_connection, host=self._host, port=self._port
+        )
+        log.info(f"OTVision ingestion server listening on {self._host}:{self.port}")
+
+    async def stop(self) -> None:
+        """Stop accepting data and finish tracking the data received so far."""
+        if self._server is not None:
+            self._server.close()
+        for connection in list(self._connections):
+            connection.cancel()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+            self._server = None
+        for stream in self._streams.values():
+            await stream.stop()
+        self._streams.clear()
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        if (task := asyncio.current_task()) is not None:
+            self._connections.add(task)
+        self._connections_metric.set(len(self._connections))
+        peer = writer.get_extra_info("peername")
+        log.info(f"Edge node {peer} connected")
+        try:
+            while (message := await read_message(reader)) is not None:
+                await self._handle_message(message)
+        except (ProtocolError, ValueError, KeyError, TypeError) as cause:
+            log.warning(f"Closing connection of edge node {peer}: {cause}")
+        except ConnectionError:
+            log.warning(f"Lost connection of edge node {peer}")
+        finally:
+            writer.close()
+            if task is not None:
+                self._connections.discard(task)
+            self._connections_metric.set(len(self._connections))
+
+    async def _handle_message(self, message: dict) -> None:
+        stream = self._get_stream(str(message[STREAM]))
+        message_type = message.get(TYPE)
+        if message_type == FRAMES:
+            frames = decode_frames(message)
+            await stream.put_frames(frames)
+            self._frames_metrics[stream.name].inc(len(frames))
+        elif message_type == FLUSH:
+            await stream.put_flush(decode_flush(message))
+        else:
+            raise ProtocolError(
+                f"Unknown message type '{message_type}'. "
+                f"Expected one of {[FRAMES, FLUSH]}."
+            )
+
+    def _get_stream(self, name: str) -> IngestedStream:
+        if (stream := self._streams.get(name)) is None:
+            log.info(f"Start tracking stream '{name}'")
+            stream = self._create_stream(name)
+            stream.start()
+            self._streams[name] = stream
+            self._frames_metrics[name] = self._metrics.labeled(stream=name).counter(
+                "otvision_ingest_frames_total", "Detected frames received."
+            )
+        return stream
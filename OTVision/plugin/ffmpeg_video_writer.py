@@ -1,12 +1,13 @@
 import logging
 from enum import IntEnum, StrEnum
 from pathlib import Path
+from queue import Full, Queue
 from subprocess import PIPE, Popen, TimeoutExpired
 from threading import Thread
 from typing import AsyncIterator, Callable
 
 import ffmpeg
-from numpy import ndarray
+from numpy import ascontiguousarray, ndarray
 
 from OTVision.application.event.new_video_start import NewVideoStartEvent
 from OTVision.detect.detected_frame_buffer import FlushEvent
@@ -17,7 +18,8 @@ from OTVision.helpers.machine import ON_WINDOWS
 
 VideoSaveLocationStrategy = Callable[[str], str]
 
-BUFFER_SIZE_100MB = 10**8
+DEFAULT_WRITE_QUEUE_SIZE = 60
+FFMPEG_EXIT_TIMEOUT = 5.0
 DEFAULT_CRF = 23
 VIDEO_SAVE_FILE_POSTFIX = "_processed"
 
@@ -106,7 +108,182 @@ class ConstantRateFactor(IntEnum):
         return list(ConstantRateFactor.__members__.keys())
 
 
+def scale_video_size(width: int, height: int, scale: float) -> tuple[int, int]:
+    """Scale the size of a video.
+
+    The scaled width and height are rounded to even numbers as required by the
+    chroma subsampling of yuv420p.
+
+    Returns:
+        tuple[int, int]: the scaled width and height.
+    """
+    if scale == 1.0:
+        return width, height
+    return _even(width * scale), _even(height * scale)
+
+
+def _even(value: float) -> int:
+    return max(2, round(value / 2) * 2)
+
+
+class FrameDecimator:
+    """Selects every `frame_step`-th frame of a video, starting with the first.
+
+    Args:
+        frame_step (int): distance between two selected frames. 1 selects every
+            frame.
+    """
+
+    def __init__(self, frame_step: int) -> None:
+        self._frame_step = max(frame_step, 1)
+        self._index = 0
+
+    def output_fps(self, fps: float) -> float:
+        return fps / self._frame_step
+
+    def reset(self) -> None:
+        self._index = 0
+
+    def select(self) -> bool:
+        """Whether the next frame is selected."""
+        selected = self._index % self._frame_step == 0
+        self._index += 1
+        return selected
+
+
+class FfmpegPipeWriter:
+    """Writes the images of a single video to the stdin of an ffmpeg process.
+
+    Images are queued by reference and written to the pipe by a dedicated thread, so
+    a slow encoder does not block the caller. The pipe is unbuffered and images are
+    written as memoryviews of their data, i.e. without copying them.
+
+    Args:
+        process (Popen): the ffmpeg process reading raw images from stdin.
+        queue_size (int): maximum number of queued images.
+        drop_frames_if_full (bool): whether to drop images if the queue is full
+            instead of waiting until the writer thread catches up.
+    """
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def dropped_frames(self) -> int:
+        return self._dropped_frames
+
+    def __init__(
+        self, process: Popen, queue_size: int, drop_frames_if_full: bool
+    ) -> None:
+        self._process = process
+        self._queue: Queue[ndarray | None] = Queue(maxsize=queue_size)
+        self._drop_frames_if_full = drop_frames_if_full
+        self._dropped_frames = 0
+        self._error: Exception | None = None
+        self._thread = Thread(
+            target=self._write_queued_images, name="ffmpeg-pipe-writer", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, image: ndarray) -> None:
+        """Queue an image to be written.
+
+        Raises:
+            RuntimeError: if writing a previous image failed.
+        """
+        if self._error is not None:
+            raise self._error
+        contiguous_image = ascontiguousarray(image)
+        if not self._drop_frames_if_full:
+            self._queue.put(contiguous_image)
+            return
+        try:
+            self._queue.put_nowait(contiguous_image)
+        except Full:
+            self._dropped_frames += 1
+
+    def close(self) -> None:
+        """Write all queued images, then close stdin and wait for ffmpeg to finish.
+
+        Returns immediately. The queued images are written in order by a background
+        thread.
+        """
+        self._queue.put(None)
+        Thread(target=self._cleanup, daemon=True).start()
+
+    def _write_queued_images(self) -> None:
+        while (image := self._queue.get()) is not None:
+            if self._error is not None:
+                continue
+            try:
+                self._write_all(memoryview(image).cast("B"))
+            except (BrokenPipeError, OSError) as cause:
+                self._error = self._create_error(cause)
+
+    def _write_all(self, data: memoryview) -> None:
+        if self._process.stdin is None:
+            return
+        while data:
+            written = self._process.stdin.write(data)
+            data = data[written:]
+
+    def _create_error(self, cause: Exception) -> Exception:
+        # Check if the process is still running
+        if self._process.poll() is None:
+            return cause
+        # Process has terminated, get the error message
+        stderr = self._process.stderr.read() if self._process.stderr else b""
+        message = stderr.decode("utf-8", errors="ignore")
+        log.info(message)
+        return RuntimeError(f"ffmpeg process terminated unexpectedly: {message}")
+
+    def _cleanup(self) -> None:
+        self._thread.join()
+        if self._error is not None:
+            log.error(f"Error writing video: {self._error}")
+        try:
+            if self._process.stdin:
+                self._process.stdin.close()
+        except Exception as cause:
+            log.debug(f"Error closing stdin: {cause}")
+
+        try:
+            try:
+                self._process.wait(timeout=FFMPEG_EXIT_TIMEOUT)
+            except TimeoutExpired:
+                self._process.kill()
+                try:
+                    self._process.wait(timeout=1.0)
+                except TimeoutExpired:
+                    log.error("Could not kill FFmpeg process")
+
+            if self._process.returncode != 0:
+                log.debug(f"FFmpeg ended with code: {self._process.returncode}")
+        except Exception as e:
+            log.debug(f"Cleanup completed with minor issues: {e}")
+
+
 class FfmpegVideoWriter(VideoWriter):
+    """Writes frames into video files using ffmpeg.
+
+    Frames are passed to ffmpeg by a writer thread per video. Hence, encoding does
+    not slow down the detection unless the write queue is full.
+
+    Videos can be recorded with less quality than the frames are detected with. Only
+    every `frame_step`-th frame is written. Frames not written are skipped before they
+    are copied or queued. ffmpeg scales the written frames by `scale`.
+
+    Args:
+        save_location_strategy (VideoSaveLocationStrategy): derives the save location
+            of a video from the output of the frames.
+        queue_size (int): maximum number of frames waiting to be written.
+        drop_frames_if_full (bool): whether to drop frames if the write queue is full
+            instead of waiting for the encoder. Use it for live streams that must
+            not fall behind.
+        scale (float): factor to scale the width and height of the videos by.
+        frame_step (int): distance between two written frames.
+    """
 
     @property
     def _current_video_metadata(self) -> NewVideoStartEvent:
@@ -115,19 +292,33 @@ class FfmpegVideoWriter(VideoWriter):
         return self.__current_video_metadata
 
     @property
-    def _ffmpeg_process(self) -> Popen:
-        if self.__ffmpeg_process is None:
+    def _pipe_writer(self) -> FfmpegPipeWriter:
+        if self.__pipe_writer is None:
             raise ValueError("FfmpegVideoWriter is not initialized yet.")
-        return self.__ffmpeg_process
+        return self.__pipe_writer
 
     @property
     def is_open(self) -> bool:
-        return self.__ffmpeg_process is not None
+        return self.__pipe_writer is not None
 
     @property
     def is_closed(self) -> bool:
         return self.is_open is False
 
+    @property
+    def queue_depth(self) -> int:
+        """Number of frames of the current video waiting to be written."""
+        if self.__pipe_writer is None:
+            return 0
+        return self.__pipe_writer.queue_depth
+
+    @property
+    def dropped_frames(self) -> int:
+        """Number of frames dropped because the write queue was full."""
+        if self.__pipe_writer is None:
+            return self._dropped_frames
+        return self._dropped_frames + self.__pipe_writer.dropped_frames
+
     def __init__(
         self,
         save_location_strategy: VideoSaveLocationStrategy,
@@ -138,6 +329,10 @@ class FfmpegVideoWriter(VideoWriter):
         output_pixel_format: PixelFormat = PixelFormat.YUV420P,
         output_video_codec: VideoCodec = VideoCodec.H264_SOFTWARE,
         constant_rate_factor: ConstantRateFactor = ConstantRateFactor.LOSSLESS,
+        queue_size: int = DEFAULT_WRITE_QUEUE_SIZE,
+        drop_frames_if_full: bool = False,
+        scale: float = 1.0,
+        frame_step: int = 1,
     ) -> None:
         if ON_WINDOWS:
             log.warning(
@@ -150,95 +345,53 @@ class FfmpegVideoWriter(VideoWriter):
         self._input_pixel_format = input_pixel_format
         self._output_pixel_format = output_pixel_format
         self._output_video_codec = output_video_codec
-        self.__ffmpeg_process: Popen | None = None
+        self._queue_size = queue_size
+        self._drop_frames_if_full = drop_frames_if_full
+        self._dropped_frames = 0
+        self._scale = scale
+        self._frame_decimator = FrameDecimator(frame_step)
+        self.__pipe_writer: FfmpegPipeWriter | None = None
         self.__current_video_metadata: NewVideoStartEvent | None = None
         self._constant_rate_factor = constant_rate_factor
         log.info(
             "FFmpeg video writer settings: "
             f"video_codec='{self._output_video_codec.value}', "
             f"encoding_speed='{self._encoding_speed.value}', "
-            f"crf='{self._constant_rate_factor.value}'"
+            f"crf='{self._constant_rate_factor.value}', "
+            f"scale='{self._scale}', "
+            f"frame_step='{frame_step}'"
         )
 
     def open(self, output: str, width: int, height: int, fps: float) -> None:
-        self.__ffmpeg_process = self.__create_ffmpeg_process(
+        self._frame_decimator.reset()
+        process = self.__create_ffmpeg_process(
             output_file=output,
             width=width,
             height=height,
-            fps=fps,
+            fps=self._frame_decimator.output_fps(fps),
+        )
+        self.__pipe_writer = FfmpegPipeWriter(
+            process,
+            queue_size=self._queue_size,
+            drop_frames_if_full=self._drop_frames_if_full,
         )
 
     def write(self, image: ndarray) -> None:
-        try:
-            if self._ffmpeg_process.stdin:
-                self._ffmpeg_process.stdin.write(image.tobytes())
-                self._ffmpeg_process.stdin.flush()
-        except BrokenPipeError:
-            # Check if the process is still running
-            if self._ffmpeg_process.poll() is not None:
-                # Process has terminated, get the error message
-                stderr = (
-                    self._ffmpeg_process.stderr.read()
-                    if self._ffmpeg_process.stderr
-                    else b""
-                )
-                log.info(stderr.decode("utf-8", errors="ignore"))
-                raise RuntimeError(
-                    "ffmpeg process terminated unexpectedly: "
-                    f"{stderr.decode('utf-8', errors='ignore')}"
-                )
-            raise  # Re-raise the original exception if the process is still running
+        writer = self._pipe_writer
+        if self._frame_decimator.select():
+            writer.write(image)
 
     def close(self) -> None:
-        if self.__ffmpeg_process is not None:
-            process_to_cleanup = self._ffmpeg_process
-            self.__ffmpeg_process = None  # Immediately mark as closed
-
-            # Close stdin synchronously (fast operation)
-            try:
-                if process_to_cleanup.stdin:
-                    process_to_cleanup.stdin.flush()
-                    process_to_cleanup.stdin.close()
-            except Exception as cause:
-                log.debug(f"Error closing stdin: {cause}")
-
-            # Handle cleanup in background thread
-            def cleanup_process() -> None:
-                try:
-                    # Just check if it's still running and wait for it
-                    if process_to_cleanup.poll() is None:
-                        # Still running, close stdin and wait
-                        try:
-                            if (
-                                process_to_cleanup.stdin
-                                and not process_to_cleanup.stdin.closed
-                            ):
-                                process_to_cleanup.stdin.close()
-                        except Exception as cause:
-                            log.error(f"Error closing stdin: {cause}")
-
-                        # Simple wait with timeout
-                        try:
-                            process_to_cleanup.wait(timeout=5.0)
-                        except TimeoutExpired:
-                            process_to_cleanup.kill()
-                            try:
-                                process_to_cleanup.wait(timeout=1.0)
-                            except TimeoutExpired:
-                                log.error("Could not kill FFmpeg process")
-
-                    # Log return code if we care
-                    if process_to_cleanup.returncode != 0:
-                        log.debug(
-                            f"FFmpeg ended with code: {process_to_cleanup.returncode}"
-                        )
-
-                except Exception as e:
-                    log.debug(f"Cleanup completed with minor issues: {e}")
-
-            # Start cleanup in daemon thread (won't prevent program exit)
-            cleanup_thread = Thread(target=cleanup_process, daemon=True)
-            cleanup_thread.start()
+        if self.__pipe_writer is not None:
+            pipe_writer = self.__pipe_writer
+            self.__pipe_writer = None  # Immediately mark as closed
+            if pipe_writer.dropped_frames:
+                log.warning(
+                    f"Dropped {pipe_writer.dropped_frames} frames of the video "
+                    "because encoding could not keep up."
+                )
+            self._dropped_frames += pipe_writer.dropped_frames
+            pipe_writer.close()
 
         self.__current_video_metadata = None
 
@@ -253,6 +406,7 @@ class FfmpegVideoWriter(VideoWriter):
         self, output_file: str, width: int, height: int, fps: float
     ) -> Popen:
         save_file = self._save_location_strategy(output_file)
+        output_width, output_height = scale_video_size(width, height, self._scale)
         cmd = (
             ffmpeg.input(
                 "pipe:0",
@@ -268,17 +422,17 @@ class FfmpegVideoWriter(VideoWriter):
                 preset=self._encoding_speed.value,
                 crf=self._constant_rate_factor.value,
                 format=self._output_format.value,
+                s=f"{output_width}x{output_height}",
             )
+            # stderr is only read once ffmpeg terminated. Progress stats would fill
+            # the pipe during long videos and block ffmpeg.
+            .global_args("-nostats", "-loglevel", "error")
             .overwrite_output()
             .compile()
         )
 
-        process = Popen(
-            cmd,
-            stdin=PIPE,
-            stderr=PIPE,
-            bufsize=BUFFER_SIZE_100MB,
-        )
+        # Unbuffered, the queue of the pipe writer decouples ffmpeg from the caller.
+        process = Popen(cmd, stdin=PIPE, stderr=PIPE, bufsize=0)
         log.info(f"Writing new video file to '{save_file}'.")
         return process
 
@@ -0,0 +1,245 @@
+import logging
+import math
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from threading import Event, Thread
+
+from OTVision.application.config import MetricsConfig
+from OTVision.application.metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    Labels,
+    Metric,
+    MetricsExporter,
+    MetricsRegistry,
+)
+from OTVision.helpers.log import LOGGER_NAME
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+METRICS_PATH = "/metrics"
+
+log = logging.getLogger(LOGGER_NAME)
+
+
+def format_prometheus_text(metrics: list[Metric]) -> str:
+    """Format metrics in the Prometheus text exposition format.
+
+    Args:
+        metrics (list[Metric]): metrics sorted by name, e.g. as collected by a
+            `MetricsRegistry`.
+
+    Returns:
+        str: the formatted metrics.
+    """
+    lines: list[str] = []
+    current_name: str | None = None
+    for metric in metrics:
+        if metric.name != current_name:
+            current_name = metric.name
+            lines.append(f"# HELP {metric.name} {_escape_help(metric.description)}")
+            lines.append(f"# TYPE {metric.name} {metric.type.value}")
+        lines.extend(_format_samples(metric))
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def _format_samples(metric: Metric) -> list[str]:
+    if isinstance(metric, (Counter, Gauge)):
+        return [_format_sample(metric.name, metric.labels, metric.value)]
+    if isinstance(metric, Histogram):
+        snapshot = metric.snapshot()
+        samples = [
+            _format_sample(
+                f"{metric.name}_bucket",
+                metric.labels + (("le", _format_value(bound)),),
+                count,
+            )
+            for bound, count in snapshot.buckets
+        ]
+        samples.append(
+            _format_sample(
+                f"{metric.name}_bucket",
+                metric.labels + (("le", "+Inf"),),
+                snapshot.count,
+            )
+        )
+        samples.append(
+            _format_sample(f"{metric.name}_sum", metric.labels, snapshot.sum)
+        )
+        samples.append(
+            _format_sample(f"{metric.name}_count", metric.labels, snapshot.count)
+        )
+        return samples
+    raise TypeError(f"Unsupported metric {type(metric).__name__}")
+
+
+def _format_sample(name: str, labels: Labels, value: float) -> str:
+    if not labels:
+        return f"{name} {_format_value(value)}"
+    formatted_labels = ",".join(
+        f'{label}="{_escape_label_value(label_value)}"' for label, label_value in labels
+    )
+    return f"{name}{{{formatted_labels}}} {_format_value(value)}"
+
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label_value(value: str) -> str:
+    return _escape_help(value).replace('"', '\\"')
+
+
+class PrometheusHttpExporter(MetricsExporter):
+    """Serves the metrics in the Prometheus text format at `/metrics`.
+
+    The server runs on a daemon thread, so that scrapes never block the event loop.
+
+    Args:
+        registry (MetricsRegistry): the registry to export.
+        host (str): interface to listen on.
+        port (int): port to listen on. Use 0 to pick a free port.
+    """
+
+    @property
+    def port(self) -> int:
+        """The port the server listens on. Only available after starting."""
+        if self._server is None:
+            raise ValueError("Metrics server has not been started yet.")
+        return self._server.server_address[1]
+
+    def __init__(self, registry: MetricsRegistry, host: str, port: int) -> None:
+        self._registry = registry
+        self._host = host
+        self._port = port
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: Thread | None = None
+
+    def start(self) -> None:
+        registry = self._registry
+
+        class MetricsRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] != METRICS_PATH:
+                    self.send_error(404)
+                    return
+                body = format_prometheus_text(registry.collect()).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: object) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(
+            (self._host, self._port), MetricsRequestHandler
+        )
+        self._server.daemon_threads = True
+        self._thread = Thread(
+            target=self._server.serve_forever, name="metrics-http", daemon=True
+        )
+        self._thread.start()
+        log.info(f"Serving metrics at http://{self._host}:{self.port}{METRICS_PATH}")
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+class PrometheusTextfileExporter(MetricsExporter):
+    """Periodically rewrites a file with the metrics in the Prometheus text format.
+
+    The file is replaced atomically, so that readers never see partial content. It is
+    written a last time on stopping.
+
+    Args:
+        registry (MetricsRegistry): the registry to export.
+        file (Path): the file to write.
+        interval_seconds (float): seconds between two writes.
+    """
+
+    def __init__(
+        self, registry: MetricsRegistry, file: Path, interval_seconds: float
+    ) -> None:
+        self._registry = registry
+        self._file = file
+        self._interval_seconds = interval_seconds
+        self._stop_event = Event()
+        self._thread: Thread | None = None
+
+    def start(self) -> None:
+        self._file.parent.mkdir(parents=True, exist_ok=True)
+        self._stop_event.clear()
+        self._thread = Thread(target=self._run, name="metrics-textfile", daemon=True)
+        self._thread.start()
+        log.info(f"Writing metrics to '{self._file}'")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def write(self) -> None:
+        temporary_file = self._file.with_name(f".{self._file.name}.tmp")
+        temporary_file.write_text(
+            format_prometheus_text(self._registry.collect()), encoding="utf-8"
+        )
+        os.replace(temporary_file, self._file)
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self._interval_seconds):
+            self._write_safely()
+        self._write_safely()
+
+    def _write_safely(self) -> None:
+        try:
+            self.write()
+        except OSError as cause:
+            log.warning(f"Could not write metrics to '{self._file}': {cause}")
+
+
+def create_metrics_exporters(
+    registry: MetricsRegistry, config: MetricsConfig
+) -> list[MetricsExporter]:
+    """Create the exporters configured for the metrics.
+
+    Args:
+        registry (MetricsRegistry): the registry to export.
+        config (MetricsConfig): the metrics config.
+
+    Returns:
+        list[MetricsExporter]: the exporters. Empty, if metrics are disabled.
+    """
+    if not config.enabled:
+        return []
+    exporters: list[MetricsExporter] = []
+    if config.port is not None:
+        exporters.append(PrometheusHttpExporter(registry, config.host, config.port))
+    if config.textfile is not None:
+        exporters.append(
+            PrometheusTextfileExporter(
+                registry, config.textfile, config.interval_seconds
+            )
+        )
+    if not exporters:
+        log.warning("Metrics are enabled, but neither a port nor a textfile is set.")
+    return exporters
@@ -0,0 +1,332 @@
+import asyncio
+import atexit
+import logging
+from fractions import Fraction
+from queue import Full, Queue
+from threading import Thread, current_thread
+from typing import AsyncIterator, cast
+
+import av
+from av.container import OutputContainer
+from av.video.stream import VideoStream
+from numpy import ndarray
+
+from OTVision.application.event.new_video_start import NewVideoStartEvent
+from OTVision.detect.detected_frame_buffer import FlushEvent
+from OTVision.domain.frame import Frame, FrameKeys
+from OTVision.domain.video_writer import VideoWriter
+from OTVision.helpers.log import LOGGER_NAME
+from OTVision.plugin.ffmpeg_video_writer import (
+    DEFAULT_WRITE_QUEUE_SIZE,
+    ConstantRateFactor,
+    EncodingSpeed,
+    FrameDecimator,
+    PixelFormat,
+    VideoCodec,
+    VideoFormat,
+    VideoSaveLocationStrategy,
+    scale_video_size,
+)
+
+MAX_FRAME_RATE_DENOMINATOR = 1001
+
+log = logging.getLogger(LOGGER_NAME)
+
+_finishing_encoder_threads: set[Thread] = set()
+
+
+@atexit.register
+def _wait_for_finishing_encoders() -> None:
+    """Finish the videos that have been closed, before the encoder threads are killed.
+
+    Encoder threads are daemon threads, so that a video never closed does not keep
+    the interpreter alive. Videos already closed are finished at exit, though.
+    """
+    for thread in list(_finishing_encoder_threads):
+        thread.join()
+
+
+class PyAvVideoEncoder:
+    """Encodes the images of a single video with libav in the current process.
+
+    Args:
+        container (OutputContainer): the container to write the video to.
+        stream (VideoStream): the configured video stream of the container.
+        input_pixel_format (PixelFormat): pixel format of the images to encode.
+        threaded (bool): whether to encode on a worker thread. Images are queued
+            by reference then.
+        queue_size (int): maximum number of queued images.
+        drop_frames_if_full (bool): whether to drop images if the queue is full
+            instead of waiting until the worker thread catches up.
+    """
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def dropped_frames(self) -> int:
+        return self._dropped_frames
+
+    @property
+    def is_finished(self) -> bool:
+        return self._thread is None or not self._thread.is_alive()
+
+    def __init__(
+        self,
+        container: OutputContainer,
+        stream: VideoStream,
+        input_pixel_format: PixelFormat,
+        threaded: bool,
+        queue_size: int,
+        drop_frames_if_full: bool,
+    ) -> None:
+        self._container = container
+        self._stream = stream
+        self._input_pixel_format = input_pixel_format
+        self._queue: Queue[ndarray | None] = Queue(maxsize=queue_size)
+        self._drop_frames_if_full = drop_frames_if_full
+        self._dropped_frames = 0
+        self._error: Exception | None = None
+        self._thread: Thread | None = None
+        if threaded:
+            self._thread = Thread(
+                target=self._encode_queued_images, name="pyav-encoder", daemon=True
+            )
+            self._thread.start()
+
+    def write(self, image: ndarray) -> None:
+        """Encode an image or queue it, if encoding on a worker thread.
+
+        Raises:
+            Exception: if encoding a previous image failed.
+        """
+        if self._error is not None:
+            raise self._error
+        if self._thread is None:
+            self._encode(image)
+        elif not self._drop_frames_if_full:
+            self._queue.put(image)
+        else:
+            try:
+                self._queue.put_nowait(image)
+            except Full:
+                self._dropped_frames += 1
+
+    def close(self) -> None:
+        """Encode all remaining images and finish the video file.
+
+        If encoding on a worker thread, returns immediately. The worker thread
+        finishes the video file once all queued images are encoded. Use
+        `wait_until_finished` to wait for it. The video is finished at the latest
+        when the interpreter exits.
+        """
+        if self._thread is None:
+            self._finish()
+        else:
+            _finishing_encoder_threads.add(self._thread)
+            self._queue.put(None)
+
+    def wait_until_finished(self, timeout: float | None = None) -> None:
+        """Wait until the worker thread has finished the closed video file."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _encode_queued_images(self) -> None:
+        try:
+            while (image := self._queue.get()) is not None:
+                if self._error is not None:
+                    continue
+                try:
+                    self._encode(image)
+                except Exception as cause:
+                    self._error = cause
+                    log.error(f"Error encoding video: {cause}")
+            self._finish()
+        finally:
+            _finishing_encoder_threads.discard(current_thread())
+
+    def _encode(self, image: ndarray) -> None:
+        frame = av.VideoFrame.from_ndarray(image, format=self._input_pixel_format)
+        if frame.width != self._stream.width or frame.height != self._stream.height:
+            frame = frame.reformat(width=self._stream.width, height=self._stream.height)
+        self._container.mux(self._stream.encode(frame))
+
+    def _finish(self) -> None:
+        try:
+            if self._error is None:
+                # Flush frames still buffered by the encoder
+                self._container.mux(self._stream.encode(None))
+        except Exception as cause:
+            log.error(f"Error finishing video: {cause}")
+        finally:
+            self._container.close()
+
+
+class PyAvVideoWriter(VideoWriter):
+    """Writes frames into video files by encoding them with libav in-process.
+
+    In contrast to `FfmpegVideoWriter`, no ffmpeg process is spawned per video and
+    images are not copied through a pipe.
+
+    Like `FfmpegVideoWriter`, only every `frame_step`-th frame is encoded and the
+    videos are scaled by `scale`. Frames not encoded are skipped before they are
+    converted.
+
+    Closed videos encoded on a worker thread are finished in the background. The
+    filter waits for them once its frames are exhausted. Otherwise, call
+    `wait_until_closed` before the files are read.
+
+    Args:
+        save_location_strategy (VideoSaveLocationStrategy): derives the save location
+            of a video from the output of the frames.
+        encode_on_worker_thread (bool): whether each video is encoded on a worker
+            thread, so that encoding does not slow down the detection.
+        queue_size (int): maximum number of frames waiting to be encoded by the
+            worker thread.
+        drop_frames_if_full (bool): whether to drop frames if the queue of the worker
+            thread is full instead of waiting for the encoder.
+        scale (float): factor to scale the width and height of the videos by.
+        frame_step (int): distance between two encoded frames.
+    """
+
+    @property
+    def is_open(self) -> bool:
+        return self.__encoder is not None
+
+    @property
+    def is_closed(self) -> bool:
+        return self.is_open is False
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of frames of the current video waiting to be encoded."""
+        if self.__encoder is None:
+            return 0
+        return self.__encoder.queue_depth
+
+    @property
+    def dropped_frames(self) -> int:
+        """Number of frames dropped because the encoding queue was full."""
+        if self.__encoder is None:
+            return self._dropped_frames
+        return self._dropped_frames + self.__encoder.dropped_frames
+
+    @property
+    def _encoder(self) -> PyAvVideoEncoder:
+        if self.__encoder is None:
+            raise ValueError("PyAvVideoWriter is not initialized yet.")
+        return self.__encoder
+
+    def __init__(
+        self,
+        save_location_strategy: VideoSaveLocationStrategy,
+        encoding_speed: EncodingSpeed = EncodingSpeed.FAST,
+        output_format: VideoFormat = VideoFormat.MP4,
+        input_pixel_format: PixelFormat = PixelFormat.RGB24,
+        output_pixel_format: PixelFormat = PixelFormat.YUV420P,
+        output_video_codec: VideoCodec = VideoCodec.H264_SOFTWARE,
+        constant_rate_factor: ConstantRateFactor = ConstantRateFactor.LOSSLESS,
+        encode_on_worker_thread: bool = True,
+        queue_size: int = DEFAULT_WRITE_QUEUE_SIZE,
+        drop_frames_if_full: bool = False,
+        scale: float = 1.0,
+        frame_step: int = 1,
+    ) -> None:
+        self._save_location_strategy = save_location_strategy
+        self._encoding_speed = encoding_speed
+        self._output_format = output_format
+        self._input_pixel_format = input_pixel_format
+        self._output_pixel_format = output_pixel_format
+        self._output_video_codec = output_video_codec
+        self._constant_rate_factor = constant_rate_factor
+        self._encode_on_worker_thread = encode_on_worker_thread
+        self._queue_size = queue_size
+        self._drop_frames_if_full = drop_frames_if_full
+        self._dropped_frames = 0
+        self._scale = scale
+        self._frame_decimator = FrameDecimator(frame_step)
+        self.__encoder: PyAvVideoEncoder | None = None
+        self._closing_encoders: list[PyAvVideoEncoder] = []
+        log.info(
+            "PyAV video writer settings: "
+            f"video_codec='{self._output_video_codec.value}', "
+            f"encoding_speed='{self._encoding_speed.value}', "
+            f"crf='{self._constant_rate_factor.value}', "
+            f"scale='{self._scale}', "
+            f"frame_step='{frame_step}'"
+        )
+
+    def open(self, output: str, width: int, height: int, fps: float) -> None:
+        self._frame_decimator.reset()
+        fps = self._frame_decimator.output_fps(fps)
+        width, height = scale_video_size(width, height, self._scale)
+        save_file = self._save_location_strategy(output)
+        container = av.open(save_file, mode="w", format=self._output_format.value)
+        stream = cast(
+            VideoStream,
+            container.add_stream(
+                self._output_video_codec.value,
+                rate=Fraction(fps).limit_denominator(MAX_FRAME_RATE_DENOMINATOR),
+                options={
+                    "preset": self._encoding_speed.value,
+                    "crf": str(self._constant_rate_factor.value),
+                },
+            ),
+        )
+        stream.width = width
+        stream.height = height
+        stream.pix_fmt = self._output_pixel_format.value
+        self.__encoder = PyAvVideoEncoder(
+            container,
+            stream,
+            input_pixel_format=self._input_pixel_format,
+            threaded=self._encode_on_worker_thread,
+            queue_size=self._queue_size,
+            drop_frames_if_full=self._drop_frames_if_full,
+        )
+        log.info(f"Writing new video file to '{save_file}'.")
+
+    def write(self, image: ndarray) -> None:
+        encoder = self._encoder
+        if self._frame_decimator.select():
+            encoder.write(image)
+
+    def close(self) -> None:
+        if self.__encoder is not None:
+            encoder = self.__encoder
+            self.__encoder = None
+            if encoder.dropped_frames:
+                log.warning(
+                    f"Dropped {encoder.dropped_frames} frames of the video "
+                    "because encoding could not keep up."
+                )
+            self._dropped_frames += encoder.dropped_frames
+            encoder.close()
+            self._closing_encoders = [
+                closing
+                for closing in [*self._closing_encoders, encoder]
+                if not closing.is_finished
+            ]
+
+    def wait_until_closed(self, timeout: float | None = None) -> None:
+        """Wait until the closed videos have been finished by their worker threads.
+
+        Args:
+            timeout (float | None): maximum seconds to wait for each video.
+        """
+        for encoder in list(self._closing_encoders):
+            encoder.wait_until_finished(timeout)
+
+    async def notify_on_flush_event(self, event: FlushEvent) -> None:
+        self.close()
+
+    def notify_on_new_video_start(self, event: NewVideoStartEvent) -> None:
+        self.open(event.output, event.width, event.height, event.fps)
+
+    async def filter(self, pipe: AsyncIterator[Frame]) -> AsyncIterator[Frame]:
+        async for frame in pipe:
+            if (image := frame.get(FrameKeys.data)) is not None:
+                self.write(image)
+            yield frame
+        await asyncio.to_thread(self.wait_until_closed)
@@ -0,0 +1,418 @@
+import asyncio
+import logging
+import os
+import struct
+from functools import partial
+from pathlib import Path
+from time import monotonic
+from typing import BinaryIO, Callable
+
+from OTVision.application.io_executor import IoExecutor
+from OTVision.application.metrics import DISABLED_METRICS, MetricsRegistry
+from OTVision.domain.message_sink import MessageSink
+from OTVision.helpers.log import LOGGER_NAME
+
+log = logging.getLogger(LOGGER_NAME)
+
+SPOOL_RECORD_PREFIX = struct.Struct("!I")
+SPOOL_READ_SIZE = 2**20
+DEFAULT_QUEUE_SIZE = 10_000
+DEFAULT_SEND_TIMEOUT_SECONDS = 10.0
+
+Clock = Callable[[], float]
+
+
+class SpoolingTcpMessageSink(MessageSink):
+    """Sends messages to a TCP server and spools them while the server is unreachable.
+
+    Messages are sent in the order they are published by a background task, so that
+    publishing never waits for the network. If the server cannot be reached, messages
+    are appended to the spool file and connecting is retried at most every
+    `retry_seconds` while messages arrive. Once connected, spooled messages are sent
+    before any new message. Messages spooled by a previous run are sent as well.
+
+    At most `queue_size` messages wait in memory. If the queue is full, because the
+    server reads slower than messages are published, further messages are spooled
+    until the queued messages have been sent. If the server does not accept a
+    message within `send_timeout_seconds`, the connection is considered broken.
+
+    The spool file is read and written by the `io_executor`, so that long outages do
+    not stall the event loop. Sent messages are not removed from the spool file one
+    by one. Instead, the offset of the next message to send is saved next to it. The
+    spool file is deleted once all of its messages have been sent.
+
+    Messages are sent as they are, so they have to be framed by the publisher.
+    Messages handed to the network right before the connection breaks may be lost.
+
+    Args:
+        host (str): host of the server.
+        port (int): port of the server.
+        spool_file (Path): file to keep messages in while the server is unreachable.
+        retry_seconds (float): minimum seconds between two connection attempts.
+        io_executor (IoExecutor): reads and writes the spool file.
+        queue_size (int): maximum number of messages waiting in memory.
+        send_timeout_seconds (float): maximum seconds to wait for the server to
+            accept a message.
+        metrics (MetricsRegistry): registry to record delivery metrics in.
+        clock (Clock): provides the current time in seconds.
+    """
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        spool_file: Path,
+        retry_seconds: float,
+        io_executor: IoExecutor,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        send_timeout_seconds: float = DEFAULT_SEND_TIMEOUT_SECONDS,
+        metrics: MetricsRegistry = DISABLED_METRICS,
+        clock: Clock = monotonic,
+    ) -> None:
+        self._host = host
+        self._port = port
+        self._spool_file = spool_file
+        self._retry_seconds = retry_seconds
+        self._io_executor = io_executor
+        self._send_timeout_seconds = send_timeout_seconds
+        self._clock = clock
+        self._queue: asyncio.Queue[bytes | None] = asyncio.Queue(max(queue_size, 1))
+        self._task: asyncio.Task | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._next_attempt = 0.0
+        # Messages published before opening or while the queue was full, which are
+        # appended to the spool file by the spooler task.
+        self._to_spool: list[bytes] = []
+        self._spooler: asyncio.Task | None = None
+        self._spooling = asyncio.Lock()
+        self._overflowing = False
+        # Messages spooled from this offset on were published while the queue was
+        # full. They are newer than the queued messages. None, if none of them has
+        # been spooled yet.
+        self._overflow_offset: int | None = None
+        # Whether the spool file may contain messages. A previous run may have left
+        # some.
+        self._spooled = True
+        self._read_offset: int | None = None
+        self._users = 0
+        self._sent_messages_metric = metrics.counter(
+            "otvision_forward_sent_messages_total", "Messages sent to the server."
+        )
+        self._spooled_messages_metric = metrics.counter(
+            "otvision_forward_spooled_messages_total",
+            "Messages spooled while the server was unreachable.",
+        )
+        self._connected_metric = metrics.gauge(
+            "otvision_forward_connected", "Whether the server is connected."
+        )
+
+    async def open(self) -> None:
+        self._users += 1
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def publish(self, message: bytes) -> None:
+        if self._task is not None and not self._overflowing:
+            try:
+                self._queue.put_nowait(message)
+                return
+            except asyncio.QueueFull:
+                log.warning(
+                    f"{self._queue.maxsize} messages wait for {self._host}:"
+                    f"{self._port}. Spooling messages until they are sent."
+                )
+                self._overflowing = True
+        self._to_spool.append(message)
+        if self._spooler is None or self._spooler.done():
+            self._spooler = asyncio.create_task(self._write_to_spool())
+
+    async def close(self) -> None:
+        self._users = max(self._users - 1, 0)
+        if self._users > 0:
+            return
+        if (task := self._task) is not None:
+            await self._queue.put(None)
+            await task
+            self._task = None
+        await self._write_to_spool()
+
+    async def _run(self) -> None:
+        try:
+            # Messages published before opening are older than the queued ones.
+            await self._write_to_spool()
+            while (message := await self._queue.get()) is not None:
+                await self._deliver(message)
+                if self._queue.empty() and self._overflowing:
+                    await self._write_to_spool()
+                    if self._queue.empty():
+                        # All messages older than the overflowed ones are sent or
+                        # spooled, so the whole spool is sent before the next
+                        # message.
+                        self._overflowing = False
+                        self._overflow_offset = None
+        finally:
+            await self._disconnect()
+
+    async def _deliver(self, message: bytes) -> None:
+        if self._writer is None:
+            await self._connect()
+        if (writer := self._writer) is not None:
+            try:
+                await self._send_spooled_messages(writer)
+                writer.write(message)
+                await self._drain(writer)
+                self._sent_messages_metric.inc()
+                return
+            except OSError as cause:
+                log.warning(f"Lost connection to {self._host}:{self._port}: {cause}")
+                await self._disconnect(abort=True)
+                self._next_attempt = self._clock() + self._retry_seconds
+        await self._spool_undelivered(message)
+
+    async def _drain(self, writer: asyncio.StreamWriter) -> None:
+        try:
+            await asyncio.wait_for(writer.drain(), timeout=self._send_timeout_seconds)
+        except TimeoutError as cause:
+            raise TimeoutError(
+                f"Server did not accept messages within {self._send_timeout_seconds}s"
+            ) from cause
+
+    async def _connect(self) -> None:
+        if self._clock() < self._next_attempt:
+            return
+        try:
+            _, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self._host, self._port),
+                timeout=max(self._retry_seconds, 1.0),
+            )
+        except (OSError, asyncio.TimeoutError) as cause:
+            log.debug(f"Could not connect to {self._host}:{self._port}: {cause}")
+            self._next_attempt = self._clock() + self._retry_seconds
+            return
+        log.info(f"Connected to {self._host}:{self._port}")
+        self._connected_metric.set(1)
+
+    async def _disconnect(self, abort: bool = False) -> None:
+        """Close the connection.
+
+        Args:
+            abort (bool): whether to discard messages not handed to the network yet
+                instead of waiting for the server to accept them.
+        """
+        if (writer := self._writer) is None:
+            return
+        self._writer = None
+        self._connected_metric.set(0)
+        if abort:
+            writer.transport.abort()
+        writer.close()
+        try:
+            await asyncio.wait_for(
+                writer.wait_closed(), timeout=self._send_timeout_seconds
+            )
+        except TimeoutError:
+            writer.transport.abort()
+        except OSError:
+            pass
+
+    async def _write_to_spool(self) -> None:
+        """Append the messages published before opening or while the queue was full
+        to the spool file."""
+        async with self._spooling:
+            while self._to_spool:
+                messages, self._to_spool = self._to_spool, []
+                offset = await self._io_executor.run(
+                    partial(_append, self._spool_file, messages)
+                )
+                self._spooled = True
+                if self._overflowing and self._overflow_offset is None:
+                    self._overflow_offset = offset
+                self._spooled_messages_metric.inc(len(messages))
+
+    async def _spool_undelivered(self, message: bytes) -> None:
+        """Spool a message that could not be sent.
+
+        The message and the queued messages are older than the messages spooled
+        while the queue was full. Hence, they are spooled in front of them.
+        """
+        messages = [message, *self._take_queued_messages()]
+        async with self._spooling:
+            if (offset := self._overflow_offset) is None:
+                await self._io_executor.run(
+                    partial(_append, self._spool_file, messages)
+                )
+            else:
+                self._overflow_offset = await self._io_executor.run(
+                    partial(_insert, self._spool_file, offset, messages)
+                )
+            self._spooled = True
+        self._spooled_messages_metric.inc(len(messages))
+
+    def _take_queued_messages(self) -> list[bytes]:
+        messages: list[bytes] = []
+        while not self._queue.empty():
+            if (message := self._queue.get_nowait()) is None:
+                # Keep the request to stop.
+                self._queue.put_nowait(None)
+                break
+            messages.append(message)
+        return messages
+
+    async def _send_spooled_messages(self, writer: asyncio.StreamWriter) -> None:
+        """Send the spooled messages older than the queued messages.
+
+        The offset of the next message to send is saved, so that sent messages are
+        not sent again after a restart. If sending fails, the messages not sent yet
+        stay in the spool file. Messages spooled while the queue was full stay in the
+        spool file until the queued messages are sent.
+        """
+        if not self._spooled:
+            return
+        if self._read_offset is None:
+            self._read_offset = await self._io_executor.run(
+                partial(_load_offset, self._spool_file)
+            )
+        start = self._read_offset
+        try:
+            while True:
+                async with self._spooling:
+                    end = self._overflow_offset
+                    if end is not None and self._read_offset >= end:
+                        return
+                    records, next_offset = await self._io_executor.run(
+                        partial(_read_records, self._spool_file, self._read_offset, end)
+                    )
+                if next_offset == self._read_offset:
+                    break
+                if self._read_offset == start:
+                    log.info(f"Sending messages spooled in '{self._spool_file}'")
+                for message, offset in records:
+                    writer.write(message)
+                    await self._drain(writer)
+                    self._sent_messages_metric.inc()
+                    self._read_offset = offset
+                self._read_offset = next_offset
+        finally:
+            if self._read_offset != start:
+                async with self._spooling:
+                    await self._io_executor.run(
+                        partial(_save_offset, self._spool_file, self._read_offset)
+                    )
+        async with self._spooling:
+            if self._overflow_offset is None and await self._io_executor.run(
+                partial(_remove_if_sent, self._spool_file, self._read_offset)
+            ):
+                self._read_offset = 0
+                self._spooled = False
+
+
+def _to_record(message: bytes) -> bytes:
+    return SPOOL_RECORD_PREFIX.pack(len(message)) + message
+
+
+def _read_record(spool: BinaryIO) -> bytes | None:
+    prefix = spool.read(SPOOL_RECORD_PREFIX.size)
+    if len(prefix) < SPOOL_RECORD_PREFIX.size:
+        return None
+    (length,) = SPOOL_RECORD_PREFIX.unpack(prefix)
+    message = spool.read(length)
+    if len(message) < length:
+        # The record was cut off, e.g. by a crash while spooling.
+        return None
+    return message
+
+
+def _offset_file(spool_file: Path) -> Path:
+    return spool_file.with_name(f"{spool_file.name}.offset")
+
+
+def _append(spool_file: Path, messages: list[bytes]) -> int:
+    """Append the messages to the spool file.
+
+    Returns:
+        int: the offset of the first appended message.
+    """
+    if not spool_file.exists():
+        # The offset belongs to a previous spool file.
+        _offset_file(spool_file).unlink(missing_ok=True)
+        spool_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(spool_file, "ab") as spool:
+        offset = spool.tell()
+        spool.writelines(_to_record(message) for message in messages)
+    return offset
+
+
+def _insert(spool_file: Path, offset: int, messages: list[bytes]) -> int:
+    """Insert the messages into the spool file in front of the given offset.
+
+    Returns:
+        int: the offset after the inserted messages.
+    """
+    with open(spool_file, "r+b") as spool:
+        spool.seek(offset)
+        later_messages = spool.read()
+        spool.seek(offset)
+        spool.writelines(_to_record(message) for message in messages)
+        end = spool.tell()
+        spool.write(later_messages)
+    return end
+
+
+def _read_records(
+    spool_file: Path, offset: int, end: int | None
+) -> tuple[list[tuple[bytes, int]], int]:
+    """Read spooled messages from the offset on until the end or at most
+    `SPOOL_READ_SIZE` bytes.
+
+    Args:
+        spool_file (Path): the spool file.
+        offset (int): offset of the first message to read.
+        end (int | None): offset to stop reading at. If None, read until the end
+            of the file.
+
+    Returns:
+        tuple[list[tuple[bytes, int]], int]: the messages with the offset following
+            each of them and the offset to continue reading at. A record cut off by
+            a crash while spooling is skipped.
+    """
+    if not spool_file.exists():
+        return [], offset
+    records: list[tuple[bytes, int]] = []
+    with open(spool_file, "rb") as spool:
+        size = os.fstat(spool.fileno()).st_size
+        stop = size if end is None else min(end, size)
+        spool.seek(offset)
+        while spool.tell() < stop and spool.tell() - offset < SPOOL_READ_SIZE:
+            message = _read_record(spool)
+            if message is None or spool.tell() > stop:
+                return records, stop
+            records.append((message, spool.tell()))
+        return records, spool.tell()
+
+
+def _load_offset(spool_file: Path) -> int:
+    try:
+        return int(_offset_file(spool_file).read_text())
+    except (OSError, ValueError):
+        return 0
+
+
+def _save_offset(spool_file: Path, offset: int) -> None:
+    _offset_file(spool_file).write_text(str(offset))
+
+
+def _remove_if_sent(spool_file: Path, offset: int) -> bool:
+    """Delete the spool file if all of its messages have been sent.
+
+    Returns:
+        bool: whether the spool file has been deleted or did not exist.
+    """
+    if spool_file.exists() and spool_file.stat().st_size > offset:
+        return False
+    spool_file.unlink(missing_ok=True)
+    _offset_file(spool_file).unlink(missing_ok=True)
+    return True
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+from pathlib import Path
+
+from OTVision.application.metrics import DISABLED_METRICS, MetricsRegistry
+from OTVision.domain.message_sink import MessageSink
+from OTVision.helpers.log import LOGGER_NAME
+
+log = logging.getLogger(LOGGER_NAME)
+
+
+class _Subscriber:
+    """A connected consumer with its own bounded queue of messages."""
+
+    def __init__(self, writer: asyncio.StreamWriter, queue_size: int) -> None:
+        self._writer = writer
+        self._queue: asyncio.Queue[bytes | None] = asyncio.Queue(max(queue_size, 1))
+
+    def offer(self, message: bytes) -> bool:
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    def close(self) -> None:
+        # Pending messages are discarded to make room for the end marker.
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait(None)
+
+    async def send(self) -> None:
+        try:
+            while (message := await self._queue.get()) is not None:
+                self._writer.write(message)
+                await self._writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._writer.close()
+
+
+class UnixSocketMessageSink(MessageSink):
+    """Broadcasts messages to all consumers connected to a Unix domain socket.
+
+    Consumers connect to the socket and read the messages as a byte stream. Each
+    consumer has its own bounded queue. If a consumer does not keep up, messages are
+    dropped for this consumer only, so that publishing never waits for consumers.
+
+    Args:
+        path (Path): path of the socket. An existing file at this path is replaced.
+        queue_size (int): maximum number of queued messages per consumer.
+        metrics (MetricsRegistry): registry to record delivery metrics in.
+    """
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def __init__(
+        self,
+        path: Path,
+        queue_size: int,
+        metrics: MetricsRegistry = DISABLED_METRICS,
+    ) -> None:
+        self._path = path
+        self._queue_size = queue_size
+        self._server: asyncio.Server | None = None
+        self._subscribers: set[_Subscriber] = set()
+        self._users = 0
+        self._dropped_messages_metric = metrics.counter(
+            "otvision_publish_dropped_messages_total",
+            "Messages dropped for subscribers that did not keep up.",
+        )
+        self._subscribers_metric = metrics.gauge(
+            "otvision_publish_subscribers", "Subscribers connected to the socket."
+        )
+
+    async def open(self) -> None:
+        self._users += 1
+        if self._server is not None:
+            return
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._path.unlink(missing_ok=True)
+        self._server = await asyncio.start_unix_server(
+            self._on_connect, path=str(self._path)
+        )
+        log.info(f"Publishing tracked frames at '{self._path}'")
+
+    def publish(self, message: bytes) -> None:
+        for subscriber in self._subscribers:
+            if not subscriber.offer(message):
+                self._dropped_messages_metric.inc()
+
+    async def close(self) -> None:
+        self._users = max(self._users - 1, 0)
+        if self._users > 0 or self._server is None:
+            return
+        server = self._server
+        self._server = None
+        server.close()
+        for subscriber in self._subscribers:
+            subscriber.close()
+        await server.wait_closed()
+        self._path.unlink(missing_ok=True)
+
+    async def _on_connect(
+        self, _: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        subscriber = _Subscriber(writer, self._queue_size)
+        self._subscribers.add(subscriber)
+        self._subscribers_metric.set(len(self._subscribers))
+        try:
+            await subscriber.send()
+        finally:
+            self._subscribers.discard(subscriber)
+            self._subscribers_metric.set(len(self._subscribers))
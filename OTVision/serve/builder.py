@@ -0,0 +1,104 @@
+from argparse import ArgumentParser
+from functools import cached_property
+
+from OTVision.application.config import Config
+from OTVision.application.config_parser import ConfigParser
+from OTVision.application.configure_logger import ConfigureLogger
+from OTVision.application.detect.detected_frame_factory import DetectedFrameFactory
+from OTVision.application.detect.factory import ObjectDetectorCachedFactory
+from OTVision.application.get_config import GetConfig
+from OTVision.application.get_current_config import GetCurrentConfig
+from OTVision.detect.yolo import YoloDetectionConverter, YoloFactory
+from OTVision.domain.cli import ServeCliArgs, ServeCliParser
+from OTVision.domain.current_config import CurrentConfig
+from OTVision.domain.object_detection import ObjectDetectorFactory
+from OTVision.domain.serialization import Deserializer
+from OTVision.plugin.yaml_serialization import YamlDeserializer
+from OTVision.serve.cli import ArgparseServeCliParser
+from OTVision.serve.job import JobType
+from OTVision.serve.job_queue import JobQueue
+from OTVision.serve.job_runner import DetectJobRunner, TrackJobRunner
+from OTVision.serve.server import JobServer
+
+
+class ServeBuilder:
+    @cached_property
+    def get_config(self) -> GetConfig:
+        return GetConfig(self.config_parser)
+
+    @cached_property
+    def config_parser(self) -> ConfigParser:
+        return ConfigParser(self.yaml_deserializer)
+
+    @cached_property
+    def yaml_deserializer(self) -> Deserializer:
+        return YamlDeserializer()
+
+    @cached_property
+    def serve_cli_parser(self) -> ServeCliParser:
+        return ArgparseServeCliParser(
+            parser=ArgumentParser("Serve detect and track jobs on a local socket"),
+            argv=self.argv,
+        )
+
+    @cached_property
+    def cli_args(self) -> ServeCliArgs:
+        return self.serve_cli_parser.parse()
+
+    @cached_property
+    def configure_logger(self) -> ConfigureLogger:
+        return ConfigureLogger()
+
+    @cached_property
+    def current_config(self) -> CurrentConfig:
+        return CurrentConfig(Config())
+
+    @cached_property
+    def get_current_config(self) -> GetCurrentConfig:
+        return GetCurrentConfig(self.current_config)
+
+    @cached_property
+    def object_detector_factory(self) -> ObjectDetectorFactory:
+        config = self.current_config.get()
+        model_cache_config = config.model_cache
+        return ObjectDetectorCachedFactory(
+            YoloFactory(
+                get_current_config=self.get_current_config,
+                detection_converter=YoloDetectionConverter(),
+                detected_frame_factory=DetectedFrameFactory(),
+            ),
+            max_models=model_cache_config.max_models,
+            max_memory_bytes=model_cache_config.max_memory_bytes,
+            pinned_weights=(
+                config.detect.weights if model_cache_config.pin_default else None
+            ),
+        )
+
+    @cached_property
+    def detect_job_runner(self) -> DetectJobRunner:
+        return DetectJobRunner(
+            current_config=self.current_config,
+            object_detector_factory=self.object_detector_factory,
+        )
+
+    @cached_property
+    def track_job_runner(self) -> TrackJobRunner:
+        return TrackJobRunner()
+
+    @cached_property
+    def job_queue(self) -> JobQueue:
+        return JobQueue(
+            runners={
+                JobType.DETECT: self.detect_job_runner,
+                JobType.TRACK: self.track_job_runner,
+            },
+            max_workers=self.cli_args.workers,
+            max_finished_jobs=self.cli_args.max_finished_jobs,
+            finished_job_retention=self.cli_args.finished_job_retention,
+        )
+
+    def __init__(self, argv: list[str] | None = None) -> None:
+        self.argv = argv
+
+    def build(self) -> JobServer:
+        return JobServer(job_queue=self.job_queue, socket_path=self.cli_args.socket)
@@ -0,0 +1,111 @@
+from argparse import ArgumentParser, BooleanOptionalAction
+from datetime import timedelta
+from pathlib import Path
+
+from OTVision.domain.cli import CliParseError, ServeCliArgs, ServeCliParser
+from OTVision.helpers.log import DEFAULT_LOG_FILE
+from OTVision.serve.job_queue import (
+    DEFAULT_FINISHED_JOB_RETENTION,
+    DEFAULT_MAX_FINISHED_JOBS,
+)
+from OTVision.serve.protocol import DEFAULT_SOCKET_PATH
+
+DEFAULT_WORKERS = 2
+
+
+class ArgparseServeCliParser(ServeCliParser):
+    def __init__(
+        self,
+        parser: ArgumentParser,
+        argv: list[str] | None = None,
+    ) -> None:
+        self._parser = parser
+        self._argv = argv
+        self.__setup()
+
+    def __setup(self) -> None:
+        self._parser.add_argument(
+            "-s",
+            "--socket",
+            type=str,
+            default=str(DEFAULT_SOCKET_PATH),
+            help="Path of the Unix socket to accept jobs on.",
+            required=False,
+        )
+        self._parser.add_argument(
+            "--workers",
+            type=int,
+            default=DEFAULT_WORKERS,
+            help=(
+                "Number of track jobs to run concurrently. Detect jobs share one "
+                "model and are always run one at a time next to the track jobs."
+            ),
+            required=False,
+        )
+        self._parser.add_argument(
+            "--max-finished-jobs",
+            type=int,
+            default=DEFAULT_MAX_FINISHED_JOBS,
+            help="Number of finished jobs to keep the status of.",
+            required=False,
+        )
+        self._parser.add_argument(
+            "--finished-job-retention-hours",
+            type=float,
+            default=DEFAULT_FINISHED_JOB_RETENTION / timedelta(hours=1),
+            help=(
+                "Hours to keep the status of finished jobs. If 0, finished jobs are "
+                "only limited by their number."
+            ),
+            required=False,
+        )
+        self._parser.add_argument(
+            "-c",
+            "--config",
+            type=str,
+            help="Path to custom user configuration yaml file.",
+            required=False,
+        )
+        self._parser.add_argument(
+            "--preload",
+            action=BooleanOptionalAction,
+            default=True,
+            help="Load the configured detection model on startup.",
+        )
+        self._parser.add_argument(
+            "--logfile",
+            default=str(DEFAULT_LOG_FILE),
+            type=str,
+            help="Specify log file directory.",
+            required=False,
+        )
+        self._parser.add_argument(
+            "--logfile-overwrite",
+            action="store_true",
+            help="Overwrite log file if it already exists.",
+            required=False,
+        )
+
+    def parse(self) -> ServeCliArgs:
+        args = self._parser.parse_args(self._argv)
+        if args.workers < 1:
+            raise CliParseError("Number of workers must be at least 1.")
+        if args.max_finished_jobs < 0:
+            raise CliParseError("Number of finished jobs must not be negative.")
+        if args.finished_job_retention_hours < 0:
+            raise CliParseError("Retention of finished jobs must not be negative.")
+
+        return ServeCliArgs(
+            socket=Path(args.socket).expanduser(),
+            workers=args.workers,
+            config_file=Path(args.config) if args.config is not None else None,
+            logfile=Path(args.logfile),
+            logfile_overwrite=args.logfile_overwrite,
+            max_finished_jobs=args.max_finished_jobs,
+            finished_job_retention=(
+                timedelta(hours=args.finished_job_retention_hours)
+                if args.finished_job_retention_hours > 0
+                else None
+            ),
+            preload=args.preload,
+        )
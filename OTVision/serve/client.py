@@ -0,0 +1,96 @@
+import socket
+import time
+from pathlib import Path
+
+from OTVision.serve.job import (
+    JOB_ARGV,
+    JOB_ID,
+    JOB_STATUS,
+    JOB_TYPE,
+    JobStatus,
+    JobType,
+)
+from OTVision.serve.protocol import (
+    ACTION,
+    ERROR,
+    JOB,
+    JOBS,
+    LIST,
+    OK,
+    SHUTDOWN,
+    STATUS,
+    SUBMIT,
+    JobServerError,
+    decode,
+    encode,
+)
+
+DEFAULT_POLL_INTERVAL_SECONDS = 1.0
+
+
+class JobClient:
+    """Thin client to submit jobs to and query jobs of a running OTVision server.
+
+    Args:
+        socket_path (Path): location of the server's Unix socket.
+        timeout (float): timeout in seconds for a single request.
+    """
+
+    def __init__(self, socket_path: Path, timeout: float = 30.0) -> None:
+        self._socket_path = socket_path
+        self._timeout = timeout
+
+    def submit(self, job_type: JobType, argv: list[str]) -> dict:
+        """Submit a job.
+
+        Args:
+            job_type (JobType): whether to run detect or track.
+            argv (list[str]): command line arguments as accepted by `detect.py` or
+                `track.py`.
+
+        Returns:
+            dict: the submitted job.
+        """
+        response = self._send(
+            {ACTION: SUBMIT, JOB_TYPE: job_type.value, JOB_ARGV: argv}
+        )
+        return response[JOB]
+
+    def status(self, job_id: str) -> dict:
+        return self._send({ACTION: STATUS, JOB_ID: job_id})[JOB]
+
+    def list_jobs(self) -> list[dict]:
+        return self._send({ACTION: LIST})[JOBS]
+
+    def shutdown(self) -> None:
+        self._send({ACTION: SHUTDOWN})
+
+    def wait(
+        self, job_id: str, poll_interval: float = DEFAULT_POLL_INTERVAL_SECONDS
+    ) -> dict:
+        """Block until the given job has finished.
+
+        Returns:
+            dict: the finished job.
+        """
+        while not JobStatus((job := self.status(job_id))[JOB_STATUS]).is_finished:
+            time.sleep(poll_interval)
+        return job
+
+    def _send(self, request: dict) -> dict:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.settimeout(self._timeout)
+            connection.connect(str(self._socket_path))
+            connection.sendall(encode(request))
+            response = decode(self._receive_line(connection))
+        if not response.get(OK, False):
+            raise JobServerError(response.get(ERROR, "Unknown error"))
+        return response
+
+    def _receive_line(self, connection: socket.socket) -> bytes:
+        chunks: list[bytes] = []
+        while chunk := connection.recv(4096):
+            chunks.append(chunk)
+            if chunk.endswith(b"\n"):
+                break
+        return b"".join(chunks)
@@ -0,0 +1,78 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import StrEnum
+
+JOB_ID = "job_id"
+JOB_TYPE = "type"
+JOB_ARGV = "argv"
+JOB_STATUS = "status"
+JOB_SUBMITTED_AT = "submitted_at"
+JOB_STARTED_AT = "started_at"
+JOB_FINISHED_AT = "finished_at"
+JOB_OUTPUT_FILES = "output_files"
+JOB_ERROR = "error"
+
+
+class JobType(StrEnum):
+    DETECT = "detect"
+    TRACK = "track"
+
+    @staticmethod
+    def as_list() -> list[str]:
+        return list(JobType.__members__.values())
+
+
+class JobStatus(StrEnum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+    @property
+    def is_finished(self) -> bool:
+        return self in (JobStatus.SUCCEEDED, JobStatus.FAILED)
+
+
+@dataclass
+class Job:
+    """A detect or track job submitted to the OTVision server.
+
+    Attributes:
+        id (str): unique identifier of the job.
+        type (JobType): whether to run detect or track.
+        argv (list[str]): command line arguments as accepted by `detect.py` or
+            `track.py`, e.g. paths and config overrides.
+        submitted_at (datetime): time the job has been submitted.
+        status (JobStatus): the current status of the job.
+        started_at (datetime | None): time the job has been started.
+        finished_at (datetime | None): time the job has finished.
+        output_files (list[str]): files written by the job.
+        error (str | None): error message if the job failed.
+    """
+
+    id: str
+    type: JobType
+    argv: list[str]
+    submitted_at: datetime
+    status: JobStatus = JobStatus.QUEUED
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    output_files: list[str] = field(default_factory=list)
+    error: str | None = None
+
+    def to_dict(self) -> dict:
+        return {
+            JOB_ID: self.id,
+            JOB_TYPE: self.type.value,
+            JOB_ARGV: self.argv,
+            JOB_STATUS: self.status.value,
+            JOB_SUBMITTED_AT: self.submitted_at.timestamp(),
+            JOB_STARTED_AT: _to_timestamp(self.started_at),
+            JOB_FINISHED_AT: _to_timestamp(self.finished_at),
+            JOB_OUTPUT_FILES: self.output_files,
+            JOB_ERROR: self.error,
+        }
+
+
+def _to_timestamp(value: datetime | None) -> float | None:
+    return value.timestamp() if value is not None else None
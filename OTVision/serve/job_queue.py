@@ -0,0 +1,150 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import cast
+from uuid import uuid4
+
+from OTVision.domain.time import CurrentDatetimeProvider, DatetimeProvider
+from OTVision.helpers.log import LOGGER_NAME
+from OTVision.serve.job import Job, JobStatus, JobType
+from OTVision.serve.job_runner import JobRunner
+
+log = logging.getLogger(LOGGER_NAME)
+
+DEFAULT_MAX_FINISHED_JOBS = 1000
+DEFAULT_FINISHED_JOB_RETENTION = timedelta(days=1)
+
+
+class UnknownJobError(Exception):
+    """Raised when a job id is not known to the job queue."""
+
+
+class JobQueue:
+    """Runs submitted jobs on worker threads and keeps track of their status.
+
+    Each job type has its own pool of worker threads. Hence, jobs of one type never
+    wait for jobs of another type to finish.
+
+    Args:
+        runners (dict[JobType, JobRunner]): runner to use for each job type.
+        max_workers (int): number of jobs of each type to run concurrently. Runners
+            may limit the number of their jobs further.
+        max_finished_jobs (int): number of finished jobs to keep. The jobs finished
+            first are forgotten first.
+        finished_job_retention (timedelta | None): time to keep finished jobs for.
+            If None, finished jobs are only limited by `max_finished_jobs`.
+        datetime_provider (DatetimeProvider): provides submission, start and end
+            times of jobs.
+    """
+
+    def __init__(
+        self,
+        runners: dict[JobType, JobRunner],
+        max_workers: int,
+        max_finished_jobs: int = DEFAULT_MAX_FINISHED_JOBS,
+        finished_job_retention: timedelta | None = DEFAULT_FINISHED_JOB_RETENTION,
+        datetime_provider: DatetimeProvider = CurrentDatetimeProvider(),
+    ) -> None:
+        self._runners = runners
+        self._max_finished_jobs = max_finished_jobs
+        self._finished_job_retention = finished_job_retention
+        self._datetime_provider = datetime_provider
+        self._executors = {
+            job_type: ThreadPoolExecutor(
+                max_workers=min(max_workers, runner.max_concurrent_jobs or max_workers),
+                thread_name_prefix=f"otvision-{job_type}-job",
+            )
+            for job_type, runner in runners.items()
+        }
+        self._jobs: dict[str, Job] = {}
+        self._lock = Lock()
+
+    def submit(self, job_type: JobType, argv: list[str]) -> Job:
+        """Queue a new job.
+
+        Args:
+            job_type (JobType): whether to run detect or track.
+            argv (list[str]): command line arguments of the job.
+
+        Returns:
+            Job: the queued job.
+        """
+        executor = self._executors[job_type]
+        job = Job(
+            id=uuid4().hex,
+            type=job_type,
+            argv=argv,
+            submitted_at=self._now(),
+        )
+        with self._lock:
+            self._jobs[job.id] = job
+        executor.submit(self._execute, job)
+        log.info(f"Queued {job.type} job {job.id} with arguments {job.argv}")
+        return job
+
+    def get(self, job_id: str) -> Job:
+        """Get the job with the given id.
+
+        Raises:
+            UnknownJobError: if no job with the given id has been submitted or the
+                job has been forgotten after it had finished.
+        """
+        with self._lock:
+            self._forget_expired_jobs()
+            if job := self._jobs.get(job_id):
+                return job
+        raise UnknownJobError(f"Unknown job '{job_id}'")
+
+    def get_all(self) -> list[Job]:
+        with self._lock:
+            self._forget_expired_jobs()
+            return list(self._jobs.values())
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting jobs and optionally wait for running jobs to finish."""
+        for executor in self._executors.values():
+            executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def _execute(self, job: Job) -> None:
+        job.status = JobStatus.RUNNING
+        job.started_at = self._now()
+        log.info(f"Start {job.type} job {job.id}")
+        try:
+            job.output_files = self._runners[job.type].run(job)
+            job.status = JobStatus.SUCCEEDED
+            log.info(f"Finished {job.type} job {job.id}")
+        except (Exception, SystemExit) as cause:
+            # argparse exits with SystemExit on invalid arguments
+            job.error = f"{type(cause).__name__}: {cause}"
+            job.status = JobStatus.FAILED
+            log.exception(f"{job.type} job {job.id} failed")
+        finally:
+            with self._lock:
+                job.finished_at = self._now()
+                self._forget_finished_jobs()
+
+    def _forget_finished_jobs(self) -> None:
+        finished_jobs = sorted(
+            (job for job in self._jobs.values() if job.finished_at is not None),
+            key=lambda job: cast(datetime, job.finished_at),
+        )
+        excess_jobs = len(finished_jobs) - self._max_finished_jobs
+        for job in finished_jobs[: max(excess_jobs, 0)]:
+            del self._jobs[job.id]
+        self._forget_expired_jobs()
+
+    def _forget_expired_jobs(self) -> None:
+        if self._finished_job_retention is None:
+            return
+        expired_before = self._now() - self._finished_job_retention
+        expired_jobs = [
+            job.id
+            for job in self._jobs.values()
+            if job.finished_at is not None and job.finished_at < expired_before
+        ]
+        for job_id in expired_jobs:
+            del self._jobs[job_id]
+
+    def _now(self) -> datetime:
+        return self._datetime_provider.provide()
@@ -0,0 +1,114 @@
+import asyncio
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+from OTVision.application.config import Config
+from OTVision.detect.detected_frame_buffer import DetectedFrameBufferEvent
+from OTVision.detect.file_based_detect_builder import FileBasedDetectBuilder
+from OTVision.domain.current_config import CurrentConfig
+from OTVision.domain.object_detection import ObjectDetectorFactory
+from OTVision.serve.job import Job
+from OTVision.track.builder import TrackBuilder
+
+
+class JobRunner(ABC):
+    """Interface for running a single job to completion.
+
+    Attributes:
+        max_concurrent_jobs (int | None): number of jobs the runner can run at the
+            same time. If None, the number is only limited by the job queue.
+    """
+
+    max_concurrent_jobs: int | None = None
+
+    @abstractmethod
+    def run(self, job: Job) -> list[str]:
+        """Run the given job in the calling thread.
+
+        Args:
+            job (Job): the job to run.
+
+        Returns:
+            list[str]: the files written by the job.
+        """
+        raise NotImplementedError
+
+
+class DetectJobRunner(JobRunner):
+    """Runs detect jobs with object detection models that are kept in memory.
+
+    All detect jobs share the same current config and object detector factory, so
+    models created by the factory stay loaded in between jobs. Detect jobs must
+    therefore run one at a time.
+
+    Args:
+        current_config (CurrentConfig): the config shared by all detect jobs.
+        object_detector_factory (ObjectDetectorFactory): factory keeping the
+            loaded models.
+    """
+
+    max_concurrent_jobs = 1
+
+    def __init__(
+        self,
+        current_config: CurrentConfig,
+        object_detector_factory: ObjectDetectorFactory,
+    ) -> None:
+        self._current_config = current_config
+        self._object_detector_factory = object_detector_factory
+
+    def preload(self, config: Config) -> None:
+        """Load and warm up the model of the given config before the first job.
+
+        Args:
+            config (Config): config containing the model to preload.
+        """
+        self._current_config.update(config)
+        self._object_detector_factory.create(config.detect).preload()
+
+    def run(self, job: Job) -> list[str]:
+        builder = FileBasedDetectBuilder(
+            argv=job.argv,
+            current_config=self._current_config,
+            object_detector_factory=self._object_detector_factory,
+        )
+        cli_args = builder.detect_cli_parser.parse()
+        config = builder.update_detect_config_with_ci_args.update(
+            config=builder.get_config.get(cli_args)
+        )
+        builder.update_current_config.update(config)
+        return asyncio.run(self._detect(builder))
+
+    async def _detect(self, builder: FileBasedDetectBuilder) -> list[str]:
+        flushed_outputs: list[str] = []
+
+        async def collect_output(event: DetectedFrameBufferEvent) -> None:
+            flushed_outputs.append(event.source_metadata.output)
+
+        builder.detected_frame_buffer.register(collect_output)
+        detect = builder.build()
+        await detect.start()
+        await builder.detected_frame_buffer.wait_for_all_observers()
+
+        detections_files = [
+            builder.detection_file_save_path_provider.provide(
+                output, builder.current_config.get().filetypes.detect
+            )
+            for output in flushed_outputs
+        ]
+        return [str(file) for file in detections_files if Path(file).is_file()]
+
+
+class TrackJobRunner(JobRunner):
+    """Runs track jobs. Each job gets its own tracker and config, so track jobs can
+    run in parallel to each other and to detect jobs."""
+
+    def run(self, job: Job) -> list[str]:
+        builder = TrackBuilder(argv=job.argv)
+        cli_args = builder.track_cli_parser.parse()
+        config = builder.update_track_config_with_cli_args.update(
+            config=builder.get_config.get(cli_args)
+        )
+        builder.update_current_config.update(config=config)
+        ottrk_files = asyncio.run(builder.build().start())
+        return [str(file) for file in ottrk_files if file.is_file()]
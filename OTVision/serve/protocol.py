@@ -0,0 +1,38 @@
+"""Request/response format of the OTVision job server.
+
+Each connection carries exactly one request and one response. Both are single line
+JSON objects terminated by a newline.
+"""
+
+from pathlib import Path
+
+import ujson
+
+DEFAULT_SOCKET_PATH = Path("/tmp/otvision.sock")
+
+ACTION = "action"
+SUBMIT = "submit"
+STATUS = "status"
+LIST = "list"
+SHUTDOWN = "shutdown"
+
+JOB = "job"
+JOBS = "jobs"
+OK = "ok"
+ERROR = "error"
+MAX_MESSAGE_SIZE = 2**20
+
+
+class JobServerError(Exception):
+    """Raised when the job server rejects a request."""
+
+
+def encode(message: dict) -> bytes:
+    return ujson.dumps(message).encode() + b"\n"
+
+
+def decode(line: bytes) -> dict:
+    message = ujson.loads(line.decode())
+    if not isinstance(message, dict):
+        raise ValueError(f"Expected JSON object but got '{message}'")
+    return message
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+from pathlib import Path
+
+from OTVision.helpers.log import LOGGER_NAME
+from OTVision.serve.job import JOB_ARGV, JOB_ID, JOB_TYPE, JobType
+from OTVision.serve.job_queue import JobQueue, UnknownJobError
+from OTVision.serve.protocol import (
+    ACTION,
+    ERROR,
+    JOB,
+    JOBS,
+    LIST,
+    MAX_MESSAGE_SIZE,
+    OK,
+    SHUTDOWN,
+    STATUS,
+    SUBMIT,
+    decode,
+    encode,
+)
+
+log = logging.getLogger(LOGGER_NAME)
+
+
+class JobServer:
+    """Accepts detect and track jobs on a local Unix socket.
+
+    Jobs are handed to the job queue, which runs them on its worker threads. The
+    server itself only answers requests and never blocks on running jobs.
+
+    Args:
+        job_queue (JobQueue): runs the submitted jobs.
+        socket_path (Path): location of the Unix socket to listen on.
+    """
+
+    def __init__(self, job_queue: JobQueue, socket_path: Path) -> None:
+        self._job_queue = job_queue
+        self._socket_path = socket_path
+        self._shutdown_requested = asyncio.Event()
+
+    async def serve(self) -> None:
+        """Serve requests until a shutdown request is received."""
+        if self._socket_path.exists():
+            self._socket_path.unlink()
+        server = await asyncio.start_unix_server(
+            self._handle_connection, path=str(self._socket_path), limit=MAX_MESSAGE_SIZE
+        )
+        log.info(f"OTVision server listening on {self._socket_path}")
+        try:
+            async with server:
+                await self._shutdown_requested.wait()
+        finally:
+            log.info("Shutting down OTVision server. Waiting for running jobs...")
+            await asyncio.to_thread(self._job_queue.shutdown, True)
+            self._socket_path.unlink(missing_ok=True)
+
+    def request_shutdown(self) -> None:
+        self._shutdown_requested.set()
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            request = decode(await reader.readline())
+            response = self._handle_request(request)
+        except Exception as cause:
+            log.warning(f"Rejected request: {cause}")
+            response = {OK: False, ERROR: str(cause)}
+
+        writer.write(encode(response))
+        await writer.drain()
+        writer.close()
+        await writer.wait_closed()
+
+    def _handle_request(self, request: dict) -> dict:
+        action = request.get(ACTION)
+        if action == SUBMIT:
+            job = self._job_queue.submit(
+                job_type=JobType(request[JOB_TYPE]),
+                argv=[str(arg) for arg in request.get(JOB_ARGV, [])],
+            )
+            return {OK: True, JOB: job.to_dict()}
+        if action == STATUS:
+            try:
+                job = self._job_queue.get(str(request[JOB_ID]))
+            except UnknownJobError as cause:
+                return {OK: False, ERROR: str(cause)}
+            return {OK: True, JOB: job.to_dict()}
+        if action == LIST:
+            return {
+                OK: True,
+                JOBS: [job.to_dict() for job in self._job_queue.get_all()],
+            }
+        if action == SHUTDOWN:
+            self.request_shutdown()
+            return {OK: True}
+        raise ValueError(
+            f"Unknown action '{action}'. "
+            f"Expected one of {[SUBMIT, STATUS, LIST, SHUTDOWN]}."
+        )
@@ -0,0 +1,567 @@
+import asyncio
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from time import monotonic
+from typing import AsyncIterator, Callable
+
+from OTVision.abstraction.pipes_and_filter import Filter
+from OTVision.application.configure_logger import logger
+from OTVision.application.get_current_config import GetCurrentConfig
+from OTVision.application.io_executor import IoExecutor
+from OTVision.application.track.ottrk import OttrkBuilderConfig, OttrkBuilderState
+from OTVision.application.track.tracking_run_id import CurrentTrackingRunId
+from OTVision.detect.otdet import OtdetBuilderConfig
+from OTVision.domain.detection import TrackId
+from OTVision.domain.frame import TrackedFrame
+from OTVision.domain.time import DatetimeProvider
+from OTVision.track.stream_ottrk_file_writer import (
+    OttrkWriterState,
+    PendingTracks,
+    StreamOttrkFileWriter,
+    UnwrittenFrames,
+)
+from OTVision.track.stream_tracker import StreamTracker
+from OTVision.track.tracker.tracker_plugin_iou import (
+    BoundingBox,
+    Coordinate,
+    IouTracker,
+    IouTrackState,
+)
+
+Clock = Callable[[], float]
+
+CHECKPOINT_VERSION = 3
+
+VERSION = "version"
+TRACKING_RUN_ID = "tracking_run_id"
+STREAMS = "streams"
+LAST_OCCURRENCE = "last_occurrence"
+LAST_TRACK_ID = "last_track_id"
+ACTIVE_TRACKS = "active_tracks"
+PENDING_OTTRK = "pending_ottrk"
+PENDING_TRACKS = "pending_tracks"
+UNWRITTEN_FRAMES = "unwritten_frames"
+
+
+class CheckpointFormatError(Exception):
+    """Raised when a checkpoint file does not match the checkpoint format."""
+
+
+@dataclass(frozen=True)
+class StreamTrackingState:
+    """The state needed to continue tracking a stream.
+
+    Attributes:
+        last_occurrence (datetime): occurrence of the last tracked frame.
+        last_track_id (TrackId): the last track id handed out.
+        active_tracks (list[IouTrackState]): the tracks that were still open.
+        pending_tracks (PendingTracks | None): the tracks of the ottrk file that
+            waited for its unfinished tracks, if there was one. The file itself is
+            saved separately, see `TrackingCheckpointer`.
+        unwritten_frames (UnwrittenFrames | None): the frames detected and tracked
+            since the last flush. They are not saved and are lost on a restart.
+    """
+
+    last_occurrence: datetime
+    last_track_id: TrackId
+    active_tracks: list[IouTrackState]
+    pending_tracks: PendingTracks | None
+    unwritten_frames: UnwrittenFrames | None = None
+
+
+@dataclass(frozen=True)
+class TrackingCheckpoint:
+    tracking_run_id: str
+    streams: dict[str, StreamTrackingState]
+
+    def to_dict(self) -> dict:
+        """Serialize the checkpoint to the versioned checkpoint format."""
+        return {
+            VERSION: CHECKPOINT_VERSION,
+            TRACKING_RUN_ID: self.tracking_run_id,
+            STREAMS: {
+                name: _serialize_stream(state) for name, state in self.streams.items()
+            },
+        }
+
+    @staticmethod
+    def from_dict(data: dict) -> "TrackingCheckpoint":
+        """Parse a checkpoint in the versioned checkpoint format.
+
+        Raises:
+            CheckpointFormatError: if the data has another version or misses fields.
+        """
+        if (version := data.get(VERSION)) != CHECKPOINT_VERSION:
+            raise CheckpointFormatError(
+                f"Unsupported checkpoint version '{version}', "
+                f"expected {CHECKPOINT_VERSION}"
+            )
+        try:
+            return TrackingCheckpoint(
+                tracking_run_id=str(data[TRACKING_RUN_ID]),
+                streams={
+                    str(name): _parse_stream(state)
+                    for name, state in data[STREAMS].items()
+                },
+            )
+        except (KeyError, TypeError, ValueError) as cause:
+            raise CheckpointFormatError(f"Invalid checkpoint: {cause!r}") from cause
+
+
+@dataclass(frozen=True)
+class CheckpointedStream:
+    """The components holding the tracking state of a stream."""
+
+    tracker: IouTracker
+    stream_tracker: StreamTracker
+    ottrk_file_writer: StreamOttrkFileWriter
+
+
+class TrackingCheckpointer:
+    """Saves the tracking state of all streams to continue tracking after a restart.
+
+    Tracks of a stream are continued if the stream has been interrupted for at most
+    `t_miss_max` frames. Tracks missed for longer are finished or discarded as if the
+    stream had been tracked over the interruption. Track ids always continue after
+    the last one handed out, so that ids stay unique within the pending ottrk files.
+
+    An ottrk file waiting for its unfinished tracks holds all detections of its
+    segment. It is saved to a file next to the checkpoint once it starts waiting,
+    i.e. once per flush. The checkpoint itself only contains the tracks that ended
+    since then, so that saving it stays cheap.
+
+    Frames are only saved once their segment is flushed to otdet and ottrk files.
+    The frames of the segment running at the restart are lost. These are at most the
+    `flush_buffer_size` frames of the stream. Their number is saved with the
+    checkpoint and reported when it is restored.
+
+    Args:
+        file (Path): the checkpoint file.
+        interval_seconds (float): minimum seconds between two checkpoints.
+        get_current_config (GetCurrentConfig): provides the tracking config and the
+            frame rate of the streams.
+        current_tracking_run_id (CurrentTrackingRunId): the tracking run to continue.
+        datetime_provider (DatetimeProvider): provides the time of the restart.
+        io_executor (IoExecutor): writes the checkpoint file off the event loop.
+        clock (Clock): measures the time between checkpoints.
+    """
+
+    def __init__(
+        self,
+        file: Path,
+        interval_seconds: float,
+        get_current_config: GetCurrentConfig,
+        current_tracking_run_id: CurrentTrackingRunId,
+        datetime_provider: DatetimeProvider,
+        io_executor: IoExecutor,
+        clock: Clock = monotonic,
+    ) -> None:
+        self._file = file
+        self._interval_seconds = interval_seconds
+        self._get_current_config = get_current_config
+        self._current_tracking_run_id = current_tracking_run_id
+        self._datetime_provider = datetime_provider
+        self._io_executor = io_executor
+        self._clock = clock
+        self._saving = asyncio.Lock()
+        self._streams: dict[str, CheckpointedStream] = {}
+        self._last_occurrences: dict[str, datetime] = {}
+        self._ended_tracks: dict[str, tuple[set[TrackId], set[TrackId]]] = {}
+        self._last_save: float | None = None
+        self._saved_pending_ottrks: dict[str, tuple[Path, datetime | None] | None] = {}
+
+    def add_stream(self, name: str, stream: CheckpointedStream) -> None:
+        self._streams[name] = stream
+
+    def create_filter(self, name: str) -> Filter[TrackedFrame, TrackedFrame]:
+        """Create the filter saving checkpoints after the frames of the stream."""
+        return TrackingCheckpointFilter(self, name)
+
+    async def on_tracked(self, name: str, frame: TrackedFrame) -> None:
+        """Record the frame and save a checkpoint if the interval has passed."""
+        self._last_occurrences[name] = frame.occurrence
+        now = self._clock()
+        if self._last_save is None or now - self._last_save >= self._interval_seconds:
+            await self.save()
+
+    async def save(self) -> None:
+        """Save the current state of all streams.
+
+        The state is taken on the event loop. Serializing and writing it runs on
+        the I/O executor. Saves of different streams are written one after another.
+        Pending ottrk files are only taken and written if they changed since the
+        last save.
+        """
+        self._last_save = self._clock()
+        streams: dict[str, StreamTrackingState] = {}
+        pending_ottrks: dict[str, OttrkWriterState | None] = {}
+        for name, stream in self._streams.items():
+            if (last_occurrence := self._last_occurrences.get(name)) is None:
+                continue
+            pending_tracks = stream.ottrk_file_writer.pending_tracks()
+            if name not in self._saved_pending_ottrks or self._saved_pending_ottrks[
+                name
+            ] != _pending_key(pending_tracks):
+                pending_ottrks[name] = (
+                    stream.ottrk_file_writer.snapshot()
+                    if pending_tracks is not None
+                    else None
+                )
+            streams[name] = StreamTrackingState(
+                last_occurrence=last_occurrence,
+                last_track_id=stream.stream_tracker.last_track_id,
+                active_tracks=stream.tracker.snapshot(),
+                pending_tracks=pending_tracks,
+                unwritten_frames=stream.ottrk_file_writer.unwritten_frames(),
+            )
+        checkpoint = TrackingCheckpoint(
+            tracking_run_id=self._current_tracking_run_id.get(), streams=streams
+        )
+        async with self._saving:
+            await self._io_executor.run(
+                partial(
+                    _write_all,
+                    self._file,
+                    checkpoint,
+                    {
+                        self._pending_ottrk_file(name): pending_ottrk
+                        for name, pending_ottrk in pending_ottrks.items()
+                    },
+                )
+            )
+        for name in pending_ottrks:
+            self._saved_pending_ottrks[name] = _pending_key(
+                streams[name].pending_tracks
+            )
+
+    def restore(self) -> bool:
+        """Restore the state of the streams from the checkpoint file.
+
+        Returns:
+            bool: whether the tracking run of the checkpoint is continued.
+        """
+        if (checkpoint := self._load()) is None:
+            return False
+        config = self._get_current_config.get()
+        now = self._datetime_provider.provide()
+        continued = False
+        for name, state in checkpoint.streams.items():
+            if (stream := self._streams.get(name)) is None:
+                continue
+            missed_frames = max(
+                round(
+                    (now - state.last_occurrence).total_seconds()
+                    * config.convert.output_fps
+                ),
+                0,
+            )
+            stream.stream_tracker.restore_last_track_id(state.last_track_id)
+            self._ended_tracks[name] = stream.tracker.restore(
+                state.active_tracks, missed_frames
+            )
+            if (pending_ottrk := self._load_pending_ottrk(name)) is not None:
+                stream.ottrk_file_writer.restore(pending_ottrk, state.pending_tracks)
+            if (unwritten := state.unwritten_frames) is not None:
+                logger().warning(
+                    f"Lost {unwritten.count} frames of stream '{name}' tracked from "
+                    f"{unwritten.since} until {state.last_occurrence}, because their "
+                    "segment had not been flushed before the restart"
+                )
+            self._last_occurrences[name] = state.last_occurrence
+            if missed_frames <= config.track.iou.t_miss_max:
+                continued = True
+                logger().info(
+                    f"Continue {len(stream.tracker.active_tracks)} tracks of stream "
+                    f"'{name}' missed for {missed_frames} frames"
+                )
+        if continued:
+            self._current_tracking_run_id.update(checkpoint.tracking_run_id)
+        return continued
+
+    async def end_restored_tracks(self, name: str) -> None:
+        """Pass the tracks that ended while the stream was down to its ottrk file."""
+        if (ended_tracks := self._ended_tracks.pop(name, None)) is None:
+            return
+        finished_tracks, discarded_tracks = ended_tracks
+        await self._streams[name].ottrk_file_writer.end_tracks(
+            finished_tracks, discarded_tracks
+        )
+
+    def _pending_ottrk_file(self, name: str) -> Path:
+        return self._file.with_name(f"{self._file.name}.{name}.pending")
+
+    def _load(self) -> TrackingCheckpoint | None:
+        if (data := _read(self._file)) is None:
+            return None
+        try:
+            return TrackingCheckpoint.from_dict(data)
+        except CheckpointFormatError as cause:
+            logger().warning(f"Ignore checkpoint '{self._file}': {cause}")
+            return None
+
+    def _load_pending_ottrk(self, name: str) -> OttrkWriterState | None:
+        """Load the ottrk file the stream waited for, if there was one.
+
+        The file is written before the checkpoint. Thus, it may be newer than the
+        checkpoint, but never older. Tracks of the checkpoint belonging to another
+        ottrk file are ignored.
+        """
+        file = self._pending_ottrk_file(name)
+        if (data := _read(file)) is None:
+            return None
+        if (version := data.get(VERSION)) != CHECKPOINT_VERSION:
+            logger().warning(f"Ignore '{file}' of checkpoint version '{version}'")
+            return None
+        try:
+            return _parse_pending_ottrk(data[PENDING_OTTRK])
+        except (KeyError, TypeError, ValueError) as cause:
+            logger().warning(f"Ignore invalid pending ottrk '{file}': {cause!r}")
+            return None
+
+
+def _pending_key(
+    pending_tracks: PendingTracks | None,
+) -> tuple[Path, datetime | None] | None:
+    if pending_tracks is None:
+        return None
+    return pending_tracks.output_file, pending_tracks.pending_since
+
+
+def _read(file: Path) -> dict | None:
+    if not file.is_file():
+        return None
+    try:
+        with open(file, "r", encoding="utf-8") as checkpoint_file:
+            data = json.load(checkpoint_file)
+    except (OSError, ValueError) as cause:
+        logger().warning(f"Could not read checkpoint '{file}': {cause}")
+        return None
+    if not isinstance(data, dict):
+        logger().warning(f"Ignore invalid checkpoint '{file}'")
+        return None
+    return data
+
+
+def _write_all(
+    file: Path,
+    checkpoint: TrackingCheckpoint,
+    pending_ottrks: dict[Path, OttrkWriterState | None],
+) -> None:
+    """Write the changed pending ottrk files, then the checkpoint referring to them.
+
+    The pending ottrk file of a stream that does not wait anymore is deleted.
+    """
+    file.parent.mkdir(parents=True, exist_ok=True)
+    for pending_file, pending_ottrk in pending_ottrks.items():
+        if pending_ottrk is None:
+            pending_file.unlink(missing_ok=True)
+        else:
+            _write(
+                pending_file,
+                {
+                    VERSION: CHECKPOINT_VERSION,
+                    PENDING_OTTRK: _serialize_pending_ottrk(pending_ottrk),
+                },
+            )
+    _write(file, checkpoint.to_dict())
+
+
+def _write(file: Path, data: dict) -> None:
+    temporary_file = file.with_name(f"{file.name}.tmp")
+    with open(temporary_file, "w", encoding="utf-8") as output:
+        json.dump(data, output)
+    os.replace(temporary_file, file)
+
+
+def _serialize_stream(state: StreamTrackingState) -> dict:
+    return {
+        LAST_OCCURRENCE: state.last_occurrence.isoformat(),
+        LAST_TRACK_ID: state.last_track_id,
+        ACTIVE_TRACKS: [_serialize_track(track) for track in state.active_tracks],
+        PENDING_TRACKS: (
+            _serialize_pending_tracks(state.pending_tracks)
+            if state.pending_tracks is not None
+            else None
+        ),
+        UNWRITTEN_FRAMES: (
+            {
+                "count": state.unwritten_frames.count,
+                "since": state.unwritten_frames.since.isoformat(),
+            }
+            if state.unwritten_frames is not None
+            else None
+        ),
+    }
+
+
+def _parse_stream(data: dict) -> StreamTrackingState:
+    return StreamTrackingState(
+        last_occurrence=datetime.fromisoformat(data[LAST_OCCURRENCE]),
+        last_track_id=int(data[LAST_TRACK_ID]),
+        active_tracks=[_parse_track(track) for track in data[ACTIVE_TRACKS]],
+        pending_tracks=(
+            _parse_pending_tracks(pending_tracks)
+            if (pending_tracks := data[PENDING_TRACKS]) is not None
+            else None
+        ),
+        unwritten_frames=(
+            UnwrittenFrames(
+                count=int(unwritten["count"]),
+                since=datetime.fromisoformat(unwritten["since"]),
+            )
+            if (unwritten := data[UNWRITTEN_FRAMES]) is not None
+            else None
+        ),
+    )
+
+
+def _serialize_track(track: IouTrackState) -> dict:
+    """Serialize the fields needed to match the track with new detections."""
+    return {
+        "id": track.id,
+        "bbox": [track.bbox.xmin, track.bbox.ymin, track.bbox.xmax, track.bbox.ymax],
+        "center": [track.center.x, track.center.y],
+        "conf": track.conf,
+        "class_id": track.class_id,
+        "max_class": track.max_class,
+        "max_conf": track.max_conf,
+        "first_frame": track.first_frame,
+        "last_frame": track.last_frame,
+        "track_age": track.track_age,
+    }
+
+
+def _parse_track(data: dict) -> IouTrackState:
+    xmin, ymin, xmax, ymax = data["bbox"]
+    x, y = data["center"]
+    return IouTrackState(
+        id=int(data["id"]),
+        bbox=BoundingBox(float(xmin), float(ymin), float(xmax), float(ymax)),
+        center=Coordinate(float(x), float(y)),
+        conf=float(data["conf"]),
+        class_id=int(data["class_id"]),
+        max_class=int(data["max_class"]),
+        max_conf=float(data["max_conf"]),
+        first_frame=int(data["first_frame"]),
+        last_frame=int(data["last_frame"]),
+        track_age=int(data["track_age"]),
+    )
+
+
+def _serialize_pending_tracks(tracks: PendingTracks) -> dict:
+    return {
+        "output_file": str(tracks.output_file),
+        "pending_since": (
+            tracks.pending_since.isoformat() if tracks.pending_since else None
+        ),
+        "unfinished_tracks": sorted(tracks.unfinished_tracks),
+        "finished_tracks": sorted(tracks.finished_tracks),
+        "discarded_tracks": sorted(tracks.discarded_tracks),
+    }
+
+
+def _parse_pending_tracks(data: dict) -> PendingTracks:
+    return PendingTracks(
+        output_file=Path(data["output_file"]),
+        pending_since=(
+            datetime.fromisoformat(pending_since)
+            if (pending_since := data["pending_since"]) is not None
+            else None
+        ),
+        unfinished_tracks={int(track_id) for track_id in data["unfinished_tracks"]},
+        finished_tracks={int(track_id) for track_id in data["finished_tracks"]},
+        discarded_tracks={int(track_id) for track_id in data["discarded_tracks"]},
+    )
+
+
+def _serialize_pending_ottrk(state: OttrkWriterState) -> dict:
+    builder_state = state.builder_state
+    return {
+        "config": _serialize_ottrk_config(builder_state.config),
+        "tracked_detections": [
+            [track_id, detections]
+            for track_id, detections in builder_state.tracked_detections.items()
+        ],
+        "unfinished_tracks": sorted(state.unfinished_tracks),
+        "output_file": str(state.output_file),
+        "pending_since": (
+            state.pending_since.isoformat() if state.pending_since else None
+        ),
+    }
+
+
+def _parse_pending_ottrk(data: dict) -> OttrkWriterState:
+    return OttrkWriterState(
+        builder_state=OttrkBuilderState(
+            config=_parse_ottrk_config(data["config"]),
+            tracked_detections={
+                int(track_id): list(detections)
+                for track_id, detections in data["tracked_detections"]
+            },
+        ),
+        unfinished_tracks={int(track_id) for track_id in data["unfinished_tracks"]},
+        output_file=Path(data["output_file"]),
+        pending_since=(
+            datetime.fromisoformat(pending_since)
+            if (pending_since := data["pending_since"]) is not None
+            else None
+        ),
+    )
+
+
+def _serialize_ottrk_config(config: OttrkBuilderConfig) -> dict:
+    return {
+        "otdet": config.otdet_builder_config.to_dict(),
+        "number_of_frames": config.number_of_frames,
+        "sigma_l": config.sigma_l,
+        "sigma_h": config.sigma_h,
+        "sigma_iou": config.sigma_iou,
+        "t_min": config.t_min,
+        "t_miss_max": config.t_miss_max,
+        "tracking_run_id": config.tracking_run_id,
+        "frame_group": config.frame_group,
+    }
+
+
+def _parse_ottrk_config(data: dict) -> OttrkBuilderConfig:
+    return OttrkBuilderConfig(
+        otdet_builder_config=OtdetBuilderConfig.from_dict(data["otdet"]),
+        number_of_frames=int(data["number_of_frames"]),
+        sigma_l=float(data["sigma_l"]),
+        sigma_h=float(data["sigma_h"]),
+        sigma_iou=float(data["sigma_iou"]),
+        t_min=int(data["t_min"]),
+        t_miss_max=int(data["t_miss_max"]),
+        tracking_run_id=str(data["tracking_run_id"]),
+        frame_group=int(data["frame_group"]),
+    )
+
+
+class TrackingCheckpointFilter(Filter[TrackedFrame, TrackedFrame]):
+    """Saves checkpoints while the tracked frames of a stream pass.
+
+    A last checkpoint is saved when the stream ends.
+
+    Args:
+        checkpointer (TrackingCheckpointer): saves the checkpoints.
+        name (str): name of the stream.
+    """
+
+    def __init__(self, checkpointer: TrackingCheckpointer, name: str) -> None:
+        self._checkpointer = checkpointer
+        self._name = name
+
+    async def filter(
+        self, pipe: AsyncIterator[TrackedFrame]
+    ) -> AsyncIterator[TrackedFrame]:
+        await self._checkpointer.end_restored_tracks(self._name)
+        try:
+            async for frame in pipe:
+                await self._checkpointer.on_tracked(self._name, frame)
+                yield frame
+        finally:
+            await self._checkpointer.save()
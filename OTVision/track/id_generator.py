@@ -6,8 +6,8 @@ def tracking_run_uuid_generator() -> str:
     return str(uuid.uuid4())
 
 
-def track_id_generator() -> Iterator[int]:
-    track_id: int = 0
+def track_id_generator(start: int = 1) -> Iterator[int]:
+    track_id: int = start - 1
     while True:
         track_id += 1
         yield track_id
@@ -6,6 +6,7 @@ from typing import Sequence
 from tqdm import tqdm
 
 from OTVision.dataformat import FRAME, INPUT_FILE_PATH, TRACK_ID
+from OTVision.detect.otdet import extract_classifications_from_otdet
 from OTVision.domain.detection import TrackId
 from OTVision.domain.frame import (
     DetectedFrame,
@@ -173,6 +174,7 @@ class FinishedChunk(TrackedChunk):
 
     def to_detection_dicts(self) -> list[dict]:
         chunk_metadata = {INPUT_FILE_PATH: self.file.as_posix()}
+        classifications = extract_classifications_from_otdet(self.metadata)
 
         frames_progress = tqdm(
             self.frames, desc="Frames to_dict", total=len(self.frames), leave=False
@@ -181,7 +183,7 @@ class FinishedChunk(TrackedChunk):
         detection_dict_list = [
             {**det_dict, **chunk_metadata}
             for frame in frames_progress
-            for det_dict in frame.to_detection_dicts()
+            for det_dict in frame.to_detection_dicts(classifications)
         ]
 
         detection_dict_list.sort(
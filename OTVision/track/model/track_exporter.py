@@ -50,13 +50,15 @@ class FinishedTracksExporter(ABC, Generic[F]):
 
     async def export(
         self, tracking_run_id: str, stream: AsyncIterator[F], overwrite: bool
-    ) -> None:
-        async for container in stream:
+    ) -> list[Path]:
+        return [
             self.export_frames(container, tracking_run_id, overwrite)
+            async for container in stream
+        ]
 
     def export_frames(
         self, container: F, tracking_run_id: str, overwrite: bool
-    ) -> None:
+    ) -> Path:
         file_path = self.get_result_path(container)
 
         det_dicts = self.reindex(self.get_detection_dicts(container))
@@ -76,6 +78,7 @@ class FinishedTracksExporter(ABC, Generic[F]):
         )
 
         log.info(f"Successfully tracked and wrote {file_path}")
+        return Path(file_path).with_suffix(self.file_type)
 
     @staticmethod
     def reindex(det_dicts: list[dict]) -> list[dict]:
@@ -6,16 +6,20 @@ from tqdm import tqdm
 
 from OTVision.dataformat import (
     CLASS,
+    CLASSES,
     CONFIDENCE,
     DATA,
+    DETECTION,
     DETECTIONS,
+    MODEL,
     OCCURRENCE,
     H,
     W,
     X,
     Y,
 )
-from OTVision.domain.detection import Detection
+from OTVision.detect.otdet import extract_classifications_from_otdet
+from OTVision.domain.detection import ClassId, ClassMapping, Detection
 from OTVision.domain.frame import DetectedFrame
 from OTVision.helpers.date import parse_datetime
 from OTVision.helpers.files import denormalize_bbox, read_json
@@ -36,15 +40,27 @@ class JsonChunkParser(ChunkParser):
         )
         input: dict[int, dict[str, Any]] = denormalized[DATA]
 
-        frames = self.convert(file, frame_offset, input)
+        classifications = extract_classifications_from_otdet(metadata)
+        number_of_known_classes = len(classifications)
+        frames = self.convert(file, frame_offset, input, classifications)
+        if len(classifications) > number_of_known_classes:
+            # Labels unknown to the otdet's classes have been assigned new class codes
+            # that are needed to serialize the tracks later on.
+            metadata.setdefault(DETECTION, {}).setdefault(MODEL, {})[
+                CLASSES
+            ] = classifications
 
         frames.sort(key=lambda frame: (frame.occurrence, frame.no))
         return FrameChunk(file, metadata, frames, frame_group.id)
 
     def convert(
-        self, file: Path, frame_offset: int, input: dict[int, dict[str, Any]]
+        self,
+        file: Path,
+        frame_offset: int,
+        input: dict[int, dict[str, Any]],
+        classifications: ClassMapping | None = None,
     ) -> list[DetectedFrame]:
-        detection_parser = DetectionParser()
+        detection_parser = DetectionParser(classifications)
         frames = []
 
         input_progress = tqdm(
@@ -67,11 +83,27 @@ class JsonChunkParser(ChunkParser):
 
 
 class DetectionParser:
+    """Parses otdet detections into `Detection` objects.
+
+    Labels are converted to class codes using the given classifications. Labels
+    unknown to the classifications are assigned new class codes, which are added to
+    the classifications.
+
+    Args:
+        classifications (ClassMapping | None): mapping of class codes to labels.
+    """
+
+    def __init__(self, classifications: ClassMapping | None = None) -> None:
+        self.classifications = classifications if classifications is not None else {}
+        self._class_ids = {
+            label: class_id for class_id, label in self.classifications.items()
+        }
+
     def convert(self, detection_data: list[dict[str, str]]) -> list[Detection]:
         detections: list[Detection] = []
         for detection in detection_data:
             detected_item = Detection(
-                detection[CLASS],
+                self._class_id_of(detection[CLASS]),
                 float(detection[CONFIDENCE]),
                 float(detection[X]),
                 float(detection[Y]),
@@ -80,3 +112,10 @@ class DetectionParser:
             )
             detections.append(detected_item)
         return detections
+
+    def _class_id_of(self, label: str) -> ClassId:
+        if (class_id := self._class_ids.get(label)) is None:
+            class_id = max(self.classifications, default=-1) + 1
+            self.classifications[class_id] = label
+            self._class_ids[label] = class_id
+        return class_id
@@ -1,14 +1,24 @@
+import asyncio
 from dataclasses import dataclass
+from datetime import datetime
+from functools import partial
 from pathlib import Path
-from typing import Any
+from time import perf_counter
+from typing import Any, AsyncIterator, Callable
 
 from OTVision.abstraction.observer import AsyncObserver, AsyncSubject
 from OTVision.application.buffer import Buffer
 from OTVision.application.config import Config, TrackConfig
 from OTVision.application.configure_logger import logger
 from OTVision.application.get_current_config import GetCurrentConfig
+from OTVision.application.io_executor import IoExecutor
+from OTVision.application.metrics import DISABLED_METRICS, MetricsRegistry
 from OTVision.application.otvision_save_path_provider import OtvisionSavePathProvider
-from OTVision.application.track.ottrk import OttrkBuilder, OttrkBuilderConfig
+from OTVision.application.track.ottrk import (
+    OttrkBuilder,
+    OttrkBuilderConfig,
+    OttrkBuilderState,
+)
 from OTVision.application.track.tracking_run_id import GetCurrentTrackingRunId
 from OTVision.detect.otdet import OtdetBuilderConfig
 from OTVision.detect.otdet_file_writer import OtdetFileWrittenEvent
@@ -24,7 +34,67 @@ class OttrkFileWrittenEvent:
     save_location: Path
 
 
+@dataclass(frozen=True)
+class OttrkWriterState:
+    """An ottrk file that waits for its unfinished tracks to be finished."""
+
+    builder_state: OttrkBuilderState
+    unfinished_tracks: set[TrackId]
+    output_file: Path
+    pending_since: datetime | None = None
+
+
+@dataclass(frozen=True)
+class PendingTracks:
+    """The tracks of an ottrk file that ended while it waited for them.
+
+    In contrast to the full `OttrkWriterState`, the tracks are cheap to save often.
+
+    Attributes:
+        output_file (Path): the ottrk file waiting for its unfinished tracks.
+        pending_since (datetime | None): occurrence of the last frame of the file.
+        unfinished_tracks (set[TrackId]): the tracks the file still waits for.
+        finished_tracks (set[TrackId]): the tracks finished while waiting.
+        discarded_tracks (set[TrackId]): the tracks discarded while waiting.
+    """
+
+    output_file: Path
+    pending_since: datetime | None
+    unfinished_tracks: set[TrackId]
+    finished_tracks: set[TrackId]
+    discarded_tracks: set[TrackId]
+
+    def belongs_to(self, state: OttrkWriterState) -> bool:
+        """Whether the tracks belong to the ottrk file of the given state."""
+        return (
+            self.output_file == state.output_file
+            and self.pending_since == state.pending_since
+        )
+
+
+@dataclass(frozen=True)
+class UnwrittenFrames:
+    """Tracked frames buffered since the last flush, which no file contains yet."""
+
+    count: int
+    since: datetime
+
+
 class StreamOttrkFileWriter(Buffer[TrackedFrame, OtdetFileWrittenEvent]):
+    """Writes the tracks of each flushed segment of a stream to an ottrk file.
+
+    After a flush, the ottrk file waits for the tracks still open at the end of the
+    segment to be finished. It waits at most `max_emission_delay_seconds` of the
+    stream or until the next flush. Then, it is written with the tracks still open.
+    Their last detections are not marked as finished and the tracks continue with
+    the same ids in the next ottrk file.
+
+    Ottrk files are assembled, serialized and compressed by the `io_executor`, so
+    that tracking continues while a file is written. Observers are notified once the
+    file has been written. Writing waits only if the executor has too many files
+    pending.
+    """
+
     @property
     def config(self) -> Config:
         return self._get_current_config.get()
@@ -50,6 +120,8 @@ class StreamOttrkFileWriter(Buffer[TrackedFrame, OtdetFileWrittenEvent]):
         get_current_config: GetCurrentConfig,
         get_current_tracking_run_id: GetCurrentTrackingRunId,
         save_path_provider: OtvisionSavePathProvider,
+        io_executor: IoExecutor,
+        metrics: MetricsRegistry = DISABLED_METRICS,
     ) -> None:
         Buffer.__init__(self)
         self._subject = subject
@@ -57,15 +129,53 @@ class StreamOttrkFileWriter(Buffer[TrackedFrame, OtdetFileWrittenEvent]):
         self._get_current_config = get_current_config
         self._current_tracking_run_id = get_current_tracking_run_id
         self._save_path_provider = save_path_provider
+        self._io_executor = io_executor
+        self._pending_writes: set[asyncio.Task[None]] = set()
+        self._write_error: Exception | None = None
 
         self._in_writing_state: bool = False
         self._ottrk_unfinished_tracks: set[TrackId] = set()
+        self._ottrk_finished_tracks: set[TrackId] = set()
+        self._ottrk_discarded_tracks: set[TrackId] = set()
         self._current_output_file: Path | None = None
+        self._pending_since: datetime | None = None
+        self._buffered_frames_metric = metrics.gauge(
+            "otvision_ottrk_buffered_frames",
+            "Tracked frames buffered until the next ottrk file is built.",
+        )
+        self._pending_tracks_metric = metrics.gauge(
+            "otvision_ottrk_pending_tracks",
+            "Unfinished tracks the current ottrk file waits for to be written.",
+        )
+        self._write_duration_metric = metrics.histogram(
+            "otvision_ottrk_write_duration_seconds",
+            "Seconds from building an ottrk file until it has been written.",
+        )
+        self._files_written_metric = metrics.counter(
+            "otvision_ottrk_files_written_total", "Ottrk files written."
+        )
+        self._continued_tracks_metric = metrics.counter(
+            "otvision_ottrk_continued_tracks_total",
+            "Tracks written still open, because their ottrk file waited too long.",
+        )
+        self._write_errors_metric = metrics.counter(
+            "otvision_ottrk_write_errors_total",
+            "Ottrk files that failed to be written.",
+        )
+
+    async def filter(
+        self, pipe: AsyncIterator[TrackedFrame]
+    ) -> AsyncIterator[TrackedFrame]:
+        async for element in super().filter(pipe):
+            yield element
+        await self.wait_for_pending_writes()
 
     async def on_flush(self, event: OtdetFileWrittenEvent) -> None:
         tracked_frames = self._get_buffered_elements()
         if not tracked_frames:
             return
+        if self._in_writing_state:
+            await self._create_ottrk_with_open_tracks()
 
         self._in_writing_state = True
         self._current_output_file = self._save_path_provider.provide(
@@ -78,7 +188,11 @@ class StreamOttrkFileWriter(Buffer[TrackedFrame, OtdetFileWrittenEvent]):
         last_frame = tracked_frames[-1]
         self._builder.add_tracked_frames(tracked_frames)
         self._ottrk_unfinished_tracks = last_frame.unfinished_tracks
+        self._ottrk_finished_tracks = set()
+        self._ottrk_discarded_tracks = set()
+        self._pending_since = last_frame.occurrence
         self.reset()
+        self._pending_tracks_metric.set(len(self._ottrk_unfinished_tracks))
 
     def _create_ottrk_builder_config(
         self,
@@ -99,45 +213,201 @@ class StreamOttrkFileWriter(Buffer[TrackedFrame, OtdetFileWrittenEvent]):
 
     def reset(self) -> None:
         self._reset_buffer()
+        self._buffered_frames_metric.set(0)
 
     async def buffer(self, to_buffer: TrackedFrame) -> None:
         self._buffer.append(to_buffer.without_image())
+        self._buffered_frames_metric.set(len(self._buffer))
 
         if self._in_writing_state:
-            self._builder.finish_tracks(to_buffer.finished_tracks)
-            self._builder.discard_tracks(to_buffer.discarded_tracks)
-            self._ottrk_unfinished_tracks = (
-                self._ottrk_unfinished_tracks.difference(to_buffer.unfinished_tracks)
-                .difference(to_buffer.finished_tracks)
-                .difference(to_buffer.discarded_tracks)
+            await self._end_pending_tracks(
+                to_buffer.unfinished_tracks,
+                to_buffer.finished_tracks,
+                to_buffer.discarded_tracks,
             )
-            logger().warning(f"Unfinished tracks: {self._ottrk_unfinished_tracks}")
-            if self.build_condition_fulfilled:
-                await self._create_ottrk()
+            if self._in_writing_state and self._emission_delay_exceeded(to_buffer):
+                await self._create_ottrk_with_open_tracks()
+
+    def _emission_delay_exceeded(self, frame: TrackedFrame) -> bool:
+        max_delay = self.track_config.max_emission_delay_seconds
+        if max_delay is None or self._pending_since is None:
+            return False
+        return (frame.occurrence - self._pending_since).total_seconds() >= max_delay
+
+    async def _create_ottrk_with_open_tracks(self) -> None:
+        open_tracks = len(self._ottrk_unfinished_tracks)
+        logger().info(
+            f"Write '{self.current_output_file}' with {open_tracks} open tracks "
+            "continuing in the next ottrk file"
+        )
+        self._continued_tracks_metric.inc(open_tracks)
+        await self._create_ottrk()
+
+    async def end_tracks(
+        self, finished_tracks: set[TrackId], discarded_tracks: set[TrackId]
+    ) -> None:
+        """Finish and discard tracks that ended without a tracked frame."""
+        if self._in_writing_state:
+            await self._end_pending_tracks(set(), finished_tracks, discarded_tracks)
+
+    async def _end_pending_tracks(
+        self,
+        unfinished_tracks: set[TrackId],
+        finished_tracks: set[TrackId],
+        discarded_tracks: set[TrackId],
+    ) -> None:
+        self._builder.finish_tracks(finished_tracks)
+        self._builder.discard_tracks(discarded_tracks)
+        self._ottrk_finished_tracks.update(
+            finished_tracks.intersection(self._ottrk_unfinished_tracks)
+        )
+        self._ottrk_discarded_tracks.update(
+            discarded_tracks.intersection(self._ottrk_unfinished_tracks)
+        )
+        self._ottrk_unfinished_tracks = (
+            self._ottrk_unfinished_tracks.difference(unfinished_tracks)
+            .difference(finished_tracks)
+            .difference(discarded_tracks)
+        )
+        logger().debug(f"Unfinished tracks: {self._ottrk_unfinished_tracks}")
+        self._pending_tracks_metric.set(len(self._ottrk_unfinished_tracks))
+        if self.build_condition_fulfilled:
+            await self._create_ottrk()
+
+    def unwritten_frames(self) -> UnwrittenFrames | None:
+        """Return the frames buffered for the next ottrk file, if there are any.
+
+        These are at most the frames of one segment of the stream.
+        """
+        if not (tracked_frames := self._get_buffered_elements()):
+            return None
+        return UnwrittenFrames(
+            count=len(tracked_frames), since=tracked_frames[0].occurrence
+        )
+
+    def snapshot(self) -> OttrkWriterState | None:
+        """Return the ottrk file waiting for unfinished tracks, if there is one.
+
+        The state contains all detections of the file. It only needs to be taken
+        once per file, the tracks ending afterwards are tracked by `pending_tracks`.
+        Frames buffered for the next ottrk file are not part of the state. See
+        `unwritten_frames`.
+        """
+        if not self._in_writing_state or self._current_output_file is None:
+            return None
+        if (builder_state := self._builder.snapshot()) is None:
+            return None
+        return OttrkWriterState(
+            builder_state=builder_state,
+            unfinished_tracks=set(self._ottrk_unfinished_tracks),
+            output_file=self._current_output_file,
+            pending_since=self._pending_since,
+        )
+
+    def pending_tracks(self) -> PendingTracks | None:
+        """Return the tracks of the ottrk file waiting for unfinished tracks, if
+        there is one."""
+        if not self._in_writing_state or self._current_output_file is None:
+            return None
+        return PendingTracks(
+            output_file=self._current_output_file,
+            pending_since=self._pending_since,
+            unfinished_tracks=set(self._ottrk_unfinished_tracks),
+            finished_tracks=set(self._ottrk_finished_tracks),
+            discarded_tracks=set(self._ottrk_discarded_tracks),
+        )
+
+    def restore(
+        self, state: OttrkWriterState, pending_tracks: PendingTracks | None = None
+    ) -> None:
+        """Continue waiting for the unfinished tracks of the given ottrk file.
+
+        Args:
+            state (OttrkWriterState): the ottrk file waiting for unfinished tracks.
+            pending_tracks (PendingTracks | None): the tracks that ended after the
+                state had been taken. Ignored if they belong to another file.
+        """
+        self._builder.restore(state.builder_state)
+        self._ottrk_unfinished_tracks = set(state.unfinished_tracks)
+        self._ottrk_finished_tracks = set()
+        self._ottrk_discarded_tracks = set()
+        if pending_tracks is not None and pending_tracks.belongs_to(state):
+            self._builder.finish_tracks(pending_tracks.finished_tracks)
+            self._builder.discard_tracks(pending_tracks.discarded_tracks)
+            self._ottrk_unfinished_tracks = set(pending_tracks.unfinished_tracks)
+            self._ottrk_finished_tracks = set(pending_tracks.finished_tracks)
+            self._ottrk_discarded_tracks = set(pending_tracks.discarded_tracks)
+        self._current_output_file = state.output_file
+        self._pending_since = state.pending_since
+        self._in_writing_state = True
+        self._pending_tracks_metric.set(len(self._ottrk_unfinished_tracks))
 
     async def _create_ottrk(self) -> None:
-        ottrk_data = self._builder.build()
-        await self.write(ottrk_data)
+        build_ottrk = self._builder.build_detached()
+        await self.write(build_ottrk)
         self.full_reset()
 
     def full_reset(self) -> None:
         self._in_writing_state = False
         self._builder.reset()
         self._ottrk_unfinished_tracks = set()
+        self._ottrk_finished_tracks = set()
+        self._ottrk_discarded_tracks = set()
         self._current_output_file = None
+        self._pending_since = None
+        self._pending_tracks_metric.set(0)
+
+    async def write(self, build_ottrk: Callable[[], dict]) -> None:
+        """Submit the ottrk file to the I/O executor without waiting for it.
 
-    async def write(self, ottrk: dict) -> None:
+        Args:
+            build_ottrk (Callable[[], dict]): builds the ottrk data on the executor.
+        """
+        start = perf_counter()
         current_output_file = self.current_output_file
-        write_json(
-            dict_to_write=ottrk,
-            file=current_output_file,
-            filetype=self.config.filetypes.track,
-            overwrite=True,
+        written = await self._io_executor.submit(
+            partial(
+                _build_and_write,
+                build_ottrk,
+                file=current_output_file,
+                filetype=self.config.filetypes.track,
+            )
+        )
+        task = asyncio.create_task(
+            self._complete_write(written, current_output_file, start)
         )
-        await self._notify_ottrk_file_written(save_location=current_output_file)
+        self._pending_writes.add(task)
+        task.add_done_callback(self._pending_writes.discard)
+
+    async def _complete_write(
+        self, written: asyncio.Future[None], save_location: Path, start: float
+    ) -> None:
+        try:
+            await written
+        except Exception as cause:
+            logger().error(f"Could not write '{save_location}': {cause}")
+            self._write_errors_metric.inc()
+            self._write_error = self._write_error or cause
+            return
+        self._write_duration_metric.observe(perf_counter() - start)
+        self._files_written_metric.inc()
+        await self._notify_ottrk_file_written(save_location=save_location)
+
+    async def wait_for_pending_writes(self) -> None:
+        """Wait until all submitted ottrk files have been written.
+
+        Raises:
+            Exception: the first error writing an ottrk file since the last call.
+        """
+        while self._pending_writes:
+            await asyncio.gather(*self._pending_writes)
+        if (error := self._write_error) is not None:
+            self._write_error = None
+            raise error
 
     async def force_flush(self, _: Any) -> None:
         await self._create_ottrk()
+        await self.wait_for_pending_writes()
 
     def register_observers(
         self, observer: AsyncObserver[OttrkFileWrittenEvent]
@@ -146,3 +416,11 @@ class StreamOttrkFileWriter(Buffer[TrackedFrame, OtdetFileWrittenEvent]):
 
     async def _notify_ottrk_file_written(self, save_location: Path) -> None:
         await self._subject.notify(OttrkFileWrittenEvent(save_location=save_location))
+
+
+def _build_and_write(
+    build_ottrk: Callable[[], dict], file: Path, filetype: str
+) -> None:
+    write_json(
+        dict_to_write=build_ottrk(), file=file, filetype=filetype, overwrite=True
+    )
@@ -0,0 +1,44 @@
+from typing import AsyncIterator, Callable
+
+from OTVision.abstraction.pipes_and_filter import Filter
+from OTVision.domain.detection import TrackId
+from OTVision.domain.frame import DetectedFrame, TrackedFrame
+from OTVision.track.model.tracking_interfaces import IdGenerator, Tracker
+
+
+class StreamTracker(Filter[DetectedFrame, TrackedFrame]):
+    """Tracks the detected frames of a stream.
+
+    Each call to `filter` continues with the track id following the last one handed
+    out. The tracker keeps its active tracks across flushes of the stream, so tracks
+    continue over output files.
+
+    Args:
+        tracker (Tracker): the tracker holding the state of the stream's tracks.
+        id_generator_factory (Callable[[int], IdGenerator]): creates the generator of
+            new track ids starting at the given id.
+    """
+
+    @property
+    def last_track_id(self) -> TrackId:
+        """The last track id handed out or 0, if there is none."""
+        return self._last_track_id
+
+    def __init__(
+        self, tracker: Tracker, id_generator_factory: Callable[[int], IdGenerator]
+    ) -> None:
+        self._tracker = tracker
+        self._id_generator_factory = id_generator_factory
+        self._last_track_id: TrackId = 0
+
+    def restore_last_track_id(self, last_track_id: TrackId) -> None:
+        """Continue handing out track ids after the given one."""
+        self._last_track_id = last_track_id
+
+    def filter(self, pipe: AsyncIterator[DetectedFrame]) -> AsyncIterator[TrackedFrame]:
+        return self._tracker.track(pipe, self._record_ids())
+
+    def _record_ids(self) -> IdGenerator:
+        for track_id in self._id_generator_factory(self._last_track_id + 1):
+            self._last_track_id = track_id
+            yield track_id
@@ -1,4 +1,5 @@
 import logging
+from pathlib import Path
 
 from tqdm.asyncio import tqdm
 
@@ -32,7 +33,12 @@ class OtvisionTrack:
         self._buffer = unfinished_chunks_buffer
         self._tracking_run_id_generator = tracking_run_id_generator
 
-    async def start(self) -> None:
+    async def start(self) -> list[Path]:
+        """Track the detections files of the configured paths.
+
+        Returns:
+            list[Path]: the ottrk files of the tracked detections files.
+        """
         check_types(
             self.config.track.sigma_l,
             self.config.track.sigma_h,
@@ -53,7 +59,7 @@ class OtvisionTrack:
             log.warning(
                 f"No files of type '{self.config.filetypes.detect}' " "found to track!"
             )
-            return
+            return []
 
         tracking_run_id = self._tracking_run_id_generator()
         finished_chunk_stream = self._buffer.group_and_track(detections_files)
@@ -61,6 +67,6 @@ class OtvisionTrack:
         finished_chunk_progress = tqdm(
             finished_chunk_stream, desc="export FrameChunk", total=len(detections_files)
         )
-        await self._track_exporter.export(
+        return await self._track_exporter.export(
             tracking_run_id, finished_chunk_progress, self.config.track.overwrite
         )
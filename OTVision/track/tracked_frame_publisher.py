@@ -0,0 +1,127 @@
+import json
+from time import monotonic
+from typing import AsyncIterator, Callable
+
+from OTVision.abstraction.pipes_and_filter import Filter
+from OTVision.application.metrics import DISABLED_METRICS, MetricsRegistry
+from OTVision.domain.frame import TrackedFrame
+from OTVision.domain.message_sink import MessageSink
+
+Clock = Callable[[], float]
+
+
+class TrackedFrameSerializer:
+    """Serializes tracked frames into compact lines of JSON.
+
+    Each line contains the stream name, the frame number, the occurrence as unix
+    timestamp, the tracked detections and the ids of the tracks finished or
+    discarded with this frame. Classes are given by their labels.
+
+    Args:
+        get_classifications (Callable[[], dict[int, str]]): provides the labels of
+            the classes of the current object detection model.
+    """
+
+    def __init__(self, get_classifications: Callable[[], dict[int, str]]) -> None:
+        self._get_classifications = get_classifications
+
+    def serialize(self, stream: str, frame: TrackedFrame) -> bytes:
+        classifications = self._get_classifications()
+        message = {
+            "stream": stream,
+            "frame": frame.no,
+            "occurrence": frame.occurrence.timestamp(),
+            "detections": [
+                {
+                    "track_id": detection.track_id,
+                    "class": classifications.get(
+                        detection.class_id, str(detection.class_id)
+                    ),
+                    "conf": detection.conf,
+                    "x": detection.x,
+                    "y": detection.y,
+                    "w": detection.w,
+                    "h": detection.h,
+                    "is_first": detection.is_first,
+                }
+                for detection in frame.detections
+            ],
+            "finished_tracks": sorted(frame.finished_tracks),
+            "discarded_tracks": sorted(frame.discarded_tracks),
+        }
+        return json.dumps(message, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+class TrackedFramePublisher(Filter[TrackedFrame, TrackedFrame]):
+    """Publishes the tracked frames of a stream as soon as they have been tracked.
+
+    Frames are published in batches. A batch is handed to the sink once it contains
+    `batch_size` frames or its first frame has waited for `max_batch_delay_seconds`.
+    The delay is checked whenever a frame arrives, so in a running stream frames wait
+    at most the delay or a frame interval, whichever is longer. Remaining frames are
+    published at the end of the stream.
+
+    Frames pass through unchanged.
+
+    Args:
+        stream (str): name of the stream the frames belong to.
+        serializer (TrackedFrameSerializer): serializes the frames.
+        sink (MessageSink): delivers the batches to the consumers.
+        batch_size (int): maximum number of frames in a batch.
+        max_batch_delay_seconds (float): maximum seconds a frame waits for its batch
+            to fill up.
+        metrics (MetricsRegistry): registry to record publishing metrics in.
+        clock (Clock): provides the current time in seconds.
+    """
+
+    def __init__(
+        self,
+        stream: str,
+        serializer: TrackedFrameSerializer,
+        sink: MessageSink,
+        batch_size: int = 1,
+        max_batch_delay_seconds: float = 0.1,
+        metrics: MetricsRegistry = DISABLED_METRICS,
+        clock: Clock = monotonic,
+    ) -> None:
+        self._stream = stream
+        self._serializer = serializer
+        self._sink = sink
+        self._batch_size = max(batch_size, 1)
+        self._max_batch_delay_seconds = max_batch_delay_seconds
+        self._clock = clock
+        self._batch: list[bytes] = []
+        self._batch_started = 0.0
+        self._published_frames_metric = metrics.counter(
+            "otvision_published_frames_total", "Tracked frames handed to the sink."
+        )
+
+    async def filter(
+        self, pipe: AsyncIterator[TrackedFrame]
+    ) -> AsyncIterator[TrackedFrame]:
+        await self._sink.open()
+        try:
+            async for frame in pipe:
+                self._add(frame)
+                yield frame
+        finally:
+            self._publish_batch()
+            await self._sink.close()
+
+    def _add(self, frame: TrackedFrame) -> None:
+        now = self._clock()
+        if not self._batch:
+            self._batch_started = now
+        self._batch.append(self._serializer.serialize(self._stream, frame))
+        if (
+            len(self._batch) >= self._batch_size
+            or now - self._batch_started >= self._max_batch_delay_seconds
+        ):
+            self._publish_batch()
+
+    def _publish_batch(self) -> None:
+        if not self._batch:
+            return
+        self._sink.publish(b"".join(self._batch))
+        self._published_frames_metric.inc(len(self._batch))
+        self._batch = []
@@ -1,8 +1,10 @@
 from dataclasses import dataclass
+from time import perf_counter
 
 from OTVision.application.config import TrackConfig
 from OTVision.application.get_current_config import GetCurrentConfig
-from OTVision.domain.detection import Detection, TrackedDetection, TrackId
+from OTVision.application.metrics import DISABLED_METRICS, MetricsRegistry
+from OTVision.domain.detection import ClassId, Detection, TrackedDetection, TrackId
 from OTVision.domain.frame import DetectedFrame, FrameNo, TrackedFrame
 from OTVision.track.model.tracking_interfaces import IdGenerator, Tracker
 
@@ -53,6 +55,26 @@ class BoundingBox:
         return (self.xmin, self.ymin, self.xmax, self.ymax)
 
 
+@dataclass(frozen=True)
+class IouTrackState:
+    """The part of an active track needed to continue matching it.
+
+    The history of a track's detections is not needed for matching. It is kept by
+    the consumers of the tracked frames.
+    """
+
+    id: TrackId
+    bbox: BoundingBox
+    center: Coordinate
+    conf: float
+    class_id: ClassId
+    max_class: ClassId
+    max_conf: float
+    first_frame: FrameNo
+    last_frame: FrameNo
+    track_age: int
+
+
 @dataclass
 class ActiveIouTrack:
     # TODO check invariant -> at least one element in lists
@@ -61,8 +83,8 @@ class ActiveIouTrack:
     bboxes: list[BoundingBox]
     center: list[Coordinate]
     conf: list[float]
-    classes: list[str]
-    max_class: str
+    classes: list[ClassId]
+    max_class: ClassId
     max_conf: float
     first_frame: FrameNo
     last_frame: FrameNo
@@ -76,8 +98,8 @@ class ActiveIouTrack:
         self.bboxes = [BoundingBox.from_xywh(detection)]
         self.center = [Coordinate.center_of(detection)]
         self.conf = [detection.conf]
-        self.classes = [detection.label]
-        self.max_class = detection.label
+        self.classes = [detection.class_id]
+        self.max_class = detection.class_id
         self.max_conf = detection.conf
         self.first_frame = frame.no
         self.last_frame = frame.no
@@ -88,7 +110,7 @@ class ActiveIouTrack:
         self.bboxes.append(BoundingBox.from_xywh(detection))
         self.center.append(Coordinate.center_of(detection))
         self.conf.append(detection.conf)
-        self.classes.append(detection.label)
+        self.classes.append(detection.class_id)
         self.max_conf = max(self.max_conf, detection.conf)
         self.last_frame = max(self.last_frame, frame.no)
         self.track_age = 0
@@ -97,6 +119,36 @@ class ActiveIouTrack:
     def frame_span(self) -> int:
         return self.last_frame - self.first_frame
 
+    def to_state(self) -> IouTrackState:
+        return IouTrackState(
+            id=self.id,
+            bbox=self.bboxes[-1],
+            center=self.center[-1],
+            conf=self.conf[-1],
+            class_id=self.classes[-1],
+            max_class=self.max_class,
+            max_conf=self.max_conf,
+            first_frame=self.first_frame,
+            last_frame=self.last_frame,
+            track_age=self.track_age,
+        )
+
+    @staticmethod
+    def from_state(state: IouTrackState) -> "ActiveIouTrack":
+        track = ActiveIouTrack.__new__(ActiveIouTrack)
+        track.id = state.id
+        track.frame_no = [state.last_frame]
+        track.bboxes = [state.bbox]
+        track.center = [state.center]
+        track.conf = [state.conf]
+        track.classes = [state.class_id]
+        track.max_class = state.max_class
+        track.max_conf = state.max_conf
+        track.first_frame = state.first_frame
+        track.last_frame = state.last_frame
+        track.track_age = state.track_age
+        return track
+
     def iou_with(self, detection: Detection) -> float:
         return iou(self.bboxes[-1], BoundingBox.from_xywh(detection))
 
@@ -144,10 +196,30 @@ class IouTracker(Tracker):
     def config(self) -> TrackConfig:
         return self._get_current_config.get().track
 
-    def __init__(self, get_current_config: GetCurrentConfig):
+    def __init__(
+        self,
+        get_current_config: GetCurrentConfig,
+        metrics: MetricsRegistry = DISABLED_METRICS,
+    ):
         super().__init__()
         self._get_current_config = get_current_config
         self.active_tracks: list[ActiveIouTrack] = []
+        self._tracking_duration_metric = metrics.histogram(
+            "otvision_tracking_duration_seconds", "Seconds to track a single frame."
+        )
+        self._active_tracks_metric = metrics.gauge(
+            "otvision_tracker_active_tracks", "Tracks that are currently open."
+        )
+        self._new_tracks_metric = metrics.counter(
+            "otvision_tracker_new_tracks_total", "Tracks started by the tracker."
+        )
+        self._finished_tracks_metric = metrics.counter(
+            "otvision_tracker_finished_tracks_total", "Tracks finished by the tracker."
+        )
+        self._discarded_tracks_metric = metrics.counter(
+            "otvision_tracker_discarded_tracks_total",
+            "Tracks discarded by the tracker for being too short or uncertain.",
+        )
 
     @property
     def sigma_l(self) -> float:
@@ -169,10 +241,46 @@ class IouTracker(Tracker):
     def t_miss_max(self) -> int:
         return self.config.iou.t_miss_max
 
+    def snapshot(self) -> list[IouTrackState]:
+        """Return the state of all active tracks."""
+        return [track.to_state() for track in self.active_tracks]
+
+    def restore(
+        self, states: list[IouTrackState], missed_frames: int = 0
+    ) -> tuple[set[TrackId], set[TrackId]]:
+        """Replace the active tracks with the given ones.
+
+        Tracks missed for more than `t_miss_max` frames in total are not continued,
+        but finished or discarded as if they had been tracked over the missed frames.
+
+        Args:
+            states (list[IouTrackState]): the tracks to continue.
+            missed_frames (int): number of frames the tracks have not been observed
+                since the states were taken.
+
+        Returns:
+            tuple[set[TrackId], set[TrackId]]: ids of the finished and the discarded
+                tracks.
+        """
+        self.active_tracks = []
+        finished_track_ids: set[TrackId] = set()
+        discarded_track_ids: set[TrackId] = set()
+        for state in states:
+            track = ActiveIouTrack.from_state(state)
+            track.track_age += missed_frames
+            if track.track_age <= self.t_miss_max:
+                self.active_tracks.append(track)
+            elif track.max_conf >= self.sigma_h and track.frame_span >= self.t_min:
+                finished_track_ids.add(track.id)
+            else:
+                discarded_track_ids.add(track.id)
+        self._active_tracks_metric.set(len(self.active_tracks))
+        return finished_track_ids, discarded_track_ids
+
     def track_frame(
         self, frame: DetectedFrame, id_generator: IdGenerator
     ) -> TrackedFrame:
-
+        start = perf_counter()
         detections = [d for d in frame.detections if d.conf >= self.sigma_l]
         tracked_detections: list[TrackedDetection] = []
 
@@ -218,6 +326,11 @@ class IouTracker(Tracker):
 
         self.active_tracks = updated_tracks + saved_tracks + new_tracks
 
+        self._active_tracks_metric.set(len(self.active_tracks))
+        self._new_tracks_metric.inc(len(new_tracks))
+        self._finished_tracks_metric.inc(len(finished_track_ids))
+        self._discarded_tracks_metric.inc(len(discarded_track_ids))
+        self._tracking_duration_metric.observe(perf_counter() - start)
         return TrackedFrame(
             no=frame.no,
             occurrence=frame.occurrence,
@@ -0,0 +1,193 @@
+"""
+OTVision script to measure the per-frame overhead of the detect loop
+"""
+
+# Copyright (C) 2022 OpenTrafficCam Contributors
+# <https://github.com/OpenTrafficCam
+# <team@opentrafficcam.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import logging
+from argparse import ArgumentParser, Namespace
+from datetime import datetime, timedelta
+from pathlib import Path
+from time import perf_counter
+from typing import Any, AsyncIterator, Callable, cast
+
+import numpy as np
+import torch
+from ultralytics import YOLO
+from ultralytics.engine.results import Results
+
+from OTVision.application.config import Config
+from OTVision.application.detect.detected_frame_factory import DetectedFrameFactory
+from OTVision.application.frame_count_provider import FrameCountProvider
+from OTVision.application.get_current_config import GetCurrentConfig
+from OTVision.dataformat import FRAME
+from OTVision.detect.timestamper import VideoTimestamper
+from OTVision.detect.yolo import YoloDetectionConverter, YoloDetector
+from OTVision.domain.current_config import CurrentConfig
+from OTVision.domain.frame import Frame, FrameKeys
+from OTVision.helpers.log import LOGGER_NAME
+
+VIDEO_FILE = Path("OTCamera1_FR20_2020-01-01_12-00-00.mp4")
+START_TIME = datetime(2020, 1, 1, 12, 0, 0)
+WIDTH = 1280
+HEIGHT = 720
+
+
+class PrecomputedModel:
+    """Stands in for a YOLO model and returns the same results for every frame.
+
+    Hence, the measured time is the overhead of the detect loop without inference.
+    """
+
+    def __init__(self, detections: int) -> None:
+        generator = torch.Generator().manual_seed(0)
+        corners = torch.rand(detections, 2, generator=generator) * 600
+        sizes = torch.rand(detections, 2, generator=generator) * 100 + 10
+        boxes = torch.cat(
+            [
+                corners,
+                corners + sizes,
+                torch.rand(detections, 1, generator=generator),
+                torch.randint(0, 4, (detections, 1), generator=generator),
+            ],
+            dim=1,
+        )
+        self.names = {0: "person", 1: "bicycle", 2: "car", 3: "motorcycle"}
+        self.model = None
+        self._results = [
+            Results(
+                orig_img=np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8),
+                path=str(VIDEO_FILE),
+                names=self.names,
+                boxes=boxes,
+            )
+        ]
+
+    def predict(self, source: Any, **kwargs: Any) -> list[Results]:
+        return self._results
+
+
+class FixedFrameCount(FrameCountProvider):
+    def __init__(self, frames: int) -> None:
+        self._frames = frames
+
+    def provide(self, video_file: Path) -> int:
+        return self._frames
+
+
+def parse_args(argv: list[str] | None = None) -> Namespace:
+    parser = ArgumentParser(
+        "Measure the per-frame overhead of the detect loop without inference"
+    )
+    parser.add_argument(
+        "-n", "--frames", type=int, default=10_000, help="Frames per run."
+    )
+    parser.add_argument(
+        "--detections", type=int, default=20, help="Detections per frame."
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Runs per step. The fastest counts."
+    )
+    return parser.parse_args(argv)
+
+
+def create_frames(number_of_frames: int) -> list[dict]:
+    image = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    return [
+        {
+            FrameKeys.data: image,
+            FRAME: no,
+            FrameKeys.source: str(VIDEO_FILE),
+            FrameKeys.output: str(VIDEO_FILE),
+        }
+        for no in range(1, number_of_frames + 1)
+    ]
+
+
+def create_detector(model: PrecomputedModel) -> YoloDetector:
+    return YoloDetector(
+        model=cast(YOLO, model),
+        get_current_config=GetCurrentConfig(CurrentConfig(Config())),
+        detection_converter=YoloDetectionConverter(),
+        detected_frame_factory=DetectedFrameFactory(),
+    )
+
+
+def measure(run: Callable[[], object], repeat: int) -> float:
+    """Measure the fastest of several runs.
+
+    Returns:
+        float: seconds of the fastest run.
+    """
+    durations = []
+    for _ in range(repeat):
+        start = perf_counter()
+        run()
+        durations.append(perf_counter() - start)
+    return min(durations)
+
+
+async def _iterate(frames: list[Frame]) -> AsyncIterator[Frame]:
+    for frame in frames:
+        yield frame
+
+
+def run_detect_loop(detector: YoloDetector, frames: list[Frame]) -> None:
+    async def consume() -> None:
+        async for _ in detector.detect(_iterate(frames)):
+            pass
+
+    asyncio.run(consume())
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    # Progress bars are disabled in production above log level INFO.
+    logging.getLogger(LOGGER_NAME).setLevel(logging.WARNING)
+    raw_frames = create_frames(args.frames)
+    timestamper = VideoTimestamper(
+        video_file=VIDEO_FILE,
+        expected_duration=timedelta(seconds=args.frames / 20),
+        frame_count_provider=FixedFrameCount(args.frames),
+        start_time=START_TIME,
+    )
+    frames = [timestamper.stamp(frame) for frame in raw_frames]
+    model = PrecomputedModel(args.detections)
+    detector = create_detector(model)
+    converter = YoloDetectionConverter()
+    boxes = model.predict(source=None)[0].boxes
+
+    steps = {
+        "timestamp": lambda: [timestamper.stamp(frame) for frame in raw_frames],
+        "convert detections": lambda: [
+            converter.convert(boxes, normalized=False) for _ in frames
+        ],
+        "detect loop": lambda: run_detect_loop(detector, frames),
+    }
+    print(
+        f"Per-frame overhead over {args.frames} frames with {args.detections} "
+        f"detections each (fastest of {args.repeat} runs):"
+    )
+    for name, step in steps.items():
+        seconds = measure(step, args.repeat)
+        print(f"  {name:<20}{seconds / args.frames * 1e6:10.1f} µs/frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,28 @@
 #!/usr/bin/env python
+import asyncio
 import re
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import StrEnum
 from pathlib import Path
 from shutil import copy2, move, rmtree
+from statistics import mean, median
 from typing import Any, Literal
 
+import cv2
+import numpy as np
 import torch
 import yaml
 from fire import Fire
+from torchvision.ops import box_iou
 from ultralytics import YOLO
+from ultralytics.utils.ops import non_max_suppression
+
+from OTVision.application.config import Config, DetectConfig
+from OTVision.detect.file_based_detect_builder import FileBasedDetectBuilder
+from OTVision.domain.current_config import CurrentConfig
+from OTVision.domain.frame import FrameKeys
 
 PATTERN_MODEL_NAME = (
     r"^(?P<core>.*?)(?:_(?P<imgsz_prefix>imgsz)(?P<digits>[0-9]+))?\.pt$"
@@ -19,6 +31,14 @@ GROUP_CORE = "core"
 GROUP_DIGITS = "digits"
 TEMP_FOLDER = Path.home() / ".yolo_exporter_temp"
 AVAILABLE_EXPORT_TYPES = {".engine", ".onnx", ".mlpackage"}
+QUANTIZATION_REPORT_SUFFIX = ".yaml"
+DEFAULT_IMAGESIZE = 640
+DEFAULT_CALIBRATION_FRAMES = 200
+DEFAULT_CALIBRATION_STRIDE = 25
+LETTERBOX_PADDING_VALUE = 114
+REPORT_CONFIDENCE = 0.25
+REPORT_IOU = 0.45
+REPORT_MATCH_IOU = 0.5
 NOW = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
 DEFAULT_SUBDIRECTORY = f"{NOW}_model_export"
 
@@ -55,6 +75,33 @@ class ModelInfo:
     core: str
     imagesize: int | None
 
+    @property
+    def temp_quantization_report_path(self) -> Path:
+        """Gets the path of the quantization report written during this export.
+
+        Returns:
+            Path: the report next to the temporary weights pt file.
+        """
+        return self.temp_path.with_suffix(QUANTIZATION_REPORT_SUFFIX)
+
+
+@dataclass
+class CalibrationSpecification:
+    """Describes the frames used to calibrate a statically quantized model.
+
+    Frames are read through OTVision's `VideoSource`. Hence, the video file names
+    must follow OTVision's naming convention including date and time.
+
+    Attributes:
+        videos (list[Path]): videos or folders of videos to sample frames from.
+        frames (int): maximum number of calibration frames.
+        stride (int): every stride-th frame of the videos is sampled.
+    """
+
+    videos: list[Path]
+    frames: int = DEFAULT_CALIBRATION_FRAMES
+    stride: int = DEFAULT_CALIBRATION_STRIDE
+
 
 @dataclass
 class ModelExportSpecification:
@@ -66,11 +113,15 @@ class ModelExportSpecification:
             (e.g., ONNX, CoreML, or TensorRT engine).
         quantization (Quantization | None): Quantization type (e.g., INT8, FP16),
             or None if not specified.
+        calibration (CalibrationSpecification | None): Calibration frames for a
+            statically quantized INT8 ONNX model running on the CPU. None, if INT8
+            quantization is delegated to the export of the format.
     """
 
     model_info: ModelInfo
     formats: list[ExportFormat]
     quantization: Quantization | None = None
+    calibration: CalibrationSpecification | None = None
 
     @property
     def imagesize(self) -> int | None:
@@ -125,6 +176,7 @@ class ModelExportSpecificationParser:
         model: Path,
         formats: list[str],
         quantization: str | None = None,
+        calibration: CalibrationSpecification | None = None,
     ) -> "ModelExportSpecification":
         """Parses input arguments to create a ModelExportSpecification.
 
@@ -133,6 +185,8 @@ class ModelExportSpecificationParser:
             formats (list[str]): Desired export formats
                 (e.g., "onnx", "engine", "coreml").
             quantization (str | None): Quantization type, if any (e.g., "int8", "fp16").
+            calibration (CalibrationSpecification | None): Calibration frames for
+                static INT8 quantization of ONNX models.
 
         Returns:
             ModelExportSpecification: The constructed export specification object.
@@ -140,11 +194,15 @@ class ModelExportSpecificationParser:
 
         model_info = self.__parse_model_info(pt_model_path=model)
         export_formats = [ExportFormat(_format) for _format in formats]
+        parsed_quantization = Quantization(quantization) if quantization else None
+        if calibration is not None and parsed_quantization != Quantization.INT8:
+            raise ParseError("Calibration videos require int8 quantization.")
 
         return ModelExportSpecification(
             model_info=model_info,
             formats=export_formats,
-            quantization=Quantization(quantization) if quantization else None,
+            quantization=parsed_quantization,
+            calibration=calibration,
         )
 
     def __parse_model_info(self, pt_model_path: Path) -> ModelInfo:
@@ -244,7 +302,7 @@ class PostExportAction:
         self, spec: ModelExportSpecification
     ) -> None:
         for exported_model in TEMP_FOLDER.iterdir():
-            if self.__is_model(exported_model):
+            if self.__is_exported_file(exported_model, spec=spec):
                 dst = self.__determine_dst(
                     spec.generate_file_stem(),
                     exported_model.suffix,
@@ -269,8 +327,11 @@ class PostExportAction:
     def __is_temp_folder(self, temp_folder: Path) -> bool:
         return temp_folder == TEMP_FOLDER
 
-    def __is_model(self, model_path: Path) -> bool:
-        return model_path.suffix in AVAILABLE_EXPORT_TYPES
+    def __is_exported_file(self, file: Path, spec: ModelExportSpecification) -> bool:
+        return (
+            file.suffix in AVAILABLE_EXPORT_TYPES
+            or file == spec.model_info.temp_quantization_report_path
+        )
 
     def __determine_dst(self, current_dst: Path, exported_model_suffix: str) -> Path:
         if self._save_dir is not None:
@@ -301,8 +362,12 @@ class ConfigParser:
         model = Path(data["model"])
         formats = [_format.lower() for _format in data["formats"]]
         quantization = self.__parse_quantization(data)
+        calibration = self.__parse_calibration(data)
         return self._parser.parser(
-            model=model, formats=formats, quantization=quantization
+            model=model,
+            formats=formats,
+            quantization=quantization,
+            calibration=calibration,
         )
 
     def __parse_quantization(self, data: dict) -> str | None:
@@ -311,6 +376,319 @@ class ConfigParser:
             return quantization.lower()
         return None
 
+    def __parse_calibration(self, data: dict) -> CalibrationSpecification | None:
+        calibration: dict | None = data.get("calibration", None)
+        if calibration is None:
+            return None
+        return CalibrationSpecification(
+            videos=[Path(video) for video in calibration["videos"]],
+            frames=int(calibration.get("frames", DEFAULT_CALIBRATION_FRAMES)),
+            stride=int(calibration.get("stride", DEFAULT_CALIBRATION_STRIDE)),
+        )
+
+
+class CalibrationFrameSampler:
+    """Samples calibration frames from videos using OTVision's `VideoSource`.
+
+    Reading the frames the same way as during detection ensures that the model is
+    calibrated on the camera views and image orientation it will be used on.
+    """
+
+    def sample(self, calibration: CalibrationSpecification) -> list[np.ndarray]:
+        """Samples every stride-th frame until the requested number is reached.
+
+        Args:
+            calibration (CalibrationSpecification): the videos to sample from.
+
+        Returns:
+            list[np.ndarray]: the sampled RGB frames.
+        """
+        return asyncio.run(self.__sample(calibration))
+
+    async def __sample(self, calibration: CalibrationSpecification) -> list[np.ndarray]:
+        config = Config(
+            detect=DetectConfig(
+                paths=[str(video) for video in calibration.videos], overwrite=True
+            )
+        )
+        input_source = FileBasedDetectBuilder(
+            current_config=CurrentConfig(config)
+        ).input_source
+
+        frames: list[np.ndarray] = []
+        frames_with_data = 0
+        async for frame in input_source.produce():
+            if (image := frame[FrameKeys.data]) is None:
+                continue
+            if frames_with_data % calibration.stride == 0:
+                frames.append(image)
+                if len(frames) >= calibration.frames:
+                    break
+            frames_with_data += 1
+        if not frames:
+            raise ValueError(
+                f"No calibration frames found in '{calibration.videos}'. Video file "
+                "names must contain date and time."
+            )
+        print(f"Sampled {len(frames)} calibration frames")
+        return frames
+
+
+def letterbox(image: np.ndarray, imagesize: int) -> np.ndarray:
+    """Resizes and pads an RGB image to the square network input of a YOLO model.
+
+    The preprocessing matches `YOLO.predict` on the RGB frames of OTVision. Predict
+    treats numpy images as BGR and reverses their channels. Hence, the network is fed
+    with BGR and the channels are reversed here as well.
+
+    Args:
+        image (np.ndarray): RGB image of shape (height, width, 3).
+        imagesize (int): side length of the network input.
+
+    Returns:
+        np.ndarray: normalized BGR network input of shape
+            (1, 3, imagesize, imagesize).
+    """
+    height, width = image.shape[:2]
+    scale = min(imagesize / height, imagesize / width)
+    new_width, new_height = round(width * scale), round(height * scale)
+    resized = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+    canvas = np.full((imagesize, imagesize, 3), LETTERBOX_PADDING_VALUE, dtype=np.uint8)
+    top = (imagesize - new_height) // 2
+    left = (imagesize - new_width) // 2
+    canvas[top : top + new_height, left : left + new_width] = resized
+    network_input = canvas[..., ::-1].transpose(2, 0, 1)[None]
+    return np.ascontiguousarray(network_input, dtype=np.float32) / 255
+
+
+class FrameCalibrationDataReader:
+    """Feeds preprocessed calibration frames to onnxruntime's static quantization.
+
+    Implements the interface of `onnxruntime.quantization.CalibrationDataReader`.
+
+    Args:
+        input_name (str): name of the model's image input.
+        inputs (list[np.ndarray]): preprocessed network inputs.
+    """
+
+    def __init__(self, input_name: str, inputs: list[np.ndarray]) -> None:
+        self._input_name = input_name
+        self._inputs = inputs
+        self._iterator = iter(inputs)
+
+    def get_next(self) -> dict[str, np.ndarray] | None:
+        next_input = next(self._iterator, None)
+        if next_input is None:
+            return None
+        return {self._input_name: next_input}
+
+    def rewind(self) -> None:
+        self._iterator = iter(self._inputs)
+
+
+@dataclass
+class ModelBenchmark:
+    """Results of running an ONNX model on the calibration sample.
+
+    Attributes:
+        latencies (list[float]): inference time per frame in milliseconds.
+        detections (list[torch.Tensor]): detections per frame after NMS with rows of
+            x1, y1, x2, y2, confidence and class.
+        outputs (list[np.ndarray]): raw model outputs per frame.
+    """
+
+    latencies: list[float] = field(default_factory=list)
+    detections: list[torch.Tensor] = field(default_factory=list)
+    outputs: list[np.ndarray] = field(default_factory=list)
+
+
+class OnnxInt8Quantizer:
+    """Statically quantizes ONNX models to INT8 for inference on the CPU.
+
+    Activation ranges are calibrated on the given frames. Afterwards, the quantized
+    model is compared against the FP32 model on the same frames. The quantization
+    parameters and the comparison report are saved next to the quantized model.
+    """
+
+    def quantize(
+        self,
+        fp32_model: Path,
+        frames: list[np.ndarray],
+        imagesize: int,
+        calibration: CalibrationSpecification,
+        report_file: Path,
+    ) -> None:
+        """Replaces the FP32 ONNX model with its INT8 counterpart.
+
+        Args:
+            fp32_model (Path): the exported FP32 ONNX model.
+            frames (list[np.ndarray]): RGB calibration frames.
+            imagesize (int): side length of the network input.
+            calibration (CalibrationSpecification): the calibration the frames were
+                sampled with.
+            report_file (Path): the file to save the quantization report to.
+        """
+        from onnxruntime.quantization import (
+            CalibrationMethod,
+            QuantFormat,
+            QuantType,
+            quant_pre_process,
+            quantize_static,
+        )
+
+        inputs = [letterbox(frame, imagesize) for frame in frames]
+        preprocessed_model = fp32_model.with_suffix(".preprocessed")
+        int8_model = fp32_model.with_suffix(".int8")
+        quant_pre_process(str(fp32_model), str(preprocessed_model))
+        quantize_static(
+            model_input=str(preprocessed_model),
+            model_output=str(int8_model),
+            calibration_data_reader=FrameCalibrationDataReader(
+                self.__input_name(fp32_model), inputs
+            ),
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=True,
+            calibrate_method=CalibrationMethod.MinMax,
+        )
+        preprocessed_model.unlink()
+
+        report = {
+            "calibration": {
+                "videos": [str(video) for video in calibration.videos],
+                "frames": len(frames),
+                "stride": calibration.stride,
+                "imagesize": imagesize,
+                "method": CalibrationMethod.MinMax.name,
+                "activation_type": QuantType.QUInt8.name,
+                "weight_type": QuantType.QInt8.name,
+                "per_channel": True,
+            },
+            "comparison": self.__compare(fp32_model, int8_model, inputs),
+            "parameters": self.__extract_quantization_parameters(int8_model),
+        }
+        with open(report_file, "w") as stream:
+            yaml.safe_dump(report, stream, sort_keys=False)
+
+        move(src=int8_model, dst=fp32_model)
+        print(f"Quantization report: {report['comparison']}")
+
+    def __input_name(self, model: Path) -> str:
+        return self.__create_session(model).get_inputs()[0].name
+
+    def __create_session(self, model: Path) -> Any:
+        from onnxruntime import InferenceSession
+
+        return InferenceSession(str(model), providers=["CPUExecutionProvider"])
+
+    def __compare(
+        self, fp32_model: Path, int8_model: Path, inputs: list[np.ndarray]
+    ) -> dict[str, Any]:
+        fp32 = self.__benchmark(fp32_model, inputs)
+        int8 = self.__benchmark(int8_model, inputs)
+
+        matched_ious: list[float] = []
+        number_of_fp32_detections = 0
+        number_of_int8_detections = 0
+        for reference, candidate in zip(fp32.detections, int8.detections):
+            number_of_fp32_detections += len(reference)
+            number_of_int8_detections += len(candidate)
+            matched_ious.extend(self.__match(reference, candidate))
+
+        output_error = [
+            float(np.abs(reference - candidate).mean())
+            for reference, candidate in zip(fp32.outputs, int8.outputs)
+        ]
+        return {
+            "fp32_latency_ms": self.__summarize(fp32.latencies),
+            "int8_latency_ms": self.__summarize(int8.latencies),
+            "speedup": median(fp32.latencies) / median(int8.latencies),
+            "fp32_detections": number_of_fp32_detections,
+            "int8_detections": number_of_int8_detections,
+            "recall_against_fp32": (
+                len(matched_ious) / number_of_fp32_detections
+                if number_of_fp32_detections
+                else 1.0
+            ),
+            "precision_against_fp32": (
+                len(matched_ious) / number_of_int8_detections
+                if number_of_int8_detections
+                else 1.0
+            ),
+            "mean_iou_of_matches": mean(matched_ious) if matched_ious else 0.0,
+            "mean_absolute_output_error": mean(output_error),
+        }
+
+    def __benchmark(self, model: Path, inputs: list[np.ndarray]) -> ModelBenchmark:
+        session = self.__create_session(model)
+        input_name = session.get_inputs()[0].name
+        # The first run initializes the session and is not representative.
+        session.run(None, {input_name: inputs[0]})
+
+        result = ModelBenchmark()
+        for network_input in inputs:
+            start = time.perf_counter()
+            output = session.run(None, {input_name: network_input})[0]
+            result.latencies.append((time.perf_counter() - start) * 1000)
+            result.outputs.append(output)
+            result.detections.append(
+                non_max_suppression(
+                    torch.from_numpy(output),
+                    conf_thres=REPORT_CONFIDENCE,
+                    iou_thres=REPORT_IOU,
+                    agnostic=True,
+                )[0]
+            )
+        return result
+
+    def __match(self, reference: torch.Tensor, candidate: torch.Tensor) -> list[float]:
+        """Greedily matches detections of the same class by their IoU.
+
+        Returns:
+            list[float]: the IoU of each matched pair.
+        """
+        if not len(reference) or not len(candidate):
+            return []
+        ious = box_iou(reference[:, :4], candidate[:, :4])
+        ious[reference[:, 5:6] != candidate[:, 5].unsqueeze(0)] = 0
+        matches: list[float] = []
+        while True:
+            best = ious.max()
+            if best < REPORT_MATCH_IOU:
+                return matches
+            matches.append(float(best))
+            row, column = divmod(int(ious.argmax()), ious.shape[1])
+            ious[row, :] = 0
+            ious[:, column] = 0
+
+    def __summarize(self, latencies: list[float]) -> dict[str, float]:
+        return {
+            "mean": mean(latencies),
+            "median": median(latencies),
+            "max": max(latencies),
+        }
+
+    def __extract_quantization_parameters(self, model: Path) -> dict[str, dict]:
+        import onnx
+        from onnx import numpy_helper
+
+        graph = onnx.load(str(model)).graph
+        initializers = {
+            initializer.name: numpy_helper.to_array(initializer)
+            for initializer in graph.initializer
+        }
+        parameters: dict[str, dict] = {}
+        for node in graph.node:
+            if node.op_type != "QuantizeLinear" or node.input[0] in initializers:
+                continue
+            tensor, scale, zero_point = node.input[:3]
+            parameters[tensor] = {
+                "scale": initializers[scale].tolist(),
+                "zero_point": initializers[zero_point].tolist(),
+            }
+        return parameters
+
 
 class YoloModelExporter:
     """Handles the export process for YOLO models.
@@ -321,10 +699,16 @@ class YoloModelExporter:
     """
 
     def __init__(
-        self, pre_export_action: PreExportAction, post_export_action: PostExportAction
+        self,
+        pre_export_action: PreExportAction,
+        post_export_action: PostExportAction,
+        calibration_frame_sampler: CalibrationFrameSampler,
+        int8_quantizer: OnnxInt8Quantizer,
     ) -> None:
         self._pre_export_action = pre_export_action
         self._post_export_action = post_export_action
+        self._calibration_frame_sampler = calibration_frame_sampler
+        self._int8_quantizer = int8_quantizer
 
     def export(self, export_config: ExportConfig) -> None:
         """Executes the complete export process for a YOLO model.
@@ -353,17 +737,20 @@ class YoloModelExporter:
         self, spec: ModelExportSpecification, export_format: ExportFormat
     ) -> None:
         model = YOLO(model=spec.model_info.temp_path)
+        calibrate = spec.calibration is not None and export_format == ExportFormat.ONNX
         kwargs = self.__create_kwargs_from(
             export_format=export_format,
             imagesize=spec.imagesize,
-            quantization=spec.quantization,
+            quantization=None if calibrate else spec.quantization,
         )
         try:
             print(
                 f"Exporting model '{spec.model_path.name}' "
                 f"with following options {kwargs}"
             )
-            model.export(**kwargs)
+            exported_model = model.export(**kwargs)
+            if calibrate and spec.calibration is not None:
+                self.__quantize_calibrated(spec, spec.calibration, Path(exported_model))
             print("Exporting model successful")
         except Exception as cause:
             print(
@@ -372,6 +759,22 @@ class YoloModelExporter:
             )
             print(cause)
 
+    def __quantize_calibrated(
+        self,
+        spec: ModelExportSpecification,
+        calibration: CalibrationSpecification,
+        fp32_model: Path,
+    ) -> None:
+        print(f"Calibrating INT8 quantization of '{spec.model_path.name}' on CPU")
+        frames = self._calibration_frame_sampler.sample(calibration)
+        self._int8_quantizer.quantize(
+            fp32_model=fp32_model,
+            frames=frames,
+            imagesize=spec.imagesize or DEFAULT_IMAGESIZE,
+            calibration=calibration,
+            report_file=spec.model_info.temp_quantization_report_path,
+        )
+
     def __create_kwargs_from(
         self,
         export_format: ExportFormat,
@@ -425,6 +828,9 @@ def main(
     quantization: Literal["int8", "fp16"] | None = None,
     config: str | None = None,
     savedir: str | None = None,
+    calibration: list[str] | str | None = None,
+    calibration_frames: int = DEFAULT_CALIBRATION_FRAMES,
+    calibration_stride: int = DEFAULT_CALIBRATION_STRIDE,
 ) -> None:
     """CLI Tool for Exporting YOLO Models.
 
@@ -456,6 +862,15 @@ def main(
         --savedir (Optional):
             Save directory for exported models. If not specified, the current models
             are overwritten if they exist.
+        --calibration (Optional):
+            Video file(s) or folder(s) to sample calibration frames from. Enables
+            static INT8 quantization of ONNX models for CPU inference. Requires
+            --quantization int8. The video file names must contain date and time as
+            required by OTVision detect.
+        --calibration_frames (Optional):
+            Maximum number of calibration frames. Defaults to 200.
+        --calibration_stride (Optional):
+            Sample every n-th frame of the calibration videos. Defaults to 25.
 
     Examples:
     1. Export a model to ONNX:
@@ -471,6 +886,10 @@ def main(
     4. Export using a config file:
         python export_models.py --config config.yaml
 
+    5. Export a calibrated INT8 ONNX model for CPU inference:
+        python export_models.py --model path/to/model.pt --formats onnx
+        --quantization int8 --calibration path/to/camera/videos
+
     YAML Config Example:
     specifications:
       - model: models/model1.pt
@@ -479,11 +898,22 @@ def main(
       - model: models/model2.pt
         formats: [engine,coreml]
         quantization: fp16
+      - model: models/model3.pt
+        formats: [onnx]
+        quantization: int8
+        calibration:
+          videos: [videos/camera1, videos/camera2]
+          frames: 200
+          stride: 25
 
     Notes:
     - Use [] for multiple formats with `--formats`.
     - Temporary files are cleaned after export.
     - Supported formats: onnx, engine, coreml.
+    - Calibrated INT8 quantization requires the quantization extra
+      (uv sync --extra inference_cpu --extra quantization). The quantization
+      parameters and an accuracy and speed comparison against the FP32 model are
+      saved next to the quantized model as YAML file.
 
     Args:
         model (str, optional): the path to the model weights.
@@ -492,12 +922,22 @@ def main(
         quantization (Literal["int8","fp16"], optional): enable INT-8 or FP-16
             quantization. Supported values: int8, fp16.
         config (str, optional): the path to the export configuration file.
+        savedir (str, optional): the save directory for exported models.
+        calibration (list[str] | str, optional): videos to calibrate static INT8
+            quantization of ONNX models on.
+        calibration_frames (int): maximum number of calibration frames.
+        calibration_stride (int): sample every n-th frame of the calibration videos.
 
     """
     print(f"CUDA is available: {torch.cuda.is_available()}")
     save_dir = determine_save_dir(savedir)
     model_export_spec_parser = ModelExportSpecificationParser()
-    exporter = YoloModelExporter(PreExportAction(), PostExportAction(save_dir=save_dir))
+    exporter = YoloModelExporter(
+        PreExportAction(),
+        PostExportAction(save_dir=save_dir),
+        CalibrationFrameSampler(),
+        OnnxInt8Quantizer(),
+    )
     if config is not None:
         config_parser = ConfigParser(model_export_spec_parser)
         export_config = config_parser.parse(config_file=Path(config))
@@ -513,10 +953,22 @@ def main(
         if model is None:
             raise ParseError("--model must be specified.")
 
+        if isinstance(calibration, str):
+            calibration = [calibration]
+
         spec = model_export_spec_parser.parser(
             model=Path(model),
             formats=_formats,
             quantization=quantization,
+            calibration=(
+                CalibrationSpecification(
+                    videos=[Path(video) for video in calibration],
+                    frames=calibration_frames,
+                    stride=calibration_stride,
+                )
+                if calibration
+                else None
+            ),
         )
         exporter.export(ExportConfig([spec]))
 
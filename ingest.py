@@ -0,0 +1,78 @@
+"""
+OTVision script to run a server that tracks the detections forwarded by edge nodes
+"""
+
+# Copyright (C) 2022 OpenTrafficCam Contributors
+# <https://github.com/OpenTrafficCam
+# <team@opentrafficcam.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+
+from OTVision.application.config import Config
+from OTVision.application.config_parser import ConfigParser
+from OTVision.domain.current_config import CurrentConfig
+from OTVision.helpers.log import DEFAULT_LOG_FILE
+from OTVision.ingest.builder import IngestBuilder
+from OTVision.plugin.yaml_serialization import YamlDeserializer
+
+
+def parse_args(argv: list[str] | None = None) -> Namespace:
+    parser = ArgumentParser("Track the detections forwarded by edge nodes")
+    parser.add_argument(
+        "-c",
+        "--config",
+        type=Path,
+        help="User config. Its INGEST and TRACK sections configure the server.",
+    )
+    parser.add_argument(
+        "--logfile", type=Path, default=DEFAULT_LOG_FILE, help="Log file."
+    )
+    parser.add_argument(
+        "--logfile-overwrite",
+        action="store_true",
+        help="Overwrite log file if it already exists.",
+    )
+    return parser.parse_args(argv)
+
+
+async def async_main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    config = (
+        ConfigParser(YamlDeserializer()).parse(args.config) if args.config else Config()
+    )
+    builder = IngestBuilder(current_config=CurrentConfig(config))
+    log = builder.configure_logger.configure(
+        config, log_file=args.logfile, logfile_overwrite=args.logfile_overwrite
+    )
+    log.info("Call ingest from command line")
+    log.info(f"Arguments: {vars(args)}")
+
+    try:
+        server = builder.build()
+        await server.serve()
+    except Exception:
+        log.exception("")
+        raise
+
+
+def main(argv: list[str] | None = None) -> None:
+    asyncio.run(async_main(argv))
+
+
+if __name__ == "__main__":
+    main()
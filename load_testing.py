@@ -0,0 +1,121 @@
+"""
+OTVision script to load test the streaming pipeline with simulated cameras
+"""
+
+# Copyright (C) 2022 OpenTrafficCam Contributors
+# <https://github.com/OpenTrafficCam
+# <team@opentrafficcam.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+from argparse import ArgumentParser, Namespace
+from dataclasses import replace
+from pathlib import Path
+
+from OTVision.application.config import Config
+from OTVision.application.config_parser import ConfigParser
+from OTVision.detect.load_testing import (
+    SimulatedMultiStreamDetectBuilder,
+    StreamLoadTest,
+    create_simulated_streams,
+)
+from OTVision.detect.simulated_camera import SimulatedCameraFaults
+from OTVision.domain.current_config import CurrentConfig
+from OTVision.helpers.log import DEFAULT_LOG_FILE
+from OTVision.plugin.yaml_serialization import YamlDeserializer
+
+
+def parse_args(argv: list[str] | None = None) -> Namespace:
+    parser = ArgumentParser("Load test the streaming pipeline with simulated cameras")
+    parser.add_argument(
+        "-v", "--video", type=Path, required=True, help="Video the cameras replay."
+    )
+    parser.add_argument(
+        "-n", "--streams", type=int, default=1, help="Number of simulated cameras."
+    )
+    parser.add_argument(
+        "-d", "--duration", type=float, default=60, help="Seconds to run the test."
+    )
+    parser.add_argument(
+        "-c",
+        "--config",
+        type=Path,
+        help="User config. Its first stream serves as template for the cameras.",
+    )
+    parser.add_argument(
+        "--save-dir",
+        type=Path,
+        default=Path("load_test"),
+        help="Directory to save the outputs of the cameras to.",
+    )
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="Multiple of the video's frame rate to replay it at.",
+    )
+    parser.add_argument("--drop-probability", type=float, default=0.0)
+    parser.add_argument("--stall-probability", type=float, default=0.0)
+    parser.add_argument("--stall-seconds", type=float, default=1.0)
+    parser.add_argument("--disconnect-probability", type=float, default=0.0)
+    parser.add_argument("--disconnect-seconds", type=float, default=5.0)
+    parser.add_argument(
+        "--seed", type=int, help="Seed of the injected faults to reproduce a run."
+    )
+    parser.add_argument(
+        "--logfile", type=Path, default=DEFAULT_LOG_FILE, help="Log file."
+    )
+    return parser.parse_args(argv)
+
+
+def load_config(args: Namespace) -> Config:
+    config = (
+        ConfigParser(YamlDeserializer()).parse(args.config) if args.config else Config()
+    )
+    return replace(
+        config, streams=create_simulated_streams(config, args.streams, args.save_dir)
+    )
+
+
+async def async_main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    config = load_config(args)
+    builder = SimulatedMultiStreamDetectBuilder(
+        video_file=args.video,
+        speed=args.speed,
+        faults=SimulatedCameraFaults(
+            drop_probability=args.drop_probability,
+            stall_probability=args.stall_probability,
+            stall_seconds=args.stall_seconds,
+            disconnect_probability=args.disconnect_probability,
+            disconnect_seconds=args.disconnect_seconds,
+        ),
+        seed=args.seed,
+        current_config=CurrentConfig(config),
+    )
+    log = builder.configure_logger.configure(
+        config, log_file=args.logfile, logfile_overwrite=True
+    )
+    log.info(f"Load test with {args.streams} simulated cameras replaying {args.video}")
+    report = await StreamLoadTest(builder, args.duration).run()
+    print(report.to_text())
+
+
+def main(argv: list[str] | None = None) -> None:
+    asyncio.run(async_main(argv))
+
+
+if __name__ == "__main__":
+    main()
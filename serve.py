@@ -0,0 +1,58 @@
+"""
+OTVision script to run a server that keeps detection models loaded and runs
+detect and track jobs submitted via `submit.py`
+"""
+
+# Copyright (C) 2022 OpenTrafficCam Contributors
+# <https://github.com/OpenTrafficCam
+# <team@opentrafficcam.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import asyncio
+
+from OTVision.serve.builder import ServeBuilder
+
+
+async def async_main(argv: list[str] | None = None) -> None:
+    builder = ServeBuilder(argv=argv)
+    cli_args = builder.cli_args
+    config = builder.get_config.get(cli_args)
+    log = builder.configure_logger.configure(
+        config,
+        log_file=cli_args.logfile,
+        logfile_overwrite=cli_args.logfile_overwrite,
+    )
+
+    log.info("Call serve from command line")
+    log.info(f"Arguments: {vars(cli_args)}")
+
+    try:
+        builder.current_config.update(config)
+        if cli_args.preload:
+            builder.detect_job_runner.preload(config)
+        server = builder.build()
+        await server.serve()
+    except Exception:
+        log.exception("")
+        raise
+
+
+def main(argv: list[str] | None = None) -> None:
+    asyncio.run(async_main(argv))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+OTVision script to soak test the streaming pipeline with simulated cameras
+"""
+
+# Copyright (C) 2022 OpenTrafficCam Contributors
+# <https://github.com/OpenTrafficCam
+# <team@opentrafficcam.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import os
+import sys
+from argparse import ArgumentParser, Namespace
+from dataclasses import replace
+from pathlib import Path
+
+from OTVision.application.config import Config
+from OTVision.application.config_parser import ConfigParser
+from OTVision.detect.load_testing import (
+    SimulatedMultiStreamDetectBuilder,
+    create_simulated_streams,
+)
+from OTVision.detect.soak_testing import (
+    MIB,
+    ResourceSampler,
+    SoakThresholds,
+    StreamSoakTest,
+)
+from OTVision.domain.current_config import CurrentConfig
+from OTVision.helpers.log import DEFAULT_LOG_FILE
+from OTVision.plugin.yaml_serialization import YamlDeserializer
+
+TINY_WEIGHTS = "yolov8n"
+TINY_IMAGE_SIZE = 320
+
+
+def parse_args(argv: list[str] | None = None) -> Namespace:
+    parser = ArgumentParser(
+        "Soak test the streaming pipeline with simulated cameras and fail on "
+        "growing resources"
+    )
+    parser.add_argument(
+        "-v", "--video", type=Path, required=True, help="Video the cameras replay."
+    )
+    parser.add_argument(
+        "-n", "--streams", type=int, default=1, help="Number of simulated cameras."
+    )
+    parser.add_argument(
+        "-d",
+        "--duration",
+        type=float,
+        default=3600,
+        help="Seconds to run the test after the warm-up.",
+    )
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=10.0,
+        help="Multiple of the video's frame rate to replay it at. Accelerates the "
+        "simulated time.",
+    )
+    parser.add_argument(
+        "--interval", type=float, default=60, help="Seconds between two samples."
+    )
+    parser.add_argument(
+        "--warmup",
+        type=float,
+        default=60,
+        help="Seconds to run the streams before the first sample.",
+    )
+    parser.add_argument(
+        "-c",
+        "--config",
+        type=Path,
+        help="User config. Its first stream serves as template for the cameras.",
+    )
+    parser.add_argument(
+        "--weights",
+        default=TINY_WEIGHTS,
+        help="Weights of the model to detect with. Defaults to a tiny model.",
+    )
+    parser.add_argument(
+        "--img-size",
+        type=int,
+        default=TINY_IMAGE_SIZE,
+        help="Size of the images the model detects in.",
+    )
+    parser.add_argument(
+        "--gpu",
+        action="store_true",
+        help="Detect on a GPU if available. By default, the test runs on CPU only.",
+    )
+    parser.add_argument(
+        "--trace-allocations",
+        action="store_true",
+        help="Report the allocation sites that grew most. Slows down the pipeline.",
+    )
+    parser.add_argument("--max-rss-growth-mb", type=float, default=64)
+    parser.add_argument("--max-object-growth", type=int, default=10_000)
+    parser.add_argument("--max-open-files-growth", type=int, default=16)
+    parser.add_argument("--max-thread-growth", type=int, default=4)
+    parser.add_argument(
+        "--max-throughput-drop",
+        type=float,
+        default=0.2,
+        help="Share the throughput may drop from the first to the last quarter.",
+    )
+    parser.add_argument(
+        "--save-dir",
+        type=Path,
+        default=Path("soak_test"),
+        help="Directory to save the outputs of the cameras to.",
+    )
+    parser.add_argument(
+        "--logfile", type=Path, default=DEFAULT_LOG_FILE, help="Log file."
+    )
+    return parser.parse_args(argv)
+
+
+def load_config(args: Namespace) -> Config:
+    config = (
+        ConfigParser(YamlDeserializer()).parse(args.config) if args.config else Config()
+    )
+    yolo_config = replace(
+        config.detect.yolo_config, weights=args.weights, img_size=args.img_size
+    )
+    return replace(
+        config,
+        detect=replace(config.detect, yolo_config=yolo_config),
+        streams=create_simulated_streams(config, args.streams, args.save_dir),
+    )
+
+
+def create_thresholds(args: Namespace) -> SoakThresholds:
+    return SoakThresholds(
+        max_rss_growth_bytes=int(args.max_rss_growth_mb * MIB),
+        max_object_growth=args.max_object_growth,
+        max_open_files_growth=args.max_open_files_growth,
+        max_thread_growth=args.max_thread_growth,
+        max_throughput_drop=args.max_throughput_drop,
+    )
+
+
+async def async_main(args: Namespace) -> bool:
+    config = load_config(args)
+    builder = SimulatedMultiStreamDetectBuilder(
+        video_file=args.video,
+        speed=args.speed,
+        current_config=CurrentConfig(config),
+    )
+    log = builder.configure_logger.configure(
+        config, log_file=args.logfile, logfile_overwrite=True
+    )
+    simulated_hours = (args.warmup + args.duration) * args.speed / 3600
+    log.info(
+        f"Soak test with {args.streams} simulated cameras replaying {args.video}, "
+        f"simulating {simulated_hours:.1f}h of camera time"
+    )
+    report = await StreamSoakTest(
+        builder,
+        duration_seconds=args.duration,
+        sample_interval_seconds=args.interval,
+        warmup_seconds=args.warmup,
+        sampler=ResourceSampler(trace_allocations=args.trace_allocations),
+        thresholds=create_thresholds(args),
+    ).run()
+    print(report.to_text())
+    return report.passed
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    if not args.gpu:
+        # Hide GPUs before the model is loaded, so that it runs like on a CI runner.
+        os.environ["CUDA_VISIBLE_DEVICES"] = ""
+    if not asyncio.run(async_main(args)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+OTVision script to submit jobs to and query jobs of a running `serve.py` server
+"""
+
+# Copyright (C) 2022 OpenTrafficCam Contributors
+# <https://github.com/OpenTrafficCam
+# <team@opentrafficcam.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import sys
+from argparse import REMAINDER, ArgumentParser
+from pathlib import Path
+
+import ujson
+
+from OTVision.serve.client import JobClient
+from OTVision.serve.job import JOB_ID, JOB_STATUS, JobStatus, JobType
+from OTVision.serve.protocol import DEFAULT_SOCKET_PATH
+
+
+def create_parser() -> ArgumentParser:
+    parser = ArgumentParser("Submit jobs to a running OTVision server")
+    parser.add_argument(
+        "-s",
+        "--socket",
+        type=str,
+        default=str(DEFAULT_SOCKET_PATH),
+        help="Path of the Unix socket the server listens on.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    for job_type in JobType:
+        job_parser = commands.add_parser(
+            job_type.value,
+            help=f"Submit a {job_type} job. Arguments are passed to {job_type}.py.",
+        )
+        job_parser.add_argument(
+            "--wait",
+            action="store_true",
+            help="Wait until the job has finished.",
+        )
+        job_parser.add_argument("argv", nargs=REMAINDER)
+    status_parser = commands.add_parser("status", help="Show the status of a job.")
+    status_parser.add_argument("job_id", type=str)
+    wait_parser = commands.add_parser("wait", help="Wait until a job has finished.")
+    wait_parser.add_argument("job_id", type=str)
+    commands.add_parser("list", help="List all jobs of the server.")
+    commands.add_parser("shutdown", help="Shut down the server after running jobs.")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = create_parser().parse_args(argv)
+    client = JobClient(Path(args.socket).expanduser())
+
+    if args.command in JobType.as_list():
+        job = client.submit(JobType(args.command), args.argv)
+        if args.wait:
+            job = client.wait(job[JOB_ID])
+        print(ujson.dumps(job, indent=2))
+        if JobStatus(job[JOB_STATUS]) == JobStatus.FAILED:
+            sys.exit(1)
+    elif args.command == "status":
+        print(ujson.dumps(client.status(args.job_id), indent=2))
+    elif args.command == "wait":
+        job = client.wait(args.job_id)
+        print(ujson.dumps(job, indent=2))
+        if JobStatus(job[JOB_STATUS]) == JobStatus.FAILED:
+            sys.exit(1)
+    elif args.command == "list":
+        print(ujson.dumps(client.list_jobs(), indent=2))
+    elif args.command == "shutdown":
+        client.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,28 @@
+import asyncio
+from dataclasses import replace
+from datetime import datetime
 from typing import AsyncIterator
-from unittest.mock import Mock
+from unittest.mock import AsyncMock, Mock
 
 import pytest
 
 from OTVision.application.config import Config
 from OTVision.application.detect.current_object_detector import CurrentObjectDetector
+from OTVision.application.event.new_otvision_config import NewOtvisionConfigEvent
 from OTVision.application.get_current_config import GetCurrentConfig
 from OTVision.domain.frame import DetectedFrame, Frame
 from OTVision.domain.object_detection import ObjectDetector, ObjectDetectorFactory
 
 CONFIG = Config()
+NEW_WEIGHTS = "new_model.pt"
+NEW_CONFIG = replace(
+    CONFIG,
+    detect=replace(
+        CONFIG.detect,
+        yolo_config=replace(CONFIG.detect.yolo_config, weights=NEW_WEIGHTS),
+    ),
+)
+OCCURRENCE = datetime(2024, 1, 1, 12)
 
 
 class TestCurrentObjectDetector:
@@ -24,18 +37,22 @@ class TestCurrentObjectDetector:
 
     @pytest.mark.asyncio
     async def test_filter(self) -> None:
-        given_detected_frames = [Mock(spec=DetectedFrame), Mock(spec=DetectedFrame)]
+        given_detected_frames = [
+            Mock(spec=DetectedFrame, output="video.mp4"),
+            Mock(spec=DetectedFrame, output="video.mp4"),
+        ]
 
         async def mock_detect_generator(
             frames: AsyncIterator[Frame],
         ) -> AsyncIterator[DetectedFrame]:
-            for frame in given_detected_frames:
-                yield frame
+            async for _ in frames:
+                yield given_detected_frames.pop(0)
 
         async def input_generator() -> AsyncIterator[Frame]:
             yield Mock(spec=Frame)
             yield Mock(spec=Frame)
 
+        expected = given_detected_frames.copy()
         given_object_detector = Mock(spec=ObjectDetector)
         given_object_detector.detect = mock_detect_generator
         given_get_current_config = create_get_current_config()
@@ -46,7 +63,69 @@ class TestCurrentObjectDetector:
         async for frame in target.filter(input_generator()):
             actual_frames.append(frame)
 
-        assert actual_frames == given_detected_frames
+        assert actual_frames == expected
+
+    @pytest.mark.asyncio
+    async def test_swap_model_loaded_in_background(self) -> None:
+        old_detector = create_named_detector("old", {0: "car"})
+        new_detector = create_named_detector("new", {0: "car", 1: "bicycle"})
+        given_get_current_config = create_get_current_config()
+        given_factory = Mock(spec=ObjectDetectorFactory)
+        given_factory.create.side_effect = [old_detector, new_detector]
+        observer = AsyncMock()
+
+        async def input_generator() -> AsyncIterator[Frame]:
+            yield create_frame(1, "segment_1.mp4")
+            given_get_current_config.get.return_value = NEW_CONFIG
+            yield create_frame(2, "segment_1.mp4")
+            await wait_until_created(given_factory, times=2)
+            yield create_frame(3, "segment_1.mp4")
+            yield create_frame(4, "segment_2.mp4")
+
+        target = CurrentObjectDetector(given_get_current_config, given_factory)
+        target.register(observer)
+        actual = [frame async for frame in target.filter(input_generator())]
+
+        assert [(frame.no, frame.source) for frame in actual] == [
+            (1, "old"),
+            (2, "old"),
+            (3, "old"),
+            (4, "new"),
+        ]
+        observer.assert_awaited_once_with(NewOtvisionConfigEvent())
+        new_detector.preload.assert_called_once()
+        assert target.get() is new_detector
+        old_metadata = target.pop_metadata("segment_1.mp4")
+        new_metadata = target.pop_metadata("segment_2.mp4")
+        assert old_metadata.config.weights == CONFIG.detect.weights
+        assert old_metadata.classifications == {0: "car"}
+        assert new_metadata.config.weights == NEW_WEIGHTS
+        assert new_metadata.classifications == {0: "car", 1: "bicycle"}
+
+    @pytest.mark.asyncio
+    async def test_keep_previous_model_if_loading_fails(self) -> None:
+        old_detector = create_named_detector("old", {0: "car"})
+        given_get_current_config = create_get_current_config()
+        given_factory = Mock(spec=ObjectDetectorFactory)
+        given_factory.create.side_effect = [old_detector, FileNotFoundError()]
+        observer = AsyncMock()
+
+        async def input_generator() -> AsyncIterator[Frame]:
+            yield create_frame(1, "segment_1.mp4")
+            given_get_current_config.get.return_value = NEW_CONFIG
+            yield create_frame(2, "segment_1.mp4")
+            await wait_until_created(given_factory, times=2)
+            yield create_frame(3, "segment_1.mp4")
+            yield create_frame(4, "segment_1.mp4")
+
+        target = CurrentObjectDetector(given_get_current_config, given_factory)
+        target.register(observer)
+        actual = [frame async for frame in target.filter(input_generator())]
+
+        assert [frame.source for frame in actual] == ["old"] * 4
+        assert given_factory.create.call_count == 2
+        observer.assert_not_awaited()
+        assert target.get() is old_detector
 
 
 def create_get_current_config() -> Mock:
@@ -65,3 +144,37 @@ def create_object_detector(generator: Mock) -> Mock:
     mock = Mock(spec=ObjectDetector)
     mock.detect.return_value = generator
     return mock
+
+
+def create_named_detector(name: str, classifications: dict[int, str]) -> Mock:
+    async def detect(frames: AsyncIterator[Frame]) -> AsyncIterator[DetectedFrame]:
+        async for frame in frames:
+            yield DetectedFrame(
+                no=frame["frame"],
+                occurrence=frame["occurrence"],
+                source=name,
+                output=frame["output"],
+                detections=[],
+            )
+
+    mock = Mock(spec=ObjectDetector)
+    mock.detect = detect
+    mock.classifications = classifications
+    return mock
+
+
+def create_frame(number: int, output: str) -> Frame:
+    return Frame(
+        data=None,
+        frame=number,
+        source="camera",
+        output=output,
+        occurrence=OCCURRENCE,
+    )
+
+
+async def wait_until_created(factory: Mock, times: int) -> None:
+    while factory.create.call_count < times:
+        await asyncio.sleep(0.01)
+    # Give the loader thread time to finish preloading.
+    await asyncio.sleep(0.05)
@@ -0,0 +1,100 @@
+from dataclasses import replace
+from unittest.mock import Mock
+
+from OTVision.application.config import DetectConfig, YoloConfig
+from OTVision.application.detect.factory import ObjectDetectorCachedFactory
+from OTVision.application.metrics import MetricsRegistry
+from OTVision.domain.object_detection import ObjectDetector, ObjectDetectorFactory
+
+MIB = 2**20
+
+
+class TestObjectDetectorCachedFactory:
+    def test_create_cached_detector_once(self) -> None:
+        metrics = MetricsRegistry()
+        given_factory = create_factory()
+        target = ObjectDetectorCachedFactory(given_factory, metrics=metrics)
+
+        first = target.create(create_config("a.pt"))
+        second = target.create(create_config("a.pt"))
+
+        assert first is second
+        given_factory.create.assert_called_once()
+        assert counter_value(metrics, "otvision_model_cache_hits_total") == 1
+        assert counter_value(metrics, "otvision_model_cache_misses_total") == 1
+
+    def test_evict_least_recently_used_detector(self) -> None:
+        given_factory = create_factory()
+        target = ObjectDetectorCachedFactory(given_factory, max_models=2)
+
+        target.create(create_config("a.pt"))
+        target.create(create_config("b.pt"))
+        target.create(create_config("a.pt"))
+        target.create(create_config("c.pt"))
+        target.create(create_config("a.pt"))
+        target.create(create_config("b.pt"))
+
+        assert created_weights(given_factory) == ["a.pt", "b.pt", "c.pt", "b.pt"]
+        assert given_factory.release_unused_memory.call_count == 2
+
+    def test_evict_detectors_exceeding_memory_budget(self) -> None:
+        metrics = MetricsRegistry()
+        given_factory = create_factory(memory_bytes=100 * MIB)
+        target = ObjectDetectorCachedFactory(
+            given_factory, max_memory_bytes=250 * MIB, metrics=metrics
+        )
+
+        target.create(create_config("a.pt"))
+        target.create(create_config("b.pt"))
+        target.create(create_config("c.pt"))
+        target.create(create_config("b.pt"))
+
+        assert created_weights(given_factory) == ["a.pt", "b.pt", "c.pt"]
+        assert counter_value(metrics, "otvision_model_cache_evictions_total") == 1
+        assert metrics.gauge("otvision_model_cache_memory_bytes", "").value == 200 * MIB
+
+    def test_never_evict_pinned_detector(self) -> None:
+        given_factory = create_factory()
+        target = ObjectDetectorCachedFactory(
+            given_factory, max_models=2, pinned_weights="default.pt"
+        )
+
+        target.create(create_config("default.pt"))
+        target.create(create_config("a.pt"))
+        target.create(create_config("b.pt"))
+        target.create(create_config("default.pt"))
+
+        assert created_weights(given_factory) == ["default.pt", "a.pt", "b.pt"]
+
+    def test_keep_new_detector_exceeding_memory_budget(self) -> None:
+        given_factory = create_factory(memory_bytes=300 * MIB)
+        target = ObjectDetectorCachedFactory(given_factory, max_memory_bytes=250 * MIB)
+
+        first = target.create(create_config("a.pt"))
+        second = target.create(create_config("a.pt"))
+
+        assert first is second
+        given_factory.create.assert_called_once()
+
+
+def create_factory(memory_bytes: int = 0) -> Mock:
+    def create(config: DetectConfig) -> Mock:
+        detector = Mock(spec=ObjectDetector)
+        detector.memory_bytes = memory_bytes
+        return detector
+
+    factory = Mock(spec=ObjectDetectorFactory)
+    factory.create.side_effect = create
+    return factory
+
+
+def create_config(weights: str) -> DetectConfig:
+    return replace(DetectConfig(), yolo_config=YoloConfig(weights=weights))
+
+
+def created_weights(factory: Mock) -> list[str]:
+    return [call.args[0].weights for call in factory.create.call_args_list]
+
+
+def counter_value(metrics: MetricsRegistry, name: str) -> float:
+    return metrics.counter(name, "").value
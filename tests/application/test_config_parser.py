@@ -5,10 +5,23 @@ from unittest.mock import Mock
 import pytest
 
 from OTVision.application.config import (
+    CheckpointConfig,
     Config,
     DetectConfig,
+    EventRecordingConfig,
+    ForwardConfig,
+    FrameDeliveryPolicy,
+    FrameTimestamps,
+    IngestConfig,
+    LoadSheddingConfig,
+    LoopMonitorConfig,
+    MetricsConfig,
+    ModelCacheConfig,
+    PublishConfig,
+    RecordingMode,
     StreamConfig,
     TrackConfig,
+    VideoWriterBackend,
     YoloConfig,
     _TrackIouConfig,
 )
@@ -44,7 +57,9 @@ class TestConfigParser:
                 "CONF": 0.35,
                 "IOU": 0.5,
                 "IMGSIZE": 1280,
+                "CHUNK_SIZE": 4,
                 "NORMALIZED": False,
+                "DIRECT_FORWARD": True,
             },
             "EXPECTED_DURATION": 3600,
             "OVERWRITE": False,
@@ -56,6 +71,7 @@ class TestConfigParser:
             "VIDEO_CODEC": "h264_nvenc",
             "ENCODING_SPEED": "medium",
             "CRF": "HIGH_QUALITY",
+            "VIDEO_WRITER": "pyav",
         }
 
         result = given_config_parser.parse_detect_config(detect_dict)
@@ -68,7 +84,9 @@ class TestConfigParser:
                 conf=0.35,
                 iou=0.5,
                 img_size=1280,
+                chunk_size=4,
                 normalized=False,
+                direct_forward=True,
             ),
             expected_duration=timedelta(seconds=3600),
             overwrite=False,
@@ -80,6 +98,7 @@ class TestConfigParser:
             video_codec=VideoCodec.H264_NVENC,
             encoding_speed=EncodingSpeed.MEDIUM,
             crf=ConstantRateFactor.HIGH_QUALITY,
+            video_writer=VideoWriterBackend.PYAV,
         )
         assert result == expected
 
@@ -93,6 +112,289 @@ class TestConfigParser:
         expected = DetectConfig()
         assert result == expected
 
+    def test_parse_stream_config(self, given_config_parser: ConfigParser) -> None:
+        stream_dict = {
+            "NAME": "OTCamera1",
+            "SOURCE": "rtsp://127.0.0.1:8554/test",
+            "SAVE_DIR": "path/to/save/dir",
+            "FLUSH_BUFFER_SIZE": 1200,
+            "FRAME_DELIVERY_POLICY": "latest_frame",
+            "CAPTURE_BUFFER_SIZE": 5,
+            "RECORDING_MODE": "remux",
+        }
+
+        result = given_config_parser.parse_stream_config(stream_dict)
+
+        assert result == StreamConfig(
+            name="OTCamera1",
+            source="rtsp://127.0.0.1:8554/test",
+            save_dir=Path("path/to/save/dir"),
+            flush_buffer_size=1200,
+            frame_delivery_policy=FrameDeliveryPolicy.LATEST_FRAME,
+            capture_buffer_size=5,
+            recording_mode=RecordingMode.REMUX,
+        )
+
+    def test_parse_stream_config_defaults_to_every_frame(
+        self, given_config_parser: ConfigParser
+    ) -> None:
+        stream_dict = {
+            "NAME": "OTCamera1",
+            "SOURCE": "rtsp://127.0.0.1:8554/test",
+            "SAVE_DIR": "path/to/save/dir",
+            "FLUSH_BUFFER_SIZE": 1200,
+        }
+
+        result = given_config_parser.parse_stream_config(stream_dict)
+
+        assert result.frame_delivery_policy == FrameDeliveryPolicy.EVERY_FRAME
+        assert result.capture_buffer_size == StreamConfig.capture_buffer_size
+        assert result.load_shedding == LoadSheddingConfig()
+        assert result.recording_mode == RecordingMode.REENCODE
+
+    def test_parse_stream_config_with_load_shedding(
+        self, given_config_parser: ConfigParser
+    ) -> None:
+        stream_dict = {
+            "NAME": "OTCamera1",
+            "SOURCE": "rtsp://127.0.0.1:8554/test",
+            "SAVE_DIR": "path/to/save/dir",
+            "FLUSH_BUFFER_SIZE": 1200,
+            "LOAD_SHEDDING": {
+                "ENABLED": True,
+                "TARGET_UTILIZATION": 0.8,
+                "MAX_DROP_RATE": 0.25,
+                "MIN_IMG_SIZE": 480,
+                "IMG_SIZE_STEP": 64,
+                "MEASUREMENT_WINDOW": 10,
+            },
+        }
+
+        result = given_config_parser.parse_stream_config(stream_dict)
+
+        assert result.load_shedding == LoadSheddingConfig(
+            enabled=True,
+            target_utilization=0.8,
+            max_drop_rate=0.25,
+            min_img_size=480,
+            img_size_step=64,
+            measurement_window=10,
+        )
+
+    def test_parse_stream_config_with_event_recording(
+        self, given_config_parser: ConfigParser
+    ) -> None:
+        stream_dict = {
+            "NAME": "OTCamera1",
+            "SOURCE": "rtsp://127.0.0.1:8554/test",
+            "SAVE_DIR": "path/to/save/dir",
+            "FLUSH_BUFFER_SIZE": 1200,
+            "EVENT_RECORDING": {
+                "ENABLED": True,
+                "PRE_ROLL_SECONDS": 3,
+                "QUIET_PERIOD_SECONDS": 10,
+                "MAX_VIDEO_SECONDS": 60,
+            },
+        }
+
+        result = given_config_parser.parse_stream_config(stream_dict)
+
+        assert result.event_recording == EventRecordingConfig(
+            enabled=True,
+            pre_roll_seconds=3.0,
+            quiet_period_seconds=10.0,
+            max_video_seconds=60.0,
+        )
+
+    def test_parse_stream_config_with_pts_timestamps(
+        self, given_config_parser: ConfigParser
+    ) -> None:
+        stream_dict = {
+            "NAME": "OTCamera1",
+            "SOURCE": "rtsp://127.0.0.1:8554/test",
+            "SAVE_DIR": "path/to/save/dir",
+            "FLUSH_BUFFER_SIZE": 1200,
+            "FRAME_TIMESTAMPS": "pts",
+        }
+
+        result = given_config_parser.parse_stream_config(stream_dict)
+
+        assert result.frame_timestamps == FrameTimestamps.PTS
+
+    def test_parse_metrics_config(self, given_config_parser: ConfigParser) -> None:
+        config_dict = {
+            "METRICS": {
+                "ENABLED": True,
+                "PORT": "9100",
+                "TEXTFILE": "path/to/otvision.prom",
+                "INTERVAL_SECONDS": 30,
+            }
+        }
+
+        result = given_config_parser.parse_from_dict(config_dict)
+
+        assert result.metrics == MetricsConfig(
+            enabled=True,
+            host="127.0.0.1",
+            port=9100,
+            textfile=Path("path/to/otvision.prom"),
+            interval_seconds=30.0,
+        )
+
+    def test_parse_publish_config(self, given_config_parser: ConfigParser) -> None:
+        config_dict = {
+            "PUBLISH": {
+                "ENABLED": True,
+                "SOCKET": "run/otvision.sock",
+                "BATCH_SIZE": 5,
+                "MAX_BATCH_DELAY_SECONDS": 0.05,
+            }
+        }
+
+        result = given_config_parser.parse_from_dict(config_dict)
+
+        assert result.publish == PublishConfig(
+            enabled=True,
+            socket=Path("run/otvision.sock"),
+            batch_size=5,
+            max_batch_delay_seconds=0.05,
+            subscriber_queue_size=100,
+        )
+
+    def test_parse_unbounded_emission_delay(
+        self, given_config_parser: ConfigParser
+    ) -> None:
+        config_dict = {"TRACK": {"MAX_EMISSION_DELAY_SECONDS": None}}
+
+        result = given_config_parser.parse_from_dict(config_dict)
+
+        assert result.track.max_emission_delay_seconds is None
+
+    def test_parse_checkpoint_config(self, given_config_parser: ConfigParser) -> None:
+        config_dict = {
+            "CHECKPOINT": {
+                "ENABLED": True,
+                "FILE": "state/otvision.checkpoint",
+            }
+        }
+
+        result = given_config_parser.parse_from_dict(config_dict)
+
+        assert result.checkpoint == CheckpointConfig(
+            enabled=True,
+            file=Path("state/otvision.checkpoint"),
+            interval_seconds=1.0,
+        )
+
+    def test_parse_forward_and_ingest_config(
+        self, given_config_parser: ConfigParser
+    ) -> None:
+        config_dict = {
+            "FORWARD": {
+                "ENABLED": True,
+                "HOST": "tracking.example.org",
+                "SPOOL_FILE": "spool/otvision_forward.spool",
+                "QUEUE_SIZE": 100,
+                "SEND_TIMEOUT_SECONDS": 2,
+            },
+            "INGEST": {"HOST": "0.0.0.0", "PORT": 8000, "SAVE_DIR": "tracks"},
+        }
+
+        result = given_config_parser.parse_from_dict(config_dict)
+
+        assert result.forward == ForwardConfig(
+            enabled=True,
+            host="tracking.example.org",
+            port=7645,
+            batch_size=20,
+            spool_file=Path("spool/otvision_forward.spool"),
+            retry_seconds=5.0,
+            queue_size=100,
+            send_timeout_seconds=2.0,
+        )
+        assert result.ingest == IngestConfig(
+            host="0.0.0.0", port=8000, save_dir=Path("tracks")
+        )
+
+    def test_parse_recording_profile(self, given_config_parser: ConfigParser) -> None:
+        config_dict = {"DETECT": {"RECORDING_SCALE": 0.5, "RECORDING_FRAME_STEP": 4}}
+
+        result = given_config_parser.parse_from_dict(config_dict)
+
+        assert result.detect.recording_scale == 0.5
+        assert result.detect.recording_frame_step == 4
+
+    def test_parse_loop_monitor_config(self, given_config_parser: ConfigParser) -> None:
+        config_dict = {
+            "LOOP_MONITOR": {"ENABLED": True, "STALL_THRESHOLD_SECONDS": 0.25}
+        }
+
+        result = given_config_parser.parse_from_dict(config_dict)
+
+        assert result.loop_monitor == LoopMonitorConfig(
+            enabled=True, interval_seconds=0.05, stall_threshold_seconds=0.25
+        )
+
+    def test_parse_model_cache_config(self, given_config_parser: ConfigParser) -> None:
+        config_dict = {
+            "MODEL_CACHE": {
+                "MAX_MODELS": None,
+                "MAX_MEMORY_MB": 512,
+                "PIN_DEFAULT": True,
+            }
+        }
+
+        result = given_config_parser.parse_from_dict(config_dict)
+
+        assert result.model_cache == ModelCacheConfig(
+            max_models=None, max_memory_mb=512.0, pin_default=True
+        )
+        assert result.model_cache.max_memory_bytes == 512 * 2**20
+
+    def test_parse_streams(self, given_config_parser: ConfigParser) -> None:
+        config_dict = {
+            "STREAMS": [
+                {
+                    "NAME": "OTCamera1",
+                    "SOURCE": "rtsp://127.0.0.1:8554/1",
+                    "SAVE_DIR": "path/to/save/dir",
+                    "FLUSH_BUFFER_SIZE": 1200,
+                },
+                {
+                    "NAME": "OTCamera2",
+                    "SOURCE": "rtsp://127.0.0.1:8554/2",
+                    "SAVE_DIR": "path/to/save/dir",
+                    "FLUSH_BUFFER_SIZE": 1200,
+                },
+            ]
+        }
+
+        result = given_config_parser.parse_from_dict(config_dict)
+
+        assert [stream.name for stream in result.streams] == [
+            "OTCamera1",
+            "OTCamera2",
+        ]
+        assert result.stream is None
+
+    def test_parse_rejects_load_shedding_in_streams(
+        self, given_config_parser: ConfigParser, given_deserializer: Mock
+    ) -> None:
+        given_deserializer.deserialize.return_value = {
+            "STREAMS": [
+                {
+                    "NAME": "OTCamera1",
+                    "SOURCE": "rtsp://127.0.0.1:8554/1",
+                    "SAVE_DIR": "path/to/save/dir",
+                    "FLUSH_BUFFER_SIZE": 1200,
+                    "LOAD_SHEDDING": {"ENABLED": True},
+                },
+            ]
+        }
+
+        with pytest.raises(InvalidOtvisionConfigError, match="OTCamera1"):
+            given_config_parser.parse(Path("config.yaml"))
+
 
 class TestConfigParserValidateFlushBufferSupportTrackLifecycle:
     """Test suite for validate_flush_buffer_support_track_lifecycle method.
@@ -160,6 +462,99 @@ class TestConfigParserValidateFlushBufferSupportTrackLifecycle:
     def given_config_parser(self, given_deserializer: Mock) -> ConfigParser:
         return ConfigParser(given_deserializer)
 
+    @pytest.mark.parametrize(
+        "names, sources, should_raise_error",
+        [
+            (["a", "b"], ["rtsp://a", "rtsp://b"], False),
+            (["a", "a"], ["rtsp://a", "rtsp://b"], True),
+            (["a", "b"], ["rtsp://a", "rtsp://a"], True),
+        ],
+    )
+    def test_validate_streams_are_unique(
+        self,
+        given_config_parser: ConfigParser,
+        names: list[str],
+        sources: list[str],
+        should_raise_error: bool,
+    ) -> None:
+        given_config = Config(
+            streams=[
+                self._build_stream_config(name=name, source=source)
+                for name, source in zip(names, sources)
+            ]
+        )
+
+        if should_raise_error:
+            with pytest.raises(InvalidOtvisionConfigError):
+                given_config_parser.validate_streams_are_unique(given_config)
+        else:
+            given_config_parser.validate_streams_are_unique(given_config)
+
+    @pytest.mark.parametrize(
+        "enabled, should_raise_error", [(False, False), (True, True)]
+    )
+    def test_validate_streams_without_load_shedding(
+        self,
+        given_config_parser: ConfigParser,
+        enabled: bool,
+        should_raise_error: bool,
+    ) -> None:
+        given_config = Config(
+            streams=[
+                self._build_stream_config(name="a"),
+                StreamConfig(
+                    name="b",
+                    source="rtsp://b",
+                    save_dir=Path("/tmp"),
+                    flush_buffer_size=100,
+                    load_shedding=LoadSheddingConfig(enabled=enabled),
+                ),
+            ]
+        )
+
+        if should_raise_error:
+            with pytest.raises(InvalidOtvisionConfigError):
+                given_config_parser.validate_streams_without_load_shedding(given_config)
+        else:
+            given_config_parser.validate_streams_without_load_shedding(given_config)
+
+    @pytest.mark.parametrize(
+        "scale, frame_step, should_raise_error",
+        [(1.0, 1, False), (0.25, 5, False), (0.0, 1, True), (1.0, 0, True)],
+    )
+    def test_validate_recording_profile(
+        self,
+        given_config_parser: ConfigParser,
+        scale: float,
+        frame_step: int,
+        should_raise_error: bool,
+    ) -> None:
+        given_config = Config(
+            detect=DetectConfig(recording_scale=scale, recording_frame_step=frame_step)
+        )
+
+        if should_raise_error:
+            with pytest.raises(InvalidOtvisionConfigError):
+                given_config_parser.validate_recording_profile(given_config)
+        else:
+            given_config_parser.validate_recording_profile(given_config)
+
+    def test_validate_flush_buffer_of_each_stream(
+        self, given_config_parser: ConfigParser
+    ) -> None:
+        given_config = Config(
+            track=self._build_track_config(t_min=5, t_miss_max=51),
+            streams=[
+                self._build_stream_config(name="a", flush_buffer_size=100),
+                self._build_stream_config(name="b", flush_buffer_size=50),
+            ],
+        )
+
+        with pytest.raises(InvalidOtvisionConfigError):
+            given_config_parser.validate_flush_buffer_support_track_lifecycle(
+                given_config
+            )
+
     def _build_stream_config(
         self,
         name: str = "test_stream",
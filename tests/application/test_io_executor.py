@@ -0,0 +1,58 @@
+import asyncio
+from threading import Event, current_thread
+
+import pytest
+
+from OTVision.application.io_executor import IoExecutor
+from OTVision.application.metrics import MetricsRegistry
+
+
+class TestIoExecutor:
+    @pytest.mark.asyncio
+    async def test_run_job_off_the_event_loop(self) -> None:
+        target = IoExecutor()
+
+        thread_name = await target.run(lambda: current_thread().name)
+
+        assert thread_name.startswith("otvision-io")
+
+    @pytest.mark.asyncio
+    async def test_raise_error_of_job(self) -> None:
+        def fail() -> None:
+            raise OSError("disk full")
+
+        target = IoExecutor()
+
+        with pytest.raises(OSError, match="disk full"):
+            await target.run(fail)
+
+    @pytest.mark.asyncio
+    async def test_submit_waits_while_too_many_jobs_are_pending(self) -> None:
+        registry = MetricsRegistry()
+        released = Event()
+        target = IoExecutor(max_workers=1, max_pending_jobs=2, metrics=registry)
+        first = await target.submit(released.wait)
+        second = await target.submit(released.wait)
+
+        third = asyncio.create_task(target.submit(lambda: True))
+        await asyncio.sleep(0.05)
+
+        assert not third.done()
+        assert registry.gauge("otvision_io_pending_jobs", "").value == 2
+        released.set()
+        await asyncio.gather(first, second)
+        assert await (await third) is True
+        await asyncio.sleep(0)
+        assert registry.gauge("otvision_io_pending_jobs", "").value == 0
+
+    @pytest.mark.asyncio
+    async def test_shutdown_waits_for_submitted_jobs(self) -> None:
+        finished = Event()
+        target = IoExecutor()
+        await target.submit(finished.set)
+
+        await asyncio.to_thread(target.shutdown)
+
+        assert finished.is_set()
+        with pytest.raises(RuntimeError):
+            await target.run(lambda: True)
@@ -0,0 +1,87 @@
+import asyncio
+import time
+from traceback import FrameSummary, StackSummary
+
+import pytest
+
+from OTVision.application.loop_monitor import (
+    PACKAGE_DIR,
+    UNKNOWN_STAGE,
+    BlockingSummary,
+    EventLoopMonitor,
+    find_stage,
+)
+from OTVision.application.metrics import MetricsRegistry
+
+
+class TestEventLoopMonitor:
+    @pytest.mark.asyncio
+    async def test_detect_stall(self) -> None:
+        metrics = MetricsRegistry()
+        target = EventLoopMonitor(
+            interval_seconds=0.01, stall_threshold_seconds=0.1, metrics=metrics
+        )
+
+        target.start()
+        await asyncio.sleep(0.05)
+        time.sleep(0.3)
+        await asyncio.sleep(0.05)
+        summary = target.stop()
+
+        assert summary.stalls == 1
+        assert summary.max_lag_seconds >= 0.2
+        assert sum(summary.blocked_seconds_by_stage.values()) == pytest.approx(
+            summary.max_lag_seconds
+        )
+        assert metrics.counter("otvision_event_loop_stalls_total", "").value == 1
+
+    @pytest.mark.asyncio
+    async def test_no_stall_while_loop_is_responsive(self) -> None:
+        target = EventLoopMonitor(interval_seconds=0.01, stall_threshold_seconds=0.2)
+
+        target.start()
+        await asyncio.sleep(0.1)
+        summary = target.stop()
+
+        assert summary == BlockingSummary(
+            stalls=0, max_lag_seconds=0.0, blocked_seconds_by_stage={}
+        )
+
+
+def create_frame(path: str, name: str) -> FrameSummary:
+    return FrameSummary(path, 1, name, lookup_line=False)
+
+
+class TestFindStage:
+    def test_find_innermost_otvision_function(self) -> None:
+        stack = StackSummary.from_list(
+            [
+                create_frame("/usr/lib/python3.12/asyncio/events.py", "_run"),
+                create_frame(str(PACKAGE_DIR / "track" / "stream_tracker.py"), "track"),
+                create_frame(str(PACKAGE_DIR / "detect" / "yolo.py"), "detect"),
+                create_frame("/site-packages/torch/nn/module.py", "forward"),
+            ]
+        )
+
+        assert find_stage(stack) == "OTVision.detect.yolo:detect"
+
+    def test_unknown_stage_without_otvision_function(self) -> None:
+        stack = StackSummary.from_list(
+            [create_frame("/usr/lib/python3.12/asyncio/events.py", "_run")]
+        )
+
+        assert find_stage(stack) == UNKNOWN_STAGE
+
+
+def test_blocking_summary_to_text() -> None:
+    summary = BlockingSummary(
+        stalls=3,
+        max_lag_seconds=0.25,
+        blocked_seconds_by_stage={"OTVision.detect.yolo:detect": 0.5, "unknown": 0.1},
+    )
+
+    lines = summary.to_text().splitlines()
+
+    assert lines[0] == "Event loop stalls: 3, longest 250 ms"
+    assert lines[1].split() == ["OTVision.detect.yolo:detect", "0.500s"]
+    assert lines[2].split() == ["unknown", "0.100s"]
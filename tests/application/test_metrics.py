@@ -0,0 +1,71 @@
+import pytest
+
+from OTVision.application.metrics import (
+    DISABLED_METRICS,
+    Counter,
+    HistogramSnapshot,
+    MetricsRegistry,
+)
+
+
+class TestMetricsRegistry:
+    def test_returns_same_metric_for_same_name_and_labels(self) -> None:
+        target = MetricsRegistry()
+
+        first = target.counter("frames_total", "Frames.")
+        second = target.counter("frames_total", "Frames.")
+        first.inc()
+        second.inc(2)
+
+        assert first is second
+        assert first.value == 3
+
+    def test_labeled_registry_shares_metrics(self) -> None:
+        target = MetricsRegistry()
+        camera1 = target.labeled(stream="OTCamera1")
+        camera2 = target.labeled(stream="OTCamera2")
+
+        camera1.gauge("queue_depth", "Queue depth.").set(3)
+        camera2.gauge("queue_depth", "Queue depth.").set(5)
+        target.counter("detections_total", "Detections.").inc()
+
+        actual = [(metric.name, metric.labels) for metric in target.collect()]
+        assert actual == [
+            ("detections_total", ()),
+            ("queue_depth", (("stream", "OTCamera1"),)),
+            ("queue_depth", (("stream", "OTCamera2"),)),
+        ]
+
+    def test_histogram_counts_observations_cumulatively(self) -> None:
+        histogram = MetricsRegistry().histogram(
+            "duration_seconds", "Duration.", buckets=(0.1, 1.0)
+        )
+
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value)
+
+        assert histogram.snapshot() == HistogramSnapshot(
+            buckets=[(0.1, 2), (1.0, 3)], sum=2.65, count=4
+        )
+
+    def test_disabled_registry_ignores_updates(self) -> None:
+        counter = DISABLED_METRICS.counter("frames_total", "Frames.")
+        gauge = DISABLED_METRICS.gauge("queue_depth", "Queue depth.")
+        histogram = DISABLED_METRICS.histogram("duration_seconds", "Duration.")
+
+        counter.inc()
+        gauge.set(3)
+        histogram.observe(1.0)
+
+        assert isinstance(counter, Counter)
+        assert counter.value == 0
+        assert gauge.value == 0
+        assert histogram.snapshot().count == 0
+        assert DISABLED_METRICS.labeled(stream="OTCamera1").collect() == []
+
+    def test_registering_name_with_other_type_raises_error(self) -> None:
+        target = MetricsRegistry()
+        target.counter("frames", "Frames.")
+
+        with pytest.raises(ValueError):
+            target.gauge("frames", "Frames.")
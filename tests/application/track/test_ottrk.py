@@ -133,6 +133,41 @@ class TestOttrkBuilder:
         assert actual == expected_ottrk
         assert not target._tracked_detections
 
+    def test_build_detached_resets_before_detections_are_built(self) -> None:
+        given = setup(create_given(ACTUAL_DURATION, EXPECTED_DURATION))
+        target = create_target(given)
+        target.set_config(given.ottrk_builder_config)
+        detection = create_tracked_detection(
+            TRACK_1, is_first=True, is_last=False, is_discarded=False
+        )
+        target.add_tracked_frames(
+            [
+                create_tracked_frame(
+                    frame_no=FRAME_1,
+                    occurrence=FRAME_1_OCCURRENCE,
+                    detections=[detection],
+                    discarded_tracks=set(),
+                    finished_tracks=set(),
+                    unfinished_tracks={TRACK_1},
+                )
+            ]
+        )
+
+        build = target.build_detached()
+
+        assert not target._tracked_detections
+        with pytest.raises(OttrkBuilderError):
+            _ = target.config
+        assert build() == create_expected_ottrk(
+            ACTUAL_DURATION,
+            EXPECTED_DURATION,
+            [
+                create_expected_tracked_detection(
+                    detection, FRAME_1, FRAME_1_OCCURRENCE, False
+                )
+            ],
+        )
+
     def test_add_config_raises_error_if_config_is_not_set(self) -> None:
         given = setup(create_given(ACTUAL_DURATION, EXPECTED_DURATION))
         target = create_target(given)
@@ -359,7 +394,7 @@ def create_tracked_detection(
 ) -> TrackedDetection:
     result = Mock()
     result.track_id = track_id
-    result.label = "car"
+    result.class_id = 2
     result.conf = 0.75
     result.x = 0
     result.y = 1
@@ -371,7 +406,7 @@ def create_tracked_detection(
     result.source = SOURCE
 
     result.to_otdet.return_value = {
-        dataformat.CLASS: result.label,
+        dataformat.CLASS: "car",
         dataformat.CONFIDENCE: result.conf,
         dataformat.X: result.x,
         dataformat.Y: result.y,
@@ -410,7 +445,7 @@ def create_expected_tracked_detection(
 ) -> dict:
     """Create an expected detection dictionary from a TrackedDetection."""
     return {
-        dataformat.CLASS: detection.label,
+        dataformat.CLASS: "car",
         dataformat.CONFIDENCE: detection.conf,
         dataformat.X: detection.x,
         dataformat.Y: detection.y,
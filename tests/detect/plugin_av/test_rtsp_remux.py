@@ -0,0 +1,207 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import cast
+from unittest.mock import Mock, patch
+
+import av
+import numpy as np
+import pytest
+from av.packet import Packet
+from av.video.stream import VideoStream
+
+from OTVision.application.config import FrameDeliveryPolicy
+from OTVision.application.metrics import MetricsRegistry
+from OTVision.detect.plugin_av.rtsp_remux import (
+    PresentationClock,
+    PyAvRtspCapture,
+    RemuxStreamRecorder,
+)
+
+NUMBER_OF_FRAMES = 40
+GOP_SIZE = 5
+WIDTH = 64
+HEIGHT = 48
+OCCURRENCE = datetime(2020, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def h264_video(tmp_path: Path) -> Path:
+    """Encodes a video with a key frame every GOP_SIZE frames and no B-frames."""
+    video_file = tmp_path / "source.mp4"
+    with av.open(str(video_file), mode="w") as container:
+        stream = cast(
+            VideoStream,
+            container.add_stream(
+                "libx264",
+                rate=20,
+                options={"g": str(GOP_SIZE), "bf": "0", "sc_threshold": "0"},
+            ),
+        )
+        stream.width = WIDTH
+        stream.height = HEIGHT
+        stream.pix_fmt = "yuv420p"
+        for index in range(NUMBER_OF_FRAMES):
+            image = np.full((HEIGHT, WIDTH, 3), index * 5, dtype=np.uint8)
+            frame = av.VideoFrame.from_ndarray(image, format="rgb24")
+            container.mux(stream.encode(frame))
+        container.mux(stream.encode())
+    return video_file
+
+
+def demux(video_file: Path) -> tuple[av.container.InputContainer, list[Packet]]:
+    container = av.open(str(video_file))
+    packets = [
+        packet
+        for packet in container.demux(container.streams.video[0])
+        if packet.dts is not None
+    ]
+    return container, packets
+
+
+def count_frames(video_file: Path) -> int:
+    container = av.open(str(video_file))
+    number_of_frames = sum(1 for _ in container.decode(video=0))
+    container.close()
+    return number_of_frames
+
+
+class TestRemuxStreamRecorder:
+    def test_record_starts_segments_at_key_frames(
+        self, h264_video: Path, tmp_path: Path
+    ) -> None:
+        first_segment = tmp_path / "first.mp4"
+        second_segment = tmp_path / "second.mp4"
+        container, packets = demux(h264_video)
+        target = RemuxStreamRecorder()
+
+        target.start_segment(str(first_segment))
+        target.record(packets[:12])
+        target.start_segment(str(second_segment))
+        target.record(packets[12:])
+        target.close()
+        container.close()
+
+        assert count_frames(first_segment) == 15
+        assert count_frames(second_segment) == NUMBER_OF_FRAMES - 15
+
+    def test_record_skips_packets_before_first_key_frame(
+        self, h264_video: Path, tmp_path: Path
+    ) -> None:
+        segment = tmp_path / "segment.mp4"
+        container, packets = demux(h264_video)
+        target = RemuxStreamRecorder()
+
+        target.start_segment(str(segment))
+        target.record(packets[2:])
+        target.close()
+        container.close()
+
+        assert count_frames(segment) == NUMBER_OF_FRAMES - GOP_SIZE
+
+
+class TestPyAvRtspCapture:
+    @pytest.mark.asyncio
+    @patch(
+        "OTVision.detect.rtsp_input_source.is_connection_available",
+        return_value=True,
+    )
+    async def test_capture_attaches_packets_to_frames(
+        self, mock_is_connection_available: Mock, h264_video: Path
+    ) -> None:
+        datetime_provider = Mock()
+        datetime_provider.provide.return_value = OCCURRENCE
+        target = PyAvRtspCapture(
+            source=str(h264_video),
+            datetime_provider=datetime_provider,
+            policy=FrameDeliveryPolicy.EVERY_FRAME,
+            buffer_size=2,
+            record_packets=True,
+            retry_seconds=0,
+        )
+
+        target.start()
+        actual = [await target.next_frame() for _ in range(10)]
+        target.stop()
+        target.join(1)
+
+        frames = [frame for frame in actual if frame is not None]
+        assert len(frames) == 10
+        assert frames[0].data.shape == (HEIGHT, WIDTH, 3)
+        assert sum(len(frame.packets) for frame in frames) == 10
+        assert frames[0].packets[0].is_keyframe
+        assert (target.width, target.height) == (WIDTH, HEIGHT)
+
+    @pytest.mark.asyncio
+    @patch(
+        "OTVision.detect.rtsp_input_source.is_connection_available",
+        return_value=True,
+    )
+    async def test_capture_derives_occurrence_from_pts(
+        self, mock_is_connection_available: Mock, h264_video: Path
+    ) -> None:
+        datetime_provider = Mock()
+        datetime_provider.provide.return_value = OCCURRENCE
+        metrics = MetricsRegistry()
+        target = PyAvRtspCapture(
+            source=str(h264_video),
+            datetime_provider=datetime_provider,
+            policy=FrameDeliveryPolicy.EVERY_FRAME,
+            buffer_size=2,
+            record_packets=False,
+            retry_seconds=0,
+            pts_timestamps=True,
+            metrics=metrics,
+        )
+
+        target.start()
+        actual = [await target.next_frame() for _ in range(5)]
+        target.stop()
+        target.join(1)
+
+        assert [frame.occurrence for frame in actual if frame is not None] == [
+            OCCURRENCE + timedelta(milliseconds=50 * index) for index in range(5)
+        ]
+        decode_latency = metrics.histogram(
+            "otvision_stream_decode_latency_seconds", ""
+        ).snapshot()
+        assert decode_latency.count >= 5
+
+
+class TestPresentationClock:
+    def test_occurrence_keeps_spacing_of_timestamps(self) -> None:
+        datetime_provider = Mock()
+        datetime_provider.provide.side_effect = [
+            OCCURRENCE,
+            OCCURRENCE + timedelta(seconds=0.5),
+            OCCURRENCE + timedelta(seconds=0.5),
+        ]
+        target = PresentationClock(datetime_provider)
+
+        actual = [target.occurrence(pts) for pts in [10.0, 10.1, 10.2]]
+
+        assert actual == [
+            OCCURRENCE,
+            OCCURRENCE + timedelta(seconds=0.1),
+            OCCURRENCE + timedelta(seconds=0.2),
+        ]
+
+    def test_occurrence_anchors_again_on_discontinuity(self) -> None:
+        later = OCCURRENCE + timedelta(seconds=1)
+        datetime_provider = Mock()
+        datetime_provider.provide.side_effect = [OCCURRENCE, later, later]
+        target = PresentationClock(datetime_provider, max_drift_seconds=5)
+
+        actual = [target.occurrence(pts) for pts in [10.0, 2.0, 100.0]]
+
+        assert actual == [OCCURRENCE, later, later]
+
+    def test_reset_anchors_next_timestamp(self) -> None:
+        later = OCCURRENCE + timedelta(seconds=3)
+        datetime_provider = Mock()
+        datetime_provider.provide.side_effect = [OCCURRENCE, later]
+        target = PresentationClock(datetime_provider)
+
+        target.occurrence(10.0)
+        target.reset()
+
+        assert target.occurrence(10.1) == later
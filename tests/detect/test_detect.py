@@ -0,0 +1,26 @@
+from unittest.mock import Mock
+
+import pytest
+
+from OTVision.application.io_executor import IoExecutor
+from OTVision.detect.detect import OTVisionVideoDetect
+from OTVision.domain.detect_producer_consumer import DetectedFrameProducer
+
+
+async def fail():  # type: ignore
+    raise RuntimeError("stream failed")
+    yield
+
+
+class TestOTVisionVideoDetect:
+    @pytest.mark.asyncio
+    async def test_start_shuts_down_io_executor_when_detection_ends(self) -> None:
+        producer = Mock(spec=DetectedFrameProducer)
+        producer.produce.return_value = fail()
+        io_executor = Mock(spec=IoExecutor)
+        target = OTVisionVideoDetect(producer, io_executor=io_executor)
+
+        with pytest.raises(RuntimeError, match="stream failed"):
+            await target.start()
+
+        io_executor.shutdown.assert_called_once_with()
@@ -1,16 +1,28 @@
-from datetime import datetime
-from unittest.mock import AsyncMock, Mock
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 
 from OTVision.abstraction.observer import AsyncSubject
+from OTVision.application.config import Config
+from OTVision.application.io_executor import IoExecutor, IoJob
+from OTVision.application.metrics import MetricsRegistry
 from OTVision.detect.detected_frame_buffer import (
     DetectedFrameBuffer,
     DetectedFrameBufferEvent,
     FlushEvent,
 )
+from OTVision.detect.otdet_file_writer import OtdetFileWriter, OtdetFileWrittenEvent
 from OTVision.domain.detection import Detection
 from OTVision.domain.frame import DetectedFrame
+from tests.detect.test_otdet_file_writer import (
+    create_get_current_config,
+    create_get_object_detector_metadata,
+    create_object_detector_metadata,
+    create_otdet_builder,
+    create_save_path_provider,
+)
 from tests.utils.mocking import create_mocks
 
 
@@ -74,3 +86,81 @@ class TestDetectedFrameBuffer:
         )
 
         assert actual == expected
+
+    @pytest.mark.asyncio
+    async def test_records_buffered_frames_and_flushes(
+        self, subject_mock: AsyncMock
+    ) -> None:
+        metrics = MetricsRegistry()
+        target = DetectedFrameBuffer(subject=subject_mock, metrics=metrics)
+        frames: list[DetectedFrame] = create_mocks(2)
+
+        for frame in frames:
+            await target.buffer(frame)
+        buffered_frames = metrics.gauge("otvision_detected_frame_buffer_frames", "")
+        assert buffered_frames.value == 2
+
+        await target.on_flush(FlushEvent(source_metadata=Mock()))
+
+        assert buffered_frames.value == 0
+        flushes = metrics.counter("otvision_detected_frame_buffer_flushes_total", "")
+        assert flushes.value == 1
+
+
+class SlowIoExecutor(IoExecutor):
+    async def run[T](self, job: IoJob[T]) -> T:
+        await asyncio.sleep(0.05)
+        return job()
+
+
+@pytest.mark.asyncio
+@patch("OTVision.detect.otdet_file_writer.write_json")
+async def test_on_flush_waits_until_segment_has_been_written(
+    mock_write_json: Mock,
+) -> None:
+    subject = AsyncSubject[DetectedFrameBufferEvent]()
+    target = DetectedFrameBuffer(subject=subject)
+    otdet_file_writer = OtdetFileWriter(
+        subject=AsyncSubject[OtdetFileWrittenEvent](),
+        builder=create_otdet_builder(),
+        get_current_config=create_get_current_config(Config()),
+        current_object_detector_metadata=create_get_object_detector_metadata(
+            create_object_detector_metadata()
+        ),
+        save_path_provider=create_save_path_provider(),
+        io_executor=SlowIoExecutor(),
+    )
+    subject.register(otdet_file_writer.write)
+    flushed_segments = AsyncMock()
+    otdet_file_writer.register_observer(flushed_segments)
+
+    await target.buffer(create_frame("segment_1.mp4"))
+    await target.on_flush(create_flush_event("segment_1.mp4"))
+
+    mock_write_json.assert_called_once()
+    flushed_segments.assert_awaited_once()
+    written = flushed_segments.call_args.args[0]
+    assert written.otdet_builder_config.source == "segment_1.mp4"
+    assert written.number_of_frames == 1
+
+
+def create_frame(output: str) -> DetectedFrame:
+    return DetectedFrame(
+        no=1,
+        occurrence=datetime(2020, 1, 1, 12),
+        source="camera",
+        output=output,
+        detections=[],
+    )
+
+
+def create_flush_event(output: str) -> FlushEvent:
+    return FlushEvent.create(
+        source="camera",
+        output=output,
+        duration=timedelta(seconds=1),
+        source_height=1080,
+        source_width=1920,
+        source_fps=20.0,
+        start_time=datetime(2020, 1, 1, 12),
+    )
@@ -13,6 +13,7 @@ INPUT_SOURCE_GENERATOR = Mock()
 VIDEO_FILE_WRITER_GENERATOR = Mock()
 DETECTED_FRAME_GENERATOR = Mock()
 DETECTED_FRAME_BUFFER_GENERATOR = Mock()
+EVENT_RECORDER_GENERATOR = Mock()
 
 PRODUCER_WITH_VIDEO_WRITER = Mock()
 PRODUCER_WITHOUT_VIDEO_WRITER = Mock()
@@ -54,6 +55,31 @@ class TestDetectedFrameProducerFactory:
             DETECTED_FRAME_GENERATOR
         )
 
+    def test_create_with_event_recorder(self) -> None:
+        given_input_source = create_input_source()
+        given_video_file_writer = create_video_file_writer()
+        given_detection_filter = create_detection_filter()
+        given_event_recorder = create_event_recorder()
+        given_detected_frame_buffer = create_detected_frame_buffer()
+
+        target = DetectedFrameProducerFactory(
+            input_source=given_input_source,
+            video_writer_filter=given_video_file_writer,
+            detection_filter=given_detection_filter,
+            detected_frame_buffer=given_detected_frame_buffer,
+            get_current_config=create_get_current_config(write_video=True),
+            event_recorder=given_event_recorder,
+        )
+        producer = target.create()
+
+        assert producer == DETECTED_FRAME_BUFFER_GENERATOR
+        given_video_file_writer.filter.assert_not_called()
+        given_detection_filter.filter.assert_called_once_with(INPUT_SOURCE_GENERATOR)
+        given_event_recorder.filter.assert_called_once_with(DETECTED_FRAME_GENERATOR)
+        given_detected_frame_buffer.filter.assert_called_once_with(
+            EVENT_RECORDER_GENERATOR
+        )
+
 
 def create_input_source() -> Mock:
     mock = Mock(spec=InputSourceDetect)
@@ -73,6 +99,12 @@ def create_detected_frame_buffer() -> Mock:
     return mock
 
 
+def create_event_recorder() -> Mock:
+    mock = Mock(spec=Filter[DetectedFrame, DetectedFrame])
+    mock.filter.return_value = EVENT_RECORDER_GENERATOR
+    return mock
+
+
 def create_video_file_writer() -> Mock:
     mock = Mock(spec=Filter[Frame, Frame])
     mock.filter.return_value = VIDEO_FILE_WRITER_GENERATOR
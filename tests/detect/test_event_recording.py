@@ -0,0 +1,164 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import AsyncIterator
+from unittest.mock import Mock, call
+
+import numpy as np
+import pytest
+
+from OTVision.application.config import (
+    Config,
+    ConvertConfig,
+    EventRecordingConfig,
+    StreamConfig,
+)
+from OTVision.application.get_current_config import GetCurrentConfig
+from OTVision.detect.event_recording import EventTriggeredVideoWriter
+from OTVision.domain.current_config import CurrentConfig
+from OTVision.domain.frame import DetectedFrame
+from OTVision.domain.video_writer import VideoWriter
+from tests.utils.asynchronous.iterator import get_elements_of
+
+FPS = 10.0
+WIDTH = 6
+HEIGHT = 4
+OCCURRENCE = datetime(2020, 1, 1, 12, 0, 0)
+SAVE_DIR = Path("output")
+
+
+def create_frame(no: int, detected: bool) -> DetectedFrame:
+    return DetectedFrame(
+        no=no,
+        occurrence=OCCURRENCE + timedelta(milliseconds=100 * no),
+        source="rtsp://127.0.0.1:8554/test",
+        output="output/OTCamera1.mp4",
+        detections=[Mock()] if detected else [],
+        image=np.full((HEIGHT, WIDTH, 3), no, dtype=np.uint8),
+    )
+
+
+async def frames_of(frames: list[DetectedFrame]) -> AsyncIterator[DetectedFrame]:
+    for frame in frames:
+        yield frame
+
+
+def create_target(
+    video_writer: Mock, max_video_seconds: float = 300.0
+) -> EventTriggeredVideoWriter:
+    current_config = CurrentConfig(
+        Config(
+            convert=ConvertConfig(output_fps=FPS),
+            stream=StreamConfig(
+                name="OTCamera1",
+                source="rtsp://127.0.0.1:8554/test",
+                save_dir=SAVE_DIR,
+                flush_buffer_size=100,
+                event_recording=EventRecordingConfig(
+                    enabled=True,
+                    pre_roll_seconds=0.3,
+                    quiet_period_seconds=0.5,
+                    max_video_seconds=max_video_seconds,
+                ),
+            ),
+        )
+    )
+    return EventTriggeredVideoWriter(
+        video_writer=video_writer,
+        get_current_config=GetCurrentConfig(current_config),
+    )
+
+
+def written_frames(video_writer: Mock) -> list[int]:
+    return [int(args[0][0, 0, 0]) for args, _ in video_writer.write.call_args_list]
+
+
+def recorded_videos(video_writer: Mock) -> list[list[int]]:
+    videos: list[list[int]] = []
+    for name, args, _ in video_writer.method_calls:
+        if name == "open":
+            videos.append([])
+        elif name == "write":
+            videos[-1].append(int(args[0][0, 0, 0]))
+    return videos
+
+
+class TestEventTriggeredVideoWriter:
+    @pytest.mark.asyncio
+    async def test_records_pre_roll_until_quiet_period_has_passed(self) -> None:
+        video_writer = Mock(spec=VideoWriter)
+        target = create_target(video_writer)
+        given = [create_frame(no, detected=no in (6, 7)) for no in range(20)]
+
+        actual = await get_elements_of(target.filter(frames_of(given)))
+
+        assert actual == given
+        video_writer.open.assert_called_once_with(
+            str(SAVE_DIR / "OTCamera1_FR10_2020-01-01_12-00-00.mp4"),
+            width=WIDTH,
+            height=HEIGHT,
+            fps=FPS,
+        )
+        assert written_frames(video_writer) == list(range(3, 13))
+        video_writer.close.assert_called_once()
+        assert not target.is_recording
+
+    @pytest.mark.asyncio
+    async def test_names_each_video_after_its_first_frame(self) -> None:
+        video_writer = Mock(spec=VideoWriter)
+        target = create_target(video_writer)
+        given = [create_frame(no, detected=no in (0, 15)) for no in range(20)]
+
+        await get_elements_of(target.filter(frames_of(given)))
+
+        assert video_writer.open.call_args_list == [
+            call(
+                str(SAVE_DIR / "OTCamera1_FR10_2020-01-01_12-00-00.mp4"),
+                width=WIDTH,
+                height=HEIGHT,
+                fps=FPS,
+            ),
+            call(
+                str(SAVE_DIR / "OTCamera1_FR10_2020-01-01_12-00-01.mp4"),
+                width=WIDTH,
+                height=HEIGHT,
+                fps=FPS,
+            ),
+        ]
+        assert written_frames(video_writer) == list(range(0, 6)) + list(range(12, 20))
+        assert video_writer.close.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_does_not_record_without_detections(self) -> None:
+        video_writer = Mock(spec=VideoWriter)
+        target = create_target(video_writer)
+        given = [create_frame(no, detected=False) for no in range(20)]
+
+        await get_elements_of(target.filter(frames_of(given)))
+
+        video_writer.open.assert_not_called()
+        video_writer.write.assert_not_called()
+        video_writer.close.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_continues_long_events_in_new_videos(self) -> None:
+        video_writer = Mock(spec=VideoWriter)
+        target = create_target(video_writer, max_video_seconds=1.0)
+        given = [create_frame(no, detected=3 <= no < 28) for no in range(40)]
+
+        await get_elements_of(target.filter(frames_of(given)))
+
+        assert video_writer.open.call_args_list == [
+            call(
+                str(SAVE_DIR / f"OTCamera1_FR10_2020-01-01_12-00-0{second}.mp4"),
+                width=WIDTH,
+                height=HEIGHT,
+                fps=FPS,
+            )
+            for second in range(4)
+        ]
+        assert recorded_videos(video_writer) == [
+            list(range(0, 10)),
+            list(range(10, 20)),
+            list(range(20, 30)),
+            list(range(30, 33)),
+        ]
@@ -0,0 +1,157 @@
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from OTVision.application.config import (
+    Config,
+    ConvertConfig,
+    DetectConfig,
+    LoadSheddingConfig,
+    StreamConfig,
+    YoloConfig,
+)
+from OTVision.application.get_current_config import GetCurrentConfig
+from OTVision.application.update_current_config import UpdateCurrentConfig
+from OTVision.detect.load_shedding import LoadSheddingController, LoadSheddingDecision
+from OTVision.domain.current_config import CurrentConfig
+from OTVision.domain.frame import Frame
+from tests.utils.asynchronous.iterator import async_frame_generator
+
+OUTPUT = "output/OTCamera1"
+OCCURRENCE = datetime(2020, 1, 1, 12, 0, 0)
+IMG_SIZE = 640
+FRAME_INTERVAL = 0.05
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def create_frames(number_of_frames: int) -> list[Frame]:
+    return [
+        Frame(
+            data=None,
+            frame=no,
+            source="rtsp://127.0.0.1:8554/test",
+            output=OUTPUT,
+            occurrence=OCCURRENCE,
+        )
+        for no in range(1, number_of_frames + 1)
+    ]
+
+
+def create_current_config(enabled: bool = True) -> CurrentConfig:
+    return CurrentConfig(
+        Config(
+            convert=ConvertConfig(output_fps=1 / FRAME_INTERVAL),
+            detect=DetectConfig(yolo_config=YoloConfig(img_size=IMG_SIZE)),
+            stream=StreamConfig(
+                name="OTCamera1",
+                source="rtsp://127.0.0.1:8554/test",
+                save_dir=Path("output"),
+                flush_buffer_size=100,
+                load_shedding=LoadSheddingConfig(enabled=enabled, measurement_window=5),
+            ),
+        )
+    )
+
+
+def create_target(
+    current_config: CurrentConfig, clock: FakeClock
+) -> LoadSheddingController:
+    return LoadSheddingController(
+        get_current_config=GetCurrentConfig(current_config),
+        update_current_config=UpdateCurrentConfig(current_config),
+        clock=clock,
+    )
+
+
+async def process(
+    target: LoadSheddingController,
+    clock: FakeClock,
+    frames: list[Frame],
+    processing_time: Callable[[Frame], float],
+) -> list[Frame]:
+    processed = []
+    async for frame in target.filter(async_frame_generator(frames)):
+        clock.now += processing_time(frame)
+        processed.append(frame)
+    return processed
+
+
+class TestLoadSheddingController:
+    @pytest.mark.asyncio
+    async def test_drops_frames_if_processing_is_too_slow(self) -> None:
+        clock = FakeClock()
+        current_config = create_current_config()
+        target = create_target(current_config, clock)
+
+        actual = await process(target, clock, create_frames(20), lambda _: 0.0625)
+
+        assert target.drop_rate == 0.3
+        assert len(actual) == 16
+        assert current_config.get().detect.img_size == IMG_SIZE
+        report = target.pop_report(OUTPUT)
+        assert report is not None
+        assert report.processed_frames == 16
+        assert report.dropped_frames == 4
+        assert report.decisions == [
+            LoadSheddingDecision(
+                frame=1, occurrence=OCCURRENCE, load=0.0, drop_rate=0.0, img_size=640
+            ),
+            LoadSheddingDecision(
+                frame=5, occurrence=OCCURRENCE, load=1.25, drop_rate=0.3, img_size=640
+            ),
+        ]
+        assert target.pop_report(OUTPUT) is None
+
+    @pytest.mark.asyncio
+    async def test_lowers_img_size_if_max_drop_rate_does_not_suffice(self) -> None:
+        clock = FakeClock()
+        current_config = create_current_config()
+        target = create_target(current_config, clock)
+
+        await process(target, clock, create_frames(5), lambda _: 0.1)
+
+        assert target.drop_rate == 0.5
+        assert current_config.get().detect.img_size == 608
+
+    @pytest.mark.asyncio
+    async def test_raises_img_size_again_if_load_drops(self) -> None:
+        clock = FakeClock()
+        current_config = create_current_config()
+        target = create_target(current_config, clock)
+
+        await process(
+            target,
+            clock,
+            create_frames(20),
+            lambda frame: 0.1 if frame["frame"] <= 5 else 0.005,
+        )
+
+        assert target.drop_rate == 0.0
+        assert current_config.get().detect.img_size == IMG_SIZE
+        report = target.pop_report(OUTPUT)
+        assert report is not None
+        assert [decision.img_size for decision in report.decisions] == [
+            640,
+            608,
+            640,
+        ]
+
+    @pytest.mark.asyncio
+    async def test_passes_all_frames_if_disabled(self) -> None:
+        clock = FakeClock()
+        target = create_target(create_current_config(enabled=False), clock)
+        given = create_frames(20)
+
+        actual = await process(target, clock, given, lambda _: 1.0)
+
+        assert actual == given
+        assert target.pop_report(OUTPUT) is None
@@ -0,0 +1,161 @@
+from pathlib import Path
+from typing import AsyncIterator
+
+import av
+import numpy as np
+import pytest
+
+from OTVision.application.config import Config, DetectConfig, StreamConfig
+from OTVision.detect.load_testing import (
+    LoadTestReport,
+    SimulatedMultiStreamDetectBuilder,
+    StreamLoadReport,
+    StreamLoadTest,
+    create_simulated_streams,
+    percentile,
+)
+from OTVision.domain.current_config import CurrentConfig
+from OTVision.domain.frame import DetectedFrame, Frame, FrameKeys
+from OTVision.domain.object_detection import ObjectDetector, ObjectDetectorFactory
+
+FPS = 20
+WIDTH = 64
+HEIGHT = 48
+
+
+@pytest.fixture
+def video(tmp_path: Path) -> Path:
+    return write_video(tmp_path / "camera.mp4")
+
+
+def write_video(video_file: Path) -> Path:
+    with av.open(str(video_file), mode="w") as container:
+        stream = container.add_stream("libx264", rate=FPS)
+        stream.width = WIDTH  # type: ignore[attr-defined]
+        stream.height = HEIGHT  # type: ignore[attr-defined]
+        stream.pix_fmt = "yuv420p"  # type: ignore[attr-defined]
+        for index in range(10):
+            image = np.full((HEIGHT, WIDTH, 3), index * 20, dtype=np.uint8)
+            frame = av.VideoFrame.from_ndarray(image, format="rgb24")
+            container.mux(stream.encode(frame))  # type: ignore[attr-defined]
+        container.mux(stream.encode())  # type: ignore[attr-defined]
+    return video_file
+
+
+class NoDetections(ObjectDetector):
+    def __init__(self, config: DetectConfig) -> None:
+        self._config = config
+
+    @property
+    def config(self) -> DetectConfig:
+        return self._config
+
+    @property
+    def classifications(self) -> dict[int, str]:
+        return {0: "person"}
+
+    async def detect(
+        self, frames: AsyncIterator[Frame]
+    ) -> AsyncIterator[DetectedFrame]:
+        async for frame in frames:
+            yield DetectedFrame(
+                no=frame[FrameKeys.frame],
+                occurrence=frame[FrameKeys.occurrence],
+                source=frame[FrameKeys.source],
+                output=frame[FrameKeys.output],
+                detections=[],
+                image=frame[FrameKeys.data],
+            )
+
+    def preload(self) -> None:
+        pass
+
+
+class NoDetectionsFactory(ObjectDetectorFactory):
+    def create(self, config: DetectConfig) -> ObjectDetector:
+        return NoDetections(config)
+
+
+class TestStreamLoadTest:
+    @pytest.mark.asyncio
+    async def test_run_measures_each_stream(self, video: Path, tmp_path: Path) -> None:
+        config = Config()
+        config = Config(
+            streams=create_simulated_streams(config, 2, tmp_path / "output")
+        )
+        builder = SimulatedMultiStreamDetectBuilder(
+            video_file=video,
+            speed=2,
+            seed=1,
+            current_config=CurrentConfig(config),
+            object_detector_factory=NoDetectionsFactory(),
+        )
+
+        report = await StreamLoadTest(builder, duration_seconds=0.5).run()
+
+        assert [stream.name for stream in report.streams] == ["camera1", "camera2"]
+        for stream in report.streams:
+            assert stream.frames > 0
+            assert stream.fps > 0
+            assert 0 <= stream.latency_p50 <= stream.latency_max
+        assert report.to_text().startswith("Load test of 2 streams")
+
+
+class TestCreateSimulatedStreams:
+    def test_use_first_stream_as_template(self, tmp_path: Path) -> None:
+        template = StreamConfig(
+            name="OTCamera1",
+            source="rtsp://127.0.0.1:8554/test",
+            save_dir=Path("output"),
+            flush_buffer_size=600,
+            capture_buffer_size=3,
+        )
+
+        actual = create_simulated_streams(Config(streams=[template]), 2, tmp_path)
+
+        assert [stream.name for stream in actual] == ["camera1", "camera2"]
+        assert [stream.source for stream in actual] == [
+            "simulated://camera1",
+            "simulated://camera2",
+        ]
+        assert all(stream.save_dir == tmp_path for stream in actual)
+        assert all(stream.flush_buffer_size == 600 for stream in actual)
+        assert all(stream.capture_buffer_size == 3 for stream in actual)
+
+
+class TestLoadTestReport:
+    def test_memory_per_stream(self) -> None:
+        stream = StreamLoadReport(
+            name="camera1",
+            frames=10,
+            fps=5.0,
+            latency_p50=0.1,
+            latency_p95=0.2,
+            latency_p99=0.3,
+            latency_max=0.4,
+            capture_drops=0,
+            injected_drops=0,
+            stalls=0,
+            disconnects=0,
+        )
+        report = LoadTestReport(
+            duration_seconds=2.0,
+            streams=[stream, stream],
+            baseline_memory_bytes=100,
+            peak_memory_bytes=300,
+        )
+
+        assert report.memory_per_stream_bytes == 100
+
+
+@pytest.mark.parametrize(
+    "share, expected", [(0.5, 5.0), (0.95, 10.0), (0.0, 1.0), (1.0, 10.0)]
+)
+def test_percentile(share: float, expected: float) -> None:
+    values = [float(value) for value in range(10, 0, -1)]
+
+    assert percentile(values, share) == expected
+
+
+def test_percentile_of_no_values() -> None:
+    assert percentile([], 0.5) == 0.0
@@ -0,0 +1,201 @@
+from datetime import datetime, timedelta
+from typing import AsyncIterator
+
+import pytest
+
+from OTVision.abstraction.observer import AsyncSubject
+from OTVision.abstraction.pipes_and_filter import Filter
+from OTVision.detect.detected_frame_buffer import FlushEvent
+from OTVision.detect.multi_stream import (
+    MultiStreamDetectedFrameProducer,
+    MultiStreamInputSource,
+    StreamLane,
+)
+from OTVision.domain.frame import DetectedFrame, Frame, FrameKeys
+from OTVision.domain.input_source_detect import InputSourceDetect
+from tests.utils.asynchronous.iterator import get_elements_of
+
+SOURCE_A = "rtsp://127.0.0.1:8554/a"
+SOURCE_B = "rtsp://127.0.0.1:8554/b"
+OCCURRENCE = datetime(2020, 1, 1, 12, 0, 0)
+
+
+def create_flush_event(source: str) -> FlushEvent:
+    return FlushEvent.create(
+        source=source,
+        output=source,
+        duration=timedelta(seconds=1),
+        source_height=600,
+        source_width=800,
+        source_fps=20.0,
+        start_time=OCCURRENCE,
+    )
+
+
+class FakeInputSource(InputSourceDetect):
+    def __init__(
+        self, source: str, number_of_frames: int, flush_after: list[int]
+    ) -> None:
+        self.subject_flush = AsyncSubject[FlushEvent]()
+        self._source = source
+        self._number_of_frames = number_of_frames
+        self._flush_after = flush_after
+
+    async def produce(self) -> AsyncIterator[Frame]:
+        for no in range(1, self._number_of_frames + 1):
+            yield Frame(
+                data=None,
+                frame=no,
+                source=self._source,
+                output=self._source,
+                occurrence=OCCURRENCE,
+            )
+            if no in self._flush_after:
+                await self.subject_flush.notify(create_flush_event(self._source))
+                await self.subject_flush.wait_for_all_observers()
+
+
+class BatchingDetection(Filter[Frame, DetectedFrame]):
+    """Detects frames in batches like a detector running batched inference."""
+
+    def __init__(self, batch_size: int) -> None:
+        self.batch_size = batch_size
+        self.received: list[tuple[str, int]] = []
+
+    async def filter(self, pipe: AsyncIterator[Frame]) -> AsyncIterator[DetectedFrame]:
+        batch: list[Frame] = []
+        async for frame in pipe:
+            self.received.append((frame[FrameKeys.source], frame[FrameKeys.frame]))
+            batch.append(frame)
+            if len(batch) == self.batch_size:
+                for detected_frame in self._detect(batch):
+                    yield detected_frame
+                batch = []
+        for detected_frame in self._detect(batch):
+            yield detected_frame
+
+    def _detect(self, batch: list[Frame]) -> list[DetectedFrame]:
+        return [
+            DetectedFrame(
+                no=frame[FrameKeys.frame],
+                occurrence=frame[FrameKeys.occurrence],
+                source=frame[FrameKeys.source],
+                output=frame[FrameKeys.output],
+                detections=[],
+            )
+            for frame in batch
+        ]
+
+
+class RecordingFilter(Filter[DetectedFrame, DetectedFrame]):
+    def __init__(self) -> None:
+        self.seen: list[int] = []
+
+    async def filter(
+        self, pipe: AsyncIterator[DetectedFrame]
+    ) -> AsyncIterator[DetectedFrame]:
+        async for frame in pipe:
+            self.seen.append(frame.no)
+            yield frame
+
+
+class FlushRecorder:
+    def __init__(self, recording_filter: RecordingFilter) -> None:
+        self._recording_filter = recording_filter
+        self.seen_at_flush: list[list[int]] = []
+
+    async def on_flush(self, event: FlushEvent) -> None:
+        self.seen_at_flush.append(list(self._recording_filter.seen))
+
+
+def create_lane(
+    name: str, input_source: FakeInputSource, queue_size: int = 2
+) -> tuple[StreamLane, RecordingFilter, FlushRecorder]:
+    recording_filter = RecordingFilter()
+    flush_recorder = FlushRecorder(recording_filter)
+    lane = StreamLane(
+        name=name,
+        input_source=input_source,
+        subject=AsyncSubject[FlushEvent](),
+        detected_frame_filter=recording_filter,
+        queue_size=queue_size,
+    )
+    input_source.subject_flush.register(lane.on_flush)
+    lane.register(flush_recorder.on_flush)
+    return lane, recording_filter, flush_recorder
+
+
+class TestMultiStreamInputSource:
+    @pytest.mark.asyncio
+    async def test_produce_takes_streams_in_turns(self) -> None:
+        lane_a, _, _ = create_lane("a", FakeInputSource(SOURCE_A, 4, []), 10)
+        lane_b, _, _ = create_lane("b", FakeInputSource(SOURCE_B, 2, []), 10)
+        target = MultiStreamInputSource([lane_a, lane_b])
+
+        actual = await get_elements_of(target.produce())
+
+        assert [(frame["source"], frame["frame"]) for frame in actual] == [
+            (SOURCE_A, 1),
+            (SOURCE_B, 1),
+            (SOURCE_A, 2),
+            (SOURCE_B, 2),
+            (SOURCE_A, 3),
+            (SOURCE_A, 4),
+        ]
+
+
+class TestMultiStreamDetectedFrameProducer:
+    @pytest.mark.asyncio
+    async def test_produce_routes_detected_frames_to_their_streams(self) -> None:
+        lane_a, recorded_a, _ = create_lane("a", FakeInputSource(SOURCE_A, 5, []))
+        lane_b, recorded_b, _ = create_lane("b", FakeInputSource(SOURCE_B, 3, []))
+        detection = BatchingDetection(batch_size=2)
+        target = MultiStreamDetectedFrameProducer(
+            input_source=MultiStreamInputSource([lane_a, lane_b]),
+            detection_filter=detection,
+        )
+
+        actual = await get_elements_of(target.produce())
+
+        assert len(actual) == 8
+        assert recorded_a.seen == [1, 2, 3, 4, 5]
+        assert recorded_b.seen == [1, 2, 3]
+        assert sorted(detection.received) == sorted(
+            [(SOURCE_A, no) for no in range(1, 6)]
+            + [(SOURCE_B, no) for no in range(1, 4)]
+        )
+
+    @pytest.mark.asyncio
+    async def test_flush_is_notified_after_preceding_frames_are_detected(
+        self,
+    ) -> None:
+        lane_a, _, flushes_a = create_lane("a", FakeInputSource(SOURCE_A, 6, [3, 6]))
+        lane_b, _, flushes_b = create_lane("b", FakeInputSource(SOURCE_B, 4, [1, 4]))
+        target = MultiStreamDetectedFrameProducer(
+            input_source=MultiStreamInputSource([lane_a, lane_b]),
+            detection_filter=BatchingDetection(batch_size=4),
+        )
+
+        await get_elements_of(target.produce())
+
+        assert flushes_a.seen_at_flush == [[1, 2, 3], [1, 2, 3, 4, 5, 6]]
+        assert flushes_b.seen_at_flush == [[1], [1, 2, 3, 4]]
+
+    @pytest.mark.asyncio
+    async def test_produce_raises_errors_of_detection(self) -> None:
+        class FailingDetection(Filter[Frame, DetectedFrame]):
+            async def filter(
+                self, pipe: AsyncIterator[Frame]
+            ) -> AsyncIterator[DetectedFrame]:
+                async for _ in pipe:
+                    raise RuntimeError("detection failed")
+                    yield
+
+        lane, _, _ = create_lane("a", FakeInputSource(SOURCE_A, 3, []))
+        target = MultiStreamDetectedFrameProducer(
+            input_source=MultiStreamInputSource([lane]),
+            detection_filter=FailingDetection(),
+        )
+
+        with pytest.raises(RuntimeError, match="detection failed"):
+            await get_elements_of(target.produce())
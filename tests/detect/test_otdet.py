@@ -1,3 +1,4 @@
+import json
 from datetime import datetime, timedelta
 from pathlib import Path
 
@@ -13,7 +14,7 @@ from OTVision.detect.otdet import (
     parse_video_length,
     serialize_video_length,
 )
-from OTVision.domain.detection import Detection
+from OTVision.domain.detection import ClassMapping, Detection
 from OTVision.domain.frame import DetectedFrame
 
 GIVEN_ACTUAL_DURATION = timedelta(
@@ -75,23 +76,25 @@ def create_expected_metadata(config: OtdetBuilderConfig, number_of_frames: int)
 
 
 def create_expected_data(
-    frames: list[DetectedFrame],
+    frames: list[DetectedFrame], classifications: ClassMapping
 ) -> dict:
     """Create the expected data dictionary based on input detections."""
     data = {}
     for frame in frames:
         data[str(frame.no)] = {
             dataformat.DETECTIONS: [
-                create_expected_detection(d) for d in frame.detections
+                create_expected_detection(d, classifications) for d in frame.detections
             ],
             dataformat.OCCURRENCE: frame.occurrence.timestamp(),
         }
     return data
 
 
-def create_expected_detection(detection: Detection) -> dict:
+def create_expected_detection(
+    detection: Detection, classifications: ClassMapping
+) -> dict:
     return {
-        CLASS: detection.label,
+        CLASS: classifications[detection.class_id],
         CONFIDENCE: detection.conf,
         X: detection.x,
         Y: detection.y,
@@ -102,7 +105,7 @@ def create_expected_detection(detection: Detection) -> dict:
 
 def create_detected_frame(source: str, frame_number: int) -> DetectedFrame:
     detection = Detection(
-        label="person",
+        class_id=0,
         conf=0.9,
         x=100,
         y=200,
@@ -204,7 +207,7 @@ class TestOtdetBuilder:
         ]
         actual = builder._build_data(given)
 
-        expected = create_expected_data(given)
+        expected = create_expected_data(given, config.classifications)
         assert actual == expected
 
     def test_build_full_result(
@@ -230,7 +233,7 @@ class TestOtdetBuilder:
         expected_metadata = create_expected_metadata(
             config, number_of_frames=len(given)
         )
-        expected_data = create_expected_data(given)
+        expected_data = create_expected_data(given, config.classifications)
         expected = {
             dataformat.METADATA: expected_metadata,
             dataformat.DATA: expected_data,
@@ -271,6 +274,42 @@ class TestOtdetBuilder:
         assert actual == expected
 
 
+class TestOtdetBuilderConfig:
+    @pytest.mark.parametrize(
+        "expected_duration, load_shedding",
+        [(timedelta(seconds=300), None), (None, {"decisions": [{"frame": 10}]})],
+    )
+    def test_to_dict_and_from_dict_survive_json(
+        self, expected_duration: timedelta | None, load_shedding: dict | None
+    ) -> None:
+        config = OtdetBuilderConfig(
+            conf=0.5,
+            iou=0.4,
+            source="video.mp4",
+            video_width=1920,
+            video_height=1080,
+            expected_duration=expected_duration,
+            actual_duration=GIVEN_ACTUAL_DURATION,
+            recorded_fps=30.0,
+            recorded_start_date=datetime(2020, 1, 1, 12, 0, 0),
+            actual_fps=29.97,
+            actual_frames=1000,
+            detection_img_size=640,
+            normalized=True,
+            detection_model="model.pt",
+            half_precision=False,
+            chunksize=32,
+            classifications={0: "person", 1: "car"},
+            detect_start=300,
+            detect_end=None,
+            load_shedding=load_shedding,
+        )
+
+        actual = OtdetBuilderConfig.from_dict(json.loads(json.dumps(config.to_dict())))
+
+        assert actual == config
+
+
 class TestSerializeVideoLength:
     @pytest.mark.parametrize(
         "given_duration, expected",
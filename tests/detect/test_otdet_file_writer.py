@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta
 from pathlib import Path
+from threading import current_thread
 from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
@@ -10,11 +11,13 @@ from OTVision.application.detect.current_object_detector_metadata import (
     CurrentObjectDetectorMetadata,
 )
 from OTVision.application.get_current_config import GetCurrentConfig
+from OTVision.application.io_executor import IoExecutor
 from OTVision.application.otvision_save_path_provider import OtvisionSavePathProvider
 from OTVision.detect.detected_frame_buffer import (
     DetectedFrameBufferEvent,
     SourceMetadata,
 )
+from OTVision.detect.load_shedding import LoadSheddingController, LoadSheddingReport
 from OTVision.detect.otdet import OtdetBuilder, OtdetBuilderConfig
 from OTVision.detect.otdet_file_writer import OtdetFileWriter, OtdetFileWrittenEvent
 from OTVision.domain.object_detection import ObjectDetectorMetadata
@@ -67,12 +70,16 @@ class TestOtdetFileWriter:
             get_current_config=given_get_current_config,
             current_object_detector_metadata=given_get_object_detector_metadata,
             save_path_provider=given_save_path_provider,
+            io_executor=IoExecutor(),
         )
 
         await target.write(given_event)
 
         expected_detect_config = config.detect
         expected_source_metadata = given_event.source_metadata
+        given_get_object_detector_metadata.pop.assert_called_once_with(
+            expected_source_metadata.output
+        )
         expected_actual_frames = len(given_event.frames)
         actual_fps = (
             expected_actual_frames / expected_source_metadata.duration.total_seconds()
@@ -113,6 +120,63 @@ class TestOtdetFileWriter:
             overwrite=expected_detect_config.overwrite,
         )
 
+    @pytest.mark.asyncio
+    @patch("OTVision.detect.otdet_file_writer.write_json")
+    async def test_write_adds_load_shedding_report(
+        self, mock_write_json: Mock, given_event: DetectedFrameBufferEvent
+    ) -> None:
+        given_otdet_builder = create_otdet_builder()
+        given_report = LoadSheddingReport(processed_frames=8, dropped_frames=2)
+        given_load_shedding = Mock(spec=LoadSheddingController)
+        given_load_shedding.pop_report.return_value = given_report
+
+        target = OtdetFileWriter(
+            subject=create_subject(),
+            builder=given_otdet_builder,
+            get_current_config=create_get_current_config(
+                create_config(expected_duration=EXPECTED_DURATION)
+            ),
+            current_object_detector_metadata=create_get_object_detector_metadata(
+                create_object_detector_metadata()
+            ),
+            save_path_provider=create_save_path_provider(),
+            io_executor=IoExecutor(),
+            load_shedding=given_load_shedding,
+        )
+
+        await target.write(given_event)
+
+        given_load_shedding.pop_report.assert_called_once_with(
+            given_event.source_metadata.output
+        )
+        actual_config = given_otdet_builder.add_config.call_args.args[0]
+        assert actual_config.load_shedding == given_report.to_dict()
+
+    @pytest.mark.asyncio
+    @patch("OTVision.detect.otdet_file_writer.write_json")
+    async def test_write_builds_otdet_off_the_event_loop(
+        self, mock_write_json: Mock, given_event: DetectedFrameBufferEvent
+    ) -> None:
+        given_otdet_builder = create_otdet_builder()
+        given_otdet_builder.build.side_effect = lambda _: current_thread().name
+        target = OtdetFileWriter(
+            subject=create_subject(),
+            builder=given_otdet_builder,
+            get_current_config=create_get_current_config(
+                create_config(expected_duration=EXPECTED_DURATION)
+            ),
+            current_object_detector_metadata=create_get_object_detector_metadata(
+                create_object_detector_metadata()
+            ),
+            save_path_provider=create_save_path_provider(),
+            io_executor=IoExecutor(),
+        )
+
+        await target.write(given_event)
+
+        building_thread = mock_write_json.call_args.args[0]
+        assert building_thread.startswith("otvision-io")
+
 
 def create_otdet_builder() -> Mock:
     builder = Mock(spec=OtdetBuilder)
@@ -134,12 +198,13 @@ def create_get_current_config(config: Config) -> Mock:
 def create_object_detector_metadata() -> Mock:
     mock = Mock(spec=ObjectDetectorMetadata)
     type(mock).classifications = CLASS_MAPPING
+    type(mock).config = create_config(expected_duration=EXPECTED_DURATION).detect
     return mock
 
 
 def create_get_object_detector_metadata(object_detector_metadata: Mock) -> Mock:
     mock = Mock(spec=CurrentObjectDetectorMetadata)
-    mock.get.return_value = object_detector_metadata
+    mock.pop.return_value = object_detector_metadata
     return mock
 
 
@@ -1,3 +1,5 @@
+import asyncio
+import threading
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -6,11 +8,23 @@ from unittest.mock import AsyncMock, Mock, call, patch
 
 import pytest
 
-from OTVision.application.config import DATETIME_FORMAT, StreamConfig
+from OTVision.application.config import (
+    DATETIME_FORMAT,
+    FrameDeliveryPolicy,
+    StreamConfig,
+)
+from OTVision.application.event.new_otvision_config import NewOtvisionConfigEvent
 from OTVision.application.event.new_video_start import NewVideoStartEvent
 from OTVision.detect.detected_frame_buffer import FlushEvent
-from OTVision.detect.rtsp_input_source import Counter, RtspInputSource
-from OTVision.domain.frame import Frame
+from OTVision.detect.rtsp_input_source import (
+    CapturedFrame,
+    Counter,
+    InvalidRtspUrlError,
+    NoConfigurationFoundError,
+    RtspCapture,
+    RtspInputSource,
+)
+from OTVision.domain.frame import Frame, FrameKeys
 
 RTSP_INPUT_SOURCE_MODULE = "OTVision.detect.rtsp_input_source"
 START_TIME = datetime(2020, 1, 1, 12, 0, 0)
@@ -26,9 +40,6 @@ OUTPUT_FPS = 1.0
 
 FIRST_FRAME_DATA = Mock()
 SECOND_FRAME_DATA = Mock()
-THIRD_FRAME_DATA = Mock()
-FOURTH_FRAME_DATA = Mock()
-FIFTH_FRAME_DATA = Mock()
 
 FIRST_FRAME_RGB_DATA = Mock()
 THIRD_FRAME_RGB_DATA = Mock()
@@ -68,26 +79,16 @@ class Given:
     subject_new_video_start: Mock
     datetime_provider: Mock
     frame_counter: Counter
-    flush_buffer_size: int
     get_current_config: Mock
-    video_capture: Mock
-    video_capture_instance: Mock
-    convert_frame_to_rgb: Mock
+    capture_factory: Mock
+    capture: Mock
     config: Mock
 
 
 class TestRtspInputSource:
     @pytest.mark.asyncio
-    @patch(RTSP_INPUT_SOURCE_MODULE + ".is_connection_available", return_value=True)
-    @patch(RTSP_INPUT_SOURCE_MODULE + ".convert_frame_to_rgb")
-    @patch(RTSP_INPUT_SOURCE_MODULE + ".VideoCapture")
-    async def test_produce(
-        self,
-        mock_video_capture: Mock,
-        mock_convert_frame_to_rgb: Mock,
-        mock_is_connection_available: Mock,
-    ) -> None:
-        given = setup_with(create_given(mock_video_capture, mock_convert_frame_to_rgb))
+    async def test_produce(self) -> None:
+        given = setup_with(create_given())
         target = create_target(given)
         generator = target.produce()
         actual = list()
@@ -129,14 +130,11 @@ class TestRtspInputSource:
                 occurrence=FOURTH_OCCURRENCE,
             ),
         ]
-        assert given.datetime_provider.provide.call_count == 6
-        assert given.video_capture_instance.read.call_count == 5
-        assert given.convert_frame_to_rgb.call_args_list == [
-            call(FIRST_FRAME_DATA),
-            call(THIRD_FRAME_DATA),
-            call(FOURTH_FRAME_DATA),
-            call(FIFTH_FRAME_DATA),
-        ]
+        assert given.datetime_provider.provide.call_count == 2
+        given.capture_factory.create.assert_called_once_with(STREAM_CONFIG)
+        given.capture.start.assert_called_once()
+        assert given.capture.next_frame.await_count == 4
+        assert given.capture.stop.call_count == 2
         assert (
             given.subject_flush_event.notify.call_args_list
             == create_expected_flush_events()
@@ -145,30 +143,208 @@ class TestRtspInputSource:
             call(create_expected_new_video_start(FIRST_OUTPUT)),
             call(create_expected_new_video_start(FOURTH_OUTPUT)),
         ]
+
+    @pytest.mark.asyncio
+    async def test_new_config_starts_new_segment_before_next_frame(self) -> None:
+        given = setup_with(create_given())
+        target = create_target(given)
+
+        generator = target.produce()
+        first = await anext(generator)
+        await target.notify_new_config(NewOtvisionConfigEvent())
+        given.subject_flush_event.notify.assert_not_called()
+        second = await anext(generator)
+
+        assert first[FrameKeys.output] == FIRST_OUTPUT
+        assert second[FrameKeys.frame] == 1
+        assert second[FrameKeys.output] == str(
+            STREAM_SAVE_DIR / f"{STREAM_NAME}_FR{round(OUTPUT_FPS)}"
+            f"_{SECOND_OCCURRENCE.strftime(DATETIME_FORMAT)}.mp4"
+        )
+        flushed = given.subject_flush_event.notify.call_args.args[0]
+        assert flushed.source_metadata.output == FIRST_OUTPUT
+        assert flushed.source_metadata.duration == timedelta(seconds=1)
+
+    @pytest.mark.asyncio
+    async def test_dropped_frames_include_closed_captures(self) -> None:
+        given = setup_with(create_given())
+        given.capture.dropped_frames = 3
+        target = create_target(given)
+
+        generator = target.produce()
+        await anext(generator)
+        target.stop()
+        with pytest.raises(StopAsyncIteration):
+            await anext(generator)
+
+        assert target.dropped_frames == 3
+
+    @pytest.mark.asyncio
+    async def test_produce_records_packets(self) -> None:
+        given = setup_with(create_given())
+        packets = [(Mock(),), (), (Mock(), Mock()), (Mock(),)]
+        given.capture.next_frame = AsyncMock(
+            side_effect=[
+                CapturedFrame(Mock(), occurrence, frame_packets)
+                for occurrence, frame_packets in zip(
+                    [
+                        FIRST_OCCURRENCE,
+                        SECOND_OCCURRENCE,
+                        THIRD_OCCURRENCE,
+                        FOURTH_OCCURRENCE,
+                    ],
+                    packets,
+                )
+            ]
+        )
+        recorder = Mock()
+        target = create_target(given, recorder=recorder)
+
+        generator = target.produce()
+        for _ in packets:
+            await anext(generator)
+        target.stop()
+        with pytest.raises(StopAsyncIteration):
+            await anext(generator)
+
+        assert recorder.method_calls == [
+            call.start_segment(FIRST_OUTPUT),
+            call.record(packets[0]),
+            call.record(packets[1]),
+            call.start_segment(FOURTH_OUTPUT),
+            call.record(packets[2]),
+            call.record(packets[3]),
+            call.close(),
+        ]
+
+    def test_stream_config_by_name(self) -> None:
+        given = create_given()
+        other_stream = StreamConfig(
+            name="other",
+            source="rtsp://127.0.0.1:8554/other",
+            save_dir=STREAM_SAVE_DIR,
+            flush_buffer_size=FLUSH_BUFFER_SIZE,
+        )
+        given.config.streams = [other_stream, STREAM_CONFIG]
+        given.get_current_config.get.return_value = given.config
+        target = create_target(given, stream_name=STREAM_NAME)
+
+        assert target.stream_config == STREAM_CONFIG
+
+    def test_stream_config_by_unknown_name(self) -> None:
+        given = create_given()
+        given.config.streams = [STREAM_CONFIG]
+        given.get_current_config.get.return_value = given.config
+        target = create_target(given, stream_name="unknown")
+
+        with pytest.raises(NoConfigurationFoundError):
+            target.stream_config
+
+
+class TestRtspCapture:
+    @pytest.mark.asyncio
+    @patch(RTSP_INPUT_SOURCE_MODULE + ".is_connection_available", return_value=True)
+    @patch(RTSP_INPUT_SOURCE_MODULE + ".convert_frame_to_rgb")
+    @patch(RTSP_INPUT_SOURCE_MODULE + ".VideoCapture")
+    async def test_every_frame_waits_for_consumer(
+        self,
+        mock_video_capture: Mock,
+        mock_convert_frame_to_rgb: Mock,
+        mock_is_connection_available: Mock,
+    ) -> None:
+        frames = [Mock() for _ in range(5)]
+        read_all = threading.Event()
+        mock_video_capture.return_value = create_video_capture(frames, read_all)
+        mock_convert_frame_to_rgb.side_effect = lambda frame: frame
+        target = create_capture(FrameDeliveryPolicy.EVERY_FRAME, buffer_size=2)
+
+        target.start()
+        actual = [await next_data(target) for _ in frames]
+        await asyncio.to_thread(read_all.wait, 1)
+        target.stop()
+        target.join(1)
+
+        assert actual == frames
+        assert target.dropped_frames == 0
+        assert await target.next_frame() is None
+        assert (target.width, target.height) == (WIDTH, HEIGHT)
+        mock_video_capture.assert_called_once_with(RTSP_URL)
         mock_is_connection_available.assert_called_once_with(RTSP_URL)
 
+    @pytest.mark.asyncio
     @patch(RTSP_INPUT_SOURCE_MODULE + ".is_connection_available", return_value=True)
     @patch(RTSP_INPUT_SOURCE_MODULE + ".convert_frame_to_rgb")
     @patch(RTSP_INPUT_SOURCE_MODULE + ".VideoCapture")
-    def test_reconnecting_on_consecutive_read_fails(
+    async def test_latest_frame_drops_oldest_frames(
         self,
         mock_video_capture: Mock,
         mock_convert_frame_to_rgb: Mock,
         mock_is_connection_available: Mock,
+    ) -> None:
+        frames = [Mock() for _ in range(5)]
+        read_all = threading.Event()
+        mock_video_capture.return_value = create_video_capture(frames, read_all)
+        mock_convert_frame_to_rgb.side_effect = lambda frame: frame
+        target = create_capture(FrameDeliveryPolicy.LATEST_FRAME, buffer_size=2)
+
+        target.start()
+        await asyncio.to_thread(read_all.wait, 1)
+        target.stop()
+        target.join(1)
+
+        assert [await next_data(target), await next_data(target)] == frames[-2:]
+        assert await target.next_frame() is None
+        assert target.dropped_frames == 3
+
+    @pytest.mark.asyncio
+    async def test_latest_frame_keeps_packets_of_dropped_frames(self) -> None:
+        packets = [Mock() for _ in range(4)]
+        target = create_capture(FrameDeliveryPolicy.LATEST_FRAME, buffer_size=1)
+        target.start()
+        target.stop()
+
+        for packet in packets:
+            target._put(CapturedFrame(Mock(), FIRST_OCCURRENCE, (packet,)))
+
+        frame = await target.next_frame()
+        assert frame is not None
+        assert frame.packets == tuple(packets)
+        assert target.dropped_frames == 3
+
+    @pytest.mark.asyncio
+    @patch(
+        RTSP_INPUT_SOURCE_MODULE + ".is_connection_available",
+        side_effect=InvalidRtspUrlError,
+    )
+    async def test_next_frame_raises_capture_errors(
+        self, mock_is_connection_available: Mock
+    ) -> None:
+        target = create_capture(FrameDeliveryPolicy.EVERY_FRAME, buffer_size=2)
+
+        target.start()
+        target.join(1)
+
+        with pytest.raises(InvalidRtspUrlError):
+            await target.next_frame()
+
+    @patch(RTSP_INPUT_SOURCE_MODULE + ".is_connection_available", return_value=True)
+    @patch(RTSP_INPUT_SOURCE_MODULE + ".VideoCapture")
+    def test_reconnecting_on_consecutive_read_fails(
+        self,
+        mock_video_capture: Mock,
+        mock_is_connection_available: Mock,
     ) -> None:
         first_vc_instance = Mock()
         second_vc_instance = Mock()
         third_vc_instance = Mock()
 
-        given = create_given(mock_video_capture, mock_convert_frame_to_rgb)
-        given = setup_with(given, video_capture_is_opened=False)
-
         # This triggers the reconnecting
         first_vc_instance.read.side_effect = [
             (True, FIRST_FRAME_DATA),
             (False, None),
             (False, None),
         ]
+        first_vc_instance.isOpened.return_value = True
 
         # This simulates the first re-connect try that fails
         second_vc_instance.isOpened.return_value = False
@@ -176,15 +352,18 @@ class TestRtspInputSource:
         # This simulates the second re-connect try that succeeds
         third_vc_instance.read.side_effect = [(True, SECOND_FRAME_DATA)]
         third_vc_instance.isOpened.return_value = True
+        first_vc_instance.get.return_value = third_vc_instance.get.return_value = 0
 
-        given.video_capture.side_effect = [
+        mock_video_capture.side_effect = [
             first_vc_instance,
             second_vc_instance,
             third_vc_instance,
         ]
 
-        target = create_target(given)
-        target._read_fail_threshold = 2
+        target = create_capture(
+            FrameDeliveryPolicy.EVERY_FRAME, buffer_size=2, read_fail_threshold=2
+        )
+        target._connect()
 
         actual = list()
         actual.append(target._read_next_frame())  # First read successful
@@ -196,8 +375,8 @@ class TestRtspInputSource:
         first_vc_instance.release.assert_called_once()
         assert first_vc_instance.read.call_count == 3
         second_vc_instance.isOpened.assert_called_once()
+        second_vc_instance.release.assert_called_once()
         second_vc_instance.read.assert_not_called()
-        assert second_vc_instance.read.call_count == 0
 
         third_vc_instance.release.assert_not_called()
         assert third_vc_instance.read.call_count == 1
@@ -210,71 +389,92 @@ class TestRtspInputSource:
         ]
 
 
-def create_given(video_capture: Mock, convert_frame_to_rgb: Mock) -> Given:
+def create_video_capture(frames: list[Mock], read_all: threading.Event) -> Mock:
+    """Creates a video capture that returns the given frames and then fails to read
+    until the capture is stopped.
+    """
+    remaining = list(frames)
+
+    def read() -> tuple[bool, Mock | None]:
+        if remaining:
+            return True, remaining.pop(0)
+        read_all.set()
+        return False, None
+
+    video_capture = Mock()
+    video_capture.isOpened.return_value = True
+    video_capture.read.side_effect = read
+    video_capture.get.side_effect = [WIDTH, HEIGHT]
+    return video_capture
+
+
+def create_capture(
+    policy: FrameDeliveryPolicy,
+    buffer_size: int,
+    read_fail_threshold: int = 1000,
+) -> RtspCapture:
+    datetime_provider = Mock()
+    datetime_provider.provide.return_value = FIRST_OCCURRENCE
+    return RtspCapture(
+        source=RTSP_URL,
+        datetime_provider=datetime_provider,
+        policy=policy,
+        buffer_size=buffer_size,
+        read_fail_threshold=read_fail_threshold,
+        retry_seconds=0,
+    )
+
+
+async def next_data(capture: RtspCapture) -> Any:
+    frame = await capture.next_frame()
+    assert frame is not None
+    return frame.data
+
+
+def create_given() -> Given:
     return Given(
         subject_flush_event=AsyncMock(),
         subject_new_video_start=Mock(),
         datetime_provider=Mock(),
         frame_counter=Counter(),
-        flush_buffer_size=FLUSH_BUFFER_SIZE,
         get_current_config=Mock(),
-        video_capture=video_capture,
-        video_capture_instance=Mock(),
-        convert_frame_to_rgb=convert_frame_to_rgb,
+        capture_factory=Mock(),
+        capture=Mock(),
         config=Mock(),
     )
 
 
-def create_target(given: Given) -> RtspInputSource:
+def create_target(
+    given: Given, stream_name: str | None = None, recorder: Mock | None = None
+) -> RtspInputSource:
     return RtspInputSource(
         subject_flush=given.subject_flush_event,
         subject_new_video_start=given.subject_new_video_start,
         datetime_provider=given.datetime_provider,
         frame_counter=given.frame_counter,
         get_current_config=given.get_current_config,
+        capture_factory=given.capture_factory,
+        stream_name=stream_name,
+        recorder=recorder,
     )
 
 
-def setup_with(given: Given, video_capture_is_opened: bool = True) -> Given:
+def setup_with(given: Given) -> Given:
     frames = [
-        (True, FIRST_FRAME_DATA),
-        (False, SECOND_FRAME_DATA),
-        (True, THIRD_FRAME_DATA),
-        (True, FOURTH_FRAME_DATA),
-        (True, FIFTH_FRAME_DATA),
-    ]
-
-    given.video_capture_instance.isOpened.return_value = video_capture_is_opened
-    given.video_capture_instance.read.side_effect = frames
-    given.video_capture_instance.get.side_effect = [
-        WIDTH,
-        HEIGHT,
-        WIDTH,
-        HEIGHT,
-        WIDTH,
-        HEIGHT,
-        WIDTH,
-        HEIGHT,
-        WIDTH,
-        HEIGHT,
-    ]
-
-    given.datetime_provider.provide.side_effect = [
-        INIT_TIME,
-        START_TIME,
-        FIRST_OCCURRENCE,
-        SECOND_OCCURRENCE,
-        THIRD_OCCURRENCE,
-        FOURTH_OCCURRENCE,
-    ]
-    given.video_capture.return_value = given.video_capture_instance
-
-    given.convert_frame_to_rgb.side_effect = [
-        FIRST_FRAME_RGB_DATA,
-        THIRD_FRAME_RGB_DATA,
-        FOURTH_FRAME_RGB_DATA,
-        FIFTH_FRAME_RGB_DATA,
+        CapturedFrame(FIRST_FRAME_RGB_DATA, FIRST_OCCURRENCE),
+        # A failed read does not produce a frame, the capture keeps on waiting.
+        CapturedFrame(THIRD_FRAME_RGB_DATA, SECOND_OCCURRENCE),
+        CapturedFrame(FOURTH_FRAME_RGB_DATA, THIRD_OCCURRENCE),
+        CapturedFrame(FIFTH_FRAME_RGB_DATA, FOURTH_OCCURRENCE),
     ]
+    given.capture.source = RTSP_URL
+    given.capture.width = WIDTH
+    given.capture.height = HEIGHT
+    given.capture.dropped_frames = 0
+    given.capture.next_frame = AsyncMock(side_effect=frames)
+    given.capture_factory.create.return_value = given.capture
+
+    given.datetime_provider.provide.side_effect = [INIT_TIME, START_TIME]
     given.config.stream = STREAM_CONFIG
     given.config.convert.output_fps = OUTPUT_FPS
     given.get_current_config.get.return_value = given.config
@@ -0,0 +1,106 @@
+from datetime import datetime
+from pathlib import Path
+from random import Random
+from time import monotonic
+from unittest.mock import Mock
+
+import av
+import numpy as np
+import pytest
+
+from OTVision.application.config import FrameDeliveryPolicy
+from OTVision.detect.simulated_camera import SimulatedCameraFaults, SimulatedCapture
+
+NUMBER_OF_FRAMES = 10
+FPS = 20
+WIDTH = 64
+HEIGHT = 48
+OCCURRENCE = datetime(2020, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def video(tmp_path: Path) -> Path:
+    video_file = tmp_path / "camera.mp4"
+    with av.open(str(video_file), mode="w") as container:
+        stream = container.add_stream("libx264", rate=FPS)
+        stream.width = WIDTH  # type: ignore[attr-defined]
+        stream.height = HEIGHT  # type: ignore[attr-defined]
+        stream.pix_fmt = "yuv420p"  # type: ignore[attr-defined]
+        for index in range(NUMBER_OF_FRAMES):
+            image = np.full((HEIGHT, WIDTH, 3), index * 20, dtype=np.uint8)
+            frame = av.VideoFrame.from_ndarray(image, format="rgb24")
+            container.mux(stream.encode(frame))  # type: ignore[attr-defined]
+        container.mux(stream.encode())  # type: ignore[attr-defined]
+    return video_file
+
+
+def create_target(
+    video: Path,
+    speed: float = 1.0,
+    faults: SimulatedCameraFaults = SimulatedCameraFaults(),
+) -> SimulatedCapture:
+    datetime_provider = Mock()
+    datetime_provider.provide.return_value = OCCURRENCE
+    return SimulatedCapture(
+        source="simulated://camera1",
+        video_file=video,
+        datetime_provider=datetime_provider,
+        policy=FrameDeliveryPolicy.EVERY_FRAME,
+        buffer_size=4,
+        speed=speed,
+        faults=faults,
+        random=Random(42),
+    )
+
+
+async def capture(target: SimulatedCapture, number_of_frames: int) -> list:
+    target.start()
+    frames = [await target.next_frame() for _ in range(number_of_frames)]
+    target.stop()
+    target.join(1)
+    return frames
+
+
+class TestSimulatedCapture:
+    @pytest.mark.asyncio
+    async def test_replay_video_at_its_frame_rate(self, video: Path) -> None:
+        target = create_target(video)
+
+        start = monotonic()
+        frames = await capture(target, 5)
+        elapsed = monotonic() - start
+
+        assert all(frame is not None for frame in frames)
+        assert frames[0].data.shape == (HEIGHT, WIDTH, 3)
+        assert elapsed >= 4 / FPS
+        assert (target.width, target.height) == (WIDTH, HEIGHT)
+
+    @pytest.mark.asyncio
+    async def test_replay_video_from_start_once_it_ended(self, video: Path) -> None:
+        target = create_target(video, speed=10)
+
+        frames = await capture(target, NUMBER_OF_FRAMES + 2)
+
+        assert all(frame is not None for frame in frames)
+        assert np.array_equal(frames[NUMBER_OF_FRAMES].data, frames[0].data)
+
+    @pytest.mark.asyncio
+    async def test_inject_faults(self, video: Path) -> None:
+        target = create_target(
+            video,
+            speed=10,
+            faults=SimulatedCameraFaults(
+                drop_probability=0.3,
+                stall_probability=0.2,
+                stall_seconds=0.01,
+                disconnect_probability=0.1,
+                disconnect_seconds=0.01,
+            ),
+        )
+
+        frames = await capture(target, 20)
+
+        assert all(frame is not None for frame in frames)
+        assert target.injected_drops > 0
+        assert target.stalls > 0
+        assert target.disconnects > 0
@@ -0,0 +1,147 @@
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from OTVision.application.config import Config
+from OTVision.detect.load_testing import (
+    SimulatedMultiStreamDetectBuilder,
+    create_simulated_streams,
+)
+from OTVision.detect.soak_testing import (
+    MIB,
+    ResourceSample,
+    ResourceSampler,
+    SoakTestReport,
+    SoakThresholds,
+    StreamSoakTest,
+)
+from OTVision.domain.current_config import CurrentConfig
+from tests.detect.test_load_testing import NoDetectionsFactory, write_video
+
+
+class TestStreamSoakTest:
+    @pytest.mark.asyncio
+    async def test_run_samples_resources(self, tmp_path: Path) -> None:
+        config = Config()
+        config = Config(
+            streams=create_simulated_streams(config, 2, tmp_path / "output")
+        )
+        builder = SimulatedMultiStreamDetectBuilder(
+            video_file=write_video(tmp_path / "camera.mp4"),
+            speed=4,
+            current_config=CurrentConfig(config),
+            object_detector_factory=NoDetectionsFactory(),
+        )
+        target = StreamSoakTest(
+            builder,
+            duration_seconds=0.6,
+            sample_interval_seconds=0.2,
+            warmup_seconds=0.2,
+            sampler=ResourceSampler(trace_allocations=True),
+        )
+
+        report = await target.run()
+
+        assert len(report.samples) >= 2
+        assert report.samples[0].elapsed_seconds == 0
+        assert report.samples[-1].elapsed_seconds >= 0.6
+        assert report.samples[-1].frames > 0
+        assert all(sample.threads > 0 for sample in report.samples)
+        assert all(sample.traced_memory_bytes for sample in report.samples)
+        assert report.to_text().startswith(
+            f"Soak test with {len(report.samples)} samples"
+        )
+
+
+class TestResourceSampler:
+    def test_measure_growth_relative_to_first_sample(self) -> None:
+        object_counter = Mock(
+            side_effect=[
+                {"Frame": 10, "dict": 100},
+                {"Frame": 50, "dict": 90, "Segment": 3},
+            ]
+        )
+        target = ResourceSampler(
+            rss_probe=Mock(side_effect=[100 * MIB, 120 * MIB]),
+            open_files_probe=Mock(side_effect=[10, 11]),
+            thread_probe=Mock(side_effect=[5, 5]),
+            object_counter=object_counter,
+        )
+
+        first = target.sample(elapsed_seconds=0.0, frames=0)
+        second = target.sample(elapsed_seconds=60.0, frames=1200)
+
+        assert first.object_growth_by_type == {}
+        assert second == ResourceSample(
+            elapsed_seconds=60.0,
+            frames=1200,
+            rss_bytes=120 * MIB,
+            open_files=11,
+            threads=5,
+            objects=143,
+            object_growth_by_type={"Frame": 40, "Segment": 3},
+        )
+
+
+def create_sample(
+    elapsed_seconds: float,
+    frames: int,
+    rss_bytes: int = 100 * MIB,
+    open_files: int = 10,
+    threads: int = 5,
+    object_growth_by_type: dict[str, int] | None = None,
+) -> ResourceSample:
+    return ResourceSample(
+        elapsed_seconds=elapsed_seconds,
+        frames=frames,
+        rss_bytes=rss_bytes,
+        open_files=open_files,
+        threads=threads,
+        objects=1000,
+        object_growth_by_type=object_growth_by_type or {},
+    )
+
+
+class TestSoakTestReport:
+    def test_pass_within_thresholds(self) -> None:
+        report = SoakTestReport(
+            samples=[
+                create_sample(0, 0),
+                create_sample(60, 1200, rss_bytes=110 * MIB),
+                create_sample(120, 2400, open_files=12),
+            ],
+            thresholds=SoakThresholds(),
+        )
+
+        assert report.passed
+        assert report.throughput_drop == 0
+        assert report.to_text().endswith("PASSED")
+
+    def test_fail_on_growth_beyond_thresholds(self) -> None:
+        report = SoakTestReport(
+            samples=[
+                create_sample(0, 0),
+                create_sample(60, 1200),
+                create_sample(
+                    120,
+                    1800,
+                    rss_bytes=200 * MIB,
+                    open_files=40,
+                    threads=12,
+                    object_growth_by_type={"Frame": 20_000, "dict": 10},
+                ),
+            ],
+            thresholds=SoakThresholds(),
+        )
+
+        assert report.throughput_drop == pytest.approx(0.5)
+        assert report.violations == [
+            "Resident memory grew by 100.0 MiB (max 64.0 MiB)",
+            "Objects of Frame grew by 20000 (max 10000)",
+            "Open files grew by 30 (max 16)",
+            "Threads grew by 7 (max 4)",
+            "Throughput dropped by 50% (max 20%)",
+        ]
+        assert not report.passed
+        assert "FAILED" in report.to_text()
@@ -0,0 +1,249 @@
+from datetime import datetime, timedelta
+from typing import AsyncIterator
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+import torch
+
+from OTVision.abstraction.observer import AsyncSubject
+from OTVision.application.config import Config, DetectConfig, YoloConfig
+from OTVision.application.detect.detected_frame_factory import DetectedFrameFactory
+from OTVision.detect.detected_frame_buffer import (
+    DetectedFrameBuffer,
+    DetectedFrameBufferEvent,
+    FlushEvent,
+)
+from OTVision.detect.yolo_direct import Letterbox, YoloDirectDetector
+from OTVision.domain.detection import Detection
+from OTVision.domain.frame import Frame
+from tests.utils.asynchronous.iterator import async_frame_generator, get_elements_of
+
+SOURCE = "path/to/video.mp4"
+IMAGE_HEIGHT = 180
+IMAGE_WIDTH = 320
+
+
+class FakeDetectionModel(torch.nn.Module):
+    """Returns the same raw predictions for each image of a batch.
+
+    The network input of a 320x180 image with image size 320 is 320x192, i.e. the
+    image is padded with 6 pixels at the top.
+    """
+
+    def __init__(self, predictions: torch.Tensor) -> None:
+        super().__init__()
+        self.names = {0: "person", 1: "car"}
+        self.stride = torch.tensor([8.0, 16.0, 32.0])
+        self.predictions = predictions
+        self.inputs: list[torch.Tensor] = []
+
+    def fuse(self, verbose: bool = True) -> "FakeDetectionModel":
+        return self
+
+    def forward(self, batch: torch.Tensor) -> tuple[torch.Tensor, list]:
+        self.inputs.append(batch)
+        return self.predictions.expand(batch.shape[0], -1, -1), []
+
+
+def create_predictions() -> torch.Tensor:
+    """Raw predictions with rows of x, y, w, h and scores of both classes."""
+    return torch.tensor(
+        [
+            [100.0, 106.0, 20.0, 40.0, 0.875, 0.125],
+            # overlaps with the first box, suppressed although of another class
+            [101.0, 106.0, 20.0, 40.0, 0.125, 0.75],
+            [200.0, 56.0, 40.0, 20.0, 0.25, 0.625],
+            # below confidence threshold
+            [50.0, 50.0, 10.0, 10.0, 0.125, 0.125],
+        ]
+    ).T.unsqueeze(0)
+
+
+def create_frame(no: int, has_data: bool = True, output: str = SOURCE) -> Frame:
+    data = (
+        np.zeros((IMAGE_HEIGHT, IMAGE_WIDTH, 3), dtype=np.uint8) if has_data else None
+    )
+    return Frame(
+        data=data,
+        frame=no,
+        source=SOURCE,
+        output=output,
+        occurrence=datetime(2020, 1, 1),
+    )
+
+
+def create_flush_event(output: str) -> FlushEvent:
+    return FlushEvent.create(
+        source=SOURCE,
+        output=output,
+        duration=timedelta(seconds=1),
+        source_height=IMAGE_HEIGHT,
+        source_width=IMAGE_WIDTH,
+        source_fps=20.0,
+        start_time=datetime(2020, 1, 1),
+    )
+
+
+def create_target(
+    model: FakeDetectionModel,
+    chunk_size: int = 1,
+    normalized: bool = False,
+    flushes_in_band: bool = False,
+) -> YoloDirectDetector:
+    config = Config(
+        detect=DetectConfig(
+            yolo_config=YoloConfig(
+                conf=0.25,
+                iou=0.45,
+                img_size=320,
+                chunk_size=chunk_size,
+                normalized=normalized,
+            )
+        )
+    )
+    get_current_config = Mock()
+    get_current_config.get.return_value = config
+    return YoloDirectDetector(
+        module=model,  # type: ignore[arg-type]
+        get_current_config=get_current_config,
+        detected_frame_factory=DetectedFrameFactory(),
+        flushes_in_band=flushes_in_band,
+    )
+
+
+EXPECTED_DETECTIONS = [
+    Detection(class_id=0, conf=0.875, x=90.0, y=80.0, w=20.0, h=40.0),
+    Detection(class_id=1, conf=0.625, x=180.0, y=40.0, w=40.0, h=20.0),
+]
+
+
+class TestLetterbox:
+    @pytest.mark.parametrize(
+        "height, width, input_size, expected_shape",
+        [
+            (1080, 1920, 640, (384, 640)),
+            (180, 320, 320, (192, 320)),
+            (320, 320, 320, (320, 320)),
+        ],
+    )
+    def test_apply_pads_to_multiple_of_stride(
+        self, height: int, width: int, input_size: int, expected_shape: tuple
+    ) -> None:
+        target = Letterbox.create(height, width, input_size, stride=32)
+
+        actual = target.apply(np.zeros((height, width, 3), dtype=np.uint8))
+
+        assert actual.shape == (*expected_shape, 3)
+
+    def test_scale_boxes(self) -> None:
+        target = Letterbox.create(1080, 1920, 640, stride=32)
+        given = torch.tensor([[0.0, 12.0, 640.0, 372.0], [-5.0, 0.0, 10.0, 400.0]])
+
+        actual = target.scale_boxes(given)
+
+        assert torch.allclose(
+            actual,
+            torch.tensor([[0.0, 0.0, 1920.0, 1080.0], [0.0, 0.0, 30.0, 1080.0]]),
+        )
+
+
+class TestYoloDirectDetector:
+    @pytest.mark.asyncio
+    async def test_detect(self) -> None:
+        target = create_target(FakeDetectionModel(create_predictions()))
+        given = [create_frame(1)]
+
+        actual = await get_elements_of(target.detect(async_frame_generator(given)))
+
+        assert len(actual) == 1
+        assert actual[0].detections == EXPECTED_DETECTIONS
+
+    @pytest.mark.asyncio
+    async def test_detect_normalized(self) -> None:
+        target = create_target(
+            FakeDetectionModel(create_predictions()), normalized=True
+        )
+
+        actual = await get_elements_of(
+            target.detect(async_frame_generator([create_frame(1)]))
+        )
+
+        first = actual[0].detections[0]
+        assert first.x == pytest.approx(90.0 / IMAGE_WIDTH)
+        assert first.y == pytest.approx(80.0 / IMAGE_HEIGHT)
+        assert first.w == pytest.approx(20.0 / IMAGE_WIDTH)
+        assert first.h == pytest.approx(40.0 / IMAGE_HEIGHT)
+
+    @pytest.mark.asyncio
+    async def test_detect_in_batches(self) -> None:
+        model = FakeDetectionModel(create_predictions())
+        target = create_target(model, chunk_size=2, flushes_in_band=True)
+        given = [
+            create_frame(1),
+            create_frame(2, has_data=False),
+            create_frame(3),
+            create_frame(4),
+            create_frame(5),
+        ]
+
+        actual = await get_elements_of(target.detect(async_frame_generator(given)))
+
+        assert [frame.no for frame in actual] == [1, 2, 3, 4, 5]
+        assert actual[1].detections == []
+        for detected_frame in [actual[0], actual[2], actual[3], actual[4]]:
+            assert detected_frame.detections == EXPECTED_DETECTIONS
+        assert [batch.shape for batch in model.inputs] == [
+            (1, 3, 192, 320),
+            (2, 3, 192, 320),
+            (1, 3, 192, 320),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_detect_without_in_band_flushes_frame_by_frame(self) -> None:
+        model = FakeDetectionModel(create_predictions())
+        target = create_target(model, chunk_size=4)
+        given = [create_frame(1), create_frame(2), create_frame(3)]
+
+        actual = await get_elements_of(target.detect(async_frame_generator(given)))
+
+        assert [frame.no for frame in actual] == [1, 2, 3]
+        assert [batch.shape[0] for batch in model.inputs] == [1, 1, 1]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("chunk_size", [1, 4])
+    async def test_last_frame_of_segment_is_flushed_with_its_segment(
+        self, chunk_size: int
+    ) -> None:
+        target = create_target(
+            FakeDetectionModel(create_predictions()), chunk_size=chunk_size
+        )
+        subject = AsyncSubject[DetectedFrameBufferEvent]()
+        buffer = DetectedFrameBuffer(subject)
+        written: list[DetectedFrameBufferEvent] = []
+
+        async def write(event: DetectedFrameBufferEvent) -> None:
+            written.append(event)
+
+        subject.register(write)
+
+        async def source() -> AsyncIterator[Frame]:
+            # Like the input sources, flush as soon as resumed after the last frame
+            # of a segment.
+            for output, numbers in [("segment_1", [1, 2]), ("segment_2", [3])]:
+                for number in numbers:
+                    yield create_frame(number, output=output)
+                await buffer.on_flush(create_flush_event(output))
+
+        await get_elements_of(buffer.filter(target.detect(source())))
+        await subject.wait_for_all_observers()
+
+        assert [
+            (event.source_metadata.output, [frame.no for frame in event.frames])
+            for event in written
+        ] == [("segment_1", [1, 2]), ("segment_2", [3])]
+
+    def test_classifications(self) -> None:
+        target = create_target(FakeDetectionModel(create_predictions()))
+
+        assert target.classifications == {0: "person", 1: "car"}
@@ -5,7 +5,7 @@ import pytest
 from torch import Tensor
 from ultralytics.engine.results import Boxes, Results
 
-from OTVision.application.config import Config, DetectConfig
+from OTVision.application.config import Config, DetectConfig, YoloConfig
 from OTVision.detect.yolo import YoloDetectionConverter, YoloDetector
 from OTVision.domain.detection import Detection
 from OTVision.domain.frame import DetectedFrame, Frame, FrameKeys
@@ -19,20 +19,15 @@ SOURCE = "path/to/video.mp4"
 class TestYoloDetectionConverter:
     @pytest.mark.parametrize("normalized", [True, False])
     def test_convert(self, normalized: bool) -> None:
-        given_class_mapping = {1: "car"}
         given_boxes = self.create_boxes()
 
         target = YoloDetectionConverter()
 
-        actual = target.convert(given_boxes, normalized, given_class_mapping)
+        actual = target.convert(given_boxes, normalized)
 
-        assert actual == self.expected_detections(
-            given_boxes, normalized, given_class_mapping
-        )
+        assert actual == self.expected_detections(given_boxes, normalized)
 
-    def expected_detections(
-        self, boxes: Boxes, normalized: bool, class_mapping: dict[int, str]
-    ) -> list[Detection]:
+    def expected_detections(self, boxes: Boxes, normalized: bool) -> list[Detection]:
 
         if normalized:
             x, y, w, h = boxes.xywhn[0].tolist()
@@ -41,7 +36,7 @@ class TestYoloDetectionConverter:
 
         return [
             Detection(
-                label=class_mapping[int(boxes.cls.item())],
+                class_id=int(boxes.cls.item()),
                 conf=boxes.conf.item(),
                 x=x - w / 2,
                 y=y - w / 2,
@@ -91,9 +86,38 @@ class TestYoloDetector:
             given_detection_converter,
             expected_model_predictions,
             normalized=config.detect.normalized,
-            class_mapping=target.classifications,
         )
 
+    @patch("OTVision.detect.yolo.torch")
+    def test_prediction_context_is_only_rebuilt_on_config_change(
+        self, mock_torch: Mock
+    ) -> None:
+        mock_torch.cuda.is_available.return_value = False
+        first_config = Config()
+        second_config = Config(
+            detect=DetectConfig(yolo_config=YoloConfig(img_size=320))
+        )
+        given_current_config = self.create_get_current_config(first_config)
+
+        target = YoloDetector(
+            model=Mock(),
+            get_current_config=given_current_config,
+            detection_converter=Mock(),
+            detected_frame_factory=Mock(),
+        )
+
+        first_context = target._get_prediction_context()
+        assert target._get_prediction_context() is first_context
+        assert first_context.predict_arguments["imgsz"] == 640
+        assert first_context.predict_arguments["device"] == "cpu"
+
+        given_current_config.get.return_value = second_config
+        second_context = target._get_prediction_context()
+
+        assert second_context is not first_context
+        assert second_context.predict_arguments["imgsz"] == 320
+        mock_torch.cuda.is_available.assert_called_once()
+
     def assert_model_called(
         self, model: Mock, input_frames: list[Frame], config: DetectConfig
     ) -> None:
@@ -130,19 +154,10 @@ class TestYoloDetector:
         detection_converter: Mock,
         model_predictions: list[Results],
         normalized: bool,
-        class_mapping: dict[int, str],
     ) -> None:
         assert detection_converter.convert.call_args_list == [
-            call(
-                model_predictions[0].boxes,
-                normalized=normalized,
-                classification_mapping=class_mapping,
-            ),
-            call(
-                model_predictions[1].boxes,
-                normalized=normalized,
-                classification_mapping=class_mapping,
-            ),
+            call(model_predictions[0].boxes, normalized=normalized),
+            call(model_predictions[1].boxes, normalized=normalized),
         ]
 
     def create_model(self, model_predictions: list[Results]) -> Mock:
@@ -0,0 +1,105 @@
+import asyncio
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from OTVision.detect.otdet import OtdetBuilderConfig
+from OTVision.detect.otdet_file_writer import OtdetFileWrittenEvent
+from OTVision.domain.detection import Detection
+from OTVision.domain.frame import DetectedFrame
+from OTVision.ingest.protocol import (
+    LENGTH_PREFIX,
+    MAX_MESSAGE_SIZE,
+    STREAM,
+    ProtocolError,
+    decode_flush,
+    decode_frames,
+    encode,
+    encode_flush,
+    encode_frames,
+    read_message,
+)
+
+STREAM_NAME = "OTCamera1"
+
+
+def create_frame(no: int) -> DetectedFrame:
+    return DetectedFrame(
+        no=no,
+        occurrence=datetime(2024, 1, 1, 12, 0, 0) + no * timedelta(seconds=0.05),
+        source="rtsp://camera",
+        output="output/OTCamera1.mp4",
+        detections=[Detection(class_id=2, conf=0.9, x=10.5, y=20, w=30, h=40.25)],
+    )
+
+
+def create_flush_event() -> OtdetFileWrittenEvent:
+    return OtdetFileWrittenEvent(
+        otdet_builder_config=OtdetBuilderConfig(
+            conf=0.25,
+            iou=0.45,
+            source="output/OTCamera1_2024-01-01_12-00-00.mp4",
+            video_width=1280,
+            video_height=720,
+            expected_duration=None,
+            actual_duration=timedelta(seconds=300),
+            recorded_fps=20.0,
+            recorded_start_date=datetime(2024, 1, 1, 12, 0, 0),
+            actual_fps=20.0,
+            actual_frames=6000,
+            detection_img_size=640,
+            normalized=False,
+            detection_model="yolov8s",
+            half_precision=False,
+            chunksize=1,
+            classifications={0: "person", 2: "car"},
+            detect_start=None,
+            detect_end=None,
+            load_shedding={"policy": "every_frame"},
+        ),
+        number_of_frames=6000,
+        save_location=Path("output/OTCamera1_2024-01-01_12-00-00.otdet"),
+    )
+
+
+async def read(data: bytes) -> dict | None:
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    return await read_message(reader)
+
+
+class TestProtocol:
+    @pytest.mark.asyncio
+    async def test_frames_round_trip(self) -> None:
+        frames = [create_frame(1), create_frame(2)]
+
+        message = await read(encode_frames(STREAM_NAME, frames))
+
+        assert message is not None
+        assert message[STREAM] == STREAM_NAME
+        assert decode_frames(message) == frames
+
+    @pytest.mark.asyncio
+    async def test_flush_round_trip(self) -> None:
+        event = create_flush_event()
+
+        message = await read(encode_flush(STREAM_NAME, event))
+
+        assert message is not None
+        assert decode_flush(message) == event
+
+    @pytest.mark.asyncio
+    async def test_read_nothing_from_closed_connection(self) -> None:
+        assert await read(b"") is None
+
+    @pytest.mark.asyncio
+    async def test_reject_truncated_message(self) -> None:
+        with pytest.raises(ProtocolError):
+            await read(encode({STREAM: STREAM_NAME})[:-1])
+
+    @pytest.mark.asyncio
+    async def test_reject_oversized_message(self) -> None:
+        with pytest.raises(ProtocolError):
+            await read(LENGTH_PREFIX.pack(MAX_MESSAGE_SIZE + 1))
@@ -0,0 +1,106 @@
+import asyncio
+from dataclasses import replace
+from pathlib import Path
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from OTVision.application.config import Config, IngestConfig, MetricsConfig
+from OTVision.application.io_executor import IoExecutor
+from OTVision.application.metrics import MetricsRegistry
+from OTVision.detect.detection_forwarder import DetectionForwarder
+from OTVision.domain.current_config import CurrentConfig
+from OTVision.ingest.builder import IngestBuilder
+from OTVision.ingest.protocol import encode
+from OTVision.ingest.server import DetectionIngestServer, IngestedStream
+from OTVision.plugin.spooling_tcp_sink import SpoolingTcpMessageSink
+from tests.ingest.test_protocol import STREAM_NAME, create_flush_event, create_frame
+
+NUMBER_OF_FRAMES = 40
+
+
+async def produce(frames):  # type: ignore
+    for frame in frames:
+        yield frame
+
+
+async def forward(port: int, spool_file: Path) -> None:
+    sink = SpoolingTcpMessageSink(
+        "127.0.0.1", port, spool_file, retry_seconds=1, io_executor=IoExecutor()
+    )
+    forwarder = DetectionForwarder(STREAM_NAME, sink, batch_size=8)
+    frames = [create_frame(no) for no in range(1, NUMBER_OF_FRAMES + 1)]
+    async for _ in forwarder.filter(produce(frames)):
+        pass
+    await sink.open()
+    await forwarder.on_flush(create_flush_event())
+    await sink.close()
+
+
+async def wait_until_received(metrics: MetricsRegistry) -> None:
+    frames = metrics.labeled(stream=STREAM_NAME).counter(
+        "otvision_ingest_frames_total", ""
+    )
+    connections = metrics.gauge("otvision_ingest_connections", "")
+    while frames.value < NUMBER_OF_FRAMES or connections.value > 0:
+        await asyncio.sleep(0.01)
+
+
+class TestDetectionIngestServer:
+    @pytest.mark.asyncio
+    async def test_write_ottrk_file_of_forwarded_segment(self, tmp_path: Path) -> None:
+        config = replace(
+            Config(),
+            ingest=IngestConfig(host="127.0.0.1", port=0, save_dir=tmp_path),
+            metrics=MetricsConfig(enabled=True),
+        )
+        builder = IngestBuilder(CurrentConfig(config))
+        server = builder.build()
+        await server.start()
+
+        await forward(server.port, tmp_path / "forward.spool")
+        await wait_until_received(builder.metrics)
+        await server.stop()
+
+        assert [file.name for file in tmp_path.glob("*.ottrk")] == [
+            "OTCamera1_2024-01-01_12-00-00.ottrk"
+        ]
+
+    @pytest.mark.asyncio
+    async def test_close_connection_violating_protocol(self) -> None:
+        stream = Mock(spec=IngestedStream)
+        stream.name = STREAM_NAME
+        stream.put_frames = AsyncMock()
+        server = DetectionIngestServer(
+            create_stream=Mock(return_value=stream), host="127.0.0.1", port=0
+        )
+        await server.start()
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+
+        writer.write(encode({"type": "unknown", "stream": STREAM_NAME}))
+        await writer.drain()
+
+        assert await asyncio.wait_for(reader.read(), timeout=1) == b""
+        writer.close()
+        await server.stop()
+        stream.stop.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_serve_shuts_down_io_executor_after_stopping(self) -> None:
+        io_executor = Mock(spec=IoExecutor)
+        server = DetectionIngestServer(
+            create_stream=Mock(), host="127.0.0.1", port=0, io_executor=io_executor
+        )
+        serving = asyncio.create_task(server.serve())
+        await asyncio.sleep(0.05)
+
+        server.request_shutdown()
+        await asyncio.wait_for(serving, timeout=1)
+
+        io_executor.shutdown.assert_called_once_with()
+
+    def test_port_requires_started_server(self) -> None:
+        server = DetectionIngestServer(create_stream=Mock(), host="127.0.0.1", port=0)
+
+        with pytest.raises(ValueError):
+            server.port
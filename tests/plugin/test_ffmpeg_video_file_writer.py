@@ -1,10 +1,12 @@
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
+from threading import Event
 from time import sleep
 from typing import Iterator, Optional
 from unittest.mock import Mock, patch
 
+import numpy as np
 import pytest
 from cv2 import CAP_PROP_FRAME_HEIGHT, CAP_PROP_FRAME_WIDTH, VideoCapture
 from numpy import ndarray
@@ -16,11 +18,14 @@ from OTVision.helpers.machine import ON_WINDOWS
 from OTVision.plugin.ffmpeg_video_writer import (
     ConstantRateFactor,
     EncodingSpeed,
+    FfmpegPipeWriter,
     FfmpegVideoWriter,
+    FrameDecimator,
     PixelFormat,
     VideoCodec,
     VideoFormat,
     keep_original_save_location,
+    scale_video_size,
 )
 from tests.conftest import YieldFixture
 from tests.utils.asynchronous.iterator import async_frame_generator
@@ -164,6 +169,169 @@ class TestFfmpegVideoFileWriter:
         assert len(actual_frames) == 2
 
 
+class BlockingStdin:
+    """Fake stdin of an ffmpeg process that accepts data once released."""
+
+    def __init__(self, max_chunk_size: int | None = None) -> None:
+        self.released = Event()
+        self.written: list[bytes] = []
+        self.closed = False
+        self._max_chunk_size = max_chunk_size
+
+    def write(self, data: memoryview) -> int:
+        assert isinstance(data, memoryview)
+        self.released.wait(timeout=5)
+        chunk = data if self._max_chunk_size is None else data[: self._max_chunk_size]
+        self.written.append(bytes(chunk))
+        return len(chunk)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def create_process(stdin: BlockingStdin) -> Mock:
+    process = Mock()
+    process.stdin = stdin
+    process.returncode = 0
+    return process
+
+
+def create_image(value: int) -> ndarray:
+    return np.full((2, 3, 3), value, dtype=np.uint8)
+
+
+def wait_until_closed(stdin: BlockingStdin) -> None:
+    for _ in range(100):
+        if stdin.closed:
+            return
+        sleep(0.01)
+    raise AssertionError("stdin was not closed")
+
+
+class TestFfmpegPipeWriter:
+    def test_close_writes_queued_images_in_order(self) -> None:
+        stdin = BlockingStdin()
+        target = FfmpegPipeWriter(
+            create_process(stdin), queue_size=10, drop_frames_if_full=False
+        )
+        given = [create_image(value) for value in range(3)]
+
+        for image in given:
+            target.write(image)
+        assert target.queue_depth >= 2
+        stdin.released.set()
+        target.close()
+        wait_until_closed(stdin)
+
+        assert stdin.written == [image.tobytes() for image in given]
+        assert target.queue_depth == 0
+        assert target.dropped_frames == 0
+
+    def test_write_drops_frames_if_queue_is_full(self) -> None:
+        stdin = BlockingStdin()
+        target = FfmpegPipeWriter(
+            create_process(stdin), queue_size=2, drop_frames_if_full=True
+        )
+
+        for value in range(6):
+            target.write(create_image(value))
+        stdin.released.set()
+        target.close()
+        wait_until_closed(stdin)
+
+        assert target.dropped_frames == 6 - len(stdin.written)
+        assert target.dropped_frames >= 3
+
+    def test_write_retries_partial_writes(self) -> None:
+        stdin = BlockingStdin(max_chunk_size=5)
+        stdin.released.set()
+        target = FfmpegPipeWriter(
+            create_process(stdin), queue_size=2, drop_frames_if_full=False
+        )
+        given = create_image(7)
+
+        target.write(given)
+        target.close()
+        wait_until_closed(stdin)
+
+        assert b"".join(stdin.written) == given.tobytes()
+
+    def test_write_raises_error_of_terminated_process(self) -> None:
+        stdin = Mock()
+        stdin.write.side_effect = BrokenPipeError()
+        process = create_process(stdin)
+        process.poll.return_value = 1
+        process.stderr.read.return_value = b"encoder not found"
+        target = FfmpegPipeWriter(process, queue_size=2, drop_frames_if_full=False)
+
+        target.write(create_image(1))
+        for _ in range(100):
+            try:
+                target.write(create_image(2))
+            except RuntimeError as cause:
+                assert "encoder not found" in str(cause)
+                break
+            sleep(0.01)
+        else:
+            raise AssertionError("error of terminated process was not raised")
+        target.close()
+
+
+class TestRecordingProfile:
+    def test_scale_video_size_to_even_numbers(self) -> None:
+        assert scale_video_size(1280, 720, 1.0) == (1280, 720)
+        assert scale_video_size(1280, 720, 0.5) == (640, 360)
+        assert scale_video_size(1920, 1080, 0.3) == (576, 324)
+        assert scale_video_size(1280, 720, 0.001) == (2, 2)
+
+    def test_frame_decimator_selects_every_nth_frame(self) -> None:
+        target = FrameDecimator(frame_step=3)
+
+        first = [target.select() for _ in range(7)]
+        target.reset()
+
+        assert first == [True, False, False, True, False, False, True]
+        assert target.select()
+        assert target.output_fps(30.0) == 10.0
+
+    @patch("OTVision.plugin.ffmpeg_video_writer.Popen")
+    def test_write_decimated_and_scaled_video(self, popen: Mock) -> None:
+        stdin = BlockingStdin()
+        stdin.released.set()
+        popen.return_value = create_process(stdin)
+        target = FfmpegVideoWriter(
+            save_location_strategy=keep_original_save_location,
+            scale=0.5,
+            frame_step=3,
+        )
+
+        target.open("video.mp4", width=64, height=48, fps=30.0)
+        for value in range(7):
+            target.write(create_image(value))
+        target.close()
+        wait_until_closed(stdin)
+
+        command = popen.call_args.args[0]
+        assert command[command.index("-framerate") + 1] == "10.0"
+        assert command[command.index("-s", command.index("pipe:0")) + 1] == "32x24"
+        assert stdin.written == [create_image(value).tobytes() for value in (0, 3, 6)]
+
+    @patch("OTVision.plugin.ffmpeg_video_writer.Popen")
+    def test_write_errors_only_to_stderr(self, popen: Mock) -> None:
+        stdin = BlockingStdin()
+        stdin.released.set()
+        popen.return_value = create_process(stdin)
+        target = FfmpegVideoWriter(save_location_strategy=keep_original_save_location)
+
+        target.open("video.mp4", width=64, height=48, fps=30.0)
+        target.close()
+        wait_until_closed(stdin)
+
+        command = popen.call_args.args[0]
+        assert "-nostats" in command
+        assert command[command.index("-loglevel") + 1] == "error"
+
+
 @dataclass
 class GivenVideo:
     save_location: str
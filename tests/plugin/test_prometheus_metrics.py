@@ -0,0 +1,93 @@
+from pathlib import Path
+from urllib.request import urlopen
+
+from OTVision.application.config import MetricsConfig
+from OTVision.application.metrics import MetricsRegistry
+from OTVision.plugin.prometheus_metrics import (
+    PrometheusHttpExporter,
+    PrometheusTextfileExporter,
+    create_metrics_exporters,
+    format_prometheus_text,
+)
+
+EXPECTED_TEXT = """# HELP otvision_inference_duration_seconds Inference duration.
+# TYPE otvision_inference_duration_seconds histogram
+otvision_inference_duration_seconds_bucket{le="0.1"} 1
+otvision_inference_duration_seconds_bucket{le="1"} 2
+otvision_inference_duration_seconds_bucket{le="+Inf"} 2
+otvision_inference_duration_seconds_sum 0.55
+otvision_inference_duration_seconds_count 2
+# HELP otvision_stream_frames_total Frames delivered by the stream.
+# TYPE otvision_stream_frames_total counter
+otvision_stream_frames_total{stream="OTCamera\\"1"} 3
+otvision_stream_frames_total{stream="OTCamera2"} 1
+"""
+
+
+def create_registry() -> MetricsRegistry:
+    registry = MetricsRegistry()
+    histogram = registry.histogram(
+        "otvision_inference_duration_seconds", "Inference duration.", (0.1, 1.0)
+    )
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    registry.labeled(stream='OTCamera"1').counter(
+        "otvision_stream_frames_total", "Frames delivered by the stream."
+    ).inc(3)
+    registry.labeled(stream="OTCamera2").counter(
+        "otvision_stream_frames_total", "Frames delivered by the stream."
+    ).inc()
+    return registry
+
+
+class TestFormatPrometheusText:
+    def test_format(self) -> None:
+        actual = format_prometheus_text(create_registry().collect())
+
+        assert actual == EXPECTED_TEXT
+
+
+class TestPrometheusHttpExporter:
+    def test_serves_metrics(self) -> None:
+        target = PrometheusHttpExporter(create_registry(), host="127.0.0.1", port=0)
+
+        target.start()
+        try:
+            url = f"http://127.0.0.1:{target.port}/metrics"
+            with urlopen(url, timeout=5) as response:
+                actual = response.read().decode("utf-8")
+        finally:
+            target.stop()
+
+        assert actual == EXPECTED_TEXT
+
+
+class TestPrometheusTextfileExporter:
+    def test_writes_metrics_on_stop(self, tmp_path: Path) -> None:
+        textfile = tmp_path / "metrics" / "otvision.prom"
+        target = PrometheusTextfileExporter(
+            create_registry(), textfile, interval_seconds=60
+        )
+
+        target.start()
+        target.stop()
+
+        assert textfile.read_text(encoding="utf-8") == EXPECTED_TEXT
+        assert list(textfile.parent.iterdir()) == [textfile]
+
+
+def test_create_metrics_exporters_without_enabled_metrics() -> None:
+    config = MetricsConfig(enabled=False, port=9100)
+
+    assert create_metrics_exporters(MetricsRegistry(), config) == []
+
+
+def test_create_metrics_exporters(tmp_path: Path) -> None:
+    config = MetricsConfig(enabled=True, port=9100, textfile=tmp_path / "metrics.prom")
+
+    actual = create_metrics_exporters(MetricsRegistry(), config)
+
+    assert [type(exporter) for exporter in actual] == [
+        PrometheusHttpExporter,
+        PrometheusTextfileExporter,
+    ]
@@ -0,0 +1,175 @@
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+from time import sleep
+from unittest.mock import Mock
+
+import av
+import numpy as np
+import pytest
+from numpy import ndarray
+
+from OTVision.application.event.new_video_start import NewVideoStartEvent
+from OTVision.domain.frame import Frame
+from OTVision.plugin.ffmpeg_video_writer import (
+    ConstantRateFactor,
+    keep_original_save_location,
+)
+from OTVision.plugin.pyav_video_writer import PyAvVideoWriter
+from tests.utils.asynchronous.iterator import async_frame_generator
+
+FPS = 20.0
+WIDTH = 64
+HEIGHT = 48
+NUMBER_OF_FRAMES = 30
+
+
+def create_images(number_of_images: int) -> list[ndarray]:
+    return [
+        np.full((HEIGHT, WIDTH, 3), index * 5, dtype=np.uint8)
+        for index in range(number_of_images)
+    ]
+
+
+def count_frames(video_file: Path) -> int:
+    container = av.open(str(video_file))
+    number_of_frames = sum(1 for _ in container.decode(video=0))
+    container.close()
+    return number_of_frames
+
+
+def read_video_size(video_file: Path) -> tuple[int, int]:
+    container = av.open(str(video_file))
+    stream = container.streams.video[0]
+    size = (stream.width, stream.height)
+    container.close()
+    return size
+
+
+def wait_for_video(video_file: Path, expected_frames: int) -> int:
+    """The worker thread finishes a video asynchronously after closing it."""
+    for _ in range(100):
+        try:
+            if (actual := count_frames(video_file)) == expected_frames:
+                return actual
+        except av.FFmpegError:
+            pass
+        sleep(0.05)
+    return count_frames(video_file)
+
+
+def create_target(encode_on_worker_thread: bool) -> PyAvVideoWriter:
+    return PyAvVideoWriter(
+        save_location_strategy=keep_original_save_location,
+        constant_rate_factor=ConstantRateFactor.DEFAULT,
+        encode_on_worker_thread=encode_on_worker_thread,
+    )
+
+
+class TestPyAvVideoWriter:
+    @pytest.mark.parametrize("encode_on_worker_thread", [False, True])
+    def test_write_video(self, tmp_path: Path, encode_on_worker_thread: bool) -> None:
+        video_file = tmp_path / "video.mp4"
+        target = create_target(encode_on_worker_thread)
+
+        target.open(str(video_file), width=WIDTH, height=HEIGHT, fps=FPS)
+        assert target.is_open
+        for image in create_images(NUMBER_OF_FRAMES):
+            target.write(image)
+        target.close()
+
+        assert target.is_closed
+        assert wait_for_video(video_file, NUMBER_OF_FRAMES) == NUMBER_OF_FRAMES
+        assert target.dropped_frames == 0
+
+    def test_write_decimated_and_scaled_video(self, tmp_path: Path) -> None:
+        video_file = tmp_path / "video.mp4"
+        target = PyAvVideoWriter(
+            save_location_strategy=keep_original_save_location,
+            constant_rate_factor=ConstantRateFactor.DEFAULT,
+            encode_on_worker_thread=False,
+            scale=0.5,
+            frame_step=3,
+        )
+
+        target.open(str(video_file), width=WIDTH, height=HEIGHT, fps=FPS)
+        for image in create_images(NUMBER_OF_FRAMES):
+            target.write(image)
+        target.close()
+
+        assert count_frames(video_file) == NUMBER_OF_FRAMES // 3
+        assert read_video_size(video_file) == (WIDTH // 2, HEIGHT // 2)
+
+    @pytest.mark.asyncio
+    async def test_filter_writes_frames_with_data(self, tmp_path: Path) -> None:
+        video_file = tmp_path / "video.mp4"
+        images = create_images(3)
+        given = [
+            Frame(
+                data=data,
+                frame=no,
+                source=str(video_file),
+                output=str(video_file),
+                occurrence=datetime(2020, 1, 1),
+            )
+            for no, data in enumerate([images[0], None, images[2]], start=1)
+        ]
+        target = create_target(encode_on_worker_thread=True)
+
+        target.notify_on_new_video_start(
+            NewVideoStartEvent(
+                output=str(video_file), width=WIDTH, height=HEIGHT, fps=FPS
+            )
+        )
+        actual = [frame async for frame in target.filter(async_frame_generator(given))]
+        await target.notify_on_flush_event(Mock())
+
+        assert actual == given
+        assert target.is_closed
+        assert wait_for_video(video_file, 2) == 2
+
+    def test_wait_until_closed_finishes_video(self, tmp_path: Path) -> None:
+        video_file = tmp_path / "video.mp4"
+        target = create_target(encode_on_worker_thread=True)
+
+        target.open(str(video_file), width=WIDTH, height=HEIGHT, fps=FPS)
+        for image in create_images(NUMBER_OF_FRAMES):
+            target.write(image)
+        target.close()
+        target.wait_until_closed()
+
+        assert count_frames(video_file) == NUMBER_OF_FRAMES
+
+    def test_finish_closed_video_when_exiting_right_after_close(
+        self, tmp_path: Path
+    ) -> None:
+        video_file = tmp_path / "video.mp4"
+        script = f"""
+import numpy as np
+from OTVision.plugin.ffmpeg_video_writer import ConstantRateFactor
+from OTVision.plugin.ffmpeg_video_writer import keep_original_save_location
+from OTVision.plugin.pyav_video_writer import PyAvVideoWriter
+
+target = PyAvVideoWriter(
+    save_location_strategy=keep_original_save_location,
+    constant_rate_factor=ConstantRateFactor.DEFAULT,
+    encode_on_worker_thread=True,
+)
+target.open({str(video_file)!r}, width=640, height=480, fps={FPS})
+for index in range({NUMBER_OF_FRAMES}):
+    target.write(np.random.randint(0, 255, (480, 640, 3), dtype=np.uint8))
+target.close()
+"""
+
+        subprocess.run(
+            [sys.executable, "-c", script], check=True, cwd=Path(__file__).parents[2]
+        )
+
+        assert count_frames(video_file) == NUMBER_OF_FRAMES
+
+    def test_write_without_open_raises_error(self) -> None:
+        target = create_target(encode_on_worker_thread=False)
+
+        with pytest.raises(ValueError):
+            target.write(create_images(1)[0])
@@ -0,0 +1,327 @@
+import asyncio
+import socket
+from pathlib import Path
+from typing import Callable
+from unittest.mock import Mock
+
+import pytest
+
+from OTVision.application.io_executor import IoExecutor
+from OTVision.application.metrics import MetricsRegistry
+from OTVision.plugin.spooling_tcp_sink import SpoolingTcpMessageSink, _to_record
+
+
+class Receiver:
+    def __init__(self) -> None:
+        self.messages: list[bytes] = []
+        self.server: asyncio.Server | None = None
+
+    async def start(self, port: int = 0) -> int:
+        self.server = await asyncio.start_server(
+            self._handle, host="127.0.0.1", port=port
+        )
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self.server is not None:
+            self.server.close()
+
+    async def wait_for(self, count: int) -> None:
+        while len(self.messages) < count:
+            await asyncio.sleep(0.01)
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        while line := await reader.readline():
+            self.messages.append(line)
+        writer.close()
+
+
+class StalledReceiver:
+    """Accepts connections, but never reads from them."""
+
+    def __init__(self) -> None:
+        self.server: asyncio.Server | None = None
+        self._writers: list[asyncio.StreamWriter] = []
+
+    async def start(self) -> int:
+        self.server = await asyncio.start_server(self._handle, host="127.0.0.1")
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        for writer in self._writers:
+            writer.transport.abort()
+        if self.server is not None:
+            self.server.close()
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self._writers.append(writer)
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+class TestSpoolingTcpMessageSink:
+    @pytest.mark.asyncio
+    async def test_send_messages(self, tmp_path: Path) -> None:
+        receiver = Receiver()
+        port = await receiver.start()
+        target = SpoolingTcpMessageSink(
+            "127.0.0.1",
+            port,
+            tmp_path / "forward.spool",
+            retry_seconds=1,
+            io_executor=IoExecutor(),
+        )
+        await target.open()
+
+        target.publish(b"first\n")
+        target.publish(b"second\n")
+        await receiver.wait_for(2)
+
+        assert receiver.messages == [b"first\n", b"second\n"]
+        assert target.connected
+        await target.close()
+        await receiver.stop()
+
+    @pytest.mark.asyncio
+    async def test_spool_while_unreachable_and_replay_in_order(
+        self, tmp_path: Path
+    ) -> None:
+        now = [0.0]
+        registry = MetricsRegistry()
+        spool_file = tmp_path / "forward.spool"
+        port = free_port()
+        target = SpoolingTcpMessageSink(
+            "127.0.0.1",
+            port,
+            spool_file,
+            retry_seconds=5,
+            io_executor=IoExecutor(),
+            metrics=registry,
+            clock=lambda: now[0],
+        )
+        await target.open()
+
+        target.publish(b"first\n")
+        target.publish(b"second\n")
+        spooled = registry.counter("otvision_forward_spooled_messages_total", "")
+        while spooled.value < 2:
+            await asyncio.sleep(0.01)
+        receiver = Receiver()
+        await receiver.start(port)
+        now[0] = 10.0
+        target.publish(b"third\n")
+        await receiver.wait_for(3)
+
+        assert receiver.messages == [b"first\n", b"second\n", b"third\n"]
+        assert not spool_file.exists()
+        await target.close()
+        await receiver.stop()
+
+    @pytest.mark.asyncio
+    async def test_spool_when_not_opened(self, tmp_path: Path) -> None:
+        receiver = Receiver()
+        port = await receiver.start()
+        spool_file = tmp_path / "forward.spool"
+        early = SpoolingTcpMessageSink("127.0.0.1", port, spool_file, 1, IoExecutor())
+        early.publish(b"early\n")
+        await early.close()
+        target = SpoolingTcpMessageSink("127.0.0.1", port, spool_file, 1, IoExecutor())
+        await target.open()
+
+        target.publish(b"late\n")
+        await receiver.wait_for(2)
+
+        assert receiver.messages == [b"early\n", b"late\n"]
+        await target.close()
+        await receiver.stop()
+
+    @pytest.mark.asyncio
+    async def test_spool_when_queue_is_full_and_keep_order(
+        self, tmp_path: Path
+    ) -> None:
+        registry = MetricsRegistry()
+        receiver = Receiver()
+        port = await receiver.start()
+        target = SpoolingTcpMessageSink(
+            "127.0.0.1",
+            port,
+            tmp_path / "forward.spool",
+            retry_seconds=1,
+            io_executor=IoExecutor(),
+            queue_size=2,
+            metrics=registry,
+        )
+        await target.open()
+
+        for index in range(5):
+            target.publish(f"{index}\n".encode())
+        await receiver.wait_for(2)
+        target.publish(b"5\n")
+        await receiver.wait_for(6)
+
+        assert receiver.messages == [f"{index}\n".encode() for index in range(6)]
+        spooled = registry.counter("otvision_forward_spooled_messages_total", "")
+        assert spooled.value == 3
+        await target.close()
+        await receiver.stop()
+
+    @pytest.mark.asyncio
+    async def test_spool_queued_messages_before_overflowed_ones(
+        self, tmp_path: Path
+    ) -> None:
+        now = [0.0]
+        registry = MetricsRegistry()
+        port = free_port()
+        target = SpoolingTcpMessageSink(
+            "127.0.0.1",
+            port,
+            tmp_path / "forward.spool",
+            retry_seconds=5,
+            io_executor=IoExecutor(),
+            queue_size=2,
+            metrics=registry,
+            clock=lambda: now[0],
+        )
+        await target.open()
+
+        for index in range(4):
+            target.publish(f"{index}\n".encode())
+        spooled = registry.counter("otvision_forward_spooled_messages_total", "")
+        await _wait_until(lambda: spooled.value == 4)
+        receiver = Receiver()
+        await receiver.start(port)
+        now[0] = 10.0
+        target.publish(b"4\n")
+        await receiver.wait_for(5)
+
+        assert receiver.messages == [f"{index}\n".encode() for index in range(5)]
+        await target.close()
+        await receiver.stop()
+
+    @pytest.mark.asyncio
+    async def test_spool_when_server_does_not_accept_messages_in_time(
+        self, tmp_path: Path
+    ) -> None:
+        registry = MetricsRegistry()
+        receiver = StalledReceiver()
+        port = await receiver.start()
+        spool_file = tmp_path / "forward.spool"
+        target = SpoolingTcpMessageSink(
+            "127.0.0.1",
+            port,
+            spool_file,
+            retry_seconds=5,
+            io_executor=IoExecutor(),
+            send_timeout_seconds=0.2,
+            metrics=registry,
+        )
+        message = b"x" * 16 * 1024 * 1024 + b"\n"
+        await target.open()
+
+        target.publish(message)
+        spooled = registry.counter("otvision_forward_spooled_messages_total", "")
+        await asyncio.wait_for(_wait_until(lambda: spooled.value == 1), timeout=5)
+
+        assert not target.connected
+        assert spool_file.stat().st_size > len(message)
+        await asyncio.wait_for(target.close(), timeout=5)
+        await receiver.stop()
+
+    @pytest.mark.asyncio
+    async def test_spool_and_replay_on_io_executor(self, tmp_path: Path) -> None:
+        now = [0.0]
+        registry = MetricsRegistry()
+        io_executor = Mock(wraps=IoExecutor())
+        port = free_port()
+        target = SpoolingTcpMessageSink(
+            "127.0.0.1",
+            port,
+            tmp_path / "forward.spool",
+            retry_seconds=5,
+            io_executor=io_executor,
+            metrics=registry,
+            clock=lambda: now[0],
+        )
+        await target.open()
+
+        target.publish(b"first\n")
+        spooled = registry.counter("otvision_forward_spooled_messages_total", "")
+        await _wait_until(lambda: spooled.value == 1)
+        spooling_jobs = io_executor.run.call_count
+        receiver = Receiver()
+        await receiver.start(port)
+        now[0] = 10.0
+        target.publish(b"second\n")
+        await receiver.wait_for(2)
+
+        assert receiver.messages == [b"first\n", b"second\n"]
+        assert spooling_jobs > 0
+        assert io_executor.run.call_count > spooling_jobs
+        await target.close()
+        await receiver.stop()
+
+    @pytest.mark.asyncio
+    async def test_resume_replay_at_saved_offset(self, tmp_path: Path) -> None:
+        receiver = Receiver()
+        port = await receiver.start()
+        spool_file = tmp_path / "forward.spool"
+        spool_file.write_bytes(_to_record(b"sent\n") + _to_record(b"unsent\n"))
+        offset_file = tmp_path / "forward.spool.offset"
+        offset_file.write_text(str(len(_to_record(b"sent\n"))))
+        target = SpoolingTcpMessageSink(
+            "127.0.0.1", port, spool_file, retry_seconds=1, io_executor=IoExecutor()
+        )
+        await target.open()
+
+        target.publish(b"new\n")
+        await receiver.wait_for(2)
+
+        assert receiver.messages == [b"unsent\n", b"new\n"]
+        assert not spool_file.exists()
+        assert not offset_file.exists()
+        await target.close()
+        await receiver.stop()
+
+    @pytest.mark.asyncio
+    async def test_ignore_offset_of_previous_spool_file(self, tmp_path: Path) -> None:
+        now = [0.0]
+        registry = MetricsRegistry()
+        port = free_port()
+        spool_file = tmp_path / "forward.spool"
+        (tmp_path / "forward.spool.offset").write_text("1000")
+        target = SpoolingTcpMessageSink(
+            "127.0.0.1",
+            port,
+            spool_file,
+            retry_seconds=5,
+            io_executor=IoExecutor(),
+            metrics=registry,
+            clock=lambda: now[0],
+        )
+        await target.open()
+
+        target.publish(b"first\n")
+        spooled = registry.counter("otvision_forward_spooled_messages_total", "")
+        await _wait_until(lambda: spooled.value == 1)
+        receiver = Receiver()
+        await receiver.start(port)
+        now[0] = 10.0
+        target.publish(b"second\n")
+        await receiver.wait_for(2)
+
+        assert receiver.messages == [b"first\n", b"second\n"]
+        await target.close()
+        await receiver.stop()
+
+
+async def _wait_until(condition: Callable[[], bool]) -> None:
+    while not condition():
+        await asyncio.sleep(0.01)
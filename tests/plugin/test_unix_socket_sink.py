@@ -0,0 +1,62 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from OTVision.application.metrics import MetricsRegistry
+from OTVision.plugin.unix_socket_sink import UnixSocketMessageSink
+
+
+async def wait_for_subscribers(sink: UnixSocketMessageSink, count: int) -> None:
+    while sink.subscribers < count:
+        await asyncio.sleep(0.01)
+
+
+class TestUnixSocketMessageSink:
+    @pytest.mark.asyncio
+    async def test_deliver_messages_to_subscribers(self, tmp_path: Path) -> None:
+        socket = tmp_path / "otvision.sock"
+        target = UnixSocketMessageSink(socket, queue_size=10)
+        await target.open()
+        reader, writer = await asyncio.open_unix_connection(str(socket))
+        await wait_for_subscribers(target, 1)
+
+        target.publish(b"first\n")
+        target.publish(b"second\n")
+
+        assert await reader.readline() == b"first\n"
+        assert await reader.readline() == b"second\n"
+        writer.close()
+        await target.close()
+        assert not socket.exists()
+
+    @pytest.mark.asyncio
+    async def test_drop_messages_for_slow_subscriber(self, tmp_path: Path) -> None:
+        registry = MetricsRegistry()
+        target = UnixSocketMessageSink(
+            tmp_path / "otvision.sock", queue_size=2, metrics=registry
+        )
+        await target.open()
+        _, writer = await asyncio.open_unix_connection(str(tmp_path / "otvision.sock"))
+        await wait_for_subscribers(target, 1)
+
+        for _ in range(5):
+            target.publish(b"message\n")
+
+        dropped = registry.counter("otvision_publish_dropped_messages_total", "")
+        assert dropped.value == 3
+        writer.close()
+        await target.close()
+
+    @pytest.mark.asyncio
+    async def test_close_only_after_last_user(self, tmp_path: Path) -> None:
+        socket = tmp_path / "otvision.sock"
+        target = UnixSocketMessageSink(socket, queue_size=10)
+        await target.open()
+        await target.open()
+
+        await target.close()
+        assert socket.exists()
+
+        await target.close()
+        assert not socket.exists()
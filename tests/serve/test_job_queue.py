@@ -0,0 +1,175 @@
+from datetime import datetime, timedelta
+from threading import Event
+from time import monotonic, sleep
+from unittest.mock import Mock
+
+import pytest
+
+from OTVision.serve.job import Job, JobStatus, JobType
+from OTVision.serve.job_queue import JobQueue, UnknownJobError
+from OTVision.serve.job_runner import JobRunner
+
+NOW = datetime(2024, 1, 1, 12, 0, 0)
+ARGV = ["-p", "video.mp4"]
+OUTPUT_FILES = ["video.otdet"]
+
+
+class FakeRunner(JobRunner):
+    def __init__(self, error: BaseException | None = None) -> None:
+        self.jobs: list[Job] = []
+        self._error = error
+
+    def run(self, job: Job) -> list[str]:
+        self.jobs.append(job)
+        if self._error is not None:
+            raise self._error
+        return OUTPUT_FILES
+
+
+class BlockingRunner(FakeRunner):
+    max_concurrent_jobs = 1
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.started = Event()
+        self.release = Event()
+
+    def run(self, job: Job) -> list[str]:
+        self.started.set()
+        self.release.wait(timeout=5)
+        return super().run(job)
+
+
+def wait_until_finished(target: JobQueue, job: Job, timeout: float = 5) -> None:
+    deadline = monotonic() + timeout
+    while not target.get(job.id).status.is_finished and monotonic() < deadline:
+        sleep(0.01)
+
+
+def create_datetime_provider() -> Mock:
+    provider = Mock()
+    provider.provide.return_value = NOW
+    return provider
+
+
+class TestJobQueue:
+    def test_submit_runs_job_with_runner_of_job_type(self) -> None:
+        detect_runner = FakeRunner()
+        track_runner = FakeRunner()
+        target = JobQueue(
+            runners={JobType.DETECT: detect_runner, JobType.TRACK: track_runner},
+            max_workers=1,
+            datetime_provider=create_datetime_provider(),
+        )
+
+        job = target.submit(JobType.DETECT, ARGV)
+        target.shutdown(wait=True)
+
+        assert detect_runner.jobs == [job]
+        assert track_runner.jobs == []
+        assert target.get(job.id) == Job(
+            id=job.id,
+            type=JobType.DETECT,
+            argv=ARGV,
+            submitted_at=NOW,
+            status=JobStatus.SUCCEEDED,
+            started_at=NOW,
+            finished_at=NOW,
+            output_files=OUTPUT_FILES,
+        )
+
+    @pytest.mark.parametrize("error", [ValueError("boom"), SystemExit(2)])
+    def test_failing_job_is_marked_as_failed(self, error: BaseException) -> None:
+        target = JobQueue(
+            runners={JobType.TRACK: FakeRunner(error=error)},
+            max_workers=1,
+            datetime_provider=create_datetime_provider(),
+        )
+
+        job = target.submit(JobType.TRACK, ARGV)
+        target.shutdown(wait=True)
+
+        actual = target.get(job.id)
+        assert actual.status == JobStatus.FAILED
+        assert actual.error == f"{type(error).__name__}: {error}"
+        assert actual.output_files == []
+
+    def test_get_unknown_job(self) -> None:
+        target = JobQueue(runners={}, max_workers=1)
+
+        with pytest.raises(UnknownJobError):
+            target.get("unknown")
+
+    def test_get_all(self) -> None:
+        target = JobQueue(runners={JobType.DETECT: FakeRunner()}, max_workers=1)
+
+        first = target.submit(JobType.DETECT, ARGV)
+        second = target.submit(JobType.DETECT, ARGV)
+        target.shutdown(wait=True)
+
+        assert target.get_all() == [first, second]
+
+    def test_forget_finished_jobs_beyond_maximum_number(self) -> None:
+        datetime_provider = create_datetime_provider()
+        datetime_provider.provide.side_effect = [
+            NOW + timedelta(seconds=second) for second in range(100)
+        ]
+        target = JobQueue(
+            runners={JobType.DETECT: FakeRunner()},
+            max_workers=1,
+            max_finished_jobs=2,
+            finished_job_retention=None,
+            datetime_provider=datetime_provider,
+        )
+
+        jobs = [target.submit(JobType.DETECT, ARGV) for _ in range(3)]
+        target.shutdown(wait=True)
+
+        assert target.get_all() == jobs[1:]
+        with pytest.raises(UnknownJobError):
+            target.get(jobs[0].id)
+
+    def test_forget_finished_jobs_after_retention(self) -> None:
+        datetime_provider = create_datetime_provider()
+        target = JobQueue(
+            runners={JobType.DETECT: FakeRunner()},
+            max_workers=1,
+            finished_job_retention=timedelta(hours=1),
+            datetime_provider=datetime_provider,
+        )
+        job = target.submit(JobType.DETECT, ARGV)
+        target.shutdown(wait=True)
+
+        datetime_provider.provide.return_value = NOW + timedelta(hours=1)
+        assert target.get(job.id) == job
+        datetime_provider.provide.return_value = NOW + timedelta(hours=2)
+
+        with pytest.raises(UnknownJobError):
+            target.get(job.id)
+        assert target.get_all() == []
+
+    def test_run_jobs_of_other_types_while_runner_limits_its_jobs(self) -> None:
+        detect_runner = BlockingRunner()
+        target = JobQueue(
+            runners={JobType.DETECT: detect_runner, JobType.TRACK: FakeRunner()},
+            max_workers=2,
+        )
+
+        running_detect_job = target.submit(JobType.DETECT, ARGV)
+        assert detect_runner.started.wait(timeout=5)
+        queued_detect_job = target.submit(JobType.DETECT, ARGV)
+        track_jobs = [target.submit(JobType.TRACK, ARGV) for _ in range(2)]
+        for track_job in track_jobs:
+            wait_until_finished(target, track_job)
+
+        assert [target.get(job.id).status for job in track_jobs] == [
+            JobStatus.SUCCEEDED,
+            JobStatus.SUCCEEDED,
+        ]
+        assert target.get(running_detect_job.id).status == JobStatus.RUNNING
+        assert target.get(queued_detect_job.id).status == JobStatus.QUEUED
+        assert target.get(queued_detect_job.id).started_at is None
+
+        detect_runner.release.set()
+        target.shutdown(wait=True)
+        assert detect_runner.jobs == [running_detect_job, queued_detect_job]
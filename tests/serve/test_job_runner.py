@@ -0,0 +1,28 @@
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+from OTVision.serve.job import Job, JobType
+from OTVision.serve.job_runner import TrackJobRunner
+
+
+class TestTrackJobRunner:
+    def test_run_returns_written_ottrk_files(
+        self, test_data_dir: Path, tmp_path: Path
+    ) -> None:
+        for detections_file in (test_data_dir / "track" / "default").glob("*.otdet"):
+            shutil.copy(detections_file, tmp_path)
+        job = Job(
+            id="job",
+            type=JobType.TRACK,
+            argv=["-p", str(tmp_path), "--overwrite"],
+            submitted_at=datetime(2024, 1, 1),
+        )
+
+        actual = TrackJobRunner().run(job)
+
+        assert sorted(Path(file).name for file in actual) == [
+            "Testvideo_Cars-Cyclist_FR20_2020-01-01_00-00-00.ottrk",
+            "Testvideo_Cars-Truck_FR20_2020-01-01_00-00-00.ottrk",
+        ]
+        assert all(Path(file).is_file() for file in actual)
@@ -0,0 +1,63 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from OTVision.serve.client import JobClient
+from OTVision.serve.job import JOB_ID, JOB_OUTPUT_FILES, JOB_STATUS, Job, JobType
+from OTVision.serve.job_queue import JobQueue
+from OTVision.serve.job_runner import JobRunner
+from OTVision.serve.protocol import JobServerError
+from OTVision.serve.server import JobServer
+
+OUTPUT_FILES = ["video.otdet"]
+
+
+class FakeRunner(JobRunner):
+    def run(self, job: Job) -> list[str]:
+        return OUTPUT_FILES
+
+
+class TestJobServer:
+    @pytest.mark.asyncio
+    async def test_submit_and_wait_for_job(self, tmp_path: Path) -> None:
+        socket_path = tmp_path / "otvision.sock"
+        job_queue = JobQueue(runners={JobType.DETECT: FakeRunner()}, max_workers=1)
+        target = JobServer(job_queue=job_queue, socket_path=socket_path)
+        client = JobClient(socket_path)
+
+        server_task = asyncio.create_task(target.serve())
+        await self._wait_for_socket(socket_path)
+
+        submitted = await asyncio.to_thread(
+            client.submit, JobType.DETECT, ["-p", "video.mp4"]
+        )
+        finished = await asyncio.to_thread(client.wait, submitted[JOB_ID], 0.01)
+        jobs = await asyncio.to_thread(client.list_jobs)
+        await asyncio.to_thread(client.shutdown)
+        await asyncio.wait_for(server_task, timeout=5)
+
+        assert finished[JOB_STATUS] == "succeeded"
+        assert finished[JOB_OUTPUT_FILES] == OUTPUT_FILES
+        assert [job[JOB_ID] for job in jobs] == [submitted[JOB_ID]]
+        assert not socket_path.exists()
+
+    @pytest.mark.asyncio
+    async def test_unknown_job_is_rejected(self, tmp_path: Path) -> None:
+        socket_path = tmp_path / "otvision.sock"
+        target = JobServer(
+            job_queue=JobQueue(runners={}, max_workers=1), socket_path=socket_path
+        )
+        client = JobClient(socket_path)
+
+        server_task = asyncio.create_task(target.serve())
+        await self._wait_for_socket(socket_path)
+
+        with pytest.raises(JobServerError):
+            await asyncio.to_thread(client.status, "unknown")
+        target.request_shutdown()
+        await asyncio.wait_for(server_task, timeout=5)
+
+    async def _wait_for_socket(self, socket_path: Path) -> None:
+        while not socket_path.exists():
+            await asyncio.sleep(0.01)
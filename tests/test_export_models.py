@@ -0,0 +1,279 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+import torch
+import yaml
+from ultralytics.models.yolo.detect import DetectionPredictor
+
+import export_models
+from export_models import (
+    DEFAULT_CALIBRATION_FRAMES,
+    DEFAULT_CALIBRATION_STRIDE,
+    LETTERBOX_PADDING_VALUE,
+    CalibrationSpecification,
+    ConfigParser,
+    ExportFormat,
+    FrameCalibrationDataReader,
+    ModelExportSpecificationParser,
+    OnnxInt8Quantizer,
+    ParseError,
+    PostExportAction,
+    Quantization,
+    letterbox,
+)
+
+CALIBRATION = CalibrationSpecification(videos=[Path("videos/camera1")])
+
+
+@pytest.fixture
+def temp_folder(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    temp_folder = tmp_path / "temp"
+    temp_folder.mkdir()
+    monkeypatch.setattr(export_models, "TEMP_FOLDER", temp_folder)
+    return temp_folder
+
+
+class TestModelExportSpecificationParser:
+    def test_parse_model_with_image_size(self, temp_folder: Path) -> None:
+        spec = ModelExportSpecificationParser().parser(
+            model=Path("models/yolov8s_imgsz800.pt"),
+            formats=["onnx", "engine"],
+            quantization="int8",
+            calibration=CALIBRATION,
+        )
+
+        assert spec.model_info.core == "yolov8s"
+        assert spec.model_info.temp_path == temp_folder / "yolov8s_imgsz800.pt"
+        assert spec.imagesize == 800
+        assert spec.formats == [ExportFormat.ONNX, ExportFormat.ENGINE]
+        assert spec.quantization == Quantization.INT8
+        assert spec.calibration == CALIBRATION
+        assert spec.generate_file_stem() == Path("models/yolov8s_imgsz800_int8")
+        assert (
+            spec.model_info.temp_quantization_report_path
+            == temp_folder / "yolov8s_imgsz800.yaml"
+        )
+
+    def test_parse_model_without_image_size(self) -> None:
+        spec = ModelExportSpecificationParser().parser(
+            model=Path("yolov8s.pt"), formats=["coreml"]
+        )
+
+        assert spec.imagesize is None
+        assert spec.quantization is None
+        assert spec.generate_file_stem() == Path("yolov8s")
+
+    @pytest.mark.parametrize("quantization", [None, "fp16"])
+    def test_calibration_requires_int8(self, quantization: str | None) -> None:
+        with pytest.raises(ParseError):
+            ModelExportSpecificationParser().parser(
+                model=Path("yolov8s.pt"),
+                formats=["onnx"],
+                quantization=quantization,
+                calibration=CALIBRATION,
+            )
+
+    def test_reject_model_that_is_not_a_pt_file(self) -> None:
+        with pytest.raises(ParseError):
+            ModelExportSpecificationParser().parser(
+                model=Path("yolov8s.onnx"), formats=["onnx"]
+            )
+
+
+class TestConfigParser:
+    def test_parse_calibration(self, tmp_path: Path) -> None:
+        config_file = tmp_path / "export.yaml"
+        config_file.write_text(
+            yaml.safe_dump(
+                {
+                    "specifications": [
+                        {
+                            "model": "models/model1.pt",
+                            "formats": ["ONNX"],
+                            "quantization": "INT8",
+                            "calibration": {
+                                "videos": ["videos/camera1", "videos/camera2"],
+                                "frames": 50,
+                                "stride": 10,
+                            },
+                        },
+                        {
+                            "model": "models/model2.pt",
+                            "formats": ["onnx"],
+                            "quantization": "int8",
+                            "calibration": {"videos": ["videos/camera1"]},
+                        },
+                        {"model": "models/model3.pt", "formats": ["engine"]},
+                    ]
+                }
+            )
+        )
+
+        specs = (
+            ConfigParser(ModelExportSpecificationParser())
+            .parse(config_file)
+            .specifications
+        )
+
+        assert [spec.formats for spec in specs] == [
+            [ExportFormat.ONNX],
+            [ExportFormat.ONNX],
+            [ExportFormat.ENGINE],
+        ]
+        assert specs[0].quantization == Quantization.INT8
+        assert specs[0].calibration == CalibrationSpecification(
+            videos=[Path("videos/camera1"), Path("videos/camera2")],
+            frames=50,
+            stride=10,
+        )
+        assert specs[1].calibration == CalibrationSpecification(
+            videos=[Path("videos/camera1")],
+            frames=DEFAULT_CALIBRATION_FRAMES,
+            stride=DEFAULT_CALIBRATION_STRIDE,
+        )
+        assert specs[2].quantization is None
+        assert specs[2].calibration is None
+
+
+class TestLetterbox:
+    def test_pad_wide_image_at_top_and_bottom(self) -> None:
+        image = np.full((50, 100, 3), 255, dtype=np.uint8)
+
+        actual = letterbox(image, imagesize=64)
+
+        assert actual.shape == (1, 3, 64, 64)
+        assert actual.dtype == np.float32
+        padding = np.float32(LETTERBOX_PADDING_VALUE) / 255
+        assert np.all(actual[:, :, :16] == padding)
+        assert np.all(actual[:, :, 16:48] == 1)
+        assert np.all(actual[:, :, 48:] == padding)
+
+    def test_reverse_channels_like_predict(self) -> None:
+        image = np.zeros((32, 32, 3), dtype=np.uint8)
+        image[..., 0] = 255
+
+        actual = letterbox(image, imagesize=32)
+
+        assert np.all(actual[0, 2] == 1)
+        assert np.all(actual[0, :2] == 0)
+
+    @pytest.mark.parametrize("shape", [(24, 40, 3), (45, 30, 3)])
+    def test_match_preprocessing_of_predict(self, shape: tuple[int, int, int]) -> None:
+        imagesize = 32
+        image = np.random.default_rng(0).integers(0, 255, shape, dtype=np.uint8)
+        predictor = DetectionPredictor(overrides={"imgsz": imagesize})
+        predictor.imgsz = (imagesize, imagesize)
+        predictor.device = torch.device("cpu")
+        predictor.model = SimpleNamespace(
+            pt=False, dynamic=False, imx=False, stride=32, fp16=False
+        )
+
+        expected = predictor.preprocess([image]).numpy()
+        actual = letterbox(image, imagesize)
+
+        assert actual.shape == expected.shape
+        assert np.allclose(actual, expected)
+
+
+class TestFrameCalibrationDataReader:
+    def test_read_inputs_until_exhausted_and_rewind(self) -> None:
+        inputs = [np.zeros((1, 3, 8, 8)), np.ones((1, 3, 8, 8))]
+        target = FrameCalibrationDataReader("images", inputs)
+
+        first = target.get_next()
+        second = target.get_next()
+        exhausted = target.get_next()
+        target.rewind()
+        rewound = target.get_next()
+
+        assert first is not None and first["images"] is inputs[0]
+        assert second is not None and second["images"] is inputs[1]
+        assert exhausted is None
+        assert rewound is not None and rewound["images"] is inputs[0]
+
+
+class TestPostExportAction:
+    def test_move_exported_models_and_own_report_only(
+        self, tmp_path: Path, temp_folder: Path
+    ) -> None:
+        save_dir = tmp_path / "exported"
+        save_dir.mkdir()
+        spec = ModelExportSpecificationParser().parser(
+            model=tmp_path / "yolov8s.pt",
+            formats=["onnx"],
+            quantization="int8",
+            calibration=CALIBRATION,
+        )
+        for file in ["yolov8s.pt", "yolov8s.onnx", "yolov8s.yaml", "args.yaml"]:
+            (temp_folder / file).write_text(file)
+
+        PostExportAction(save_dir=save_dir).execute(spec)
+
+        assert sorted(file.name for file in save_dir.iterdir()) == [
+            "yolov8s_int8.onnx",
+            "yolov8s_int8.yaml",
+        ]
+        assert (save_dir / "yolov8s_int8.yaml").read_text() == "yolov8s.yaml"
+        assert not temp_folder.exists()
+
+
+class TinyDetector(torch.nn.Module):
+    """Maps an image to YOLO-like raw outputs with 4 box and 1 class channels."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.conv = torch.nn.Conv2d(3, 5, kernel_size=8, stride=8)
+
+    def forward(self, images: torch.Tensor) -> torch.Tensor:
+        return self.conv(images).flatten(start_dim=2)
+
+
+class TestOnnxInt8Quantizer:
+    def test_quantize_and_report(self, tmp_path: Path) -> None:
+        pytest.importorskip("onnxruntime")
+        torch.manual_seed(0)
+        imagesize = 32
+        fp32_model = tmp_path / "tiny.onnx"
+        torch.onnx.export(
+            TinyDetector(),
+            (torch.rand(1, 3, imagesize, imagesize),),
+            str(fp32_model),
+            input_names=["images"],
+            dynamo=False,
+        )
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 255, (24, 40, 3), dtype=np.uint8) for _ in range(4)]
+        report_file = tmp_path / "tiny.yaml"
+
+        OnnxInt8Quantizer().quantize(
+            fp32_model=fp32_model,
+            frames=frames,
+            imagesize=imagesize,
+            calibration=CALIBRATION,
+            report_file=report_file,
+        )
+
+        report = yaml.safe_load(report_file.read_text())
+        assert report["calibration"] == {
+            "videos": ["videos/camera1"],
+            "frames": 4,
+            "stride": DEFAULT_CALIBRATION_STRIDE,
+            "imagesize": imagesize,
+            "method": "MinMax",
+            "activation_type": "QUInt8",
+            "weight_type": "QInt8",
+            "per_channel": True,
+        }
+        comparison = report["comparison"]
+        assert set(comparison["fp32_latency_ms"]) == {"mean", "median", "max"}
+        assert comparison["speedup"] > 0
+        assert 0 <= comparison["recall_against_fp32"] <= 1
+        assert 0 <= comparison["precision_against_fp32"] <= 1
+        assert comparison["mean_absolute_output_error"] >= 0
+        assert report["parameters"]["images"]["scale"] > 0
+        assert sorted(file.name for file in tmp_path.iterdir()) == [
+            "tiny.onnx",
+            "tiny.yaml",
+        ]
@@ -4,8 +4,10 @@ from typing import Any, Optional
 
 from OTVision.dataformat import (
     CLASS,
+    CLASSES,
     CONFIDENCE,
     DATA,
+    DETECTION,
     DETECTIONS,
     EXPECTED_DURATION,
     FILENAME,
@@ -13,6 +15,7 @@ from OTVision.dataformat import (
     INPUT_FILE_PATH,
     INTERPOLATED_DETECTION,
     METADATA,
+    MODEL,
     OCCURRENCE,
     RECORDED_START_DATE,
     VIDEO,
@@ -21,7 +24,7 @@ from OTVision.dataformat import (
     X,
     Y,
 )
-from OTVision.domain.detection import Detection
+from OTVision.domain.detection import ClassId, ClassMapping, Detection
 from OTVision.domain.frame import DetectedFrame
 from OTVision.track.parser.chunk_parser_plugins import JsonChunkParser
 
@@ -29,6 +32,8 @@ DEFAULT_HOSTNAME = "hostname"
 DEFAULT_START_DATE = datetime(year=2022, month=5, day=4, tzinfo=timezone.utc)
 DEFAULT_INPUT_FILE_PATH = Path(f"{DEFAULT_HOSTNAME}_input-file.otdet")
 DEFAULT_LABEL = "car"
+DEFAULT_CLASS_ID = 0
+DEFAULT_CLASSIFICATIONS: ClassMapping = {DEFAULT_CLASS_ID: DEFAULT_LABEL}
 DEFAULT_CONFIDENCE = 1.0
 DEFAULT_X = 512.0
 DEFAULT_Y = 256.0
@@ -54,6 +59,7 @@ class DataBuilder:
     current_key: int
     input_file_path: Path
     start_date: datetime
+    classifications: ClassMapping
 
     def __init__(
         self,
@@ -67,6 +73,15 @@ class DataBuilder:
         self.current_key = 0
         self.input_file_path = input_file_path
         self.start_date = start_date
+        self.classifications = DEFAULT_CLASSIFICATIONS.copy()
+
+    def class_id_of(self, label: str) -> ClassId:
+        for class_id, known_label in self.classifications.items():
+            if known_label == label:
+                return class_id
+        class_id = max(self.classifications, default=-1) + 1
+        self.classifications[class_id] = label
+        return class_id
 
     def append_non_classified_frame(self) -> "DataBuilder":
         frame_number = self.next_key()
@@ -132,7 +147,9 @@ class DataBuilder:
         w: float = DEFAULT_W,
         h: float = DEFAULT_H,
     ) -> Detection:
-        return Detection(label=label, conf=confidence, x=x, y=y, w=w, h=h)
+        return Detection(
+            class_id=self.class_id_of(label), conf=confidence, x=x, y=y, w=w, h=h
+        )
 
     def append_classified_frame(
         self,
@@ -215,7 +232,9 @@ class DataBuilder:
         return self.objects.copy()
 
     def build_as_detections(self) -> list[DetectedFrame]:
-        return JsonChunkParser().convert(DEFAULT_INPUT_FILE_PATH, 0, self.data.copy())
+        return JsonChunkParser().convert(
+            DEFAULT_INPUT_FILE_PATH, 0, self.data.copy(), self.classifications.copy()
+        )
 
     def build_ot_det(self) -> dict:
         return {
@@ -224,7 +243,8 @@ class DataBuilder:
                     FILENAME: self.input_file_path.as_posix(),
                     RECORDED_START_DATE: self.start_date.timestamp(),
                     EXPECTED_DURATION: 1,
-                }
+                },
+                DETECTION: {MODEL: {CLASSES: self.classifications.copy()}},
             },
             DATA: self.build(),
         }
@@ -232,7 +252,7 @@ class DataBuilder:
 
 def create_default_detection() -> Detection:
     return Detection(
-        label=DEFAULT_LABEL,
+        class_id=DEFAULT_CLASS_ID,
         conf=DEFAULT_CONFIDENCE,
         x=DEFAULT_X,
         y=DEFAULT_Y,
@@ -24,6 +24,25 @@ class TestDetectionParser:
         expected = data_builder.build_objects()[1].detections
         assert expected == result
 
+    def test_convert_assigns_codes_to_unknown_labels(self) -> None:
+        dict_input = (
+            DataBuilder()
+            .append_classified_frame(label="bicycle")
+            .append_classified_frame(label="car")
+            .append_classified_frame(label="bicycle")
+        ).build()
+        given_classifications = {0: "person", 1: "car"}
+
+        parser = DetectionParser(given_classifications)
+        result = [
+            detection.class_id
+            for frame in dict_input.values()
+            for detection in parser.convert(frame[DETECTIONS])
+        ]
+
+        assert result == [2, 1, 2]
+        assert given_classifications == {0: "person", 1: "car", 2: "bicycle"}
+
 
 class TestJsonChunkParser:
 
@@ -0,0 +1,397 @@
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import cast
+from unittest.mock import Mock
+
+import pytest
+
+from OTVision.application.config import Config
+from OTVision.application.io_executor import IoExecutor
+from OTVision.application.track.ottrk import OttrkBuilderConfig, OttrkBuilderState
+from OTVision.application.track.tracking_run_id import CurrentTrackingRunId
+from OTVision.detect.otdet import OtdetBuilderConfig
+from OTVision.domain.detection import Detection
+from OTVision.domain.frame import DetectedFrame, TrackedFrame
+from OTVision.track.checkpoint import (
+    CHECKPOINT_VERSION,
+    VERSION,
+    CheckpointedStream,
+    StreamTrackingState,
+    TrackingCheckpoint,
+    TrackingCheckpointer,
+)
+from OTVision.track.id_generator import track_id_generator
+from OTVision.track.stream_ottrk_file_writer import (
+    OttrkWriterState,
+    PendingTracks,
+    StreamOttrkFileWriter,
+    UnwrittenFrames,
+)
+from OTVision.track.stream_tracker import StreamTracker
+from OTVision.track.tracker.tracker_plugin_iou import (
+    BoundingBox,
+    Coordinate,
+    IouTracker,
+    IouTrackState,
+)
+
+STREAM = "OTCamera1"
+TRACKING_RUN_ID = "run-1"
+START = datetime(2024, 1, 1, 12, 0, 0)
+FRAME_DURATION = timedelta(seconds=1 / Config().convert.output_fps)
+
+
+def create_detection(x: float) -> Detection:
+    return Detection(class_id=2, conf=0.9, x=x, y=100, w=50, h=50)
+
+
+def create_frame(no: int, detections: list[Detection]) -> DetectedFrame:
+    return DetectedFrame(
+        no=no,
+        occurrence=START + no * FRAME_DURATION,
+        source=STREAM,
+        output=STREAM,
+        detections=detections,
+    )
+
+
+async def track(
+    stream_tracker: StreamTracker, frames: list[DetectedFrame]
+) -> list[TrackedFrame]:
+    async def produce():  # type: ignore
+        for frame in frames:
+            yield frame
+
+    return [frame async for frame in stream_tracker.filter(produce())]
+
+
+def create_stream() -> CheckpointedStream:
+    get_current_config = Mock()
+    get_current_config.get.return_value = Config()
+    tracker = IouTracker(get_current_config=get_current_config)
+    ottrk_file_writer = Mock(spec=StreamOttrkFileWriter)
+    ottrk_file_writer.snapshot.return_value = None
+    ottrk_file_writer.pending_tracks.return_value = None
+    ottrk_file_writer.unwritten_frames.return_value = None
+    return CheckpointedStream(
+        tracker=tracker,
+        stream_tracker=StreamTracker(tracker, track_id_generator),
+        ottrk_file_writer=ottrk_file_writer,
+    )
+
+
+def create_checkpointer(
+    file: Path,
+    stream: CheckpointedStream,
+    current_tracking_run_id: CurrentTrackingRunId,
+    now: datetime,
+) -> TrackingCheckpointer:
+    get_current_config = Mock()
+    get_current_config.get.return_value = Config()
+    datetime_provider = Mock()
+    datetime_provider.provide.return_value = now
+    checkpointer = TrackingCheckpointer(
+        file=file,
+        interval_seconds=1,
+        get_current_config=get_current_config,
+        current_tracking_run_id=current_tracking_run_id,
+        datetime_provider=datetime_provider,
+        io_executor=IoExecutor(),
+    )
+    checkpointer.add_stream(STREAM, stream)
+    return checkpointer
+
+
+async def save_open_track(file: Path) -> datetime:
+    stream = create_stream()
+    current_tracking_run_id = CurrentTrackingRunId()
+    current_tracking_run_id.update(TRACKING_RUN_ID)
+    checkpointer = create_checkpointer(file, stream, current_tracking_run_id, START)
+    frames = [create_frame(no, [create_detection(100 + no)]) for no in range(1, 8)]
+    tracked_frames = await track(stream.stream_tracker, frames)
+    await checkpointer.on_tracked(STREAM, tracked_frames[-1])
+    return tracked_frames[-1].occurrence
+
+
+class TestTrackingCheckpointer:
+    @pytest.mark.asyncio
+    async def test_continue_tracks_after_short_interruption(
+        self, tmp_path: Path
+    ) -> None:
+        file = tmp_path / "otvision.checkpoint"
+        last_occurrence = await save_open_track(file)
+        stream = create_stream()
+        current_tracking_run_id = CurrentTrackingRunId()
+        checkpointer = create_checkpointer(
+            file, stream, current_tracking_run_id, last_occurrence + 10 * FRAME_DURATION
+        )
+
+        restored = checkpointer.restore()
+        tracked_frames = await track(
+            stream.stream_tracker,
+            [create_frame(1, [create_detection(108), create_detection(500)])],
+        )
+
+        assert restored is True
+        assert current_tracking_run_id.get() == TRACKING_RUN_ID
+        assert {
+            (detection.track_id, detection.is_first)
+            for detection in tracked_frames[0].detections
+        } == {(1, False), (2, True)}
+
+    @pytest.mark.asyncio
+    async def test_end_tracks_after_long_interruption(self, tmp_path: Path) -> None:
+        file = tmp_path / "otvision.checkpoint"
+        last_occurrence = await save_open_track(file)
+        stream = create_stream()
+        checkpointer = create_checkpointer(
+            file, stream, CurrentTrackingRunId(), last_occurrence + timedelta(hours=1)
+        )
+
+        restored = checkpointer.restore()
+        await checkpointer.end_restored_tracks(STREAM)
+        tracked_frames = await track(
+            stream.stream_tracker, [create_frame(1, [create_detection(108)])]
+        )
+
+        assert restored is False
+        assert stream.tracker.active_tracks[0].id == 2
+        assert tracked_frames[0].detections[0].is_first
+        stream.ottrk_file_writer.end_tracks.assert_awaited_once_with(  # type: ignore
+            {1}, set()
+        )
+
+    def test_ignore_unreadable_checkpoint(self, tmp_path: Path) -> None:
+        file = tmp_path / "otvision.checkpoint"
+        file.write_bytes(b"no checkpoint")
+        checkpointer = create_checkpointer(
+            file, create_stream(), CurrentTrackingRunId(), START
+        )
+
+        assert checkpointer.restore() is False
+
+    def test_restore_without_checkpoint(self, tmp_path: Path) -> None:
+        checkpointer = create_checkpointer(
+            tmp_path / "otvision.checkpoint",
+            create_stream(),
+            CurrentTrackingRunId(),
+            START,
+        )
+
+        assert checkpointer.restore() is False
+
+    @pytest.mark.asyncio
+    async def test_save_versioned_json_on_io_executor(self, tmp_path: Path) -> None:
+        file = tmp_path / "otvision.checkpoint"
+        stream = create_stream()
+        current_tracking_run_id = CurrentTrackingRunId()
+        current_tracking_run_id.update(TRACKING_RUN_ID)
+        io_executor = Mock(wraps=IoExecutor())
+        checkpointer = TrackingCheckpointer(
+            file=file,
+            interval_seconds=1,
+            get_current_config=Mock(),
+            current_tracking_run_id=current_tracking_run_id,
+            datetime_provider=Mock(),
+            io_executor=io_executor,
+        )
+        checkpointer.add_stream(STREAM, stream)
+        tracked_frames = await track(
+            stream.stream_tracker, [create_frame(1, [create_detection(100)])]
+        )
+
+        await checkpointer.on_tracked(STREAM, tracked_frames[0])
+
+        io_executor.run.assert_called_once()
+        data = json.loads(file.read_text())
+        assert data[VERSION] == CHECKPOINT_VERSION
+        assert TrackingCheckpoint.from_dict(data).streams[STREAM].active_tracks == (
+            stream.tracker.snapshot()
+        )
+
+    @pytest.mark.asyncio
+    async def test_report_frames_lost_since_last_flush(
+        self, tmp_path: Path, caplog: pytest.LogCaptureFixture
+    ) -> None:
+        file = tmp_path / "otvision.checkpoint"
+        stream = create_stream()
+        unwritten = UnwrittenFrames(count=3, since=START + FRAME_DURATION)
+        stream.ottrk_file_writer.unwritten_frames.return_value = (  # type: ignore
+            unwritten
+        )
+        current_tracking_run_id = CurrentTrackingRunId()
+        current_tracking_run_id.update(TRACKING_RUN_ID)
+        checkpointer = create_checkpointer(file, stream, current_tracking_run_id, START)
+        tracked_frames = await track(
+            stream.stream_tracker,
+            [create_frame(no, [create_detection(100)]) for no in range(1, 4)],
+        )
+        await checkpointer.on_tracked(STREAM, tracked_frames[-1])
+        restarted = create_checkpointer(
+            file, create_stream(), CurrentTrackingRunId(), START + FRAME_DURATION * 4
+        )
+
+        restarted.restore()
+
+        assert (
+            f"Lost 3 frames of stream '{STREAM}' tracked from {unwritten.since} "
+            f"until {tracked_frames[-1].occurrence}" in caplog.text
+        )
+
+    @pytest.mark.asyncio
+    async def test_save_pending_ottrk_only_if_it_changed(self, tmp_path: Path) -> None:
+        file = tmp_path / "otvision.checkpoint"
+        pending_file = tmp_path / f"otvision.checkpoint.{STREAM}.pending"
+        stream = create_stream()
+        writer = cast(Mock, stream.ottrk_file_writer)
+        writer.snapshot.return_value = create_pending_ottrk()
+        writer.pending_tracks.return_value = create_pending_tracks()
+        current_tracking_run_id = CurrentTrackingRunId()
+        current_tracking_run_id.update(TRACKING_RUN_ID)
+        checkpointer = create_checkpointer(file, stream, current_tracking_run_id, START)
+        tracked_frames = await track(
+            stream.stream_tracker, [create_frame(1, [create_detection(100)])]
+        )
+
+        await checkpointer.on_tracked(STREAM, tracked_frames[0])
+        writer.pending_tracks.return_value = create_pending_tracks(finished_tracks={1})
+        await checkpointer.save()
+
+        writer.snapshot.assert_called_once()
+        assert json.loads(pending_file.read_text())[VERSION] == CHECKPOINT_VERSION
+        assert TrackingCheckpoint.from_dict(json.loads(file.read_text())).streams[
+            STREAM
+        ].pending_tracks == create_pending_tracks(finished_tracks={1})
+
+        writer.pending_tracks.return_value = None
+        await checkpointer.save()
+
+        assert not pending_file.exists()
+
+    @pytest.mark.asyncio
+    async def test_restore_pending_ottrk_with_ended_tracks(
+        self, tmp_path: Path
+    ) -> None:
+        file = tmp_path / "otvision.checkpoint"
+        stream = create_stream()
+        writer = cast(Mock, stream.ottrk_file_writer)
+        writer.snapshot.return_value = create_pending_ottrk()
+        writer.pending_tracks.return_value = create_pending_tracks()
+        current_tracking_run_id = CurrentTrackingRunId()
+        current_tracking_run_id.update(TRACKING_RUN_ID)
+        checkpointer = create_checkpointer(file, stream, current_tracking_run_id, START)
+        tracked_frames = await track(
+            stream.stream_tracker, [create_frame(1, [create_detection(100)])]
+        )
+        await checkpointer.on_tracked(STREAM, tracked_frames[0])
+        writer.pending_tracks.return_value = create_pending_tracks(finished_tracks={1})
+        await checkpointer.save()
+        restarted_stream = create_stream()
+        restarted = create_checkpointer(
+            file, restarted_stream, CurrentTrackingRunId(), START + FRAME_DURATION
+        )
+
+        restarted.restore()
+
+        cast(Mock, restarted_stream.ottrk_file_writer).restore.assert_called_once_with(
+            create_pending_ottrk(), create_pending_tracks(finished_tracks={1})
+        )
+
+    def test_ignore_checkpoint_of_other_version(self, tmp_path: Path) -> None:
+        file = tmp_path / "otvision.checkpoint"
+        file.write_text(json.dumps({VERSION: CHECKPOINT_VERSION + 1}))
+        checkpointer = create_checkpointer(
+            file, create_stream(), CurrentTrackingRunId(), START
+        )
+
+        assert checkpointer.restore() is False
+
+
+class TestTrackingCheckpoint:
+    def test_serialize_and_parse_pending_tracks(self) -> None:
+        checkpoint = TrackingCheckpoint(
+            tracking_run_id=TRACKING_RUN_ID,
+            streams={
+                STREAM: StreamTrackingState(
+                    last_occurrence=START,
+                    last_track_id=2,
+                    active_tracks=[
+                        IouTrackState(
+                            id=2,
+                            bbox=BoundingBox(75, 75, 125, 125),
+                            center=Coordinate(100, 100),
+                            conf=0.9,
+                            class_id=2,
+                            max_class=2,
+                            max_conf=0.9,
+                            first_frame=1,
+                            last_frame=7,
+                            track_age=0,
+                        )
+                    ],
+                    pending_tracks=create_pending_tracks(finished_tracks={1}),
+                    unwritten_frames=UnwrittenFrames(count=3, since=START),
+                )
+            },
+        )
+
+        actual = TrackingCheckpoint.from_dict(
+            json.loads(json.dumps(checkpoint.to_dict()))
+        )
+
+        assert actual == checkpoint
+
+
+def create_pending_tracks(finished_tracks: set[int] | None = None) -> PendingTracks:
+    finished_tracks = finished_tracks or set()
+    return PendingTracks(
+        output_file=Path("OTCamera1.ottrk"),
+        pending_since=START + timedelta(minutes=5),
+        unfinished_tracks={1}.difference(finished_tracks),
+        finished_tracks=finished_tracks,
+        discarded_tracks=set(),
+    )
+
+
+def create_pending_ottrk() -> OttrkWriterState:
+    return OttrkWriterState(
+        builder_state=OttrkBuilderState(
+            config=OttrkBuilderConfig(
+                otdet_builder_config=OtdetBuilderConfig(
+                    conf=0.25,
+                    iou=0.45,
+                    source=STREAM,
+                    video_width=800,
+                    video_height=600,
+                    expected_duration=timedelta(minutes=5),
+                    actual_duration=timedelta(seconds=299.5),
+                    recorded_fps=20.0,
+                    recorded_start_date=START,
+                    actual_fps=19.9,
+                    actual_frames=5970,
+                    detection_img_size=640,
+                    normalized=False,
+                    detection_model="yolov8s",
+                    half_precision=False,
+                    chunksize=1,
+                    classifications={0: "person", 2: "car"},
+                    detect_start=None,
+                    detect_end=None,
+                    load_shedding={"dropped_frames": 3},
+                ),
+                number_of_frames=5970,
+                sigma_l=0.27,
+                sigma_h=0.42,
+                sigma_iou=0.38,
+                t_min=5,
+                t_miss_max=51,
+                tracking_run_id=TRACKING_RUN_ID,
+                frame_group=0,
+            ),
+            tracked_detections={1: [{"class": "car", "frame": 1, "finished": False}]},
+        ),
+        unfinished_tracks={1},
+        output_file=Path("OTCamera1.ottrk"),
+        pending_since=START + timedelta(minutes=5),
+    )
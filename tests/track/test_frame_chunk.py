@@ -4,7 +4,14 @@ from pathlib import Path
 from typing import Any
 from unittest.mock import MagicMock, patch
 
-from OTVision.dataformat import FRAME, INPUT_FILE_PATH, OCCURRENCE
+from OTVision.dataformat import (
+    CLASSES,
+    DETECTION,
+    FRAME,
+    INPUT_FILE_PATH,
+    MODEL,
+    OCCURRENCE,
+)
 from OTVision.domain.detection import FinishedDetection, TrackedDetection
 from OTVision.domain.frame import TrackedFrame
 from OTVision.track.model.filebased.frame_chunk import (
@@ -12,7 +19,11 @@ from OTVision.track.model.filebased.frame_chunk import (
     FrameChunk,
     TrackedChunk,
 )
-from tests.track.helper.data_builder import DEFAULT_START_DATE
+from tests.track.helper.data_builder import (
+    DEFAULT_CLASS_ID,
+    DEFAULT_CLASSIFICATIONS,
+    DEFAULT_START_DATE,
+)
 
 
 class TestFrameChunk:
@@ -59,7 +70,14 @@ class TestTrackedChunk(unittest.TestCase):
 
     def _mock_detection(self, track_id: int) -> TrackedDetection:
         return TrackedDetection(
-            label="car", conf=1.0, x=5, y=5, w=5, h=5, is_first=False, track_id=track_id
+            class_id=DEFAULT_CLASS_ID,
+            conf=1.0,
+            x=5,
+            y=5,
+            w=5,
+            h=5,
+            is_first=False,
+            track_id=track_id,
         )
 
     def _mock_occurrence(self, frame: int) -> datetime:
@@ -209,7 +227,7 @@ class TestFinishedChunk(TestTrackedChunk):
     def _tracked_chunk(self, is_last_chunk: bool) -> TrackedChunk:
         return TrackedChunk(
             file=self.mock_file,
-            metadata={"test": 42},
+            metadata={DETECTION: {MODEL: {CLASSES: DEFAULT_CLASSIFICATIONS}}},
             is_last_chunk=is_last_chunk,
             frames=self.frames,
             frame_group_id=1,
@@ -226,7 +244,7 @@ class TestFinishedChunk(TestTrackedChunk):
 
     def _mock_expected_dict(self, frame: int, det: FinishedDetection) -> dict:
         return {
-            **det.to_dict(),
+            **det.to_dict(DEFAULT_CLASSIFICATIONS),
             FRAME: frame,
             OCCURRENCE: self._mock_occurrence(frame).timestamp(),
             INPUT_FILE_PATH: self.mock_file.as_posix(),
@@ -8,8 +8,13 @@ import pytest
 from OTVision.application.buffer import Buffer
 from OTVision.application.config import Config, TrackConfig
 from OTVision.application.get_current_config import GetCurrentConfig
+from OTVision.application.io_executor import IoExecutor
 from OTVision.application.otvision_save_path_provider import OtvisionSavePathProvider
-from OTVision.application.track.ottrk import OttrkBuilder, OttrkBuilderConfig
+from OTVision.application.track.ottrk import (
+    OttrkBuilder,
+    OttrkBuilderConfig,
+    OttrkBuilderState,
+)
 from OTVision.application.track.tracking_run_id import GetCurrentTrackingRunId
 from OTVision.detect.otdet import OtdetBuilderConfig
 from OTVision.detect.otdet_file_writer import OtdetFileWrittenEvent
@@ -18,7 +23,10 @@ from OTVision.domain.frame import TrackedFrame
 from OTVision.track.stream_ottrk_file_writer import (
     STREAMING_FRAME_GROUP_ID,
     OttrkFileWrittenEvent,
+    OttrkWriterState,
+    PendingTracks,
     StreamOttrkFileWriter,
+    UnwrittenFrames,
 )
 
 # Test data constants
@@ -28,6 +36,7 @@ TEST_OUTPUT_PATH = Path("/test/output/tracks.ottrk")
 RECORDED_START_DATE = datetime(2023, 1, 1, 12, 0, 0)
 ACTUAL_DURATION = timedelta(seconds=295)
 EXPECTED_DURATION = timedelta(seconds=300)
+MAX_EMISSION_DELAY_SECONDS = 60.0
 TRACK_ID_1 = TrackId(1)
 TRACK_ID_2 = TrackId(2)
 TRACK_ID_3 = TrackId(3)
@@ -162,7 +171,7 @@ class TestStreamOttrkFileWriter:
         given.builder.discard_tracks.assert_called_once_with(
             tracked_frame.discarded_tracks
         )
-        given.builder.build.assert_not_called()
+        given.builder.build_detached.assert_not_called()
         assert target._ottrk_unfinished_tracks == {TRACK_ID_4}
         mock_write_json.assert_not_called()
 
@@ -185,6 +194,7 @@ class TestStreamOttrkFileWriter:
 
         # When: Buffering a tracked frame
         await target.buffer(tracked_frame)
+        await target.wait_for_pending_writes()
 
         # Then: It should process finished and discarded tracks
         given.builder.finish_tracks.assert_called_once_with(
@@ -193,7 +203,7 @@ class TestStreamOttrkFileWriter:
         given.builder.discard_tracks.assert_called_once_with(
             tracked_frame.discarded_tracks
         )
-        given.builder.build.assert_called_once()
+        given.builder.build_detached.assert_called_once()
         assert len(target._ottrk_unfinished_tracks) == 0
         mock_write_json.assert_called_once_with(
             dict_to_write=given.built_ottrk,
@@ -217,7 +227,7 @@ class TestStreamOttrkFileWriter:
         given.save_path_provider.provide.assert_not_called()
         given.builder.set_config.assert_not_called()
         given.builder.add_tracked_frames.assert_not_called()
-        given.builder.build.assert_not_called()
+        given.builder.build_detached.assert_not_called()
         assert target._in_writing_state is False
 
     @pytest.mark.asyncio
@@ -310,7 +320,8 @@ class TestStreamOttrkFileWriter:
         ottrk_data = {"test": "data"}
 
         # When: Calling write
-        await target.write(ottrk_data)
+        await target.write(lambda: ottrk_data)
+        await target.wait_for_pending_writes()
 
         # Then: It should call write_json with correct parameters
         mock_write_json.assert_called_once_with(
@@ -323,6 +334,203 @@ class TestStreamOttrkFileWriter:
             OttrkFileWrittenEvent(save_location=TEST_OUTPUT_PATH)
         )
 
+    @patch("OTVision.track.stream_ottrk_file_writer.write_json")
+    @pytest.mark.asyncio
+    async def test_raise_write_error_when_waiting_for_pending_writes(
+        self, mock_write_json: Mock
+    ) -> None:
+        given = create_given()
+        target = create_target(given)
+        target._current_output_file = TEST_OUTPUT_PATH
+        mock_write_json.side_effect = OSError("disk full")
+
+        await target.write(lambda: {"test": "data"})
+
+        with pytest.raises(OSError, match="disk full"):
+            await target.wait_for_pending_writes()
+        given.subject.notify.assert_not_called()
+        await target.wait_for_pending_writes()
+
+    def test_snapshot_is_none_when_not_waiting_for_tracks(self) -> None:
+        given = create_given()
+        target = create_target(given)
+
+        assert target.snapshot() is None
+
+    @pytest.mark.asyncio
+    async def test_unwritten_frames_are_buffered_since_last_flush(self) -> None:
+        given = create_given()
+        target = create_target(given)
+        assert target.unwritten_frames() is None
+
+        await target.buffer(create_tracked_frame())
+        await target.buffer(
+            create_tracked_frame(occurrence=RECORDED_START_DATE + timedelta(seconds=1))
+        )
+
+        assert target.unwritten_frames() == UnwrittenFrames(
+            count=2, since=RECORDED_START_DATE
+        )
+
+    @pytest.mark.asyncio
+    async def test_snapshot_and_restore_pending_ottrk(self) -> None:
+        # Given: A writer waiting for an unfinished track
+        given = create_given()
+        builder_state = Mock(spec=OttrkBuilderState)
+        given.builder.snapshot.return_value = builder_state
+        target = create_target(given)
+        await target.buffer(create_tracked_frame(unfinished_tracks={TRACK_ID_1}))
+        await target.on_flush(create_otdet_file_written_event())
+
+        # When: Restoring its snapshot into a new writer
+        state = target.snapshot()
+        restored_given = create_given()
+        restored = create_target(restored_given)
+        assert state is not None
+        restored.restore(state)
+
+        # Then: The new writer waits for the same track of the same file
+        assert state == OttrkWriterState(
+            builder_state=builder_state,
+            unfinished_tracks={TRACK_ID_1},
+            output_file=TEST_OUTPUT_PATH,
+            pending_since=RECORDED_START_DATE,
+        )
+        restored_given.builder.restore.assert_called_once_with(builder_state)
+        assert restored._in_writing_state is True
+        assert restored.current_output_file == TEST_OUTPUT_PATH
+        assert restored._ottrk_unfinished_tracks == {TRACK_ID_1}
+
+    @pytest.mark.asyncio
+    async def test_restore_tracks_ended_after_snapshot(self) -> None:
+        # Given: A snapshot of a writer waiting for three unfinished tracks
+        given = create_given()
+        target = create_target(given)
+        await target.buffer(
+            create_tracked_frame(unfinished_tracks={TRACK_ID_1, TRACK_ID_2, TRACK_ID_3})
+        )
+        await target.on_flush(create_otdet_file_written_event())
+        state = target.snapshot()
+        assert state is not None
+
+        # When: Two of them end afterwards and the writer is restored
+        await target.buffer(
+            create_tracked_frame(
+                finished_tracks={TRACK_ID_1, TRACK_ID_4},
+                discarded_tracks={TRACK_ID_2},
+            )
+        )
+        pending_tracks = target.pending_tracks()
+        restored_given = create_given()
+        restored = create_target(restored_given)
+        restored.restore(state, pending_tracks)
+
+        # Then: The ended tracks are ended in the restored file as well
+        assert pending_tracks == PendingTracks(
+            output_file=TEST_OUTPUT_PATH,
+            pending_since=RECORDED_START_DATE,
+            unfinished_tracks={TRACK_ID_3},
+            finished_tracks={TRACK_ID_1},
+            discarded_tracks={TRACK_ID_2},
+        )
+        restored_given.builder.finish_tracks.assert_called_once_with({TRACK_ID_1})
+        restored_given.builder.discard_tracks.assert_called_once_with({TRACK_ID_2})
+        assert restored._ottrk_unfinished_tracks == {TRACK_ID_3}
+        assert restored.pending_tracks() == pending_tracks
+
+    def test_restore_ignores_tracks_of_other_ottrk_file(self) -> None:
+        given = create_given()
+        target = create_target(given)
+        state = OttrkWriterState(
+            builder_state=Mock(spec=OttrkBuilderState),
+            unfinished_tracks={TRACK_ID_1},
+            output_file=TEST_OUTPUT_PATH,
+            pending_since=RECORDED_START_DATE,
+        )
+        pending_tracks = PendingTracks(
+            output_file=Path("/test/output/previous.ottrk"),
+            pending_since=RECORDED_START_DATE - timedelta(minutes=5),
+            unfinished_tracks=set(),
+            finished_tracks={TRACK_ID_1},
+            discarded_tracks=set(),
+        )
+
+        target.restore(state, pending_tracks)
+
+        given.builder.finish_tracks.assert_not_called()
+        assert target._ottrk_unfinished_tracks == {TRACK_ID_1}
+
+    @patch("OTVision.track.stream_ottrk_file_writer.write_json")
+    @pytest.mark.asyncio
+    async def test_end_tracks_builds_when_no_track_is_pending(
+        self, mock_write_json: Mock
+    ) -> None:
+        given = create_given()
+        target = create_target(given)
+        target._in_writing_state = True
+        target._current_output_file = TEST_OUTPUT_PATH
+        target._ottrk_unfinished_tracks.update({TRACK_ID_1, TRACK_ID_2})
+
+        await target.end_tracks({TRACK_ID_1}, {TRACK_ID_2})
+        await target.wait_for_pending_writes()
+
+        given.builder.finish_tracks.assert_called_once_with({TRACK_ID_1})
+        given.builder.discard_tracks.assert_called_once_with({TRACK_ID_2})
+        given.builder.build_detached.assert_called_once()
+        mock_write_json.assert_called_once()
+
+    @patch("OTVision.track.stream_ottrk_file_writer.write_json")
+    @pytest.mark.asyncio
+    async def test_buffer_writes_with_open_tracks_after_max_emission_delay(
+        self, mock_write_json: Mock
+    ) -> None:
+        # Given: An ottrk file waiting for a track that stays open
+        given = create_given()
+        target = create_target(given)
+        await target.buffer(create_tracked_frame(unfinished_tracks={TRACK_ID_1}))
+        await target.on_flush(create_otdet_file_written_event())
+        delay = timedelta(seconds=MAX_EMISSION_DELAY_SECONDS)
+
+        # When: The track is missed, but not ended, until the maximum delay
+        await target.buffer(
+            create_tracked_frame(occurrence=RECORDED_START_DATE + delay / 2)
+        )
+        given.builder.build_detached.assert_not_called()
+        await target.buffer(
+            create_tracked_frame(occurrence=RECORDED_START_DATE + delay)
+        )
+        await target.wait_for_pending_writes()
+
+        # Then: The file is written with the open track and the next one is buffered
+        given.builder.build_detached.assert_called_once()
+        given.builder.finish_tracks.assert_called_with(set())
+        mock_write_json.assert_called_once()
+        assert target._in_writing_state is False
+        assert len(target._get_buffered_elements()) == 2
+
+    @patch("OTVision.track.stream_ottrk_file_writer.write_json")
+    @pytest.mark.asyncio
+    async def test_on_flush_writes_pending_ottrk_before_next_segment(
+        self, mock_write_json: Mock
+    ) -> None:
+        # Given: An ottrk file waiting for a track without maximum delay
+        given = create_given()
+        given.config.track.max_emission_delay_seconds = None
+        target = create_target(given)
+        await target.buffer(create_tracked_frame(unfinished_tracks={TRACK_ID_1}))
+        await target.on_flush(create_otdet_file_written_event())
+        await target.buffer(create_tracked_frame(unfinished_tracks={TRACK_ID_2}))
+
+        # When: The next segment is flushed
+        await target.on_flush(create_otdet_file_written_event())
+        await target.wait_for_pending_writes()
+
+        # Then: The pending file is written before waiting for the next one
+        given.builder.build_detached.assert_called_once()
+        mock_write_json.assert_called_once()
+        assert target._in_writing_state is True
+        assert target._ottrk_unfinished_tracks == {TRACK_ID_2}
+
 
 @dataclass
 class Given:
@@ -342,7 +550,7 @@ def create_given() -> Given:
     # Mock dependencies
     built_ottrk = Mock()
     builder = Mock(spec=OttrkBuilder)
-    builder.build.return_value = built_ottrk
+    builder.build_detached.return_value = lambda: built_ottrk
 
     get_current_config = Mock(spec=GetCurrentConfig)
     get_current_tracking_run_id = Mock(spec=GetCurrentTrackingRunId)
@@ -356,6 +564,7 @@ def create_given() -> Given:
     track_config.sigma_iou = 0.5
     track_config.t_min = 5
     track_config.t_miss_max = 10
+    track_config.max_emission_delay_seconds = MAX_EMISSION_DELAY_SECONDS
     config.track = track_config
     config.filetypes.track = "ottrk"
 
@@ -382,6 +591,7 @@ def create_target(given: Given) -> StreamOttrkFileWriter:
         get_current_config=given.get_current_config,
         get_current_tracking_run_id=given.get_current_tracking_run_id,
         save_path_provider=given.save_path_provider,
+        io_executor=IoExecutor(),
         subject=given.subject,
     )
 
@@ -390,9 +600,11 @@ def create_tracked_frame(
     finished_tracks: set[TrackId] | None = None,
     discarded_tracks: set[TrackId] | None = None,
     unfinished_tracks: set[TrackId] | None = None,
+    occurrence: datetime = RECORDED_START_DATE,
 ) -> Mock:
     """Create a mock TrackedFrame for testing."""
     frame = Mock(spec=TrackedFrame)
+    frame.occurrence = occurrence
     frame.finished_tracks = finished_tracks or set()
     frame.discarded_tracks = discarded_tracks or set()
     frame.unfinished_tracks = unfinished_tracks or set()
@@ -141,12 +141,15 @@ async def test_track_pass(
         t_miss_max=t_miss_max,
         overwrite=True,
     )
-    await otvision_track.start()
+    actual_tracks_files = await otvision_track.start()
 
     # Get reference tracks file names
     extension = CONFIG["DEFAULT_FILETYPE"]["TRACK"]
     ref_tracks_files = (test_track_dir / test_case).glob(f"*{extension}")
     tracks_file_names = [file.name for file in ref_tracks_files]
+    assert sorted(file.name for file in actual_tracks_files) == sorted(
+        tracks_file_names
+    )
 
     # Compare all test tracks files to their respective reference tracks files
     equal_files = []
@@ -281,8 +284,9 @@ async def test_track_emptyDirAsParam(test_track_tmp_dir: Path) -> None:
     empty_dir.mkdir()
 
     otvision_track = create_otvision_track(paths=[empty_dir])
-    await otvision_track.start()
+    actual_tracks_files = await otvision_track.start()
 
+    assert actual_tracks_files == []
     assert os.listdir(empty_dir) == []
 
 
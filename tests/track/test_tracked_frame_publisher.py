@@ -0,0 +1,132 @@
+import json
+from datetime import datetime, timezone
+from typing import AsyncIterator
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from OTVision.domain.detection import TrackedDetection, TrackId
+from OTVision.domain.frame import TrackedFrame
+from OTVision.domain.message_sink import MessageSink
+from OTVision.track.tracked_frame_publisher import (
+    TrackedFramePublisher,
+    TrackedFrameSerializer,
+)
+from tests.utils.asynchronous.iterator import get_elements_of
+
+STREAM = "OTCamera1"
+OCCURRENCE = datetime(2020, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+CLASSIFICATIONS = {0: "person", 2: "car"}
+
+
+def create_frame(no: int) -> TrackedFrame:
+    return TrackedFrame(
+        no=no,
+        occurrence=OCCURRENCE,
+        source="rtsp://127.0.0.1:8554/test",
+        output="output/OTCamera1.mp4",
+        detections=[
+            TrackedDetection(
+                class_id=2,
+                conf=0.5,
+                x=1.0,
+                y=2.0,
+                w=3.0,
+                h=4.0,
+                is_first=True,
+                track_id=TrackId(7),
+            )
+        ],
+        image=None,
+        finished_tracks={TrackId(5), TrackId(3)},
+        discarded_tracks=set(),
+    )
+
+
+async def frames_of(frames: list[TrackedFrame]) -> AsyncIterator[TrackedFrame]:
+    for frame in frames:
+        yield frame
+
+
+def create_serializer() -> TrackedFrameSerializer:
+    return TrackedFrameSerializer(lambda: CLASSIFICATIONS)
+
+
+class TestTrackedFrameSerializer:
+    def test_serialize(self) -> None:
+        result = create_serializer().serialize(STREAM, create_frame(3))
+
+        assert result.endswith(b"\n")
+        assert json.loads(result) == {
+            "stream": STREAM,
+            "frame": 3,
+            "occurrence": OCCURRENCE.timestamp(),
+            "detections": [
+                {
+                    "track_id": 7,
+                    "class": "car",
+                    "conf": 0.5,
+                    "x": 1.0,
+                    "y": 2.0,
+                    "w": 3.0,
+                    "h": 4.0,
+                    "is_first": True,
+                }
+            ],
+            "finished_tracks": [3, 5],
+            "discarded_tracks": [],
+        }
+
+
+class TestTrackedFramePublisher:
+    @pytest.mark.asyncio
+    async def test_publish_in_batches_of_given_size(self) -> None:
+        sink = create_sink()
+        frames = [create_frame(no) for no in range(5)]
+        target = TrackedFramePublisher(
+            STREAM, create_serializer(), sink, batch_size=2, clock=lambda: 0.0
+        )
+
+        result = await get_elements_of(target.filter(frames_of(frames)))
+
+        assert result == frames
+        assert [count_lines(call.args[0]) for call in sink.publish.call_args_list] == [
+            2,
+            2,
+            1,
+        ]
+        sink.open.assert_awaited_once()
+        sink.close.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_publish_batch_after_max_delay(self) -> None:
+        sink = create_sink()
+        times = iter([0.0, 0.05, 0.2, 0.25])
+        target = TrackedFramePublisher(
+            STREAM,
+            create_serializer(),
+            sink,
+            batch_size=10,
+            max_batch_delay_seconds=0.1,
+            clock=lambda: next(times),
+        )
+
+        await get_elements_of(
+            target.filter(frames_of([create_frame(no) for no in range(4)]))
+        )
+
+        assert [count_lines(call.args[0]) for call in sink.publish.call_args_list] == [
+            3,
+            1,
+        ]
+
+
+def create_sink() -> Mock:
+    sink = Mock(spec=MessageSink)
+    sink.open = AsyncMock()
+    sink.close = AsyncMock()
+    return sink
+
+
+def count_lines(message: bytes) -> int:
+    return len(message.splitlines())
@@ -22,7 +22,12 @@ from OTVision.domain.detection import (
     TrackId,
 )
 from OTVision.domain.frame import DetectedFrame, TrackedFrame
-from tests.track.helper.data_builder import DEFAULT_START_DATE, DataBuilder
+from tests.track.helper.data_builder import (
+    DEFAULT_CLASS_ID,
+    DEFAULT_CLASSIFICATIONS,
+    DEFAULT_START_DATE,
+    DataBuilder,
+)
 
 
 class TestDetection:
@@ -45,7 +50,7 @@ class TestDetection:
 
             tracked_det = det.of_track(id, is_first)
 
-            assert det.label == tracked_det.label
+            assert det.class_id == tracked_det.class_id
             assert det.conf == tracked_det.conf
             assert det.x == tracked_det.x
             assert det.y == tracked_det.y
@@ -75,7 +80,7 @@ class TestTrackedDetection(TestDetection):
         det: TrackedDetection,
         finished_det: FinishedDetection,
     ) -> None:
-        assert det.label == finished_det.label
+        assert det.class_id == finished_det.class_id
         assert det.conf == finished_det.conf
         assert det.x == finished_det.x
         assert det.y == finished_det.y
@@ -137,9 +142,9 @@ class TestFinishedDetection(TestTrackedDetection):
         dets = self.finished_detections()
 
         for det in dets:
-            dict = det.to_dict()
+            dict = det.to_dict(DEFAULT_CLASSIFICATIONS)
 
-            assert dict[CLASS] == det.label
+            assert dict[CLASS] == DEFAULT_CLASSIFICATIONS[det.class_id]
             assert dict[CONFIDENCE] == det.conf
             assert dict[X] == det.x
             assert dict[Y] == det.y
@@ -261,7 +266,14 @@ class TestFinishedFrame(unittest.TestCase):
 
     def _mock_detection(self, track_id: int) -> TrackedDetection:
         return TrackedDetection(
-            label="car", conf=1.0, x=5, y=5, w=5, h=5, is_first=False, track_id=track_id
+            class_id=DEFAULT_CLASS_ID,
+            conf=1.0,
+            x=5,
+            y=5,
+            w=5,
+            h=5,
+            is_first=False,
+            track_id=track_id,
         )
 
     def _mock_occurrence(self, frame: int) -> datetime:
@@ -321,7 +333,7 @@ class TestFinishedFrame(unittest.TestCase):
 
     def _mock_expected_dict(self, frame: int, det: FinishedDetection) -> dict:
         return {
-            **det.to_dict(),
+            **det.to_dict(DEFAULT_CLASSIFICATIONS),
             FRAME: frame,
             OCCURRENCE: self._mock_occurrence(frame).timestamp(),
             # INPUT_FILE_PATH: self.mock_file,
@@ -364,11 +376,11 @@ class TestFinishedFrame(unittest.TestCase):
         ]
 
     def test_to_detection_dicts(self) -> None:
-        result1 = self.finished_frames[0].to_detection_dicts()
+        result1 = self.finished_frames[0].to_detection_dicts(DEFAULT_CLASSIFICATIONS)
         assert self.expected_dicts_1() == result1
 
-        result2 = self.finished_frames[1].to_detection_dicts()
+        result2 = self.finished_frames[1].to_detection_dicts(DEFAULT_CLASSIFICATIONS)
         assert self.expected_dicts_2() == result2
 
-        result3 = self.finished_frames[2].to_detection_dicts()
+        result3 = self.finished_frames[2].to_detection_dicts(DEFAULT_CLASSIFICATIONS)
         assert self.expected_dicts_3() == result3